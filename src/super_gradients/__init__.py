@@ -1,11 +1,36 @@
 __version__ = "3.3.1"
 
+from typing import TYPE_CHECKING
+
 from super_gradients.common import init_trainer, is_distributed, object_names
-from super_gradients.training import losses, utils, datasets_utils, DataAugmentation, Trainer, KDTrainer, QATTrainer
-from super_gradients.common.registry.registry import ARCHITECTURES
-from super_gradients.sanity_check import env_sanity_check
-from super_gradients.training.utils.distributed_training_utils import setup_device
-from super_gradients.training.pre_launch_callbacks import AutoTrainBatchSizeSelectionCallback, QATRecipeModificationCallback
+from super_gradients.common.environment.env_variables import env_variables
+from super_gradients.common.lazy_imports import lazy_module_attributes
+
+# The training objects are only imported on first access, so that `import super_gradients` does not import every trainer, model, loss and dataset.
+__getattr__, __dir__ = lazy_module_attributes(
+    __name__,
+    {
+        "ARCHITECTURES": "super_gradients.common.registry.registry:ARCHITECTURES",
+        "losses": "super_gradients.training.losses",
+        "utils": "super_gradients.training.utils",
+        "datasets_utils": "super_gradients.training.datasets.datasets_utils",
+        "DataAugmentation": "super_gradients.training.datasets.data_augmentation:DataAugmentation",
+        "Trainer": "super_gradients.training.sg_trainer:Trainer",
+        "KDTrainer": "super_gradients.training.kd_trainer:KDTrainer",
+        "QATTrainer": "super_gradients.training.qat_trainer:QATTrainer",
+        "env_sanity_check": "super_gradients.sanity_check:env_sanity_check",
+        "setup_device": "super_gradients.training.utils.distributed_training_utils:setup_device",
+        "QATRecipeModificationCallback": "super_gradients.training.pre_launch_callbacks:QATRecipeModificationCallback",
+        "AutoTrainBatchSizeSelectionCallback": "super_gradients.training.pre_launch_callbacks:AutoTrainBatchSizeSelectionCallback",
+    },
+)
+
+if TYPE_CHECKING:
+    from super_gradients.training import losses, utils, datasets_utils, DataAugmentation, Trainer, KDTrainer, QATTrainer
+    from super_gradients.common.registry.registry import ARCHITECTURES
+    from super_gradients.sanity_check import env_sanity_check
+    from super_gradients.training.utils.distributed_training_utils import setup_device
+    from super_gradients.training.pre_launch_callbacks import AutoTrainBatchSizeSelectionCallback, QATRecipeModificationCallback
 
 __all__ = [
     "ARCHITECTURES",
@@ -25,4 +50,6 @@ __all__ = [
     "AutoTrainBatchSizeSelectionCallback",
 ]
 
-env_sanity_check()
+
+if env_variables.ENV_SANITY_CHECK:
+    __getattr__("env_sanity_check")()
@@ -30,6 +30,10 @@ class EnvironmentVariables:
     def UPLOAD_LOGS(self) -> bool:
         return os.getenv("UPLOAD_LOGS", "TRUE") == "TRUE"
 
+    @property
+    def ENV_SANITY_CHECK(self) -> bool:
+        return os.getenv("ENV_SANITY_CHECK", "FALSE") == "TRUE"
+
     @property
     def FILE_LOG_LEVEL(self) -> str:
         return os.getenv("FILE_LOG_LEVEL", default="DEBUG").upper()
@@ -0,0 +1,42 @@
+import importlib
+import importlib.util
+import sys
+from typing import Callable, Dict, List, Tuple
+
+
+def lazy_module_attributes(module_name: str, lazy_attributes: Dict[str, str]) -> Tuple[Callable[[str], object], Callable[[], List[str]]]:
+    """
+    Create the module-level `__getattr__` and `__dir__` functions (PEP 562) of a package whose attributes are imported on first access.
+    This is used by the packages that re-export many objects (e.g. super_gradients.training), so that importing them, or any of their
+    submodules, does not import all these objects and the modules they depend on.
+
+    >>> __getattr__, __dir__ = lazy_module_attributes(__name__, {"Trainer": "super_gradients.training.sg_trainer:Trainer"})
+
+    :param module_name:     Name of the package (`__name__`).
+    :param lazy_attributes: Maps the attribute name to "module:attribute" for an object, or to "module" for a module.
+                            Attributes that are not listed but are submodules of the package are imported on first access as well.
+    :return:                Tuple of (`__getattr__`, `__dir__`) to be defined in the package.
+    """
+
+    def __getattr__(name: str):
+        if name in lazy_attributes:
+            source_module_name, _, attribute_name = lazy_attributes[name].partition(":")
+        elif not name.startswith("__") and importlib.util.find_spec(f"{module_name}.{name}") is not None:
+            source_module_name, attribute_name = f"{module_name}.{name}", ""
+        else:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+
+        try:
+            value = importlib.import_module(source_module_name)
+        except AttributeError as e:
+            # Otherwise reported by `from module_name import name` as "cannot import name", hiding the actual error
+            raise ImportError(f"Failed to import {source_module_name!r} for the attribute {name!r} of {module_name!r}: {e}") from e
+        if attribute_name:
+            value = getattr(value, attribute_name)
+        setattr(sys.modules[module_name], name, value)  # Next accesses do not go through __getattr__
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[module_name])) | set(lazy_attributes))
+
+    return __getattr__, __dir__
@@ -53,6 +53,7 @@ class Transforms:
     DetectionStandardize = "DetectionStandardize"
     DetectionMosaic = "DetectionMosaic"
     DetectionRandomAffine = "DetectionRandomAffine"
+    DetectionMosaicAffine = "DetectionMosaicAffine"
     DetectionMixup = "DetectionMixup"
     DetectionHSV = "DetectionHSV"
     DetectionRGB2BGR = "DetectionRGB2BGR"
@@ -151,6 +152,7 @@ class Callbacks:
     DEKR_VISUALIZATION = "DEKRVisualizationCallback"
     ROBOFLOW_RESULT_CALLBACK = "RoboflowResultCallback"
     TIMER = "TimerCallback"
+    IMAGE_CACHE_STATS = "ImageCacheStatsCallback"
     SLIDING_WINDOW_VALIDATION = "SlidingWindowValidationCallback"
 
 
@@ -1,5 +1,6 @@
+import importlib
 import inspect
-from typing import Callable, Dict, Optional
+from typing import Callable, Dict, Optional, Sequence
 import warnings
 
 import torch
@@ -10,6 +11,97 @@ from super_gradients.common.object_names import Losses, Transforms, Samplers, Op
 
 _DEPRECATED_KEY = "_deprecated_objects"
 
+# Modules that, once imported, have registered every object of SuperGradients (these are the modules that `import super_gradients` used to import).
+_ALL_REGISTERING_MODULES = (
+    "super_gradients.training.sg_trainer",
+    "super_gradients.training.kd_trainer",
+    "super_gradients.training.qat_trainer",
+    "super_gradients.training.pre_launch_callbacks",
+    "super_gradients.training.losses",
+    "super_gradients.training.utils",
+    "super_gradients.training.datasets",
+)
+
+
+class Registry(dict):
+    """
+    Dict of registered objects (maps name to object), which imports the modules registering these objects on first use.
+
+    Objects are registered when the module defining them is imported, but `import super_gradients` does not import all the modules.
+    Looking up a name that is not registered yet therefore imports the modules registering the objects of this registry, and then every
+    module of SuperGradients if the name is still missing. Listing the registry (keys, values, items, iteration, len) imports the modules
+    registering the objects of this registry, so that all the built-in objects are listed.
+    """
+
+    def __init__(self, *args, modules: Sequence[str] = (), **kwargs):
+        """
+        :param modules: Modules registering the built-in objects of this registry. If empty, all the modules of SuperGradients are imported on first use.
+        """
+        super().__init__(*args, **kwargs)
+        self.modules = tuple(modules)
+        self._imported_modules = False
+        self._imported_all_modules = False
+        self._importing = False
+
+    def _import_modules(self, all_modules: bool) -> None:
+        """Import the modules registering the objects of this registry, or every module of SuperGradients if all_modules is True."""
+        all_modules = all_modules or not self.modules
+        if self._importing or self._imported_all_modules or (self._imported_modules and not all_modules):
+            return
+        self._importing = True
+        try:
+            for module in _ALL_REGISTERING_MODULES if all_modules else self.modules:
+                importlib.import_module(module)
+            self._imported_modules = True
+            self._imported_all_modules = all_modules
+        finally:
+            self._importing = False
+
+    def _import_modules_for(self, key) -> None:
+        """Import the modules that may register `key`, which is not registered yet."""
+        self._import_modules(all_modules=False)
+        # Deprecated names are registered by the same modules as the objects, so they are not worth importing every module.
+        if key != _DEPRECATED_KEY and not dict.__contains__(self, key):
+            self._import_modules(all_modules=True)
+
+    def __missing__(self, key):
+        self._import_modules_for(key)
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        if not dict.__contains__(self, key):
+            self._import_modules_for(key)
+        return dict.__contains__(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def keys(self):
+        self._import_modules(all_modules=False)
+        return dict.keys(self)
+
+    def values(self):
+        self._import_modules(all_modules=False)
+        return dict.values(self)
+
+    def items(self):
+        self._import_modules(all_modules=False)
+        return dict.items(self)
+
+    def __iter__(self):
+        self._import_modules(all_modules=False)
+        return dict.__iter__(self)
+
+    def __len__(self) -> int:
+        self._import_modules(all_modules=False)
+        return dict.__len__(self)
+
+    def __repr__(self) -> str:
+        self._import_modules(all_modules=False)
+        return dict.__repr__(self)
+
 
 def create_register_decorator(registry: Dict[str, Callable]) -> Callable:
     """
@@ -32,14 +124,15 @@ def create_register_decorator(registry: Dict[str, Callable]) -> Callable:
         def decorator(cls: Callable) -> Callable:
             """Register the decorated callable"""
 
+            # The registry is accessed with dict methods, so that registering an object never imports other modules (see Registry).
             def _registered_cls(registration_name: str):
-                if registration_name in registry:
-                    registered_cls = registry[registration_name]
+                if dict.__contains__(registry, registration_name):
+                    registered_cls = dict.__getitem__(registry, registration_name)
                     if registered_cls != cls:
                         raise Exception(
                             f"`{registration_name}` is already registered and points to `{inspect.getmodule(registered_cls).__name__}.{registered_cls.__name__}"
                         )
-                registry[registration_name] = cls
+                dict.__setitem__(registry, registration_name, cls)
 
             registration_name = name or cls.__name__
             _registered_cls(registration_name=registration_name)
@@ -50,9 +143,9 @@ def create_register_decorator(registry: Dict[str, Callable]) -> Callable:
 
                 # But deprecated objects are also listed in the _deprecated_objects key.
                 # This can later be used in the factories to know if a name is deprecated and how it should be named instead.
-                deprecated_registered_objects = registry.get(_DEPRECATED_KEY, {})
+                deprecated_registered_objects = dict.get(registry, _DEPRECATED_KEY, {})
                 deprecated_registered_objects[deprecated_name] = registration_name  # Keep the information about how it should be named.
-                registry[_DEPRECATED_KEY] = deprecated_registered_objects
+                dict.__setitem__(registry, _DEPRECATED_KEY, deprecated_registered_objects)
 
             return cls
 
@@ -66,116 +159,127 @@ def warn_if_deprecated(name: str, registry: dict):
     :param name:        The name of the object that we want to check if it is deprecated.
     :param registry:    The registry that may or may not include deprecated objects.
     """
+    if name not in registry:  # Also imports the module registering `name` if the registry is a Registry
+        return
     deprecated_names = registry.get(_DEPRECATED_KEY, {})
     if name in deprecated_names:
         warnings.simplefilter("once", DeprecationWarning)  # Required, otherwise the warning may never be displayed.
         warnings.warn(f"Object name `{name}` is now deprecated. Please replace it with `{deprecated_names[name]}`.", DeprecationWarning)
 
 
-ARCHITECTURES = {}
+ARCHITECTURES = Registry(modules=["super_gradients.training.models"])
 register_model = create_register_decorator(registry=ARCHITECTURES)
 
-KD_ARCHITECTURES = {}
+KD_ARCHITECTURES = Registry(modules=["super_gradients.training.models"])
 register_kd_model = create_register_decorator(registry=KD_ARCHITECTURES)
 
-ALL_DETECTION_MODULES = {}
+ALL_DETECTION_MODULES = Registry(modules=["super_gradients.training.models"])
 register_detection_module = create_register_decorator(registry=ALL_DETECTION_MODULES)
 
-METRICS = {}
+METRICS = Registry(modules=["super_gradients.training.metrics"])
 register_metric = create_register_decorator(registry=METRICS)
 
-LOSSES = {}
+LOSSES = Registry(modules=["super_gradients.training.losses"])
 register_loss = create_register_decorator(registry=LOSSES)
 register_loss(name=Losses.MSE, deprecated_name="mse")(nn.MSELoss)  # Register manually to benefit from deprecated logic
 
-ALL_DATALOADERS = {}
+ALL_DATALOADERS = Registry(modules=["super_gradients.training.dataloaders"])
 register_dataloader = create_register_decorator(registry=ALL_DATALOADERS)
 
-CALLBACKS = {}
+CALLBACKS = Registry()
 register_callback = create_register_decorator(registry=CALLBACKS)
 
-TRANSFORMS = {
-    Transforms.Compose: torchvision.transforms.Compose,
-    Transforms.ToTensor: torchvision.transforms.ToTensor,
-    Transforms.PILToTensor: torchvision.transforms.PILToTensor,
-    Transforms.ConvertImageDtype: torchvision.transforms.ConvertImageDtype,
-    Transforms.ToPILImage: torchvision.transforms.ToPILImage,
-    Transforms.Normalize: torchvision.transforms.Normalize,
-    Transforms.Resize: torchvision.transforms.Resize,
-    Transforms.CenterCrop: torchvision.transforms.CenterCrop,
-    Transforms.Pad: torchvision.transforms.Pad,
-    Transforms.Lambda: torchvision.transforms.Lambda,
-    Transforms.RandomApply: torchvision.transforms.RandomApply,
-    Transforms.RandomChoice: torchvision.transforms.RandomChoice,
-    Transforms.RandomOrder: torchvision.transforms.RandomOrder,
-    Transforms.RandomCrop: torchvision.transforms.RandomCrop,
-    Transforms.RandomHorizontalFlip: torchvision.transforms.RandomHorizontalFlip,
-    Transforms.RandomVerticalFlip: torchvision.transforms.RandomVerticalFlip,
-    Transforms.RandomResizedCrop: torchvision.transforms.RandomResizedCrop,
-    Transforms.FiveCrop: torchvision.transforms.FiveCrop,
-    Transforms.TenCrop: torchvision.transforms.TenCrop,
-    Transforms.LinearTransformation: torchvision.transforms.LinearTransformation,
-    Transforms.ColorJitter: torchvision.transforms.ColorJitter,
-    Transforms.RandomRotation: torchvision.transforms.RandomRotation,
-    Transforms.RandomAffine: torchvision.transforms.RandomAffine,
-    Transforms.Grayscale: torchvision.transforms.Grayscale,
-    Transforms.RandomGrayscale: torchvision.transforms.RandomGrayscale,
-    Transforms.RandomPerspective: torchvision.transforms.RandomPerspective,
-    Transforms.RandomErasing: torchvision.transforms.RandomErasing,
-    Transforms.GaussianBlur: torchvision.transforms.GaussianBlur,
-    Transforms.InterpolationMode: torchvision.transforms.InterpolationMode,
-    Transforms.RandomInvert: torchvision.transforms.RandomInvert,
-    Transforms.RandomPosterize: torchvision.transforms.RandomPosterize,
-    Transforms.RandomSolarize: torchvision.transforms.RandomSolarize,
-    Transforms.RandomAdjustSharpness: torchvision.transforms.RandomAdjustSharpness,
-    Transforms.RandomAutocontrast: torchvision.transforms.RandomAutocontrast,
-    Transforms.RandomEqualize: torchvision.transforms.RandomEqualize,
-}
+TRANSFORMS = Registry(
+    {
+        Transforms.Compose: torchvision.transforms.Compose,
+        Transforms.ToTensor: torchvision.transforms.ToTensor,
+        Transforms.PILToTensor: torchvision.transforms.PILToTensor,
+        Transforms.ConvertImageDtype: torchvision.transforms.ConvertImageDtype,
+        Transforms.ToPILImage: torchvision.transforms.ToPILImage,
+        Transforms.Normalize: torchvision.transforms.Normalize,
+        Transforms.Resize: torchvision.transforms.Resize,
+        Transforms.CenterCrop: torchvision.transforms.CenterCrop,
+        Transforms.Pad: torchvision.transforms.Pad,
+        Transforms.Lambda: torchvision.transforms.Lambda,
+        Transforms.RandomApply: torchvision.transforms.RandomApply,
+        Transforms.RandomChoice: torchvision.transforms.RandomChoice,
+        Transforms.RandomOrder: torchvision.transforms.RandomOrder,
+        Transforms.RandomCrop: torchvision.transforms.RandomCrop,
+        Transforms.RandomHorizontalFlip: torchvision.transforms.RandomHorizontalFlip,
+        Transforms.RandomVerticalFlip: torchvision.transforms.RandomVerticalFlip,
+        Transforms.RandomResizedCrop: torchvision.transforms.RandomResizedCrop,
+        Transforms.FiveCrop: torchvision.transforms.FiveCrop,
+        Transforms.TenCrop: torchvision.transforms.TenCrop,
+        Transforms.LinearTransformation: torchvision.transforms.LinearTransformation,
+        Transforms.ColorJitter: torchvision.transforms.ColorJitter,
+        Transforms.RandomRotation: torchvision.transforms.RandomRotation,
+        Transforms.RandomAffine: torchvision.transforms.RandomAffine,
+        Transforms.Grayscale: torchvision.transforms.Grayscale,
+        Transforms.RandomGrayscale: torchvision.transforms.RandomGrayscale,
+        Transforms.RandomPerspective: torchvision.transforms.RandomPerspective,
+        Transforms.RandomErasing: torchvision.transforms.RandomErasing,
+        Transforms.GaussianBlur: torchvision.transforms.GaussianBlur,
+        Transforms.InterpolationMode: torchvision.transforms.InterpolationMode,
+        Transforms.RandomInvert: torchvision.transforms.RandomInvert,
+        Transforms.RandomPosterize: torchvision.transforms.RandomPosterize,
+        Transforms.RandomSolarize: torchvision.transforms.RandomSolarize,
+        Transforms.RandomAdjustSharpness: torchvision.transforms.RandomAdjustSharpness,
+        Transforms.RandomAutocontrast: torchvision.transforms.RandomAutocontrast,
+        Transforms.RandomEqualize: torchvision.transforms.RandomEqualize,
+    },
+    modules=["super_gradients.training.transforms", "super_gradients.training.datasets"],
+)
 register_transform = create_register_decorator(registry=TRANSFORMS)
 
-ALL_DATASETS = {}
+ALL_DATASETS = Registry(modules=["super_gradients.training.datasets"])
 register_dataset = create_register_decorator(registry=ALL_DATASETS)
 
-ALL_PRE_LAUNCH_CALLBACKS = {}
+ALL_PRE_LAUNCH_CALLBACKS = Registry(modules=["super_gradients.training.pre_launch_callbacks"])
 register_pre_launch_callback = create_register_decorator(registry=ALL_PRE_LAUNCH_CALLBACKS)
 
-BACKBONE_STAGES = {}
+BACKBONE_STAGES = Registry(modules=["super_gradients.training.models"])
 register_unet_backbone_stage = create_register_decorator(registry=BACKBONE_STAGES)
 
-UP_FUSE_BLOCKS = {}
+UP_FUSE_BLOCKS = Registry(modules=["super_gradients.training.models"])
 register_unet_up_block = create_register_decorator(registry=UP_FUSE_BLOCKS)
 
-ALL_TARGET_GENERATORS = {}
+ALL_TARGET_GENERATORS = Registry(modules=["super_gradients.training.datasets"])
 register_target_generator = create_register_decorator(registry=ALL_TARGET_GENERATORS)
 
-LR_SCHEDULERS_CLS_DICT = {}
+LR_SCHEDULERS_CLS_DICT = Registry(modules=["super_gradients.training.utils.callbacks"])
 register_lr_scheduler = create_register_decorator(registry=LR_SCHEDULERS_CLS_DICT)
 
-LR_WARMUP_CLS_DICT = {}
+LR_WARMUP_CLS_DICT = Registry(modules=["super_gradients.training.utils.callbacks"])
 register_lr_warmup = create_register_decorator(registry=LR_WARMUP_CLS_DICT)
 
-SG_LOGGERS = {}
+SG_LOGGERS = Registry(modules=["super_gradients.common.sg_loggers"])
 register_sg_logger = create_register_decorator(registry=SG_LOGGERS)
 
-ALL_COLLATE_FUNCTIONS = {}
+ALL_COLLATE_FUNCTIONS = Registry()
 register_collate_function = create_register_decorator(registry=ALL_COLLATE_FUNCTIONS)
 
-SAMPLERS = {
-    Samplers.DISTRIBUTED: torch.utils.data.DistributedSampler,
-    Samplers.SEQUENTIAL: torch.utils.data.SequentialSampler,
-    Samplers.SUBSET_RANDOM: torch.utils.data.SubsetRandomSampler,
-    Samplers.RANDOM: torch.utils.data.RandomSampler,
-    Samplers.WEIGHTED_RANDOM: torch.utils.data.WeightedRandomSampler,
-}
+SAMPLERS = Registry(
+    {
+        Samplers.DISTRIBUTED: torch.utils.data.DistributedSampler,
+        Samplers.SEQUENTIAL: torch.utils.data.SequentialSampler,
+        Samplers.SUBSET_RANDOM: torch.utils.data.SubsetRandomSampler,
+        Samplers.RANDOM: torch.utils.data.RandomSampler,
+        Samplers.WEIGHTED_RANDOM: torch.utils.data.WeightedRandomSampler,
+    },
+    modules=["super_gradients.training.datasets.samplers"],
+)
 register_sampler = create_register_decorator(registry=SAMPLERS)
 
 
-OPTIMIZERS = {
-    Optimizers.SGD: optim.SGD,
-    Optimizers.ADAM: optim.Adam,
-    Optimizers.ADAMW: optim.AdamW,
-    Optimizers.RMS_PROP: optim.RMSprop,
-}
+OPTIMIZERS = Registry(
+    {
+        Optimizers.SGD: optim.SGD,
+        Optimizers.ADAM: optim.Adam,
+        Optimizers.ADAMW: optim.AdamW,
+        Optimizers.RMS_PROP: optim.RMSprop,
+    },
+    modules=["super_gradients.training.utils.optimizers"],
+)
 
 TORCH_LR_SCHEDULERS = {
     "StepLR": torch.optim.lr_scheduler.StepLR,
@@ -192,5 +296,5 @@ TORCH_LR_SCHEDULERS = {
 
 register_optimizer = create_register_decorator(registry=OPTIMIZERS)
 
-PROCESSINGS = {}
+PROCESSINGS = Registry(modules=["super_gradients.training.processing"])
 register_processing = create_register_decorator(registry=PROCESSINGS)
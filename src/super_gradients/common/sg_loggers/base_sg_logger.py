@@ -315,20 +315,29 @@ class BaseSGLogger(AbstractSGLogger):
         self._save_checkpoint(path=path, state_dict=state_dict)
 
     @multi_process_safe
-    def _save_checkpoint(self, path: str, state_dict: dict) -> None:
-        """Save the Checkpoint locally.
+    def add_checkpoint_file(self, path: str, global_step: int = None) -> None:
+        """Handle a checkpoint file that was already written to the experiment folder (by add_checkpoint, or by an AsyncCheckpointWriter),
+        i.e. upload it to the remote storage if required.
 
         :param path:        Full path of the checkpoint
-        :param state_dict:  State dict of the checkpoint
+        :param global_step: Epoch number.
         """
-
         name = os.path.basename(path)
-        torch.save(state_dict, path)
         if "best" in name:
             logger.info("Checkpoint saved in " + path)
         if self.save_checkpoints_remote:
             self.model_checkpoints_data_interface.save_remote_checkpoints_file(self.experiment_name, self._local_dir, name)
 
+    @multi_process_safe
+    def _save_checkpoint(self, path: str, state_dict: dict) -> None:
+        """Save the Checkpoint locally.
+
+        :param path:        Full path of the checkpoint
+        :param state_dict:  State dict of the checkpoint
+        """
+        torch.save(state_dict, path)
+        self.add_checkpoint_file(path=path)
+
     def add(self, tag: str, obj: Any, global_step: int = None):
         pass
 
@@ -261,6 +261,11 @@ class DagsHubSGLogger(BaseSGLogger):
             name += ".pth"
         path = os.path.join(self._local_dir, name)
         torch.save(state_dict, path)
+        self.add_checkpoint_file(path=path, global_step=global_step)
+
+    @multi_process_safe
+    def add_checkpoint_file(self, path: str, global_step: int = 0) -> None:
+        name = os.path.basename(path)
         if self.save_checkpoints_dagshub:
             mlflow.log_artifact(path)
             if (global_step >= (self.max_global_steps - 1)) and not self.log_mlflow_only:
@@ -93,13 +93,13 @@ class DeciPlatformSGLogger(BaseSGLogger):
         self._upload_folder_files(folder_name=".hydra")
 
     @multi_process_safe
-    def _save_checkpoint(self, path: str, state_dict: dict) -> None:
-        """Save the Checkpoint locally, and then upload it to Deci platform if required.
+    def add_checkpoint_file(self, path: str, global_step: int = None) -> None:
+        """Upload a checkpoint that was saved locally to Deci platform if required.
 
         :param path:        Full path of the checkpoint
-        :param state_dict:  State dict of the checkpoint
+        :param global_step: Epoch number.
         """
-        super(DeciPlatformSGLogger, self)._save_checkpoint(path=path, state_dict=state_dict)
+        super(DeciPlatformSGLogger, self).add_checkpoint_file(path=path, global_step=global_step)
         if self.upload_model:
             self._save_experiment_file(file_path=path)
 
@@ -271,7 +271,11 @@ class WandBSGLogger(BaseSGLogger):
 
         path = os.path.join(self._local_dir, name)
         torch.save(state_dict, path)
+        self.add_checkpoint_file(path=path, global_step=global_step)
 
+    @multi_process_safe
+    def add_checkpoint_file(self, path: str, global_step: int = 0) -> None:
+        name = os.path.basename(path)
         if self.save_checkpoints_wandb:
             if self.s3_location_available:
                 self.model_checkpoints_data_interface.save_remote_checkpoints_file(self.experiment_name, self._local_dir, name)
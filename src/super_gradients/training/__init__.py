@@ -1,11 +1,30 @@
 # PACKAGE IMPORTS FOR EXTERNAL USAGE
-import super_gradients.training.utils.distributed_training_utils as distributed_training_utils
+from typing import TYPE_CHECKING
+
 from super_gradients.common import MultiGPUMode, StrictLoad, EvaluationType
-from super_gradients.training.datasets import datasets_utils, DataAugmentation
-from super_gradients.training.pre_launch_callbacks import modify_params_for_qat
-from super_gradients.training.qat_trainer import QATTrainer
-from super_gradients.training.sg_trainer import Trainer
-from super_gradients.training.kd_trainer import KDTrainer
+from super_gradients.common.lazy_imports import lazy_module_attributes
+
+# The trainers are only imported on first access, so that importing a single training module (e.g. super_gradients.training.models) does not import all of them.
+__getattr__, __dir__ = lazy_module_attributes(
+    __name__,
+    {
+        "distributed_training_utils": "super_gradients.training.utils.distributed_training_utils",
+        "datasets_utils": "super_gradients.training.datasets.datasets_utils",
+        "DataAugmentation": "super_gradients.training.datasets.data_augmentation:DataAugmentation",
+        "modify_params_for_qat": "super_gradients.training.pre_launch_callbacks:modify_params_for_qat",
+        "QATTrainer": "super_gradients.training.qat_trainer:QATTrainer",
+        "Trainer": "super_gradients.training.sg_trainer:Trainer",
+        "KDTrainer": "super_gradients.training.kd_trainer:KDTrainer",
+    },
+)
+
+if TYPE_CHECKING:
+    import super_gradients.training.utils.distributed_training_utils as distributed_training_utils
+    from super_gradients.training.datasets import datasets_utils, DataAugmentation
+    from super_gradients.training.pre_launch_callbacks import modify_params_for_qat
+    from super_gradients.training.qat_trainer import QATTrainer
+    from super_gradients.training.sg_trainer import Trainer
+    from super_gradients.training.kd_trainer import KDTrainer
 
 __all__ = [
     "distributed_training_utils",
@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from super_gradients.common.abstractions.abstract_logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class UnsupportedAnnotationError(ValueError):
+    """Raised when some annotations cannot be stored in an AnnotationIndex."""
+
+
+class AnnotationIndex:
+    """Persistent, memory-mapped index of the annotations of a dataset.
+
+    The annotations of every sample are stored in a columnar format, one (or two) `.npy` file(s) per annotation field:
+        - Arrays (e.g. "target"):           One flat array concatenating the arrays of all the samples along the first axis,
+                                            and an array of per-sample offsets into it.
+        - Strings (e.g. "img_path"):        Same as arrays, using the utf-8 encoded bytes of the string.
+        - Tuples (e.g. "resized_img_shape") and scalars (e.g. "n_invalid_labels"): One row per sample.
+
+    The files are memory-mapped when loading the index, so that loading is almost instant and processes (e.g. dataloader workers)
+    share the same pages instead of each holding a copy of the annotations.
+    Arrays returned by the index are read-only views on the memory-mapped files.
+    """
+
+    VERSION = 1
+    METADATA_FILENAME = "metadata.json"
+
+    def __init__(self, path: str):
+        """
+        :param path: Directory of an index that was written with `AnnotationIndex.build`.
+        """
+        self.path = Path(path)
+        with open(self.path / self.METADATA_FILENAME, "r") as f:
+            self.metadata = json.load(f)
+        if self.metadata["version"] != self.VERSION:
+            raise ValueError(f"Annotation index {self.path} has version {self.metadata['version']} but version {self.VERSION} is expected.")
+        self.n_samples: int = self.metadata["n_samples"]
+        self.fields: Dict[str, Dict[str, Any]] = self.metadata["fields"]
+        self.attributes: Dict[str, Any] = self.metadata.get("attributes", {})
+        self._open_files()
+
+    @classmethod
+    def load(cls, path: str) -> Optional["AnnotationIndex"]:
+        """Load an index if it exists and was written with the current version of the format.
+
+        :param path:    Directory of the index
+        :return:        The index, or None if it does not exist or is outdated.
+        """
+        metadata_path = Path(path) / cls.METADATA_FILENAME
+        if not metadata_path.exists():
+            return None
+        try:
+            return cls(path)
+        except (ValueError, KeyError, OSError) as e:
+            logger.warning(f"Ignoring annotation index {path}: {e}")
+            return None
+
+    @classmethod
+    def build(cls, annotations: List[Dict[str, Any]], path: str, attributes: Optional[Dict[str, Any]] = None) -> "AnnotationIndex":
+        """Write the annotations of every sample to a new index, and load it.
+        The index is written to a temporary directory which is then renamed, so that an index is either complete or missing.
+
+        :param annotations: Annotations of every sample, ordered by sample id. All the annotations must have the same fields.
+        :param path:        Directory where the index will be written.
+        :param attributes:  Optional JSON serializable attributes of the whole dataset (e.g. names of the keypoints), available as `index.attributes`.
+        :return:            The loaded index
+        """
+        if len(annotations) == 0:
+            raise UnsupportedAnnotationError("Cannot build an annotation index without any annotation.")
+
+        path = Path(path)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir(parents=True)
+
+        try:
+            fields = {}
+            for field_index, field in enumerate(annotations[0].keys()):
+                values = [annotation[field] for annotation in annotations]
+                # Field names are not necessarily valid file names, so the files are named after the field position.
+                fields[field] = cls._write_field(directory=tmp_path, file_prefix=f"field_{field_index:03d}", field=field, values=values)
+
+            with open(tmp_path / cls.METADATA_FILENAME, "w") as f:
+                json.dump({"version": cls.VERSION, "n_samples": len(annotations), "fields": fields, "attributes": attributes or {}}, f)
+
+            if path.exists():  # Written by another process in the meantime
+                shutil.rmtree(tmp_path)
+            else:
+                os.replace(tmp_path, path)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+        return cls(str(path))
+
+    def __len__(self) -> int:
+        return self.n_samples
+
+    def __contains__(self, sample_id: int) -> bool:
+        return 0 <= sample_id < self.n_samples
+
+    def __getitem__(self, sample_id: int) -> Dict[str, Any]:
+        """Get the annotation of a sample.
+
+        :param sample_id:   Sample ID refers to the index of the sample in the dataset, WITHOUT considering any filtering.
+        :return:            Annotation of the sample, with the same fields as the annotation that was indexed.
+        """
+        if sample_id not in self:
+            raise KeyError(sample_id)
+
+        annotation = {}
+        for field, field_info in self.fields.items():
+            kind = field_info["kind"]
+            if kind in ("array", "str"):
+                data, offsets = self._columns[field]
+                value = data[offsets[sample_id] : offsets[sample_id + 1]]
+                if kind == "str":
+                    annotation[field] = bytes(value).decode("utf-8")
+                elif "dtypes" in field_info:
+                    annotation[field] = value.astype(field_info["dtypes"][self._dtype_codes[field][sample_id]])
+                else:
+                    annotation[field] = np.asarray(value)
+            elif kind == "tuple":
+                annotation[field] = tuple(self._columns[field][sample_id].tolist())
+            else:
+                annotation[field] = self._columns[field][sample_id].item()
+        return annotation
+
+    def get_lengths(self, field: str) -> np.ndarray:
+        """Get the length (first dimension) of an array field for every sample, without loading the annotations.
+
+        :param field:   Name of an array field (e.g. "target")
+        :return:        Array of shape (n_samples,)
+        """
+        if self.fields[field]["kind"] != "array":
+            raise ValueError(f"{field} is not an array field")
+        offsets = self._columns[field][1]
+        return np.diff(offsets)
+
+    def get_column(self, field: str) -> np.ndarray:
+        """Get the values of a scalar or tuple field for every sample.
+
+        :param field:   Name of a scalar or tuple field (e.g. "n_invalid_labels")
+        :return:        Array with one row per sample
+        """
+        if self.fields[field]["kind"] not in ("scalar", "tuple"):
+            raise ValueError(f"{field} is not a scalar or tuple field")
+        return self._columns[field]
+
+    def __getstate__(self):
+        # Memory maps are opened again in the unpickled object instead of copying the data.
+        state = self.__dict__.copy()
+        del state["_columns"]
+        del state["_dtype_codes"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open_files()
+
+    def _open_files(self) -> None:
+        self._columns = self._load_columns()
+        self._dtype_codes = {field: self._load_array(field_info["dtype_codes"]) for field, field_info in self.fields.items() if "dtypes" in field_info}
+
+    def _load_columns(self) -> Dict[str, Any]:
+        columns = {}
+        for field, field_info in self.fields.items():
+            if field_info["kind"] in ("array", "str"):
+                columns[field] = (self._load_array(field_info["data"]), self._load_array(field_info["offsets"]))
+            else:
+                columns[field] = self._load_array(field_info["data"])
+        return columns
+
+    def _load_array(self, filename: str) -> np.ndarray:
+        return np.load(str(self.path / filename), mmap_mode="r")
+
+    @classmethod
+    def _write_field(cls, directory: Path, file_prefix: str, field: str, values: List[Any]) -> Dict[str, Any]:
+        """Write the values of a field (one per sample) and return the description of the field to be stored in the metadata."""
+        first_value = values[0]
+        field_info = {}
+
+        if isinstance(first_value, np.ndarray):
+            if not all(isinstance(value, np.ndarray) and value.ndim >= 1 and value.shape[1:] == first_value.shape[1:] for value in values):
+                raise UnsupportedAnnotationError(f"Field {field} should be made of arrays with the same shape (except for the first dimension).")
+            lengths = np.array([len(value) for value in values], dtype=np.int64)
+            data = np.concatenate(values, axis=0)
+
+            # Samples may not all have the same dtype (e.g. empty targets), in which case the dtype of each sample is stored to be restored.
+            dtypes = sorted({value.dtype.str for value in values})
+            if len(dtypes) > 1:
+                dtype_codes = np.array([dtypes.index(value.dtype.str) for value in values], dtype=np.uint8)
+                np.save(str(directory / f"{file_prefix}.dtypes.npy"), dtype_codes)
+                field_info.update({"dtypes": dtypes, "dtype_codes": f"{file_prefix}.dtypes.npy"})
+        elif isinstance(first_value, str):
+            if not all(isinstance(value, str) for value in values):
+                raise UnsupportedAnnotationError(f"Field {field} should only be made of strings.")
+            encoded_values = [value.encode("utf-8") for value in values]
+            lengths = np.array([len(value) for value in encoded_values], dtype=np.int64)
+            data = np.frombuffer(b"".join(encoded_values), dtype=np.uint8)
+        elif isinstance(first_value, (tuple, list)) or np.isscalar(first_value):
+            is_tuple = isinstance(first_value, (tuple, list))
+            if not all(isinstance(value, (tuple, list)) == is_tuple and not isinstance(value, str) for value in values):
+                raise UnsupportedAnnotationError(f"Field {field} should either be made of tuples or of scalars.")
+            data = np.array(values)
+            if data.dtype.kind not in "biuf" or data.ndim != (2 if is_tuple else 1):
+                raise UnsupportedAnnotationError(f"Field {field} should be made of numbers, or tuples of numbers with the same length.")
+            np.save(str(directory / f"{file_prefix}.npy"), data)
+            return {"kind": "tuple" if is_tuple else "scalar", "data": f"{file_prefix}.npy"}
+        else:
+            raise UnsupportedAnnotationError(f"Field {field} of type {type(first_value)} is not supported.")
+
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        np.save(str(directory / f"{file_prefix}.data.npy"), data)
+        np.save(str(directory / f"{file_prefix}.offsets.npy"), offsets)
+        kind = "array" if isinstance(first_value, np.ndarray) else "str"
+        return {"kind": kind, "data": f"{file_prefix}.data.npy", "offsets": f"{file_prefix}.offsets.npy", **field_info}
+
+
+def compute_files_fingerprint(file_paths: Iterable[str]) -> str:
+    """Compute a fingerprint of a list of files, based on their path, size and modification time (the content is not read).
+
+    :param file_paths:  Paths of the files
+    :return:            Hexadecimal hash
+    """
+    file_hash = hashlib.sha256()
+    for file_path in file_paths:
+        stat = os.stat(file_path)
+        file_hash.update(f"{file_path}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+    return file_hash.hexdigest()
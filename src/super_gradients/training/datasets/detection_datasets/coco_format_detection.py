@@ -1,13 +1,18 @@
 import copy
+import hashlib
+import json
 import os
+import threading
+from pathlib import Path
 
 import cv2
 import numpy as np
 from pycocotools.coco import COCO
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
 from contextlib import redirect_stdout
 from super_gradients.common.abstractions.abstract_logger import get_logger
+from super_gradients.training.datasets.annotation_index import AnnotationIndex, UnsupportedAnnotationError, compute_files_fingerprint
 from super_gradients.training.datasets.detection_datasets.detection_dataset import DetectionDataset
 from super_gradients.common.exceptions.dataset_exceptions import DatasetValidationException, ParameterMismatchException
 from super_gradients.training.datasets.data_formats.default_formats import XYXY_LABEL
@@ -23,6 +28,9 @@ class COCOFormatDetectionDataset(DetectionDataset):
     Output format: (x, y, x, y, class_id)
     """
 
+    # Prevents parsing the annotation file several times when annotations are loaded lazily from several threads
+    _coco_init_lock = threading.Lock()
+
     def __init__(
         self,
         data_dir: str,
@@ -68,22 +76,74 @@ class COCOFormatDetectionDataset(DetectionDataset):
                 )
 
     def _setup_data_source(self) -> int:
-        """Initialize img_and_target_path_list and warn if label file is missing
+        """Initialize img_and_target_path_list and warn if label file is missing.
+        When annotation_index_dir is set, the class ids, class names and image ids are stored in a data source index next to the annotation index,
+        so that later instantiations do not parse the annotation file (it is only parsed if annotations have to be loaded, see `coco`).
 
         :return: List of tuples made of (img_path,target_path)
         """
+        data_source_index_path = self._get_data_source_index_path() if self.annotation_index_dir is not None else None
+        data_source_index = AnnotationIndex.load(data_source_index_path) if data_source_index_path is not None else None
+
+        if data_source_index is not None:
+            self._coco = None
+            self.class_ids = data_source_index.attributes["class_ids"]
+            self.original_classes = data_source_index.attributes["original_classes"]
+            self.sample_id_to_coco_id = data_source_index.get_column("coco_id").tolist()
+        else:
+            self._coco = self._init_coco()
+            self.class_ids = sorted(cls_id for cls_id in self.coco.getCatIds() if cls_id not in self.class_ids_to_ignore)
+            self.original_classes = list([category["name"] for category in self.coco.loadCats(self.class_ids)])
+            self.sample_id_to_coco_id = self.coco.getImgIds()
+            if data_source_index_path is not None:
+                self._build_data_source_index(data_source_index_path)
 
-        self.coco = self._init_coco()
-        self.class_ids = sorted(cls_id for cls_id in self.coco.getCatIds() if cls_id not in self.class_ids_to_ignore)
-        self.original_classes = list([category["name"] for category in self.coco.loadCats(self.class_ids)])
         self.classes = copy.deepcopy(self.original_classes)
-        self.sample_id_to_coco_id = self.coco.getImgIds()
         return len(self.sample_id_to_coco_id)
 
+    @property
+    def coco(self) -> COCO:
+        """COCO API of the annotation file. When the dataset was set up from the data source index, the annotation file is parsed on first use."""
+        if self._coco is None:
+            with self._coco_init_lock:
+                if self._coco is None:
+                    self._coco = self._init_coco()
+        return self._coco
+
+    @coco.setter
+    def coco(self, coco: COCO) -> None:
+        self._coco = coco
+
+    def _get_data_source_index_path(self) -> str:
+        """Path of the data source index, keyed by the annotation sources only (unlike the annotation index, it does not depend on the dataset parameters)."""
+        index_key = {"version": AnnotationIndex.VERSION, "dataset": self.__class__.__name__, "sources": self._get_annotation_sources()}
+        index_hash = hashlib.sha256(json.dumps(index_key, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return str(Path(self.annotation_index_dir) / f"coco_data_source_{index_hash}")
+
+    def _build_data_source_index(self, path: str) -> None:
+        """Save the class ids, class names and image ids, which are needed to set up the dataset without parsing the annotation file."""
+        try:
+            AnnotationIndex.build(
+                annotations=[{"coco_id": int(coco_id)} for coco_id in self.sample_id_to_coco_id],
+                path=path,
+                attributes={"class_ids": [int(class_id) for class_id in self.class_ids], "original_classes": self.original_classes},
+            )
+        except UnsupportedAnnotationError as e:
+            logger.warning(f"The data source of {self.__class__.__name__} cannot be indexed: {e}. The annotation file will be parsed every time.")
+
     @property
     def _all_classes(self) -> List[str]:
         return self.original_classes
 
+    def _get_annotation_sources(self) -> Dict[str, Any]:
+        annotation_file_path = os.path.join(self.data_dir, self.json_annotation_file)
+        return {
+            "annotation_file": compute_files_fingerprint([annotation_file_path]),
+            "images_dir": os.path.join(self.data_dir, self.images_dir),
+            "tight_box_rotation": self.tight_box_rotation,
+            "class_ids_to_ignore": self.class_ids_to_ignore,
+        }
+
     def _init_coco(self) -> COCO:
         annotation_file_path = os.path.join(self.data_dir, self.json_annotation_file)
         if not os.path.exists(annotation_file_path):
@@ -133,14 +193,86 @@ class COCOFormatDetectionDataset(DetectionDataset):
         non_crowd_annotations = [annotation for annotation in cleaned_annotations if annotation["iscrowd"] == 0]
 
         target = np.zeros((len(non_crowd_annotations), 5))
-        num_seg_values = 98 if self.tight_box_rotation else 0
-        target_segmentation = np.ones((len(non_crowd_annotations), num_seg_values))
-        target_segmentation.fill(np.nan)
         for ix, annotation in enumerate(non_crowd_annotations):
             cls = self.class_ids.index(annotation["category_id"])
             target[ix, 0:4] = annotation["clean_bbox"]
             target[ix, 4] = cls
-            if self.tight_box_rotation:
+        target_segmentation = self._get_target_segmentation(non_crowd_annotations)
+
+        crowd_annotations = [annotation for annotation in cleaned_annotations if annotation["iscrowd"] == 1]
+
+        crowd_target = np.zeros((len(crowd_annotations), 5))
+        for ix, annotation in enumerate(crowd_annotations):
+            cls = self.class_ids.index(annotation["category_id"])
+            crowd_target[ix, 0:4] = annotation["clean_bbox"]
+            crowd_target[ix, 4] = cls
+
+        return self._build_annotation(sample_id, img_metadata, target, crowd_target, target_segmentation)
+
+    def _load_annotations_in_bulk(self, sample_ids: Sequence[int]) -> List[dict]:
+        """Load the annotations of a chunk of samples. The bboxes of all the annotations of the chunk are cleaned at once,
+        instead of one annotation at a time as in _load_annotation. The result is identical to _load_annotation.
+
+        :param sample_ids:  Sample_ids in the dataset
+        :return:            Annotations of the samples (see _load_annotation), in the same order as sample_ids.
+        """
+        if type(self)._load_annotation is not COCOFormatDetectionDataset._load_annotation:
+            # A subclass changed how a single annotation is loaded, so the bulk loading would not match it.
+            return super()._load_annotations_in_bulk(sample_ids)
+
+        imgs_metadata = [self.coco.loadImgs(self.sample_id_to_coco_id[sample_id])[0] for sample_id in sample_ids]
+        imgs_annotations = [self.coco.loadAnns(self.coco.getAnnIds(imgIds=[int(self.sample_id_to_coco_id[sample_id])])) for sample_id in sample_ids]
+        annotations = [annotation for img_annotations in imgs_annotations for annotation in img_annotations]
+        n_annotations_per_img = [len(img_annotations) for img_annotations in imgs_annotations]
+        annotations_offsets = np.cumsum([0] + n_annotations_per_img)
+
+        # Same cleaning as in _load_annotation, vectorized over the annotations of the chunk
+        widths = np.repeat([img_metadata["width"] for img_metadata in imgs_metadata], n_annotations_per_img)
+        heights = np.repeat([img_metadata["height"] for img_metadata in imgs_metadata], n_annotations_per_img)
+        bboxes = np.array([annotation["bbox"][0:4] for annotation in annotations], dtype=np.float64).reshape(-1, 4)
+        x1 = np.maximum(0, bboxes[:, 0])
+        y1 = np.maximum(0, bboxes[:, 1])
+        x2 = np.minimum(widths, x1 + np.maximum(0, bboxes[:, 2]))
+        y2 = np.minimum(heights, y1 + np.maximum(0, bboxes[:, 3]))
+        clean_bboxes = np.stack([x1, y1, x2, y2], axis=1)
+        areas = np.array([annotation["area"] for annotation in annotations], dtype=np.float64)
+        is_clean = (areas > 0) & (x2 >= x1) & (y2 >= y1)
+        is_crowd = np.array([annotation["iscrowd"] for annotation in annotations], dtype=np.float64)
+
+        class_id_to_index = {class_id: index for index, class_id in enumerate(self.class_ids)}
+
+        def get_targets(annotation_indexes: np.ndarray) -> np.ndarray:
+            targets = np.zeros((len(annotation_indexes), 5))
+            targets[:, 0:4] = clean_bboxes[annotation_indexes]
+            for ix, annotation_index in enumerate(annotation_indexes):
+                category_id = annotations[annotation_index]["category_id"]
+                # list.index raises the same error as _load_annotation for categories that are not in self.class_ids
+                targets[ix, 4] = class_id_to_index[category_id] if category_id in class_id_to_index else self.class_ids.index(category_id)
+            return targets
+
+        chunk_annotations = []
+        for ix, (sample_id, img_metadata) in enumerate(zip(sample_ids, imgs_metadata)):
+            start, end = annotations_offsets[ix], annotations_offsets[ix + 1]
+            non_crowd_indexes = start + np.flatnonzero(is_clean[start:end] & (is_crowd[start:end] == 0))
+            crowd_indexes = start + np.flatnonzero(is_clean[start:end] & (is_crowd[start:end] == 1))
+
+            target = get_targets(non_crowd_indexes)
+            target_segmentation = self._get_target_segmentation([annotations[annotation_index] for annotation_index in non_crowd_indexes])
+            crowd_target = get_targets(crowd_indexes)
+            chunk_annotations.append(self._build_annotation(sample_id, img_metadata, target, crowd_target, target_segmentation))
+        return chunk_annotations
+
+    def _get_target_segmentation(self, non_crowd_annotations: List[dict]) -> np.ndarray:
+        """Get the convex hull of the segmentation of each non crowd annotation (if tight_box_rotation, otherwise an empty array per annotation).
+
+        :param non_crowd_annotations:   Non crowd annotations of an image
+        :return:                        Segmentation, of shape (n_annotations, 98) if tight_box_rotation, (n_annotations, 0) otherwise, padded with nan.
+        """
+        num_seg_values = 98 if self.tight_box_rotation else 0
+        target_segmentation = np.ones((len(non_crowd_annotations), num_seg_values))
+        target_segmentation.fill(np.nan)
+        if self.tight_box_rotation:
+            for ix, annotation in enumerate(non_crowd_annotations):
                 seg_points = [j for i in annotation.get("segmentation", []) for j in i]
                 if seg_points:
                     seg_points_c = np.array(seg_points).reshape((-1, 2)).astype(np.int32)
@@ -148,14 +280,21 @@ class COCOFormatDetectionDataset(DetectionDataset):
                 else:
                     seg_points_convex = []
                 target_segmentation[ix, : len(seg_points_convex)] = seg_points_convex
+        return target_segmentation
 
-        crowd_annotations = [annotation for annotation in cleaned_annotations if annotation["iscrowd"] == 1]
+    def _build_annotation(self, sample_id: int, img_metadata: dict, target: np.ndarray, crowd_target: np.ndarray, target_segmentation: np.ndarray) -> dict:
+        """Build the annotation of a sample from its targets (see _load_annotation), resizing them if input_dim is set.
 
-        crowd_target = np.zeros((len(crowd_annotations), 5))
-        for ix, annotation in enumerate(crowd_annotations):
-            cls = self.class_ids.index(annotation["category_id"])
-            crowd_target[ix, 0:4] = annotation["clean_bbox"]
-            crowd_target[ix, 4] = cls
+        :param sample_id:           Sample_id in the dataset
+        :param img_metadata:        COCO metadata of the image
+        :param target:              Target Bboxes (detection) in XYXY_LABEL format, at the original image size
+        :param crowd_target:        Crowd target Bboxes (detection) in XYXY_LABEL format, at the original image size
+        :param target_segmentation: Segmentation, at the original image size
+        :return:                    Annotation of the sample (see _load_annotation)
+        """
+        img_id = self.sample_id_to_coco_id[sample_id]
+        width = img_metadata["width"]
+        height = img_metadata["height"]
 
         # Currently, the base class includes a feature to resize the image, so we need to resize the target as well when self.input_dim is set.
         initial_img_shape = (height, width)
@@ -170,7 +309,6 @@ class COCOFormatDetectionDataset(DetectionDataset):
 
         file_name = img_metadata["file_name"] if "file_name" in img_metadata else "{:012}".format(img_id) + ".jpg"
         img_path = os.path.join(self.data_dir, self.images_dir, file_name)
-        img_id = self.sample_id_to_coco_id[sample_id]
 
         annotation = {
             "target": target,
@@ -1,6 +1,6 @@
 import collections
 import os
-from typing import List, Dict, Union, Any, Optional, Tuple
+from typing import List, Dict, Union, Any, Optional, Tuple, Iterator, Sequence
 from multiprocessing.pool import ThreadPool
 import random
 import cv2
@@ -8,6 +8,7 @@ import matplotlib.pyplot as plt
 from pathlib import Path
 from copy import deepcopy
 import hashlib
+import json
 
 import numpy as np
 from tqdm import tqdm
@@ -25,6 +26,8 @@ from super_gradients.common.factories.list_factory import ListFactory
 from super_gradients.common.factories.transforms_factory import TransformsFactory
 from super_gradients.training.datasets.data_formats.default_formats import XYXY_LABEL
 from super_gradients.training.datasets.data_formats.formats import ConcatenatedTensorFormat, LabelTensorSliceItem
+from super_gradients.training.datasets.annotation_index import AnnotationIndex, UnsupportedAnnotationError
+from super_gradients.training.datasets.sharded_image_cache import ShardedImageCache
 from super_gradients.training.utils.utils import ensure_is_tuple_of_two
 
 logger = get_logger(__name__)
@@ -65,6 +68,9 @@ class DetectionDataset(Dataset, HasPreprocessingParams):
         - Sample ID:    Index of the sample in the dataset, WITHOUT considering any filtering. 0<=sample_id<=len(source)-1
     """
 
+    # Number of samples whose annotations are loaded together by _load_annotations_in_bulk when indexing the dataset.
+    annotation_loading_chunk_size: int = 256
+
     @resolve_param("transforms", ListFactory(TransformsFactory()))
     def __init__(
         self,
@@ -73,7 +79,13 @@ class DetectionDataset(Dataset, HasPreprocessingParams):
         max_num_samples: int = None,
         cache: bool = False,
         cache_annotations: bool = True,
+        annotation_index_dir: Optional[str] = None,
+        annotation_loading_workers: int = 0,
         cache_dir: str = None,
+        cache_mode: str = "padded",
+        cache_compression: Optional[str] = None,
+        cache_shard_size_mb: int = 1024,
+        cache_background_fill: bool = False,
         input_dim: Union[int, Tuple[int, int], None] = None,
         transforms: List[DetectionTransform] = [],
         all_classes_list: Optional[List[str]] = [],
@@ -83,6 +95,7 @@ class DetectionDataset(Dataset, HasPreprocessingParams):
         output_fields: List[str] = None,
         verbose: bool = True,
         show_all_warnings: bool = False,
+        read_only_samples: bool = False,
     ):
         """Detection dataset.
 
@@ -97,7 +110,23 @@ class DetectionDataset(Dataset, HasPreprocessingParams):
         :param cache:                   Whether to cache images or not.
         :param cache_annotations:       Whether to cache annotations or not. This reduces training time by pre-loading all the annotations,
                                         but requires more RAM and more time to instantiate the dataset when working on very large datasets.
+        :param annotation_index_dir:    If set, the parsed annotations are stored in a persistent, memory-mapped index in this directory
+                                        (see AnnotationIndex), keyed by a hash of the annotation sources and of the dataset parameters.
+                                        Later instantiations load the index instead of parsing the annotations again, and dataloader workers
+                                        share its memory pages. Only supported by datasets implementing `_get_annotation_sources`.
+        :param annotation_loading_workers: Number of threads loading the annotations when indexing the whole dataset, each loading chunks of
+                                        `annotation_loading_chunk_size` samples (see `_load_annotations_in_bulk`). This mostly speeds up
+                                        datasets reading one annotation file per sample, e.g. on network filesystems.
+                                        0 (default) loads the chunks in the main thread.
         :param cache_dir:              Path to the directory where cached images will be stored in an optimized format.
+        :param cache_mode:              How images are cached when cache=True.
+                                            - "padded":  Legacy mode. A single memory-mapped array, where each image is padded to input_dim.
+                                            - "sharded": Images are stored with their real shape in fixed-size shard files (see ShardedImageCache).
+                                                         Supports compression and background filling, and does not require input_dim.
+        :param cache_compression:       Only for cache_mode="sharded". None (raw pixels), "png" (lossless) or "jpeg" (lossy re-encoding).
+        :param cache_shard_size_mb:     Only for cache_mode="sharded". Size (in MB) of each shard file.
+        :param cache_background_fill:   Only for cache_mode="sharded". If True, the cache is filled in a background thread and images that are
+                                        not cached yet are loaded from their original source. Otherwise, the cache is filled before training starts.
         :param transforms:              List of transforms to apply sequentially on sample.
         :param all_classes_list:        All the class names.
         :param class_inclusion_list:    If not None, define the subset of classes to be included as targets.
@@ -112,10 +141,14 @@ class DetectionDataset(Dataset, HasPreprocessingParams):
                                                 It has to include at least "image" and "target" but can include other.
         :param verbose:                 Whether to show additional information or not, such as loading progress. (doesnt include warnings)
         :param show_all_warnings:       Whether to show all warnings or not.
+        :param read_only_samples:       If True, the annotation arrays returned by `get_sample` are read-only views on the annotations of the dataset
+                                        instead of copies, which saves a copy of every annotation on each access. Only use it when none of the
+                                        transforms modifies the annotation arrays of the sample in place.
         """
         super().__init__()
         self.verbose = verbose
         self.show_all_warnings = show_all_warnings
+        self.read_only_samples = read_only_samples
 
         if isinstance(original_target_format, DetectionTargetsFormat):
             logger.warning(
@@ -127,6 +160,9 @@ class DetectionDataset(Dataset, HasPreprocessingParams):
         if not Path(data_dir).exists():
             raise RuntimeError(f"data_dir={data_dir} not found. Please make sure that data_dir points toward your dataset.")
 
+        # Set before _setup_data_source, so that datasets can set up their data source from the annotation index directory
+        self.annotation_index_dir = annotation_index_dir
+
         # Number of images that are available (regardless of ignored images)
         n_dataset_samples = self._setup_data_source()
         if not isinstance(n_dataset_samples, int) or n_dataset_samples < 1:
@@ -165,7 +201,10 @@ class DetectionDataset(Dataset, HasPreprocessingParams):
             raise ValueError('output_fields must start with "image" and then "target", followed by any other field')
 
         self._cache_annotations = cache_annotations
-        self._cached_annotations: Dict[int, Dict] = {}  # We use a dict and not a list because when `ignore_empty_annotations=True` we may ignore some indexes.
+        self.annotation_loading_workers = annotation_loading_workers
+        self._cached_annotations: Union[
+            Dict[int, Dict], AnnotationIndex
+        ] = {}  # We use a dict and not a list because when `ignore_empty_annotations=True` we may ignore some indexes.
 
         # Maps (dataset index) -> (non-empty sample ids)
         self._non_empty_sample_ids: Optional[List[int]] = None
@@ -188,26 +227,46 @@ class DetectionDataset(Dataset, HasPreprocessingParams):
                     "Having a transform with `non_empty_annotations=True` set causes the process to take longer due to the need for a full dataset indexing."
                 )
 
-            # Map indexes to sample annotations.
-            non_empty_annotations, empty_annotations = self._load_all_annotations(n_samples=n_samples)
-            if self._cache_annotations:
-                if self.ignore_empty_annotations and transform_require_non_empty_annotations:
-                    self._cached_annotations = non_empty_annotations
-                else:
-                    # Non overlapping dicts. since they map unique sample_ids -> sample
-                    self._cached_annotations = {**non_empty_annotations, **empty_annotations}
-
-            if self.ignore_empty_annotations and len(non_empty_annotations) == 0:
+            annotation_index = self._get_annotation_index(n_samples=n_samples) if annotation_index_dir is not None else None
+            if annotation_index is not None:
+                # The index is used as the annotation cache, so that annotations are read from the shared memory-mapped files.
+                non_empty_sample_ids = self._get_non_empty_sample_ids_from_index(annotation_index=annotation_index)
+                if self._cache_annotations:
+                    self._cached_annotations = annotation_index
+            else:
+                # Map indexes to sample annotations.
+                non_empty_annotations, empty_annotations = self._load_all_annotations(n_samples=n_samples)
+                if self._cache_annotations:
+                    if self.ignore_empty_annotations and transform_require_non_empty_annotations:
+                        self._cached_annotations = non_empty_annotations
+                    else:
+                        # Non overlapping dicts. since they map unique sample_ids -> sample
+                        self._cached_annotations = {**non_empty_annotations, **empty_annotations}
+                non_empty_sample_ids = list(non_empty_annotations.keys())
+
+            if self.ignore_empty_annotations and len(non_empty_sample_ids) == 0:
                 raise EmptyDatasetException(f"Out of {n_samples} images, not a single one was found with any of these classes: {self.class_inclusion_list}")
 
-            self._non_empty_sample_ids = list(non_empty_annotations.keys())
+            self._non_empty_sample_ids = non_empty_sample_ids
 
         self._n_samples = n_samples  # Regardless of any filtering
 
         # CACHE IMAGE
         self.cache = cache
         self.cache_dir = cache_dir
-        self.cached_imgs_padded = self._cache_images() if self.cache else None
+        self.cache_mode = cache_mode
+        self.cache_compression = cache_compression
+        self.cache_shard_size_mb = cache_shard_size_mb
+        self.cache_background_fill = cache_background_fill
+        self.cached_imgs_padded = None
+        self.sharded_image_cache = None
+        if self.cache:
+            if cache_mode == "padded":
+                self.cached_imgs_padded = self._cache_images()
+            elif cache_mode == "sharded":
+                self.sharded_image_cache = self._create_sharded_image_cache()
+            else:
+                raise ValueError(f"cache_mode={cache_mode} is not supported. Please use one of ['padded', 'sharded']")
 
     @property
     def _all_classes(self):
@@ -246,7 +305,12 @@ class DetectionDataset(Dataset, HasPreprocessingParams):
         """Load the annotation associated to a specific sample and apply subclassing.
         :param sample_id:   Sample ID refers to the index of the sample in the dataset, WITHOUT considering any filtering. 0<=sample_id<=len(source)-1
         """
-        sample_annotations = self._load_annotation(sample_id=sample_id)
+        return self._check_and_sub_class_annotation(sample_annotations=self._load_annotation(sample_id=sample_id))
+
+    def _check_and_sub_class_annotation(self, sample_annotations: Dict[str, Union[np.ndarray, Any]]) -> Dict[str, Union[np.ndarray, Any]]:
+        """Check that an annotation returned by _load_annotation includes the required fields, and apply subclassing.
+        :param sample_annotations:  Annotation of a sample, as returned by _load_annotation.
+        """
         if not self._required_annotation_fields.issubset(set(sample_annotations.keys())):
             raise KeyError(
                 f"_load_annotation is expected to return at least the fields {self._required_annotation_fields}, but got {set(sample_annotations.keys())}"
@@ -258,6 +322,37 @@ class DetectionDataset(Dataset, HasPreprocessingParams):
 
         return sample_annotations
 
+    def _load_annotations_in_bulk(self, sample_ids: Sequence[int]) -> List[Dict[str, Union[np.ndarray, Any]]]:
+        """Load the annotations of a chunk of samples. This is called (possibly from several threads at the same time) when indexing the whole dataset.
+        Override this method to load the annotations of several samples at once faster than one by one (e.g. vectorized parsing).
+        The annotations have to be identical to the ones returned by _load_annotation.
+
+        :param sample_ids:  Sample IDs of the chunk, WITHOUT considering any filtering. 0<=sample_id<=len(source)-1
+        :return:            Annotations of the samples, in the same order as sample_ids.
+        """
+        return [self._load_annotation(sample_id=sample_id) for sample_id in sample_ids]
+
+    def _generate_all_sample_annotations(self, n_samples: int) -> Iterator[Dict[str, Union[np.ndarray, Any]]]:
+        """Load the annotations of all the samples in chunks (see _load_annotations_in_bulk), with a progress bar.
+        The chunks are loaded by a pool of `annotation_loading_workers` threads if set, and in the main thread otherwise.
+
+        :param n_samples:   Number of samples in the datasets (including samples without annotations).
+        :return:            Iterator of the annotations of every sample (after subclassing), ordered by sample id.
+        """
+        chunks = [range(start, min(start + self.annotation_loading_chunk_size, n_samples)) for start in range(0, n_samples, self.annotation_loading_chunk_size)]
+        pool = ThreadPool(self.annotation_loading_workers) if self.annotation_loading_workers > 0 else None
+        chunks_annotations = pool.imap(self._load_annotations_in_bulk, chunks) if pool is not None else map(self._load_annotations_in_bulk, chunks)
+        try:
+            with tqdm(total=n_samples, desc="Indexing dataset annotations", disable=not self.verbose) as progress_bar:
+                for chunk_annotations in chunks_annotations:
+                    for sample_annotations in chunk_annotations:
+                        yield self._check_and_sub_class_annotation(sample_annotations=sample_annotations)
+                    progress_bar.update(len(chunk_annotations))
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
     def _load_all_annotations(self, n_samples: int) -> Tuple[Dict[int, Dict[str, Any]], Dict[int, Dict[str, Any]]]:
         """Load ALL the annotations into memory. This is usually required when `ignore_empty_annotations=True`,
         because we have to iterate over the whole dataset once in order to know which sample is empty and which is not.
@@ -275,9 +370,7 @@ class DetectionDataset(Dataset, HasPreprocessingParams):
         n_invalid_bbox = 0
         non_empty_annotations, empty_annotations = {}, {}
 
-        for index in tqdm(range(n_samples), desc="Indexing dataset annotations", disable=not self.verbose):
-
-            sample_annotations = self._load_sample_annotation(sample_id=index)
+        for index, sample_annotations in enumerate(self._generate_all_sample_annotations(n_samples=n_samples)):
             n_invalid_bbox += sample_annotations.get("n_invalid_labels", 0)
 
             is_annotation_non_empty = any(len(sample_annotations[field]) != 0 for field in self.target_fields)
@@ -294,6 +387,65 @@ class DetectionDataset(Dataset, HasPreprocessingParams):
 
         return non_empty_annotations, empty_annotations
 
+    def _get_annotation_sources(self) -> Optional[Dict[str, Any]]:
+        """Describe where the annotations are parsed from (e.g. fingerprint of the annotation files, and parsing parameters).
+        This is used to key the annotation index, so it has to change whenever the parsed annotations may change.
+
+        :return: JSON serializable description of the annotation sources, or None if the dataset does not support the annotation index.
+        """
+        return None
+
+    def _get_annotation_index(self, n_samples: int) -> Optional[AnnotationIndex]:
+        """Load the annotation index matching the current annotation sources and parameters, or build it if it does not exist.
+
+        :param n_samples:   Number of samples in the datasets (including samples without annotations).
+        :return:            The annotation index, or None if the annotations of this dataset cannot be indexed.
+        """
+        annotation_sources = self._get_annotation_sources()
+        if annotation_sources is None:
+            logger.warning(f"{self.__class__.__name__} does not support `annotation_index_dir`. The annotations will be parsed instead.")
+            return None
+
+        index_key = {
+            "version": AnnotationIndex.VERSION,
+            "dataset": self.__class__.__name__,
+            "sources": annotation_sources,
+            "n_samples": n_samples,
+            "input_dim": self.input_dim,
+            "all_classes_list": self.all_classes_list,
+            "class_inclusion_list": self.class_inclusion_list,
+        }
+        index_hash = hashlib.sha256(json.dumps(index_key, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        index_path = Path(self.annotation_index_dir) / f"annotation_index_{index_hash}"
+
+        annotation_index = AnnotationIndex.load(str(index_path))
+        if annotation_index is not None:
+            logger.info(f"Loaded the annotation index from {index_path}")
+        else:
+            annotations = list(self._generate_all_sample_annotations(n_samples=n_samples))
+            try:
+                annotation_index = AnnotationIndex.build(annotations=annotations, path=str(index_path))
+            except UnsupportedAnnotationError as e:
+                logger.warning(f"The annotations of {self.__class__.__name__} cannot be indexed: {e}. The annotations will be parsed instead.")
+                return None
+            logger.info(f"Saved the annotation index to {index_path}")
+
+        if "n_invalid_labels" in annotation_index.fields:
+            n_invalid_bbox = int(np.sum(annotation_index.get_column("n_invalid_labels")))
+            if n_invalid_bbox > 0:
+                logger.warning(f"Found {n_invalid_bbox} invalid bbox that were ignored. For more information, please set `show_all_warnings=True`.")
+        return annotation_index
+
+    def _get_non_empty_sample_ids_from_index(self, annotation_index: AnnotationIndex) -> List[int]:
+        """Get the sample ids of the samples with at least one target, without loading their annotations.
+        :param annotation_index:    Annotation index of the dataset
+        :return:                    Sample ids of the non-empty samples, in increasing order.
+        """
+        is_non_empty = np.zeros(len(annotation_index), dtype=bool)
+        for field in self.target_fields:
+            is_non_empty |= annotation_index.get_lengths(field) > 0
+        return np.flatnonzero(is_non_empty).tolist()
+
     def _sub_class_annotation(self, annotation: dict) -> Union[dict, None]:
         """Subclass every field listed in self.target_fields. It could be targets, crowd_targets, ...
 
@@ -328,9 +480,9 @@ class DetectionDataset(Dataset, HasPreprocessingParams):
         """Cache the images. The cached image are stored in a file to be loaded faster mext time.
         :return: Cached images
         """
-        cache_dir = Path(self.cache_dir)
-        if cache_dir is None:
+        if self.cache_dir is None:
             raise ValueError("You must specify a cache_dir if you want to cache your images." "If you did not mean to use cache, please set cache=False ")
+        cache_dir = Path(self.cache_dir)
         cache_dir.mkdir(parents=True, exist_ok=True)
 
         logger.warning(
@@ -344,28 +496,14 @@ class DetectionDataset(Dataset, HasPreprocessingParams):
             raise RuntimeError("caching is not possible without input_dim is not set")
         max_h, max_w = self.input_dim[0], self.input_dim[1]
 
-        # The cache should be the same as long as the images and their sizes are the same
-        hash = hashlib.sha256()
-        for index in range(len(self)):
-            annotation = self._get_sample_annotations(index=index, ignore_empty_annotations=self.ignore_empty_annotations)
-            values_to_hash = [annotation["resized_img_shape"][0], annotation["resized_img_shape"][1], Path(annotation["img_path"]).name]
-            for value in values_to_hash:
-                hash.update(str(value).encode("utf-8"))
-        cache_hash = hash.hexdigest()
-
+        cache_hash = self._get_images_cache_hash()
         img_resized_cache_path = cache_dir / f"img_resized_cache_{cache_hash}.array"
 
         if not img_resized_cache_path.exists():
             logger.info("Caching images for the first time. Be aware that this will stay in the disk until you delete it yourself.")
             NUM_THREADs = min(8, os.cpu_count())
 
-            # Inline-function because we should not to pollute the rest of the class with this function.
-            # This function is required because of legacy design - ideally we should not have to load annotations in order to get the image path.
-            def _load_image_from_index(index: int) -> np.ndarray:
-                annotations = self._get_sample_annotations(index=index, ignore_empty_annotations=self.ignore_empty_annotations)
-                return self._load_resized_img(image_path=annotations["img_path"])
-
-            loaded_images = ThreadPool(NUM_THREADs).imap(func=_load_image_from_index, iterable=range(len(self)))
+            loaded_images = ThreadPool(NUM_THREADs).imap(func=self._load_resized_img_from_index, iterable=range(len(self)))
 
             # Initialize placeholder for images
             cached_imgs = np.memmap(str(img_resized_cache_path), shape=(len(self), max_h, max_w, 3), dtype=np.uint8, mode="w+")
@@ -382,6 +520,44 @@ class DetectionDataset(Dataset, HasPreprocessingParams):
         cached_imgs = np.memmap(str(img_resized_cache_path), shape=(len(self), max_h, max_w, 3), dtype=np.uint8, mode="r+")
         return cached_imgs
 
+    def _create_sharded_image_cache(self) -> ShardedImageCache:
+        """Create (or reuse) a sharded cache of the resized images. Unlike `_cache_images`, images are not padded and input_dim is not required.
+        :return: Sharded image cache
+        """
+        if self.cache_dir is None:
+            raise ValueError("You must specify a cache_dir if you want to cache your images." "If you did not mean to use cache, please set cache=False ")
+
+        cache_name = f"img_resized_cache_{self._get_images_cache_hash()}_{self.cache_compression or 'raw'}"
+        return ShardedImageCache(
+            cache_dir=str(Path(self.cache_dir) / cache_name),
+            n_images=len(self),
+            load_image_fn=self._load_resized_img_from_index,
+            compression=self.cache_compression,
+            shard_size_mb=self.cache_shard_size_mb,
+            background_fill=self.cache_background_fill,
+            num_threads=min(8, os.cpu_count()),
+            verbose=self.verbose,
+        )
+
+    def _get_images_cache_hash(self) -> str:
+        """Hash identifying the cached images. The cache should be the same as long as the images and their sizes are the same."""
+        hash = hashlib.sha256()
+        for index in range(len(self)):
+            annotation = self._get_sample_annotations(index=index, ignore_empty_annotations=self.ignore_empty_annotations)
+            values_to_hash = [annotation["resized_img_shape"][0], annotation["resized_img_shape"][1], Path(annotation["img_path"]).name]
+            for value in values_to_hash:
+                hash.update(str(value).encode("utf-8"))
+        return hash.hexdigest()
+
+    def _load_resized_img_from_index(self, index: int) -> np.ndarray:
+        """Load the resized image of a given index.
+        This function is required because of legacy design - ideally we should not have to load annotations in order to get the image path.
+        :param index:   Index refers to the index of the sample in the dataset, AFTER filtering (if relevant). 0<=index<=len(dataset)-1
+        :return:        Image in BGR format, and channel last (HWC).
+        """
+        annotations = self._get_sample_annotations(index=index, ignore_empty_annotations=self.ignore_empty_annotations)
+        return self._load_resized_img(image_path=annotations["img_path"])
+
     def _load_resized_img(self, image_path: str) -> np.ndarray:
         """Load an image and resize it to the desired size (If relevant).
         :param image_path:  Full path of the image
@@ -428,23 +604,32 @@ class DetectionDataset(Dataset, HasPreprocessingParams):
         for field in self.output_fields:
             if field not in sample.keys():
                 raise KeyError(f"The field {field} must be present in the sample but was not found." "Please check the output fields of your transforms.")
-        return tuple(sample[field] for field in self.output_fields)
+        # With read_only_samples, fields that were not modified by any transform are still read-only views on the annotations, so we copy them.
+        return tuple(_ensure_writeable(sample[field]) for field in self.output_fields)
 
     def get_random_item(self):
         return self[self.get_random_sample(ignore_empty_annotations=self.ignore_empty_annotations)]
 
     def get_sample(self, index: int, ignore_empty_annotations: bool = False) -> Dict[str, Union[np.ndarray, Any]]:
         """Get raw sample, before any transform (beside subclassing).
+        The annotations of the sample are copies, unless read_only_samples is set. In that case, the annotation arrays (e.g. "target") are read-only
+        views on the annotations of the dataset, and transforms should create new arrays (or copy them first) instead of modifying them in place.
+
         :param index:                       Index refers to the index of the sample in the dataset, AFTER filtering (if relevant). 0<=index<=len(dataset)-1
         :param ignore_empty_annotations:    If True, empty annotations will be ignored
         :return:                            Sample, i.e. a dictionary including at least "image" and "target"
         """
         sample_annotations = self._get_sample_annotations(index=index, ignore_empty_annotations=ignore_empty_annotations)
-        if self.cache:
+        if self.sharded_image_cache is not None:
+            image = self.sharded_image_cache.get(index)
+            if image is None:  # Not cached yet (background fill in progress)
+                image = self._load_resized_img(image_path=sample_annotations["img_path"])
+        elif self.cache:
             image = self._get_cached_image(index=index, cached_image_shape=sample_annotations["resized_img_shape"])
         else:
             image = self._load_resized_img(image_path=sample_annotations["img_path"])
-        return {"image": image, **deepcopy(sample_annotations)}
+        get_annotation_value = _as_read_only if self.read_only_samples else _copy_annotation_value
+        return {"image": image, **{field: get_annotation_value(value) for field, value in sample_annotations.items()}}
 
     def _get_cached_image(self, index: int, cached_image_shape: Tuple[int, int]) -> np.ndarray:
         """Load an image from cache.
@@ -570,6 +755,37 @@ class DetectionDataset(Dataset, HasPreprocessingParams):
         return params
 
 
+def _as_read_only(value: Any) -> Any:
+    """Get a read-only version of an annotation value without copying its data.
+    Arrays are returned as read-only views, immutable values as is, and other values (e.g. lists or dicts) are deep-copied.
+    """
+    if isinstance(value, np.ndarray):
+        value = value.view()
+        value.flags.writeable = False
+        return value
+    if isinstance(value, (str, bytes, int, float, bool, np.generic, type(None))):
+        return value
+    return deepcopy(value)
+
+
+def _copy_annotation_value(value: Any) -> Any:
+    """Get a writeable copy of an annotation value. Arrays are copied (including read-only views, e.g. from the annotation index),
+    immutable values are returned as is and other values are deep-copied.
+    """
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, (str, bytes, int, float, bool, np.generic, type(None))):
+        return value
+    return deepcopy(value)
+
+
+def _ensure_writeable(value: Any) -> Any:
+    """Copy read-only arrays, and return any other value as is."""
+    if isinstance(value, np.ndarray) and not value.flags.writeable:
+        return value.copy()
+    return value
+
+
 def _get_class_index_in_target(target_format: DetectionTargetsFormat) -> int:
     """Get the index of the class in the target format.
     :param target_format: format of the target. E.g. XYXY_LABEL, LABEL_NORMALIZED_XYXY, ect...
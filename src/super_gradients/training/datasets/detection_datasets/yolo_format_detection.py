@@ -2,10 +2,11 @@ import os
 
 import imagesize
 import numpy as np
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from super_gradients.common.abstractions.abstract_logger import get_logger
 from super_gradients.training.utils.media.image import is_image
+from super_gradients.training.datasets.annotation_index import compute_files_fingerprint
 from super_gradients.training.datasets.detection_datasets.detection_dataset import DetectionDataset
 from super_gradients.training.datasets.data_formats import ConcatenatedTensorFormatConverter
 from super_gradients.training.datasets.data_formats.default_formats import XYXY_LABEL, LABEL_NORMALIZED_CXCYWH
@@ -166,6 +167,17 @@ class YoloDarknetFormatDetectionDataset(DetectionDataset):
                 self.labels_file_names.append(base_name + ".txt")
         return len(self.images_file_names)
 
+    def _get_annotation_sources(self) -> Dict[str, Any]:
+        # The image files are part of the sources because the image shape is read from them.
+        image_paths = [os.path.join(self.images_folder, image_file_name) for image_file_name in self.images_file_names]
+        label_paths = [os.path.join(self.labels_folder, label_file_name) for label_file_name in self.labels_file_names]
+        return {
+            "images": compute_files_fingerprint(image_paths),
+            "labels": compute_files_fingerprint(label_paths),
+            "class_ids_to_ignore": self.class_ids_to_ignore,
+            "ignore_invalid_labels": self.ignore_invalid_labels,
+        }
+
     def _load_annotation(self, sample_id: int) -> dict:
         """Load relevant information of a specific image.
 
@@ -180,7 +192,6 @@ class YoloDarknetFormatDetectionDataset(DetectionDataset):
         label_path = os.path.join(self.labels_folder, self.labels_file_names[sample_id])
 
         image_width, image_height = imagesize.get(image_path)
-        image_shape = (image_height, image_width)
 
         yolo_format_target, invalid_labels = self._parse_yolo_label_file(
             label_file_path=label_path,
@@ -188,7 +199,49 @@ class YoloDarknetFormatDetectionDataset(DetectionDataset):
             ignore_invalid_labels=self.ignore_invalid_labels,
             show_warnings=self.show_all_warnings,
         )
+        return self._build_annotation(sample_id, image_path, (image_height, image_width), yolo_format_target, invalid_labels)
+
+    def _load_annotations_in_bulk(self, sample_ids: Sequence[int]) -> List[dict]:
+        """Load the annotations of a chunk of samples: the image sizes are probed one after the other from their headers,
+        and the label files are parsed together (see _parse_yolo_label_files).
+
+        :param sample_ids:  Sample_ids in the dataset
+        :return:            Annotations of the samples (see _load_annotation), in the same order as sample_ids.
+        """
+        if type(self)._load_annotation is not YoloDarknetFormatDetectionDataset._load_annotation:
+            # A subclass changed how a single annotation is loaded, so the bulk parsing would not match it.
+            return super()._load_annotations_in_bulk(sample_ids)
+
+        image_paths = [os.path.join(self.images_folder, self.images_file_names[sample_id]) for sample_id in sample_ids]
+        label_paths = [os.path.join(self.labels_folder, self.labels_file_names[sample_id]) for sample_id in sample_ids]
 
+        image_sizes = [imagesize.get(image_path) for image_path in image_paths]
+        parsed_label_files = self._parse_yolo_label_files(
+            label_file_paths=label_paths,
+            num_classes=len(self.all_classes_list),
+            ignore_invalid_labels=self.ignore_invalid_labels,
+            show_warnings=self.show_all_warnings,
+        )
+        return [
+            self._build_annotation(sample_id, image_path, (image_height, image_width), yolo_format_target, invalid_labels)
+            for sample_id, image_path, (image_width, image_height), (yolo_format_target, invalid_labels) in zip(
+                sample_ids, image_paths, image_sizes, parsed_label_files
+            )
+        ]
+
+    def _build_annotation(
+        self, sample_id: int, image_path: str, image_shape: Tuple[int, int], yolo_format_target: np.ndarray, invalid_labels: List[str]
+    ) -> dict:
+        """Build the annotation of a sample from its parsed label file (see _load_annotation).
+
+        :param sample_id:           Sample_id in the dataset
+        :param image_path:          Path to the associated image
+        :param image_shape:         Image (height, width)
+        :param yolo_format_target:  Targets in yolo format (LABEL_NORMALIZED_CXCYWH), as returned by _parse_yolo_label_file
+        :param invalid_labels:      Lines of the label file that failed to be parsed
+        :return:                    Annotation of the sample (see _load_annotation)
+        """
+        image_height, image_width = image_shape
         converter = ConcatenatedTensorFormatConverter(input_format=LABEL_NORMALIZED_CXCYWH, output_format=XYXY_LABEL, image_shape=image_shape)
         target = converter(yolo_format_target)
 
@@ -255,3 +308,77 @@ class YoloDarknetFormatDetectionDataset(DetectionDataset):
                 else:
                     raise RuntimeError(error_msg)
         return np.array(labels_yolo_format) if labels_yolo_format else np.zeros((0, 5)), invalid_labels
+
+    @staticmethod
+    def _parse_yolo_label_files(
+        label_file_paths: Sequence[str],
+        ignore_invalid_labels: bool = True,
+        show_warnings: bool = True,
+        num_classes: Optional[int] = None,
+    ) -> List[Tuple[np.ndarray, List[str]]]:
+        """Parse several label files in yolo format at once. The result is identical to calling _parse_yolo_label_file on each file.
+
+        Each file is read in a single call, and the values of all the well-formed files (every line made of 5 values with a valid class id)
+        are converted together, instead of line by line. Files with any malformed line are parsed with _parse_yolo_label_file,
+        which handles invalid lines.
+
+        :param label_file_paths:        Paths to the label files in yolo format.
+        :param ignore_invalid_labels:   Whether to ignore labels that fail to be parsed. If True ignores and logs a warning, otherwise raise an error.
+        :param show_warnings:           Whether to show the warnings or not.
+        :param num_classes:             Number of classes in the dataset. Used to ensure that class ids are within the range [0, num_classes - 1].
+                                        If None, ignore.
+        :return:                        For each file, in order:
+            - labels:           np.ndarray of shape (n_labels, 5) in yolo format (LABEL_NORMALIZED_CXCYWH)
+            - invalid_labels:   List of lines that failed to be parsed
+        """
+        # Tokens of each file, or None for the files with a line that is not made of 5 values, which are parsed by the line parser.
+        files_tokens = []
+        for label_file_path in label_file_paths:
+            with open(label_file_path, "r") as f:
+                # Same lines as f.readlines(), without the empty ones
+                lines_tokens = [line.split() for line in f.read().split("\n") if line != ""]
+            is_well_formed = all(len(line_tokens) == 5 for line_tokens in lines_tokens)
+            files_tokens.append([token for line_tokens in lines_tokens for token in line_tokens] if is_well_formed else None)
+
+        # Convert the values of all the files at once, or file by file if some values cannot be converted.
+        all_tokens = [token for tokens in files_tokens if tokens is not None for token in tokens]
+        all_labels = _convert_yolo_tokens(all_tokens)
+        if all_labels is not None:
+            files_labels, offset = [], 0
+            for tokens in files_tokens:
+                n_labels = 0 if tokens is None else len(tokens) // 5
+                files_labels.append(None if tokens is None else all_labels[offset : offset + n_labels])
+                offset += n_labels
+        else:
+            files_labels = [None if tokens is None else _convert_yolo_tokens(tokens) for tokens in files_tokens]
+
+        parsed_label_files = []
+        for label_file_path, labels in zip(label_file_paths, files_labels):
+            if labels is not None and num_classes is not None and np.any((labels[:, 0] < 0) | (labels[:, 0] >= num_classes)):
+                labels = None
+            if labels is None:
+                parsed_label_files.append(
+                    YoloDarknetFormatDetectionDataset._parse_yolo_label_file(
+                        label_file_path=label_file_path, ignore_invalid_labels=ignore_invalid_labels, show_warnings=show_warnings, num_classes=num_classes
+                    )
+                )
+            else:
+                parsed_label_files.append((labels.copy() if len(labels) else np.zeros((0, 5)), []))
+        return parsed_label_files
+
+
+def _convert_yolo_tokens(tokens: List[str]) -> Optional[np.ndarray]:
+    """Convert the tokens of yolo format labels (5 per label) the same way as _parse_yolo_label_file, i.e. int(class_id) and float(values).
+
+    :param tokens:  Tokens of the labels, concatenated.
+    :return:        np.ndarray of shape (n_labels, 5), or None if some tokens cannot be converted.
+    """
+    try:
+        labels = np.array(list(map(float, tokens)), dtype=np.float64).reshape(-1, 5)
+        class_ids = np.array(list(map(int, tokens[::5])))
+    except ValueError:
+        return None
+    if class_ids.dtype == object:
+        return None  # Class ids beyond int64 produce an array of objects with _parse_yolo_label_file
+    labels[:, 0] = class_ids
+    return labels
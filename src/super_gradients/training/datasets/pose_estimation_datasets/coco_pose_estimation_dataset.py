@@ -1,10 +1,13 @@
+import hashlib
+import json
 import os
-from typing import Tuple, List, Union
+from typing import Any, Dict, Tuple, List, Optional, Union
 
 import cv2
 import numpy as np
 import pycocotools
 from pycocotools.coco import COCO
+from tqdm import tqdm
 
 from super_gradients.common.abstractions.abstract_logger import get_logger
 from super_gradients.common.decorators.factory_decorator import resolve_param
@@ -12,10 +15,13 @@ from super_gradients.common.factories.transforms_factory import TransformsFactor
 from super_gradients.common.factories.type_factory import TypeFactory
 from super_gradients.common.object_names import Datasets
 from super_gradients.common.registry.registry import register_dataset
+from super_gradients.training.datasets.annotation_index import AnnotationIndex, UnsupportedAnnotationError, compute_files_fingerprint
 from super_gradients.training.datasets.data_formats.bbox_formats.xywh import xywh_to_xyxy, xyxy_to_xywh
 from super_gradients.training.datasets.pose_estimation_datasets.abstract_pose_estimation_dataset import AbstractPoseEstimationDataset
 from super_gradients.training.datasets.pose_estimation_datasets.coco_utils import (
     CrowdAnnotationActionEnum,
+    decode_mask_runs,
+    encode_mask_runs,
     remove_duplicate_annotations as remove_duplicate_annotations_fn,
     remove_crowd_annotations,
     remove_samples_with_crowd_annotations,
@@ -54,6 +60,7 @@ class COCOPoseEstimationDataset(AbstractPoseEstimationDataset):
         keypoint_colors: Union[List[Tuple[int, int, int]], np.ndarray, None],
         remove_duplicate_annotations: bool = False,
         crowd_annotations_action: CrowdAnnotationActionEnum = CrowdAnnotationActionEnum.NO_ACTION,
+        annotation_index_dir: Optional[str] = None,
     ):
         """
 
@@ -77,24 +84,49 @@ class COCOPoseEstimationDataset(AbstractPoseEstimationDataset):
                                              "drop_annotation" - Crowd annotations will be dropped from the dataset.
                                              "mask_as_normal" - These annotations will be treated as normal (non-crowd) annotations.
                                              "no_action" - No action will be taken for crowd annotations.
+        :param annotation_index_dir:         If set, the annotations are preprocessed once and stored in a persistent, memory-mapped index
+                                             in this directory (see AnnotationIndex), keyed by a hash of the annotation file and of the
+                                             parameters above. Joints, boxes, areas and crowd masks (run-length encoded) are then read from
+                                             the index, so the COCO object is neither built on later instantiations nor kept in memory,
+                                             and dataloader workers share the pages of the index.
         """
         json_file = os.path.join(data_dir, json_file)
         if not os.path.exists(json_file) or not os.path.isfile(json_file):
             raise FileNotFoundError(f"Annotation file {json_file} does not exist")
 
-        coco = COCO(json_file)
+        annotation_index_path = None
+        annotation_index = None
+        if annotation_index_dir is not None:
+            index_key = {
+                "version": AnnotationIndex.VERSION,
+                "dataset": self.__class__.__name__,
+                "annotation_file": compute_files_fingerprint([json_file]),
+                "include_empty_samples": include_empty_samples,
+                "remove_duplicate_annotations": remove_duplicate_annotations,
+                "crowd_annotations_action": CrowdAnnotationActionEnum(crowd_annotations_action).value,
+            }
+            index_hash = hashlib.sha256(json.dumps(index_key, sort_keys=True).encode("utf-8")).hexdigest()
+            annotation_index_path = os.path.join(annotation_index_dir, f"pose_annotation_index_{index_hash}")
+            annotation_index = AnnotationIndex.load(annotation_index_path)
 
-        if remove_duplicate_annotations:
-            coco = remove_duplicate_annotations_fn(coco)
+        if annotation_index is not None:
+            logger.info(f"Loaded the annotation index from {annotation_index_path}")
+            coco = None
+            joints = annotation_index.attributes["joints"]
+        else:
+            coco = COCO(json_file)
 
-        if crowd_annotations_action == CrowdAnnotationActionEnum.DROP_SAMPLE:
-            coco = remove_samples_with_crowd_annotations(coco)
-        elif crowd_annotations_action == CrowdAnnotationActionEnum.DROP_ANNOTATION:
-            coco = remove_crowd_annotations(coco)
+            if remove_duplicate_annotations:
+                coco = remove_duplicate_annotations_fn(coco)
 
-        if len(coco.dataset["categories"]) != 1:
-            raise ValueError("Dataset must contain exactly one category")
-        joints = coco.dataset["categories"][0]["keypoints"]
+            if crowd_annotations_action == CrowdAnnotationActionEnum.DROP_SAMPLE:
+                coco = remove_samples_with_crowd_annotations(coco)
+            elif crowd_annotations_action == CrowdAnnotationActionEnum.DROP_ANNOTATION:
+                coco = remove_crowd_annotations(coco)
+
+            if len(coco.dataset["categories"]) != 1:
+                raise ValueError("Dataset must contain exactly one category")
+            joints = coco.dataset["categories"][0]["keypoints"]
         num_joints = len(joints)
 
         super().__init__(
@@ -107,13 +139,23 @@ class COCOPoseEstimationDataset(AbstractPoseEstimationDataset):
         self.root = data_dir
         self.images_dir = os.path.join(data_dir, images_dir)
         self.coco = coco
-        self.ids = list(self.coco.imgs.keys())
         self.joints = joints
         self.crowd_annotations_action = crowd_annotations_action
+        self.annotation_index = annotation_index
+
+        if annotation_index is not None:
+            self.ids = annotation_index.get_column("image_id").tolist()
+        else:
+            self.ids = list(self.coco.imgs.keys())
+            if not include_empty_samples:
+                subset = [img_id for img_id in self.ids if len(self.coco.getAnnIds(imgIds=img_id)) > 0]
+                self.ids = subset
 
-        if not include_empty_samples:
-            subset = [img_id for img_id in self.ids if len(self.coco.getAnnIds(imgIds=img_id)) > 0]
-            self.ids = subset
+            if annotation_index_path is not None:
+                self.annotation_index = self._build_annotation_index(annotation_index_path)
+                if self.annotation_index is not None:
+                    # The COCO object is not needed anymore, so that dataloader workers do not each hold a copy of it.
+                    self.coco = None
 
     def __len__(self):
         return len(self.ids)
@@ -124,10 +166,46 @@ class COCOPoseEstimationDataset(AbstractPoseEstimationDataset):
         :param index: Sample index
         :return:      Returns an instance of PoseEstimationSample that holds complete sample (image and annotations)
         """
-        img_id = self.ids[index]
+        if self.annotation_index is not None:
+            # Arrays of the index are read-only views on the memory-mapped files, while transforms may modify them in place
+            annotation = {key: np.array(value) if isinstance(value, np.ndarray) else value for key, value in self.annotation_index[index].items()}
+            image_height, image_width = annotation["image_shape"]
+            mask = np.logical_not(decode_mask_runs(annotation["crowd_mask_runs"], shape=(image_height, image_width))).astype(np.float32)
+        else:
+            annotation, mask = self._load_sample_annotation(self.ids[index])
+
+        file_path = os.path.join(self.images_dir, annotation["file_name"])
+        orig_image = cv2.imread(file_path, cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+        if orig_image is None:
+            # This is a nice fallback/hack to handle case when OpenCV cannot read some images
+            # In happens to some OpenCV versions for COCO datasets (There are 1-2 corrupted images)
+            # But we generaly want to read with OpenCV since it's much faster than PIL
+            from PIL import Image
+
+            orig_image = Image.open(file_path).convert("BGR")
+
+        if orig_image.shape[:2] != tuple(annotation["image_shape"]):
+            raise RuntimeError(f"Annotated image size ({tuple(annotation['image_shape'])}) does not match image size in file {orig_image.shape[:2]}")
+
+        return PoseEstimationSample(
+            image=orig_image,
+            mask=mask,
+            joints=annotation["joints"],
+            areas=annotation["areas"],
+            bboxes_xywh=annotation["bboxes_xywh"],
+            is_crowd=annotation["is_crowd"],
+            additional_samples=None,
+        )
+
+    def _load_sample_annotation(self, img_id) -> Tuple[Dict[str, Any], np.ndarray]:
+        """
+        Parse the annotations of an image from the COCO object.
+        :param img_id: COCO image id
+        :return:       Tuple of
+                        - Annotation of the image (file name, image shape, joints, bounding boxes clipped to the image, areas and crowd flags)
+                        - Crowd mask of the image (see _get_crowd_mask)
+        """
         image_info = self.coco.loadImgs(img_id)[0]
-        file_name = image_info["file_name"]
-        file_path = os.path.join(self.images_dir, file_name)
         ann_ids = self.coco.getAnnIds(imgIds=img_id)
         anno = self.coco.loadAnns(ann_ids)
 
@@ -148,33 +226,48 @@ class COCOPoseEstimationDataset(AbstractPoseEstimationDataset):
             else:
                 gt_areas[i] = gt_bboxes[i, 2] * gt_bboxes[i, 3] * 0.53
 
-        orig_image = cv2.imread(file_path, cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
-        if orig_image is None:
-            # This is a nice fallback/hack to handle case when OpenCV cannot read some images
-            # In happens to some OpenCV versions for COCO datasets (There are 1-2 corrupted images)
-            # But we generaly want to read with OpenCV since it's much faster than PIL
-            from PIL import Image
-
-            orig_image = Image.open(file_path).convert("BGR")
-
-        if orig_image.shape[0] != image_info["height"] or orig_image.shape[1] != image_info["width"]:
-            raise RuntimeError(f"Annotated image size ({image_info['height'],image_info['width']}) does not match image size in file {orig_image.shape[:2]}")
-
         # Clip bboxes to image boundaries (Some annotations extend 1-2px outside of image boundaries)
-        image_height, image_width = orig_image.shape[:2]
+        # The size of the image file is checked to be the annotated one when loading the sample.
+        image_height, image_width = image_info["height"], image_info["width"]
         xyxy_bboxes = xywh_to_xyxy(gt_bboxes, image_shape=(image_height, image_width))
-        image_height, image_width = orig_image.shape[:2]
         xyxy_bboxes[:, 0] = np.clip(xyxy_bboxes[:, 0], 0, image_width)
         xyxy_bboxes[:, 1] = np.clip(xyxy_bboxes[:, 1], 0, image_height)
         xyxy_bboxes[:, 2] = np.clip(xyxy_bboxes[:, 2], 0, image_width)
         xyxy_bboxes[:, 3] = np.clip(xyxy_bboxes[:, 3], 0, image_height)
         gt_bboxes = xyxy_to_xywh(xyxy_bboxes, image_shape=(image_height, image_width))
 
+        annotation = {
+            "file_name": image_info["file_name"],
+            "image_shape": (image_height, image_width),
+            "joints": gt_joints,
+            "areas": gt_areas,
+            "bboxes_xywh": gt_bboxes,
+            "is_crowd": gt_iscrowd,
+        }
         mask: np.ndarray = self._get_crowd_mask(anno, image_info)
+        return annotation, mask
 
-        return PoseEstimationSample(
-            image=orig_image, mask=mask, joints=gt_joints, areas=gt_areas, bboxes_xywh=gt_bboxes, is_crowd=gt_iscrowd, additional_samples=None
-        )
+    def _build_annotation_index(self, path: str) -> Optional[AnnotationIndex]:
+        """
+        Parse the annotations of all the samples and write them to an annotation index.
+        The crowd masks are stored run-length encoded, and decoded when loading a sample.
+        :param path: Directory of the index
+        :return:     The annotation index, or None if the annotations cannot be indexed.
+        """
+        annotations = []
+        for img_id in tqdm(self.ids, desc="Indexing pose estimation annotations"):
+            annotation, mask = self._load_sample_annotation(img_id)
+            annotation["image_id"] = img_id
+            annotation["crowd_mask_runs"] = encode_mask_runs(mask < 0.5)
+            annotations.append(annotation)
+
+        try:
+            annotation_index = AnnotationIndex.build(annotations=annotations, path=path, attributes={"joints": self.joints})
+        except UnsupportedAnnotationError as e:
+            logger.warning(f"The annotations of {self.__class__.__name__} cannot be indexed: {e}. The annotations will be parsed instead.")
+            return None
+        logger.info(f"Saved the annotation index to {path}")
+        return annotation_index
 
     def _get_crowd_mask(self, anno, img_info) -> np.ndarray:
         """
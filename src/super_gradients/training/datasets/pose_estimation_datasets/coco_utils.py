@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Tuple
 
 import numpy as np
 from pycocotools.coco import COCO
@@ -16,6 +17,8 @@ __all__ = [
     "remove_duplicate_annotations",
     "remove_crowd_annotations",
     "remove_samples_with_crowd_annotations",
+    "encode_mask_runs",
+    "decode_mask_runs",
 ]
 
 
@@ -211,3 +214,39 @@ def remove_samples_with_crowd_annotations(coco: COCO):
         coco.createIndex()
 
     return coco
+
+
+def encode_mask_runs(mask: np.ndarray) -> np.ndarray:
+    """
+    Run-length encode a binary mask, in row-major order.
+    Runs alternate between False and True values and always start with a run of False values (possibly of length 0).
+
+    :param mask: Binary mask of [H,W] shape
+    :return:     Lengths of the runs, as an uint32 array
+    """
+    flat_mask = np.asarray(mask, dtype=bool).ravel()
+    if flat_mask.size == 0:
+        return np.zeros((1,), dtype=np.uint32)
+    run_starts = np.flatnonzero(flat_mask[1:] != flat_mask[:-1]) + 1
+    boundaries = np.concatenate([[0], run_starts, [flat_mask.size]])
+    runs = np.diff(boundaries)
+    if flat_mask[0]:
+        runs = np.concatenate([[0], runs])
+    return runs.astype(np.uint32)
+
+
+def decode_mask_runs(runs: np.ndarray, shape: Tuple[int, int]) -> np.ndarray:
+    """
+    Decode a binary mask encoded with encode_mask_runs.
+
+    :param runs:  Lengths of the runs
+    :param shape: Shape of the mask (H,W)
+    :return:      Boolean mask of [H,W] shape
+    """
+    mask = np.zeros(shape, dtype=bool)
+    flat_mask = mask.reshape(-1)
+    # Masks are made of a few regions, so filling the runs of True values is faster than expanding every run with np.repeat
+    run_ends = np.cumsum(runs, dtype=np.int64).tolist()
+    for start, end in zip(run_ends[0::2], run_ends[1::2]):
+        flat_mask[start:end] = True
+    return mask
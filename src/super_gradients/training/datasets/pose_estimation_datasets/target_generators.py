@@ -46,11 +46,32 @@ class DEKRTargetsGenerator(KeypointsTargetsGenerator):
         self.center_sigma = center_sigma
         self.bg_weight = bg_weight
         self.offset_radius = offset_radius
+        self._gaussian_kernels: Dict[Tuple[float, Tuple[int, int], Tuple[int, int]], np.ndarray] = {}
 
     def get_heat_val(self, sigma: float, x, y, x0, y0) -> float:
         g = np.exp(-((x - x0) ** 2 + (y - y0) ** 2) / (2 * sigma**2))
         return g
 
+    def get_gaussian_kernel(self, sigma: float, dx_range: Tuple[int, int], dy_range: Tuple[int, int]) -> np.ndarray:
+        """
+        Get a gaussian patch with the values of get_heat_val(sigma, x0 + dx, y0 + dy, x0, y0) for dx in range(*dx_range) and dy in range(*dy_range).
+        The patch of a joint only depends on sigma and on the sub-pixel position of the joint (which determines the patch bounds
+        relative to the joint), so there are only a few different patches and they are computed once and cached.
+
+        :param sigma:    Sigma of the gaussian kernel
+        :param dx_range: Range of x offsets (relative to the joint location) covered by the patch
+        :param dy_range: Range of y offsets (relative to the joint location) covered by the patch
+        :return: [len(range(*dy_range)), len(range(*dx_range))] Gaussian patch. The returned array is shared and should not be modified.
+        """
+        key = (sigma, dx_range, dy_range)
+        kernel = self._gaussian_kernels.get(key)
+        if kernel is None:
+            dx = np.arange(*dx_range)
+            dy = np.arange(*dy_range)
+            kernel = np.exp(-(dx[np.newaxis, :] ** 2 + dy[:, np.newaxis] ** 2) / (2 * sigma**2)).astype(np.float32)
+            self._gaussian_kernels[key] = kernel
+        return kernel
+
     def compute_area(self, joints: np.ndarray) -> np.ndarray:
         """
         Compute area of a bounding box for each instance
@@ -173,18 +194,15 @@ class DEKRTargetsGenerator(KeypointsTargetsGenerator):
                     aa, bb = max(0, ul[1]), min(br[1], output_rows)
                     cc, dd = max(0, ul[0]), min(br[0], output_cols)
 
-                    joint_rg = np.zeros((bb - aa, dd - cc), dtype=np.float32)
-                    for sy in range(aa, bb):
-                        for sx in range(cc, dd):
-                            # EK: Note we round x/y values here to obtain clear peak in the center of odd-sized heatmap
-                            # joint_rg[sy - aa, sx - cc] = self.get_heat_val(sigma, sx, sy, x, y)
-                            joint_rg[sy - aa, sx - cc] = self.get_heat_val(sigma, sx, sy, int(x), int(y))
+                    # EK: Note we round x/y values here to obtain clear peak in the center of odd-sized heatmap
+                    x0, y0 = int(x), int(y)
+                    kernel = self.get_gaussian_kernel(sigma, (ul[0] - x0, br[0] - x0), (ul[1] - y0, br[1] - y0))
+                    joint_rg = kernel[aa - ul[1] : bb - ul[1], cc - ul[0] : dd - ul[0]].copy()
 
                     # It is important for RFL loss to have 1.0 in heatmap. since 0.9999 would be interpreted as negative pixel
                     joint_rg[joint_rg.shape[0] // 2, joint_rg.shape[1] // 2] = 1
 
-                    heatmaps[idx, aa:bb, cc:dd] = np.maximum(heatmaps[idx, aa:bb, cc:dd], joint_rg)
-                    # print(heatmaps[-1, 0, 0])
+                    np.maximum(heatmaps[idx, aa:bb, cc:dd], joint_rg, out=heatmaps[idx, aa:bb, cc:dd])
                     ignored_hms[idx, aa:bb, cc:dd] = 1.0
 
         for person_id, p in enumerate(joints):
@@ -207,15 +225,11 @@ class DEKRTargetsGenerator(KeypointsTargetsGenerator):
                     end_x = min(int(ct_x + self.offset_radius), output_cols)
                     end_y = min(int(ct_y + self.offset_radius), output_rows)
 
-                    for pos_x in range(start_x, end_x):
-                        for pos_y in range(start_y, end_y):
-                            offset_x = pos_x - x
-                            offset_y = pos_y - y
-
-                            offset_map[idx * 2, pos_y, pos_x] = offset_x
-                            offset_map[idx * 2 + 1, pos_y, pos_x] = offset_y
-                            offset_weight[idx * 2, pos_y, pos_x] = offset_weight_factor
-                            offset_weight[idx * 2 + 1, pos_y, pos_x] = offset_weight_factor
+                    pos_x = np.arange(start_x, end_x)
+                    pos_y = np.arange(start_y, end_y)
+                    offset_map[idx * 2, start_y:end_y, start_x:end_x] = pos_x[np.newaxis, :] - x
+                    offset_map[idx * 2 + 1, start_y:end_y, start_x:end_x] = pos_y[:, np.newaxis] - y
+                    offset_weight[idx * 2 : idx * 2 + 2, start_y:end_y, start_x:end_x] = offset_weight_factor
 
         ignored_hms[ignored_hms == 2] = self.bg_weight
 
@@ -109,13 +109,20 @@ class CityscapesDataset(SegmentationDataSet):
             :param label_path:  Path to the label image.
             :return:                     The mask image created from the array, with converted class labels.
         """
+        return Image.fromarray(self.target_array_loader(label_path), "L")
+
+    def target_array_loader(self, label_path: str) -> np.ndarray:
+        """
+        Override target_array_loader function, load the labels mask as an array.
+            :param label_path:  Path to the label image.
+            :return:            The mask array, with converted class labels.
+        """
         # assert that is a png file, other file types might alter the class labels value.
         assert os.path.splitext(label_path)[-1].lower() == ".png"
 
         label = cv2.imread(label_path, cv2.IMREAD_GRAYSCALE)
         # map ground-truth ids to train ids
-        label = self.labels_map[label].astype(np.uint8)
-        return Image.fromarray(label, "L")
+        return self.labels_map[label].astype(np.uint8)
 
     def _create_color_palette(self):
         """
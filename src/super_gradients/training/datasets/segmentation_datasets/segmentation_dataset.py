@@ -1,6 +1,7 @@
 import os
 from typing import Callable, Iterable
 
+import cv2
 import numpy as np
 import torch
 import torchvision.transforms as transform
@@ -28,6 +29,7 @@ class SegmentationDataSet(DirectoryDataSet, ListDataset):
         collate_fn: Callable = None,
         target_extension: str = ".png",
         transforms: Iterable = None,
+        image_backend: str = "pil",
     ):
         """
         SegmentationDataSet
@@ -40,12 +42,20 @@ class SegmentationDataSet(DirectoryDataSet, ListDataset):
             :param collate_fn:                  collate_fn func to process batches for the Data Loader
             :param target_extension:            file extension of the targets (default is .png for PASCAL VOC 2012)
             :param transforms:                  transforms to be applied on image and mask
+            :param image_backend:               How images and masks are loaded and transformed:
+                                                    - "pil":    PIL images (see sample_loader and target_loader).
+                                                    - "cv2":    uint8 numpy arrays, (H, W, 3) RGB images and (H, W) masks, decoded with OpenCV
+                                                                (see sample_array_loader and target_array_loader). The segmentation transforms
+                                                                use OpenCV on numpy arrays, which avoids the conversions between PIL and numpy.
 
         """
+        if image_backend not in ("pil", "cv2"):
+            raise ValueError(f"Unsupported image_backend: {image_backend}, expected: 'pil' or 'cv2'")
         self.samples_sub_directory = samples_sub_directory
         self.targets_sub_directory = targets_sub_directory
         self.cache_labels = cache_labels
         self.cache_images = cache_images
+        self.image_backend = image_backend
 
         # CREATE A DIRECTORY DATASET OR A LIST DATASET BASED ON THE list_file INPUT VARIABLE
         if list_file is not None:
@@ -83,13 +93,13 @@ class SegmentationDataSet(DirectoryDataSet, ListDataset):
         if self.cache_images:
             sample = self.imgs[index]
         else:
-            sample = self.sample_loader(sample_path)
+            sample = self._load_sample(sample_path)
 
         # TRY TO LOAD THE CACHED LABEL FIRST
         if self.cache_labels:
             target = self.labels[index]
         else:
-            target = self.target_loader(target_path)
+            target = self._load_target(target_path)
 
         # MAKE SURE THE TRANSFORM WORKS ON BOTH IMAGE AND MASK TO ALIGN THE AUGMENTATIONS
         sample, target = self._transform_image_and_mask(sample, target)
@@ -106,6 +116,18 @@ class SegmentationDataSet(DirectoryDataSet, ListDataset):
         image = Image.open(sample_path).convert("RGB")
         return image
 
+    @staticmethod
+    def sample_array_loader(sample_path: str) -> np.ndarray:
+        """
+        sample_array_loader - Loads a dataset image from path using OpenCV (image_backend="cv2")
+            :param sample_path: The path to the sample image
+            :return:            The loaded image, as a uint8 array of shape (H, W, 3) in RGB
+        """
+        image = cv2.imread(sample_path, cv2.IMREAD_COLOR)
+        if image is None:
+            raise FileNotFoundError(f"Could not read image {sample_path}")
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
     @staticmethod
     def sample_transform(image):
         """
@@ -131,6 +153,24 @@ class SegmentationDataSet(DirectoryDataSet, ListDataset):
         target = Image.open(target_path)
         return target
 
+    def target_array_loader(self, target_path: str) -> np.ndarray:
+        """
+        target_array_loader - Loads a target mask as a numpy array (image_backend="cv2").
+        By default, the mask returned by target_loader is converted to an array, which keeps the exact values of palette masks.
+        Override it to decode the mask directly into an array.
+            :param target_path: The path to the target mask
+            :return:            The loaded mask, as an array of shape (H, W)
+        """
+        return np.array(self.target_loader(target_path))
+
+    def _load_sample(self, sample_path: str):
+        """Load a sample image as a PIL image or as a numpy array, depending on image_backend."""
+        return self.sample_array_loader(sample_path) if self.image_backend == "cv2" else self.sample_loader(sample_path)
+
+    def _load_target(self, target_path: str):
+        """Load a target mask as a PIL image or as a numpy array, depending on image_backend."""
+        return self.target_array_loader(target_path) if self.image_backend == "cv2" else self.target_loader(target_path)
+
     @staticmethod
     def target_transform(target):
         """
@@ -160,7 +200,7 @@ class SegmentationDataSet(DirectoryDataSet, ListDataset):
             cached_images_mem_in_gb = 0.0
             with tqdm(image_files, desc="Caching images") as pbar:
                 for i, img_path in enumerate(pbar):
-                    img = self.sample_loader(img_path)
+                    img = self._load_sample(img_path)
                     if img is None:
                         image_indices_to_remove.append(i)
 
@@ -179,7 +219,7 @@ class SegmentationDataSet(DirectoryDataSet, ListDataset):
                 missing_labels, found_labels, duplicate_labels = 0, 0, 0
 
                 for i, file in enumerate(pbar):
-                    labels = self.target_loader(file)
+                    labels = self._load_target(file)
 
                     if labels is None:
                         missing_labels += 1
@@ -0,0 +1,381 @@
+import json
+import os
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import torch.utils.data
+from tqdm import tqdm
+
+from super_gradients.common.abstractions.abstract_logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ShardedImageCache:
+    """Disk cache of images, split into fixed-size shard files.
+
+    Each shard is a flat binary file holding the images back to back, together with an index file storing, for every image of the shard,
+    its offset, size and shape. Images are stored with their real shape (no padding), either raw or compressed (PNG is lossless, JPEG is lossy).
+
+    The shards are written sequentially, and a shard is only visible to readers once both its data file and its index file were atomically renamed
+    to their final name. This allows to fill the cache in a background thread while the dataset is already being used:
+    images that are not (yet) in the cache are reported as misses by `get`, and should be loaded from the original source by the caller.
+
+    Cache hits and misses are counted in shared memory, so that the counters include the `get` calls of the dataloader workers.
+    Each dataloader worker counts in its own slot of the shared memory, so that no lock is needed between the processes.
+    They are available with `get_stats` (e.g. to report them to the sg_logger every epoch, see ImageCacheStatsCallback) and regularly logged.
+    """
+
+    SUPPORTED_COMPRESSIONS = (None, "png", "jpeg")
+    INDEX_DTYPE = np.dtype([("index", np.int64), ("offset", np.int64), ("nbytes", np.int64), ("height", np.int32), ("width", np.int32), ("channels", np.int32)])
+    METADATA_FILENAME = "metadata.json"
+    LOCK_FILENAME = "fill.lock"
+    N_STATS_SLOTS = 64  # Slot 0 is used by the main process, the others by the dataloader workers
+
+    def __init__(
+        self,
+        cache_dir: str,
+        n_images: int,
+        load_image_fn: Callable[[int], np.ndarray],
+        compression: Optional[str] = None,
+        jpeg_quality: int = 95,
+        shard_size_mb: int = 1024,
+        background_fill: bool = False,
+        num_threads: int = 8,
+        log_stats_every: int = 10000,
+        refresh_interval_sec: float = 10.0,
+        verbose: bool = True,
+    ):
+        """
+        :param cache_dir:               Directory where the shards will be stored. It should be specific to the set of images being cached.
+        :param n_images:                Number of images to cache.
+        :param load_image_fn:           Function loading the image (HWC, uint8) of a given index. Used to fill the cache.
+        :param compression:             How to store the images. None stores the raw pixels (fastest reads, largest size),
+                                        "png" is lossless and "jpeg" re-encodes the images with `jpeg_quality`.
+        :param jpeg_quality:            JPEG quality (0-100), only used when compression="jpeg".
+        :param shard_size_mb:           Size (in MB) after which a shard is closed and a new one is started.
+        :param background_fill:         If True, the cache is filled in a background thread and `get` returns None for images not cached yet.
+                                        If False, the cache is filled before returning from the constructor.
+        :param num_threads:             Number of threads used to load the images when filling the cache.
+        :param log_stats_every:         Log the hit/miss counters every `log_stats_every` calls to `get`. Set to 0 to disable.
+        :param refresh_interval_sec:    While the cache is not complete, minimum time between two scans for newly written shards.
+        :param verbose:                 Whether to show a progress bar when filling the cache in the foreground.
+        """
+        if compression not in self.SUPPORTED_COMPRESSIONS:
+            raise ValueError(f"compression={compression} is not supported. Please use one of {self.SUPPORTED_COMPRESSIONS}")
+
+        self.cache_dir = Path(cache_dir)
+        self.n_images = n_images
+        self.compression = compression
+        self.jpeg_quality = jpeg_quality
+        self.shard_size_bytes = int(shard_size_mb * 1024 * 1024)
+        self.num_threads = num_threads
+        self.log_stats_every = log_stats_every
+        self.refresh_interval_sec = refresh_interval_sec
+        self.verbose = verbose
+        self._load_image_fn = load_image_fn
+
+        self._stats_memory = SharedMemory(create=True, size=self.N_STATS_SLOTS * 2 * np.dtype(np.int64).itemsize)
+        self._stats_owner_pid = os.getpid()
+        self._stats_offset = np.zeros(2, dtype=np.int64)
+        self._attach_stats()
+        self._stats[:] = 0
+
+        self._image_shard = np.full(n_images, -1, dtype=np.int64)
+        self._image_records = np.zeros(n_images, dtype=self.INDEX_DTYPE)
+        self._shards: Dict[int, np.memmap] = {}
+        self._loaded_shard_ids = set()
+        self._is_complete = False
+        self._last_refresh_time = 0.0
+        self._fill_thread: Optional[threading.Thread] = None
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._refresh_index(force=True)
+
+        if not self._is_complete:
+            if background_fill:
+                self._fill_thread = threading.Thread(target=self._fill_with_lock, name="ShardedImageCacheFill", daemon=True)
+                self._fill_thread.start()
+            else:
+                self._fill_with_lock()
+                self._refresh_index(force=True)
+
+    @property
+    def is_complete(self) -> bool:
+        """Whether every image was written to the cache."""
+        return self._is_complete
+
+    @property
+    def n_cached_images(self) -> int:
+        """Number of images currently available in the cache (as seen by this process)."""
+        return int((self._image_shard >= 0).sum())
+
+    @property
+    def hits(self) -> int:
+        """Number of `get` calls that found the image in the cache, summed over the processes sharing this cache."""
+        return int(self._stats[:, 0].sum() - self._stats_offset[0])
+
+    @property
+    def misses(self) -> int:
+        """Number of `get` calls that did not find the image in the cache, summed over the processes sharing this cache."""
+        return int(self._stats[:, 1].sum() - self._stats_offset[1])
+
+    def get(self, index: int) -> Optional[np.ndarray]:
+        """Get an image from the cache.
+
+        :param index:   Index of the image
+        :return:        The image (HWC, uint8), or None if the image is not in the cache (yet).
+        """
+        if self._image_shard[index] < 0 and not self._is_complete:
+            self._refresh_index()
+
+        shard_id = self._image_shard[index]
+        if shard_id < 0:
+            image = None
+        else:
+            image = self._read_image(shard_id=int(shard_id), record=self._image_records[index])
+
+        with self._stats_lock:
+            self._stats[self._get_stats_slot(), 0 if image is not None else 1] += 1
+
+        if self.log_stats_every and int(self._stats.sum()) % self.log_stats_every == 0:
+            self.log_stats()
+        return image
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get the cache counters, summed over the processes sharing this cache (e.g. dataloader workers).
+
+        :return: Dictionary with the number of "hits" and "misses", the "hit_rate" and the ratio of images currently cached ("cached_ratio").
+        """
+        if not self._is_complete:
+            self._refresh_index()
+        hits, misses = self.hits, self.misses
+        n_requests = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / n_requests if n_requests else 0.0,
+            "cached_ratio": self.n_cached_images / self.n_images if self.n_images else 1.0,
+        }
+
+    def reset_stats(self) -> None:
+        """Reset the hit/miss counters seen by this process, i.e. only count the `get` calls (of all the processes) from now on."""
+        self._stats_offset = self._stats.sum(axis=0)
+
+    def log_stats(self) -> None:
+        """Log the cache hit/miss counters."""
+        stats = self.get_stats()
+        logger.info(
+            f"Image cache {self.cache_dir.name}: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1%} hit rate), "
+            f"{self.n_cached_images}/{self.n_images} images cached"
+        )
+
+    def wait_until_filled(self, timeout: Optional[float] = None) -> None:
+        """Block until the background fill of this process is over (if any), and load the index of all the shards.
+
+        :param timeout: Maximum time to wait (in seconds). None means no limit.
+        """
+        if self._fill_thread is not None:
+            self._fill_thread.join(timeout=timeout)
+        self._refresh_index(force=True)
+
+    def __getstate__(self):
+        # Memory maps, locks and the fill thread are process specific. They are recreated on demand in the other processes (e.g. dataloader workers).
+        # The shared memory of the counters is passed by name, and attached again when unpickling.
+        state = self.__dict__.copy()
+        state["_shards"] = {}
+        state["_fill_thread"] = None
+        state["_stats_memory"] = self._stats_memory.name
+        state["_stats_owner_pid"] = None
+        del state["_stats"], state["_stats_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._stats_memory = SharedMemory(name=self._stats_memory)
+        self._attach_stats()
+
+    def __del__(self):
+        stats_memory = self.__dict__.get("_stats_memory")
+        if isinstance(stats_memory, SharedMemory):
+            self._stats = None  # The buffer cannot be closed while an array uses it
+            stats_memory.close()
+            if self._stats_owner_pid == os.getpid():  # Not in the forked dataloader workers, nor in the unpickled copies
+                stats_memory.unlink()
+
+    def _attach_stats(self) -> None:
+        """Create the (N_STATS_SLOTS, 2) array of [hits, misses] counters on top of the shared memory."""
+        self._stats = np.ndarray((self.N_STATS_SLOTS, 2), dtype=np.int64, buffer=self._stats_memory.buf)
+        self._stats_lock = threading.Lock()
+
+    def _get_stats_slot(self) -> int:
+        """Slot of the counters written by this process: each dataloader worker has its own slot, and the main process uses slot 0."""
+        worker_info = torch.utils.data.get_worker_info()
+        return 0 if worker_info is None else 1 + worker_info.id % (self.N_STATS_SLOTS - 1)
+
+    def _read_image(self, shard_id: int, record: np.void) -> np.ndarray:
+        shard = self._shards.get(shard_id)
+        if shard is None:
+            shard = np.memmap(self._shard_path(shard_id), dtype=np.uint8, mode="r")
+            self._shards[shard_id] = shard
+
+        offset, nbytes = int(record["offset"]), int(record["nbytes"])
+        buffer = shard[offset : offset + nbytes]
+        if self.compression is None:
+            return np.array(buffer).reshape(int(record["height"]), int(record["width"]), int(record["channels"]))
+
+        image = cv2.imdecode(np.asarray(buffer), cv2.IMREAD_UNCHANGED)
+        return image if image.ndim == 3 else image[:, :, None]
+
+    def _encode_image(self, image: np.ndarray) -> np.ndarray:
+        if image.dtype != np.uint8:
+            raise ValueError(f"Only uint8 images can be cached, got {image.dtype}")
+        if image.ndim == 2:
+            image = image[:, :, None]
+
+        if self.compression is None:
+            return np.ascontiguousarray(image).reshape(-1)
+
+        if self.compression == "png":
+            success, buffer = cv2.imencode(".png", image, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        else:
+            success, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not success:
+            raise RuntimeError(f"Failed to encode image with compression={self.compression}")
+        return buffer.reshape(-1)
+
+    def _shard_path(self, shard_id: int) -> Path:
+        return self.cache_dir / f"shard_{shard_id:05d}.bin"
+
+    def _shard_index_path(self, shard_id: int) -> Path:
+        return self.cache_dir / f"shard_{shard_id:05d}.index.npy"
+
+    def _refresh_index(self, force: bool = False) -> None:
+        """Load the index of the shards that were written since the last refresh (rate limited unless force=True)."""
+        now = time.monotonic()
+        if not force and now - self._last_refresh_time < self.refresh_interval_sec:
+            return
+        self._last_refresh_time = now
+
+        for index_path in sorted(self.cache_dir.glob("shard_*.index.npy")):
+            shard_id = int(index_path.name[len("shard_") :].split(".")[0])
+            if shard_id in self._loaded_shard_ids:
+                continue
+            records = np.load(str(index_path))
+            self._image_shard[records["index"]] = shard_id
+            self._image_records[records["index"]] = records
+            self._loaded_shard_ids.add(shard_id)
+
+        self._is_complete = (self.cache_dir / self.METADATA_FILENAME).exists()
+
+    def _fill_with_lock(self) -> None:
+        """Fill the cache, unless another live process is already doing it (e.g. other DDP ranks sharing the same cache_dir)."""
+        lock_path = self.cache_dir / self.LOCK_FILENAME
+        if not self._acquire_lock(lock_path):
+            logger.info(f"Image cache {self.cache_dir} is being filled by another process. Images will be read from disk until it is ready.")
+            return
+        try:
+            self._fill()
+        except Exception:
+            logger.exception(f"Failed to fill the image cache {self.cache_dir}. Images will keep being read from disk.")
+        finally:
+            lock_path.unlink(missing_ok=True)
+
+    def _acquire_lock(self, lock_path: Path) -> bool:
+        try:
+            fd = os.open(str(lock_path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if not self._is_stale_lock(lock_path):
+                return False
+            lock_path.unlink(missing_ok=True)
+            return self._acquire_lock(lock_path)
+        with os.fdopen(fd, "w") as f:
+            f.write(str(os.getpid()))
+        return True
+
+    @staticmethod
+    def _is_stale_lock(lock_path: Path) -> bool:
+        """A lock is stale if the process that created it does not exist anymore (i.e. it crashed while filling the cache)."""
+        try:
+            pid = int(lock_path.read_text())
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except (ValueError, OSError):
+            return False
+        return False
+
+    def _fill(self) -> None:
+        # Shards are written sequentially, so we can resume right after the last complete shard.
+        self._refresh_index(force=True)
+        cached = np.flatnonzero(self._image_shard >= 0)
+        start_index = int(cached.max()) + 1 if len(cached) else 0
+        shard_id = max(self._loaded_shard_ids) + 1 if self._loaded_shard_ids else 0
+        for tmp_file in self.cache_dir.glob("*.tmp"):
+            tmp_file.unlink(missing_ok=True)
+
+        if start_index == 0:
+            logger.info(f"Caching images to {self.cache_dir} for the first time. Be aware that this will stay in the disk until you delete it yourself.")
+        else:
+            logger.info(f"Resuming the caching of images to {self.cache_dir} from image {start_index}/{self.n_images}.")
+
+        shard_file, shard_records = None, []
+        offset = 0
+        chunk_size = max(self.num_threads * 16, 1)
+        with ThreadPool(self.num_threads) as pool, tqdm(
+            total=self.n_images, initial=start_index, desc="Caching images", disable=not self.verbose or self._fill_thread is not None
+        ) as pbar:
+            for chunk_start in range(start_index, self.n_images, chunk_size):
+                # Process the images by chunks to bound the memory used by the images loaded ahead of the writer.
+                chunk_indexes = list(range(chunk_start, min(chunk_start + chunk_size, self.n_images)))
+                for index, (buffer, shape) in zip(chunk_indexes, pool.imap(self._load_and_encode, chunk_indexes)):
+                    if shard_file is None:
+                        shard_file = open(self._temp_path(self._shard_path(shard_id)), "wb")
+                    shard_file.write(buffer.tobytes())
+                    shard_records.append((index, offset, buffer.nbytes, *shape))
+                    offset += buffer.nbytes
+                    if offset >= self.shard_size_bytes:
+                        self._close_shard(shard_id, shard_file, shard_records)
+                        shard_id, shard_file, shard_records, offset = shard_id + 1, None, [], 0
+                pbar.update(len(chunk_indexes))
+
+        if shard_file is not None:
+            self._close_shard(shard_id, shard_file, shard_records)
+
+        self._write_atomically(
+            self.cache_dir / self.METADATA_FILENAME,
+            json.dumps({"n_images": self.n_images, "n_shards": shard_id + 1, "compression": self.compression}).encode("utf-8"),
+        )
+
+    def _load_and_encode(self, index: int) -> Tuple[np.ndarray, Tuple[int, int, int]]:
+        image = self._load_image_fn(index)
+        shape = image.shape if image.ndim == 3 else (*image.shape, 1)
+        return self._encode_image(image), shape
+
+    def _close_shard(self, shard_id: int, shard_file, shard_records: List[tuple]) -> None:
+        """Publish a shard. The index is renamed last, so that readers never see an index pointing to an incomplete data file."""
+        shard_file.flush()
+        os.fsync(shard_file.fileno())
+        shard_file.close()
+        os.replace(self._temp_path(self._shard_path(shard_id)), self._shard_path(shard_id))
+
+        index_tmp_path = self._temp_path(self._shard_index_path(shard_id))
+        with open(index_tmp_path, "wb") as f:
+            np.save(f, np.array(shard_records, dtype=self.INDEX_DTYPE))
+        os.replace(index_tmp_path, self._shard_index_path(shard_id))
+
+    def _write_atomically(self, path: Path, content: bytes) -> None:
+        tmp_path = self._temp_path(path)
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _temp_path(path: Path) -> Path:
+        return path.with_name(path.name + f".{os.getpid()}.tmp")
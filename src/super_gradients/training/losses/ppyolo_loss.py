@@ -2,7 +2,6 @@ from typing import Mapping, Tuple, Union, Optional
 
 import numpy as np
 import torch
-import torch.nn.functional as F
 from torch import nn, Tensor
 
 import super_gradients
@@ -10,6 +9,7 @@ from super_gradients.common.object_names import Losses
 from super_gradients.common.registry.registry import register_loss
 from super_gradients.training.datasets.data_formats.bbox_formats.cxcywh import cxcywh_to_xyxy
 from super_gradients.training.utils.bbox_utils import batch_distance2bbox
+from super_gradients.training.utils.detection_utils import pack_flat_tensors_per_image
 from super_gradients.common.environment.ddp_utils import get_world_size
 
 
@@ -678,44 +678,14 @@ class PPYoloELoss(nn.Module):
          - gt_bbox: (Tensor, float32): Ground truth bboxes, shape(B, n, 4) in x1y1x2y2 format
          - pad_gt_mask (Tensor, float32): 1 means bbox, 0 means no bbox, shape(B, n, 1)
         """
-        image_index = targets[:, 0]
         gt_class = targets[:, 1:2].long()
         gt_bbox = cxcywh_to_xyxy(targets[:, 2:6], image_shape=None)
+        valid_bboxes = gt_bbox.sum(dim=1, keepdims=True) > 0
 
-        per_image_class = []
-        per_image_bbox = []
-        per_image_pad_mask = []
-
-        max_boxes = 0
-        for i in range(batch_size):
-            mask = image_index == i
-
-            image_labels = gt_class[mask]
-            image_bboxes = gt_bbox[mask, :]
-            valid_bboxes = image_bboxes.sum(dim=1, keepdims=True) > 0
-
-            per_image_class.append(image_labels)
-            per_image_bbox.append(image_bboxes)
-            per_image_pad_mask.append(valid_bboxes)
-
-            max_boxes = max(max_boxes, mask.sum().item())
-
-        for i in range(batch_size):
-            elements_to_pad = max_boxes - len(per_image_class[i])
-            padding_left = 0
-            padding_right = 0
-            padding_top = 0
-            padding_bottom = elements_to_pad
-            pad = padding_left, padding_right, padding_top, padding_bottom
-            per_image_class[i] = F.pad(per_image_class[i], pad, mode="constant", value=0)
-            per_image_bbox[i] = F.pad(per_image_bbox[i], pad, mode="constant", value=0)
-            per_image_pad_mask[i] = F.pad(per_image_pad_mask[i], pad, mode="constant", value=0)
-
-        return {
-            "gt_class": torch.stack(per_image_class, dim=0),
-            "gt_bbox": torch.stack(per_image_bbox, dim=0),
-            "pad_gt_mask": torch.stack(per_image_pad_mask, dim=0),
-        }
+        (gt_class, gt_bbox, pad_gt_mask), _ = pack_flat_tensors_per_image(
+            image_index=targets[:, 0], flat_tensors=[gt_class, gt_bbox, valid_bboxes], batch_size=batch_size
+        )
+        return {"gt_class": gt_class, "gt_bbox": gt_bbox, "pad_gt_mask": pad_gt_mask}
 
     def forward(
         self,
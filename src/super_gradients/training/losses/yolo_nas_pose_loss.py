@@ -3,7 +3,6 @@ from typing import Mapping, Tuple, Union, List, Optional
 
 import numpy as np
 import torch
-import torch.nn.functional as F
 from torch import nn, Tensor
 
 from super_gradients.common.object_names import Losses
@@ -15,7 +14,7 @@ from .functional import bbox_ciou_loss
 
 from .ppyolo_loss import GIoULoss, batch_iou_similarity, check_points_inside_bboxes, gather_topk_anchors, compute_max_iou_anchor
 
-from super_gradients.training.datasets.pose_estimation_datasets.yolo_nas_pose_collate_fn import undo_flat_collate_tensors_with_batch_index
+from super_gradients.training.utils.detection_utils import pack_flat_tensors_per_image
 
 
 @dataclasses.dataclass
@@ -356,50 +355,18 @@ class YoloNASPoseLoss(nn.Module):
         """
         target_boxes, target_joints, target_iscrowd = targets
 
-        image_index = target_boxes[:, 0]
         gt_bbox = target_boxes[:, 1:5]
-
-        per_image_class = []
-        per_image_bbox = []
-        per_image_pad_mask = []
-        per_image_targets = undo_flat_collate_tensors_with_batch_index(target_joints, batch_size)
-        per_image_crowds = undo_flat_collate_tensors_with_batch_index(target_iscrowd, batch_size)
-
-        max_boxes = 0
-        for i in range(batch_size):
-            mask = image_index == i
-
-            image_bboxes = gt_bbox[mask, :]
-            valid_bboxes = image_bboxes.sum(dim=1, keepdims=True) > 0
-
-            per_image_bbox.append(image_bboxes)
-            per_image_pad_mask.append(valid_bboxes)
-            # Since for pose estimation we have only one class, we can just fill it with zeros
-            per_image_class.append(torch.zeros((len(image_bboxes), 1), dtype=torch.long, device=target_boxes.device))
-
-            max_boxes = max(max_boxes, mask.sum().item())
-
-        for i in range(batch_size):
-            elements_to_pad = max_boxes - len(per_image_bbox[i])
-            padding_left = 0
-            padding_right = 0
-            padding_top = 0
-            padding_bottom = elements_to_pad
-            pad = padding_left, padding_right, padding_top, padding_bottom
-            per_image_class[i] = F.pad(per_image_class[i], pad, mode="constant", value=0)
-            per_image_bbox[i] = F.pad(per_image_bbox[i], pad, mode="constant", value=0)
-            per_image_pad_mask[i] = F.pad(per_image_pad_mask[i], pad, mode="constant", value=0)
-            per_image_targets[i] = F.pad(per_image_targets[i], (0, 0) + pad, mode="constant", value=0)
-            per_image_crowds[i] = F.pad(per_image_crowds[i], pad, mode="constant", value=0)
-
-        new_targets = {
-            "gt_class": torch.stack(per_image_class, dim=0),
-            "gt_bbox": torch.stack(per_image_bbox, dim=0),
-            "pad_gt_mask": torch.stack(per_image_pad_mask, dim=0),
-            "gt_poses": torch.stack(per_image_targets, dim=0),
-            "gt_crowd": torch.stack(per_image_crowds, dim=0),
-        }
-        return new_targets
+        valid_bboxes = gt_bbox.sum(dim=1, keepdims=True) > 0
+        # Since for pose estimation we have only one class, we can just fill it with zeros
+        gt_class = torch.zeros((len(gt_bbox), 1), dtype=torch.long, device=target_boxes.device)
+
+        # Boxes, joints and crowd flags are collated together, so they share the same batch index
+        (gt_class, gt_bbox, pad_gt_mask, gt_poses, gt_crowd), _ = pack_flat_tensors_per_image(
+            image_index=target_boxes[:, 0],
+            flat_tensors=[gt_class, gt_bbox, valid_bboxes, target_joints[:, :, 1:], target_iscrowd[:, 1:]],
+            batch_size=batch_size,
+        )
+        return {"gt_class": gt_class, "gt_bbox": gt_bbox, "pad_gt_mask": pad_gt_mask, "gt_poses": gt_poses, "gt_crowd": gt_crowd}
 
     def forward(
         self,
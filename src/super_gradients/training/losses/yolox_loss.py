@@ -17,7 +17,7 @@ from super_gradients.common.object_names import Losses
 from super_gradients.common.registry.registry import register_loss
 from super_gradients.common.abstractions.abstract_logger import get_logger
 from super_gradients.training.utils import torch_version_is_greater_or_equal
-from super_gradients.training.utils.detection_utils import calculate_bbox_iou_matrix
+from super_gradients.training.utils.detection_utils import calculate_bbox_iou_matrix, calculate_batched_bbox_iou_matrix, pack_flat_tensors_per_image
 
 logger = get_logger(__name__)
 
@@ -116,6 +116,10 @@ class YoloXDetectionLoss(_Loss):
     :param obj_weight:              Weight to apply to the obj loss term.
     :param cls_weight:              Weight to apply to the cls loss term.
     :param cls_pos_weight:          Class weights for the cls loss. Passed on to torch.nn.BCEWithLogitsLoss
+    :param batched_assignment:      If True, SimOTA label assignment is computed for all the images of the batch at once, with ground truths
+                                    and candidate cells padded to the largest image (see get_batched_assignments), instead of image by image.
+                                    Assignments are the same, but the cost matrices of the whole batch are held in memory at the same time.
+                                    On OOM, the batch falls back to the image by image assignment.
     """
 
     def __init__(
@@ -129,6 +133,7 @@ class YoloXDetectionLoss(_Loss):
         obj_weight: float = 1.0,
         cls_weight: float = 1.0,
         cls_pos_weight: Optional[torch.Tensor] = None,
+        batched_assignment: bool = False,
     ):
         super().__init__()
         self.grids = [torch.zeros(1)] * len(strides)
@@ -145,6 +150,7 @@ class YoloXDetectionLoss(_Loss):
         self.iou_weight = 5.0 if iou_weight is None else iou_weight
         self.obj_weight = 1.0 if obj_weight is None else obj_weight
         self.cls_weight = 1.0 if cls_weight is None else cls_weight
+        self.batched_assignment = batched_assignment
 
     @property
     def component_names(self) -> List[str]:
@@ -205,6 +211,75 @@ class YoloXDetectionLoss(_Loss):
         cls_preds = transformed_outputs[:, :, 5:]  # [batch, n_anchors_all, n_cls]
 
         # calculate targets
+        if self.batched_assignment:
+            try:
+                cls_targets, reg_targets, l1_targets, obj_targets, fg_masks, num_fg, num_gts = self._get_batched_targets(
+                    targets, transformed_outputs, bbox_preds, cls_preds, obj_preds, expanded_strides, x_shifts, y_shifts
+                )
+            except RuntimeError as e:
+                if "out of memory" not in str(e):
+                    raise
+                logger.error("OOM RuntimeError is raised during the batched label assignment. Image by image assignment is applied in this batch.")
+                torch.cuda.empty_cache()
+                cls_targets, reg_targets, l1_targets, obj_targets, fg_masks, num_fg, num_gts = self._get_targets_per_image(
+                    targets, transformed_outputs, bbox_preds, cls_preds, obj_preds, expanded_strides, x_shifts, y_shifts
+                )
+        else:
+            cls_targets, reg_targets, l1_targets, obj_targets, fg_masks, num_fg, num_gts = self._get_targets_per_image(
+                targets, transformed_outputs, bbox_preds, cls_preds, obj_preds, expanded_strides, x_shifts, y_shifts
+            )
+
+        num_fg = max(num_fg, 1)
+        # loss terms divided by the total number of foregrounds
+        loss_iou = self.iou_loss(bbox_preds.view(-1, 4)[fg_masks], reg_targets).sum() / num_fg
+        loss_obj = self.obj_bcewithlog_loss(obj_preds.view(-1, 1), obj_targets).sum() / num_fg
+        loss_cls = self.cls_bcewithlog_loss(cls_preds.view(-1, self.num_classes)[fg_masks], cls_targets).sum() / num_fg
+        if self.use_l1:
+            loss_l1 = self.l1_loss(raw_outputs.view(-1, 4)[fg_masks], l1_targets).sum() / num_fg
+        else:
+            loss_l1 = 0.0
+
+        loss = self.iou_weight * loss_iou + self.obj_weight * loss_obj + self.cls_weight * loss_cls + loss_l1
+
+        return (
+            loss,
+            torch.cat(
+                (
+                    loss_iou.unsqueeze(0),
+                    loss_obj.unsqueeze(0),
+                    loss_cls.unsqueeze(0),
+                    torch.tensor(loss_l1).unsqueeze(0).to(loss.device),
+                    torch.tensor(num_fg / max(num_gts, 1)).unsqueeze(0).to(loss.device),
+                    loss.unsqueeze(0),
+                )
+            ).detach(),
+        )
+
+    def _get_targets_per_image(
+        self,
+        targets: torch.Tensor,
+        transformed_outputs: torch.Tensor,
+        bbox_preds: torch.Tensor,
+        cls_preds: torch.Tensor,
+        obj_preds: torch.Tensor,
+        expanded_strides: torch.Tensor,
+        x_shifts: torch.Tensor,
+        y_shifts: torch.Tensor,
+    ) -> Tuple[torch.Tensor, torch.Tensor, Optional[torch.Tensor], torch.Tensor, torch.Tensor, float, float]:
+        """
+        Assign cells to ground truths image by image and compute the targets of all the loss terms.
+
+        :param targets:             [Num_targets x (4 + 2)], values on dim 1 are: image id in a batch, class, box x y w h
+        :param transformed_outputs: predictions with boxes in real coordinates, shape [batch_size x num_cells x (num_classes + 5)]
+        :param bbox_preds:          predicted boxes, shape [batch_size x num_cells x 4]
+        :param cls_preds:           class logits, shape [batch_size x num_cells x num_classes]
+        :param obj_preds:           objectness logits, shape [batch_size x num_cells x 1]
+        :param expanded_strides:    stride of the output grid the prediction is coming from, shape [1 x num_cells]
+        :param x_shifts:            x coordinate on the grid cell the prediction is coming from, shape [1 x num_cells]
+        :param y_shifts:            y coordinate on the grid cell the prediction is coming from, shape [1 x num_cells]
+        :return:                    cls_targets, reg_targets, l1_targets (None if not use_l1), obj_targets, fg_masks, num_fg, num_gts
+                                    where the targets of all the images are concatenated (image by image, in the order of the cells).
+        """
         total_num_anchors = transformed_outputs.shape[1]
         cls_targets = []
         reg_targets = []
@@ -300,31 +375,7 @@ class YoloXDetectionLoss(_Loss):
         if self.use_l1:
             l1_targets = torch.cat(l1_targets, 0)
 
-        num_fg = max(num_fg, 1)
-        # loss terms divided by the total number of foregrounds
-        loss_iou = self.iou_loss(bbox_preds.view(-1, 4)[fg_masks], reg_targets).sum() / num_fg
-        loss_obj = self.obj_bcewithlog_loss(obj_preds.view(-1, 1), obj_targets).sum() / num_fg
-        loss_cls = self.cls_bcewithlog_loss(cls_preds.view(-1, self.num_classes)[fg_masks], cls_targets).sum() / num_fg
-        if self.use_l1:
-            loss_l1 = self.l1_loss(raw_outputs.view(-1, 4)[fg_masks], l1_targets).sum() / num_fg
-        else:
-            loss_l1 = 0.0
-
-        loss = self.iou_weight * loss_iou + self.obj_weight * loss_obj + self.cls_weight * loss_cls + loss_l1
-
-        return (
-            loss,
-            torch.cat(
-                (
-                    loss_iou.unsqueeze(0),
-                    loss_obj.unsqueeze(0),
-                    loss_cls.unsqueeze(0),
-                    torch.tensor(loss_l1).unsqueeze(0).to(loss.device),
-                    torch.tensor(num_fg / max(num_gts, 1)).unsqueeze(0).to(loss.device),
-                    loss.unsqueeze(0),
-                )
-            ).detach(),
-        )
+        return cls_targets, reg_targets, (l1_targets if self.use_l1 else None), obj_targets, fg_masks, num_fg, num_gts
 
     def prepare_predictions(self, predictions: List[torch.Tensor]) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
         """
@@ -625,6 +676,183 @@ class YoloXDetectionLoss(_Loss):
         pred_ious_this_matching = (matching_matrix * pair_wise_ious).sum(0)[fg_mask_inboxes]
         return num_fg, gt_matched_classes, pred_ious_this_matching, matched_gt_inds
 
+    def _get_batched_targets(
+        self,
+        targets: torch.Tensor,
+        transformed_outputs: torch.Tensor,
+        bbox_preds: torch.Tensor,
+        cls_preds: torch.Tensor,
+        obj_preds: torch.Tensor,
+        expanded_strides: torch.Tensor,
+        x_shifts: torch.Tensor,
+        y_shifts: torch.Tensor,
+    ) -> Tuple[torch.Tensor, torch.Tensor, Optional[torch.Tensor], torch.Tensor, torch.Tensor, float, float]:
+        """
+        Batched equivalent of _get_targets_per_image, returning the same targets in the same order.
+        """
+        fg_mask, matched_gt_inds, pred_ious_this_matching, gt_bboxes, gt_classes = self.get_batched_assignments(
+            targets, bbox_preds, cls_preds, obj_preds, expanded_strides, x_shifts, y_shifts
+        )
+
+        # nonzero enumerates the foregrounds image by image, in the order of the cells, like the concatenation of the per image targets
+        fg_image_ids, fg_cell_ids = fg_mask.nonzero(as_tuple=True)
+        fg_gt_ids = matched_gt_inds[fg_image_ids, fg_cell_ids]
+        num_fg = len(fg_cell_ids)
+
+        cls_targets = F.one_hot(gt_classes[fg_image_ids, fg_gt_ids].to(torch.int64), self.num_classes) * pred_ious_this_matching[
+            fg_image_ids, fg_cell_ids
+        ].unsqueeze(-1)
+        reg_targets = gt_bboxes[fg_image_ids, fg_gt_ids]
+        obj_targets = fg_mask.view(-1, 1).to(transformed_outputs.dtype)
+        l1_targets = None
+        if self.use_l1:
+            l1_targets = self.get_l1_target(
+                transformed_outputs.new_zeros((num_fg, 4)),
+                reg_targets,
+                expanded_strides[0][fg_cell_ids],
+                x_shifts=x_shifts[0][fg_cell_ids],
+                y_shifts=y_shifts[0][fg_cell_ids],
+            )
+        return cls_targets, reg_targets, l1_targets, obj_targets, fg_mask.view(-1), num_fg, len(targets)
+
+    @torch.no_grad()
+    def get_batched_assignments(
+        self,
+        targets: torch.Tensor,
+        bbox_preds: torch.Tensor,
+        cls_preds: torch.Tensor,
+        obj_preds: torch.Tensor,
+        expanded_strides: torch.Tensor,
+        x_shifts: torch.Tensor,
+        y_shifts: torch.Tensor,
+        ious_loss_cost_coeff: float = 3.0,
+        outside_boxes_and_center_cost_coeff: float = 100000.0,
+    ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
+        """
+        Match cells to ground truths for all the images of the batch at once, with the same rules as get_assignments:
+            * at most 1 GT per cell
+            * dynamic number of cells per GT
+
+        Ground truths are padded to the largest number of GTs in an image (G), and the candidate cells (cells inside a GT box or
+        close to a GT center) are padded to the largest number of candidates in an image (M).
+        Costs of padded pairs are set to infinity, so that they are never matched.
+
+        :param targets:                             [Num_targets x (4 + 2)], values on dim 1 are: image id in a batch, class, box x y w h
+        :param bbox_preds:                          Predicted boxes, shape [batch_size x num_cells x 4]
+        :param cls_preds:                           Class logits, shape [batch_size x num_cells x num_classes]
+        :param obj_preds:                           Objectness logits, shape [batch_size x num_cells x 1]
+        :param expanded_strides:                    Stride of the output grid the prediction is coming from, shape [1 x num_cells]
+        :param x_shifts:                            X's in cell coordinates, shape [1 x num_cells]
+        :param y_shifts:                            Y's in cell coordinates, shape [1 x num_cells]
+        :param ious_loss_cost_coeff:                Cost coefficient for iou loss in dynamic matching (default=3).
+        :param outside_boxes_and_center_cost_coeff: Cost coefficient of cells outside the radius and bbox of gts in dynamic matching (default=100000).
+        :return: 5 tensors:
+                    * fg_mask:                  [batch_size x num_cells], cells matched with a GT
+                    * matched_gt_inds:          [batch_size x num_cells], index of the matched GT in the padded GTs of the image
+                    * pred_ious_this_matching:  [batch_size x num_cells], IoU between the predicted box and the matched GT
+                    * gt_bboxes:                [batch_size x G x 4], padded GT boxes
+                    * gt_classes:               [batch_size x G], padded GT classes
+        """
+        batch_size, total_num_anchors = bbox_preds.shape[:2]
+        device = bbox_preds.device
+        (gt_bboxes, gt_classes), gt_valid = pack_flat_tensors_per_image(targets[:, 0], [targets[:, 2:6], targets[:, 1]], batch_size)
+        num_gt = gt_bboxes.shape[1]
+
+        fg_mask = torch.zeros((batch_size, total_num_anchors), dtype=torch.bool, device=device)
+        matched_gt_inds = torch.zeros((batch_size, total_num_anchors), dtype=torch.long, device=device)
+        pred_ious_this_matching = bbox_preds.new_zeros((batch_size, total_num_anchors))
+        if num_gt == 0:
+            return fg_mask, matched_gt_inds, pred_ious_this_matching, gt_bboxes, gt_classes
+
+        # candidate cells of every image, padded to [batch_size x M]
+        is_in_boxes, is_in_centers = self.get_batched_in_boxes_info(gt_bboxes, gt_valid, expanded_strides, x_shifts, y_shifts)
+        candidate_image_ids, candidate_cell_ids = (is_in_boxes | is_in_centers).any(dim=1).nonzero(as_tuple=True)
+        (candidate_cell_ids,), candidate_valid = pack_flat_tensors_per_image(candidate_image_ids, [candidate_cell_ids], batch_size)
+        num_candidates = candidate_cell_ids.shape[1]
+        if num_candidates == 0:
+            return fg_mask, matched_gt_inds, pred_ious_this_matching, gt_bboxes, gt_classes
+
+        image_ids = torch.arange(batch_size, device=device).unsqueeze(1)
+        candidate_bboxes = bbox_preds[image_ids, candidate_cell_ids]
+        is_in_boxes_and_center = (is_in_boxes & is_in_centers).gather(2, candidate_cell_ids.unsqueeze(1).expand(-1, num_gt, -1))
+        pair_valid = gt_valid.unsqueeze(2) & candidate_valid.unsqueeze(1)
+
+        # calculate cost between all candidates and all ground truths of each image, shape [batch_size x G x M]
+        pair_wise_ious = calculate_batched_bbox_iou_matrix(gt_bboxes, candidate_bboxes, x1y1x2y2=False)
+        pair_wise_ious_loss = -torch.log(pair_wise_ious + 1e-8)
+        gt_cls_per_image = F.one_hot(gt_classes.to(torch.int64), self.num_classes).bool().unsqueeze(2)
+
+        with torch.cuda.amp.autocast(enabled=False):
+            cls_preds_ = cls_preds[image_ids, candidate_cell_ids].float().sigmoid_() * obj_preds[image_ids, candidate_cell_ids].float().sigmoid_()
+            cls_preds_ = cls_preds_.sqrt_()
+            # the BCE of each (cell, class) is computed once for a positive and once for a negative target, instead of once per GT,
+            # and the BCE of each GT is gathered from them (these are the same values as computing it directly for each GT)
+            positive_cls_loss = F.binary_cross_entropy(cls_preds_, torch.ones_like(cls_preds_), reduction="none").unsqueeze(1)
+            negative_cls_loss = F.binary_cross_entropy(cls_preds_, torch.zeros_like(cls_preds_), reduction="none").unsqueeze(1)
+            pair_wise_cls_loss = torch.where(gt_cls_per_image, positive_cls_loss, negative_cls_loss).sum(-1)
+        del cls_preds_, positive_cls_loss, negative_cls_loss
+
+        cost = pair_wise_cls_loss + ious_loss_cost_coeff * pair_wise_ious_loss + outside_boxes_and_center_cost_coeff * (~is_in_boxes_and_center)
+        cost = cost.masked_fill(~pair_valid, float("inf"))
+        pair_wise_ious = pair_wise_ious.masked_fill(~pair_valid, 0.0)
+        del pair_wise_cls_loss, pair_wise_ious_loss
+
+        # for each GT get a dynamic k of candidates with a minimum cost: k = int(sum[top 10 IoUs])
+        n_candidate_k = min(10, num_candidates)
+        topk_ious, _ = torch.topk(pair_wise_ious, n_candidate_k, dim=2)
+        dynamic_ks = torch.clamp(topk_ious.sum(2).int(), min=1)
+        # k <= 10, so the k smallest costs of every GT are among its 10 smallest costs
+        topk_costs, pos_idx = torch.topk(cost, n_candidate_k, dim=2, largest=False)
+        is_selected = (torch.arange(n_candidate_k, device=device) < dynamic_ks.unsqueeze(2)) & torch.isfinite(topk_costs)
+        matching_matrix = torch.zeros_like(cost, dtype=torch.uint8).scatter_(2, pos_idx, is_selected.to(torch.uint8))
+        del topk_ious, dynamic_ks, pos_idx
+
+        # leave at most one GT per candidate, chose the one with the smallest cost
+        anchor_matching_gt = matching_matrix.sum(1)
+        _, cost_argmin = torch.min(cost, dim=1)
+        candidate_gt_inds = torch.where(anchor_matching_gt > 1, cost_argmin, matching_matrix.argmax(1))
+        candidate_ious = pair_wise_ious.gather(1, candidate_gt_inds.unsqueeze(1)).squeeze(1)
+
+        # scatter back from the candidates to all the cells
+        is_matched = (anchor_matching_gt > 0) & candidate_valid
+        matched_image_ids = image_ids.expand_as(candidate_cell_ids)[is_matched]
+        matched_cell_ids = candidate_cell_ids[is_matched]
+        fg_mask[matched_image_ids, matched_cell_ids] = True
+        matched_gt_inds[matched_image_ids, matched_cell_ids] = candidate_gt_inds[is_matched]
+        pred_ious_this_matching[matched_image_ids, matched_cell_ids] = candidate_ious[is_matched]
+        return fg_mask, matched_gt_inds, pred_ious_this_matching, gt_bboxes, gt_classes
+
+    def get_batched_in_boxes_info(
+        self, gt_bboxes: torch.Tensor, gt_valid: torch.Tensor, expanded_strides: torch.Tensor, x_shifts: torch.Tensor, y_shifts: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Batched equivalent of get_in_boxes_info, without the reduction over the GTs.
+
+        :param gt_bboxes:           Padded GT boxes (cx, cy, w, h), shape [batch_size x G x 4]
+        :param gt_valid:            Mask of the non-padded GTs, shape [batch_size x G]
+        :param expanded_strides:    Stride of the output grid the prediction is coming from, shape [1 x num_cells]
+        :param x_shifts:            X's in cell coordinates, shape [1 x num_cells]
+        :param y_shifts:            Y's in cell coordinates, shape [1 x num_cells]
+        :return: is_in_boxes, is_in_centers, both of shape [batch_size x G x num_cells]
+            where:
+             - is_in_boxes masks the cells whose center is inside a GT box
+             - is_in_centers masks the cells whose center is within self.center_sampling_radius cells from a GT center
+        """
+        expanded_strides_per_image = expanded_strides[0]
+        x_centers = (x_shifts[0] * expanded_strides_per_image + 0.5 * expanded_strides_per_image).view(1, 1, -1)
+        y_centers = (y_shifts[0] * expanded_strides_per_image + 0.5 * expanded_strides_per_image).view(1, 1, -1)
+        gt_x, gt_y, gt_w, gt_h = [gt_bboxes[:, :, i : i + 1] for i in range(4)]
+
+        is_in_boxes = (x_centers - (gt_x - 0.5 * gt_w) > 0.0) & (y_centers - (gt_y - 0.5 * gt_h) > 0.0)
+        is_in_boxes &= ((gt_x + 0.5 * gt_w) - x_centers > 0.0) & ((gt_y + 0.5 * gt_h) - y_centers > 0.0)
+
+        center_radius = (self.center_sampling_radius * expanded_strides_per_image).view(1, 1, -1)
+        is_in_centers = (x_centers - (gt_x - center_radius) > 0.0) & (y_centers - (gt_y - center_radius) > 0.0)
+        is_in_centers &= ((gt_x + center_radius) - x_centers > 0.0) & ((gt_y + center_radius) - y_centers > 0.0)
+
+        gt_valid = gt_valid.unsqueeze(2)
+        return is_in_boxes & gt_valid, is_in_centers & gt_valid
+
 
 @register_loss(name=Losses.YOLOX_FAST_LOSS, deprecated_name="yolox_fast_loss")
 class YoloXFastDetectionLoss(YoloXDetectionLoss):
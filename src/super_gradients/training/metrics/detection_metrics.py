@@ -10,7 +10,13 @@ import super_gradients.common.environment.ddp_utils
 from super_gradients.common.object_names import Metrics
 from super_gradients.common.registry.registry import register_metric
 from super_gradients.training.utils import tensor_container_to_device
-from super_gradients.training.utils.detection_utils import compute_detection_matching, compute_detection_metrics
+from super_gradients.training.utils.detection_utils import (
+    compute_detection_matching,
+    compute_detection_matching_batched,
+    compute_detection_matching_histograms,
+    compute_detection_metrics,
+    compute_detection_metrics_from_histograms,
+)
 from super_gradients.training.utils.detection_utils import DetectionPostPredictionCallback, IouThreshold
 from super_gradients.common.abstractions.abstract_logger import get_logger
 
@@ -56,6 +62,15 @@ class DetectionMetrics(Metric):
     :param class_names:                     Array of class names. When include_classwise_ap=True, will use these names to make
                                             per-class APs keys in the output metrics dictionary.
                                             If None, will use dummy names `class_{idx}` instead.
+    :param batched_matching:                If True, predictions and targets of the whole batch are matched at once with padded tensors
+                                            (see compute_detection_matching_batched) instead of image by image.
+                                            The matching results are identical, but it is much faster for large batches and many boxes.
+    :param score_histogram_bins:            If None (default), the matching info of every prediction is accumulated, which takes
+                                            memory proportional to the size of the dataset.
+                                            If set, the state is instead accumulated in fixed-size per-class, per-IoU-threshold
+                                            histograms of matched/false positive counts binned by confidence score, with this many bins.
+                                            The memory does not depend on the dataset size and DDP sync is a single all_reduce,
+                                            but metrics are approximated at the bins boundaries (more bins = closer to the exact values).
     """
 
     def __init__(
@@ -72,6 +87,8 @@ class DetectionMetrics(Metric):
         calc_best_score_thresholds: bool = False,
         include_classwise_ap: bool = False,
         class_names: List[str] = None,
+        batched_matching: bool = False,
+        score_histogram_bins: Optional[int] = None,
     ):
         if class_names is None and include_classwise_ap:
             logger.warning(
@@ -123,13 +140,24 @@ class DetectionMetrics(Metric):
         self.denormalize_targets = not normalize_targets
         self.world_size = None
         self.rank = None
-        self.add_state(f"matching_info{self._get_range_str()}", default=[], dist_reduce_fx=None)
+        self.score_histogram_bins = score_histogram_bins
+        if self.score_histogram_bins is None:
+            self.add_state(f"matching_info{self._get_range_str()}", default=[], dist_reduce_fx=None)
+        else:
+            n_iou_thresholds = len(self.iou_thresholds)
+            self.add_state("matched_histogram", default=torch.zeros((num_cls, n_iou_thresholds, score_histogram_bins), dtype=torch.long), dist_reduce_fx="sum")
+            self.add_state(
+                "false_positive_histogram", default=torch.zeros((num_cls, n_iou_thresholds, score_histogram_bins), dtype=torch.long), dist_reduce_fx="sum"
+            )
+            self.add_state("preds_histogram", default=torch.zeros((num_cls, score_histogram_bins), dtype=torch.long), dist_reduce_fx="sum")
+            self.add_state("n_targets", default=torch.zeros(num_cls, dtype=torch.long), dist_reduce_fx="sum")
 
         self.recall_thresholds = torch.linspace(0, 1, 101) if recall_thres is None else recall_thres
         self.score_threshold = score_thres
         self.top_k_predictions = top_k_predictions
 
         self.accumulate_on_cpu = accumulate_on_cpu
+        self.batched_matching = batched_matching
 
     def update(self, preds, target: torch.Tensor, device: str, inputs: torch.tensor, crowd_targets: Optional[torch.Tensor] = None) -> None:
         """
@@ -150,7 +178,8 @@ class DetectionMetrics(Metric):
 
         preds = self.post_prediction_callback(preds, device=device)
 
-        new_matching_info = compute_detection_matching(
+        matching_fn = compute_detection_matching_batched if self.batched_matching else compute_detection_matching
+        new_matching_info = matching_fn(
             preds,
             targets,
             height,
@@ -163,28 +192,45 @@ class DetectionMetrics(Metric):
             return_on_cpu=self.accumulate_on_cpu,
         )
 
-        accumulated_matching_info = getattr(self, f"matching_info{self._get_range_str()}")
-        setattr(self, f"matching_info{self._get_range_str()}", accumulated_matching_info + new_matching_info)
+        if self.score_histogram_bins is not None:
+            if len(new_matching_info):
+                new_histograms = compute_detection_matching_histograms(new_matching_info, num_cls=self.num_cls, n_score_bins=self.score_histogram_bins)
+                for state_name, new_histogram in zip(self._histogram_state_names, new_histograms):
+                    accumulated_histogram = getattr(self, state_name)
+                    setattr(self, state_name, accumulated_histogram + new_histogram.to(accumulated_histogram.device))
+        else:
+            accumulated_matching_info = getattr(self, f"matching_info{self._get_range_str()}")
+            setattr(self, f"matching_info{self._get_range_str()}", accumulated_matching_info + new_matching_info)
 
     def compute(self) -> Dict[str, Union[float, torch.Tensor]]:
         """Compute the metrics for all the accumulated results.
         :return: Metrics of interest
         """
         mean_ap, mean_precision, mean_recall, mean_f1, best_score_threshold, best_score_threshold_per_cls = -1.0, -1.0, -1.0, -1.0, -1.0, None
-        accumulated_matching_info = getattr(self, f"matching_info{self._get_range_str()}")
         mean_ap_per_class = np.zeros(self.num_cls)
 
-        if len(accumulated_matching_info):
-            matching_info_tensors = [torch.cat(x, 0) for x in list(zip(*accumulated_matching_info))]
-
-            # shape (n_class, nb_iou_thresh)
-            ap, precision, recall, f1, unique_classes, best_score_threshold, best_score_threshold_per_cls = compute_detection_metrics(
-                *matching_info_tensors,
-                recall_thresholds=self.recall_thresholds,
-                score_threshold=self.score_threshold,
-                device="cpu" if self.accumulate_on_cpu else self.device,
-                calc_best_score_thresholds=self.calc_best_score_thresholds,
-            )
+        if self._is_any_matching_info_accumulated():
+            if self.score_histogram_bins is not None:
+                # shape (n_class, nb_iou_thresh)
+                ap, precision, recall, f1, unique_classes, best_score_threshold, best_score_threshold_per_cls = compute_detection_metrics_from_histograms(
+                    *[getattr(self, state_name) for state_name in self._histogram_state_names],
+                    recall_thresholds=self.recall_thresholds,
+                    score_threshold=self.score_threshold,
+                    device="cpu" if self.accumulate_on_cpu else self.device,
+                    calc_best_score_thresholds=self.calc_best_score_thresholds,
+                )
+            else:
+                accumulated_matching_info = getattr(self, f"matching_info{self._get_range_str()}")
+                matching_info_tensors = [torch.cat(x, 0) for x in list(zip(*accumulated_matching_info))]
+
+                # shape (n_class, nb_iou_thresh)
+                ap, precision, recall, f1, unique_classes, best_score_threshold, best_score_threshold_per_cls = compute_detection_metrics(
+                    *matching_info_tensors,
+                    recall_thresholds=self.recall_thresholds,
+                    score_threshold=self.score_threshold,
+                    device="cpu" if self.accumulate_on_cpu else self.device,
+                    calc_best_score_thresholds=self.calc_best_score_thresholds,
+                )
 
             # Precision, recall and f1 are computed for IoU threshold range, averaged over classes
             # results before version 3.0.4 (Dec 11 2022) were computed only for smallest value (i.e IoU 0.5 if metric is @0.5:0.95)
@@ -227,7 +273,17 @@ class DetectionMetrics(Metric):
         if self.rank is None:
             self.rank = torch.distributed.get_rank() if self.is_distributed else -1
 
-        if self.is_distributed:
+        if self.is_distributed and self.score_histogram_bins is not None:
+            # Histograms have a fixed size, so they are summed over all the processes with a single all_reduce
+            histograms = [getattr(self, state_name) for state_name in self._histogram_state_names]
+            device = torch.device("cuda", torch.cuda.current_device()) if torch.distributed.get_backend() == "nccl" else "cpu"
+            flat_histograms = torch.cat([histogram.reshape(-1) for histogram in histograms]).to(device)
+            torch.distributed.all_reduce(flat_histograms, op=torch.distributed.ReduceOp.SUM)
+            reduced_histograms = flat_histograms.split([histogram.numel() for histogram in histograms])
+            for state_name, histogram, reduced_histogram in zip(self._histogram_state_names, histograms, reduced_histograms):
+                setattr(self, state_name, reduced_histogram.view_as(histogram).to(histogram.device))
+
+        elif self.is_distributed:
             local_state_dict = {attr: getattr(self, attr) for attr in self._reductions.keys()}
             gathered_state_dicts = [None] * self.world_size
             torch.distributed.barrier()
@@ -239,6 +295,15 @@ class DetectionMetrics(Metric):
 
             setattr(self, f"matching_info{self._get_range_str()}", matching_info)
 
+    @property
+    def _histogram_state_names(self) -> List[str]:
+        return ["matched_histogram", "false_positive_histogram", "preds_histogram", "n_targets"]
+
+    def _is_any_matching_info_accumulated(self) -> bool:
+        if self.score_histogram_bins is not None:
+            return bool(self.preds_histogram.sum() + self.n_targets.sum() > 0)
+        return len(getattr(self, f"matching_info{self._get_range_str()}")) > 0
+
     def _get_range_str(self):
         return "@%.2f" % self.iou_thresholds[0] if not len(self.iou_thresholds) > 1 else "@%.2f:%.2f" % (self.iou_thresholds[0], self.iou_thresholds[-1])
 
@@ -258,6 +323,8 @@ class DetectionMetrics_050(DetectionMetrics):
         calc_best_score_thresholds: bool = False,
         include_classwise_ap: bool = False,
         class_names: List[str] = None,
+        batched_matching: bool = False,
+        score_histogram_bins: Optional[int] = None,
     ):
 
         super().__init__(
@@ -273,6 +340,8 @@ class DetectionMetrics_050(DetectionMetrics):
             calc_best_score_thresholds=calc_best_score_thresholds,
             include_classwise_ap=include_classwise_ap,
             class_names=class_names,
+            batched_matching=batched_matching,
+            score_histogram_bins=score_histogram_bins,
         )
 
 
@@ -291,6 +360,8 @@ class DetectionMetrics_075(DetectionMetrics):
         calc_best_score_thresholds: bool = False,
         include_classwise_ap: bool = False,
         class_names: List[str] = None,
+        batched_matching: bool = False,
+        score_histogram_bins: Optional[int] = None,
     ):
 
         super().__init__(
@@ -306,6 +377,8 @@ class DetectionMetrics_075(DetectionMetrics):
             calc_best_score_thresholds=calc_best_score_thresholds,
             include_classwise_ap=include_classwise_ap,
             class_names=class_names,
+            batched_matching=batched_matching,
+            score_histogram_bins=score_histogram_bins,
         )
 
 
@@ -324,6 +397,8 @@ class DetectionMetrics_050_095(DetectionMetrics):
         calc_best_score_thresholds: bool = False,
         include_classwise_ap: bool = False,
         class_names: List[str] = None,
+        batched_matching: bool = False,
+        score_histogram_bins: Optional[int] = None,
     ):
 
         super().__init__(
@@ -339,4 +414,6 @@ class DetectionMetrics_050_095(DetectionMetrics):
             calc_best_score_thresholds=calc_best_score_thresholds,
             include_classwise_ap=include_classwise_ap,
             class_names=class_names,
+            batched_matching=batched_matching,
+            score_histogram_bins=score_histogram_bins,
         )
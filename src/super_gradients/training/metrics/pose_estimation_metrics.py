@@ -11,10 +11,18 @@ from super_gradients.common.environment.ddp_utils import is_distributed, get_wor
 from super_gradients.common.object_names import Metrics
 from super_gradients.common.registry.registry import register_metric
 from super_gradients.module_interfaces import PoseEstimationPredictions, AbstractPoseEstimationPostPredictionCallback
-from super_gradients.training.metrics.pose_estimation_utils import compute_img_keypoint_matching, compute_visible_bbox_xywh
+from super_gradients.training.metrics.pose_estimation_utils import (
+    compute_batch_keypoint_matching,
+    compute_img_keypoint_matching,
+    compute_visible_bbox_xywh,
+)
 from super_gradients.training.samples import PoseEstimationSample
 from super_gradients.training.utils import convert_to_tensor
-from super_gradients.training.utils.detection_utils import compute_detection_metrics_per_cls
+from super_gradients.training.utils.detection_utils import (
+    compute_detection_matching_histograms,
+    compute_detection_metrics_from_histograms,
+    compute_detection_metrics_per_cls,
+)
 
 logger = get_logger(__name__)
 
@@ -51,6 +59,8 @@ class PoseEstimationMetrics(Metric):
         iou_thresholds: Optional[Iterable] = None,
         recall_thresholds: Optional[Iterable] = None,
         iou_thresholds_to_report: Optional[Iterable] = None,
+        score_histogram_bins: Optional[int] = None,
+        batched_matching: bool = False,
     ):
         """
         Compute the AP & AR metrics for pose estimation. By default, this class returns only AP and AR values.
@@ -74,6 +84,18 @@ class PoseEstimationMetrics(Metric):
         :param: iou_thresholds_to_report: List of IoU thresholds to return in metric. By default, only AP/AR metrics are returned, but one
                                           may also request to return AP_0.5,AP_0.75,AR_0.5,AR_0.75 setting `iou_thresholds_to_report=[0.5, 0.75]`
 
+        :param score_histogram_bins:      If None (default), the matching results of every predicted pose are accumulated, which takes
+                                          memory proportional to the size of the dataset (exact metrics, as reported by COCO eval).
+                                          If set, the state is instead accumulated in fixed-size per-OKS-threshold histograms of
+                                          matched/false positive counts binned by pose score (scores are expected in [0, 1]), with this
+                                          many bins, plus the number of targets. The memory does not depend on the dataset size and
+                                          DDP sync is a single all_reduce, but AP/AR are approximated at the bins boundaries
+                                          (more bins = closer to the exact values).
+
+        :param batched_matching:          If True, the predictions and groundtruth of the whole batch are padded and matched at once
+                                          on the device of the predictions (see compute_batch_keypoint_matching) instead of image by image
+                                          on CPU. The matching results are the same, only the compact results are moved to the host.
+
         """
         super().__init__(dist_sync_on_step=False)
         self.num_joints = num_joints
@@ -126,10 +148,17 @@ class PoseEstimationMetrics(Metric):
         self.is_distributed = is_distributed()
         self.world_size = None
         self.rank = None
-        self.add_state("predictions", default=[], dist_reduce_fx=None)
-
-    def reset(self) -> None:
-        self.predictions.clear()
+        self.batched_matching = batched_matching
+        self.score_histogram_bins = score_histogram_bins
+        if self.score_histogram_bins is None:
+            self.add_state("predictions", default=[], dist_reduce_fx=None)
+        else:
+            # Histograms of a single class, so that they can be passed as is to compute_detection_metrics_from_histograms
+            n_iou_thresholds = len(self.iou_thresholds)
+            self.add_state("matched_histogram", default=torch.zeros((1, n_iou_thresholds, score_histogram_bins), dtype=torch.long), dist_reduce_fx="sum")
+            self.add_state("false_positive_histogram", default=torch.zeros((1, n_iou_thresholds, score_histogram_bins), dtype=torch.long), dist_reduce_fx="sum")
+            self.add_state("preds_histogram", default=torch.zeros((1, score_histogram_bins), dtype=torch.long), dist_reduce_fx="sum")
+            self.add_state("n_targets", default=torch.zeros(1, dtype=torch.long), dist_reduce_fx="sum")
 
     @torch.no_grad()
     def update(
@@ -178,8 +207,18 @@ class PoseEstimationMetrics(Metric):
         """
         predictions: List[PoseEstimationPredictions] = self.post_prediction_callback(preds)  # Decode raw predictions into poses
 
-        if gt_samples is not None:
+        if gt_samples is not None and self.batched_matching:
+            self._update_batched(
+                predictions,
+                gt_joints=[sample.joints for sample in gt_samples],
+                gt_bboxes=[sample.bboxes_xywh for sample in gt_samples],
+                gt_areas=[sample.areas for sample in gt_samples],
+                gt_iscrowd=[sample.is_crowd for sample in gt_samples],
+            )
+        elif gt_samples is not None:
             self._update_with_samples(predictions, gt_samples)
+        elif self.batched_matching:
+            self._update_batched(predictions, gt_joints, gt_bboxes, gt_areas, gt_iscrowd)
         else:
             self._update_with_old_style_args(predictions, gt_joints, gt_bboxes, gt_areas, gt_iscrowd)
 
@@ -311,7 +350,121 @@ class PoseEstimationMetrics(Metric):
             top_k=self.max_objects_per_image,
         )
 
-        self.predictions.append((mr.preds_matched.cpu(), mr.preds_to_ignore.cpu(), mr.preds_scores.cpu(), int(mr.num_targets)))
+        self._accumulate_image_matching(mr.preds_matched.cpu(), mr.preds_to_ignore.cpu(), mr.preds_scores.cpu(), int(mr.num_targets))
+
+    def _update_batched(
+        self,
+        predictions: List[PoseEstimationPredictions],
+        gt_joints: List[np.ndarray],
+        gt_bboxes: Optional[List[Optional[np.ndarray]]],
+        gt_areas: Optional[List[Optional[np.ndarray]]],
+        gt_iscrowd: Optional[List[Optional[np.ndarray]]],
+    ) -> None:
+        """
+        Update internal state of metric class with a batch of predictions and groundtruth, matched all at once.
+        Arguments are the same as for _update_with_old_style_args, except that bboxes, areas and is_crowd may also be None per image.
+        """
+        batch_size = len(predictions)
+        if batch_size == 0:
+            return
+        device = next((p.poses.device for p in predictions if torch.is_tensor(p.poses)), self.device)
+
+        predicted_poses = [convert_to_tensor(p.poses, dtype=torch.float32, device=device).reshape(-1, self.num_joints, 3) for p in predictions]
+        predicted_scores = [convert_to_tensor(p.scores, dtype=torch.float32, device=device).reshape(-1) for p in predictions]
+        for poses, scores in zip(predicted_poses, predicted_scores):
+            if len(poses) != len(scores):
+                raise ValueError("Length of predicted poses and scores should be equal. Got {} and {}".format(len(poses), len(scores)))
+
+        num_preds = torch.tensor([len(poses) for poses in predicted_poses], device=device)
+        preds = torch.nn.utils.rnn.pad_sequence(predicted_poses, batch_first=True)
+        pred_scores = torch.nn.utils.rnn.pad_sequence(predicted_scores, batch_first=True)
+        preds_mask = torch.arange(preds.shape[1], device=device).view(1, -1) < num_preds.view(-1, 1)
+
+        # Groundtruth is padded on host with numpy, and moved to the device at once
+        gt_joints = [np.asarray(joints, dtype=np.float32).reshape(-1, self.num_joints, 3) for joints in gt_joints]
+        num_gt = np.array([len(joints) for joints in gt_joints], dtype=np.int64)
+        max_gt = int(num_gt.max()) if batch_size else 0
+        padded_joints = np.zeros((batch_size, max_gt, self.num_joints, 3), dtype=np.float32)
+        padded_bboxes = np.zeros((batch_size, max_gt, 4), dtype=np.float32)
+        padded_areas = np.zeros((batch_size, max_gt), dtype=np.float32)
+        padded_iscrowd = np.zeros((batch_size, max_gt), dtype=bool)
+        has_bboxes = np.zeros((batch_size, 1), dtype=bool)
+        has_areas = np.zeros((batch_size, 1), dtype=bool)
+        for i, joints in enumerate(gt_joints):
+            padded_joints[i, : len(joints)] = joints
+            if gt_bboxes is not None and gt_bboxes[i] is not None:
+                padded_bboxes[i, : len(joints)] = np.asarray(gt_bboxes[i], dtype=np.float32).reshape(-1, 4)
+                has_bboxes[i] = True
+            if gt_areas is not None and gt_areas[i] is not None:
+                padded_areas[i, : len(joints)] = np.asarray(gt_areas[i], dtype=np.float32).reshape(-1)
+                has_areas[i] = True
+            if gt_iscrowd is not None and gt_iscrowd[i] is not None:
+                padded_iscrowd[i, : len(joints)] = np.asarray(gt_iscrowd[i], dtype=bool).reshape(-1)
+
+        gt_keypoints = torch.from_numpy(padded_joints).to(device)
+        gt_keypoints_xy = gt_keypoints[..., 0:2]
+        gt_keypoints_visibility = gt_keypoints[..., 2]
+
+        # Missing boxes are computed from the visible joints, and missing areas from the boxes
+        gt_bboxes = torch.where(
+            torch.from_numpy(has_bboxes).to(device)[..., None],
+            torch.from_numpy(padded_bboxes).to(device),
+            compute_visible_bbox_xywh(gt_keypoints_xy, gt_keypoints_visibility),
+        )
+        gt_areas = torch.where(torch.from_numpy(has_areas).to(device), torch.from_numpy(padded_areas).to(device), gt_bboxes[..., 2] * gt_bboxes[..., 3])
+
+        gt_mask = torch.arange(max_gt, device=device).view(1, -1) < torch.from_numpy(num_gt).to(device).view(-1, 1)
+        gt_is_ignore = gt_keypoints_visibility.eq(0).all(dim=-1) | torch.from_numpy(padded_iscrowd).to(device)
+
+        mr = compute_batch_keypoint_matching(
+            preds=preds,
+            pred_scores=pred_scores,
+            preds_mask=preds_mask,
+            targets=gt_keypoints_xy,
+            targets_visibilities=gt_keypoints_visibility,
+            targets_areas=gt_areas,
+            targets_bboxes=gt_bboxes,
+            targets_mask=gt_mask & ~gt_is_ignore,
+            crowd_targets_mask=gt_mask & gt_is_ignore,
+            iou_thresholds=self.iou_thresholds.to(device),
+            sigmas=self.oks_sigmas.to(device),
+            top_k=self.max_objects_per_image,
+        )
+
+        # Only the compact matching results are moved to the host
+        preds_matched, preds_to_ignore, preds_scores = mr.preds_matched.cpu(), mr.preds_to_ignore.cpu(), mr.preds_scores.cpu()
+        for i, (image_num_preds, image_num_targets) in enumerate(zip(mr.num_preds.tolist(), mr.num_targets.tolist())):
+            if image_num_preds == 0 and num_gt[i] == 0:
+                continue
+            self._accumulate_image_matching(
+                preds_matched[i, :image_num_preds], preds_to_ignore[i, :image_num_preds], preds_scores[i, :image_num_preds], image_num_targets
+            )
+
+    def _accumulate_image_matching(self, preds_matched: Tensor, preds_to_ignore: Tensor, preds_scores: Tensor, num_targets: int) -> None:
+        """
+        Accumulate the matching results of a single image in the internal state of the metric.
+
+        :param preds_matched:   Tensor of shape (num_predictions, n_iou_thresholds)
+        :param preds_to_ignore: Tensor of shape (num_predictions, n_iou_thresholds)
+        :param preds_scores:    Tensor of shape (num_predictions)
+        :param num_targets:     Number of groundtruth targets (crowd targets excluded)
+        """
+        if self.score_histogram_bins is not None:
+            matching_info = [
+                (
+                    preds_matched,
+                    preds_to_ignore,
+                    preds_scores,
+                    torch.zeros(len(preds_scores), dtype=torch.long),
+                    torch.zeros(num_targets, dtype=torch.long),
+                )
+            ]
+            new_histograms = compute_detection_matching_histograms(matching_info, num_cls=1, n_score_bins=self.score_histogram_bins)
+            for state_name, new_histogram in zip(self._histogram_state_names, new_histograms):
+                accumulated_histogram = getattr(self, state_name)
+                setattr(self, state_name, accumulated_histogram + new_histogram.to(accumulated_histogram.device))
+        else:
+            self.predictions.append((preds_matched, preds_to_ignore, preds_scores, num_targets))
 
     def _sync_dist(self, dist_sync_fn=None, process_group=None):
         """
@@ -326,7 +479,17 @@ class PoseEstimationMetrics(Metric):
         if self.rank is None:
             self.rank = get_local_rank() if self.is_distributed else -1
 
-        if self.is_distributed:
+        if self.is_distributed and self.score_histogram_bins is not None:
+            # Histograms have a fixed size, so they are summed over all the processes with a single all_reduce
+            histograms = [getattr(self, state_name) for state_name in self._histogram_state_names]
+            device = torch.device("cuda", torch.cuda.current_device()) if torch.distributed.get_backend() == "nccl" else "cpu"
+            flat_histograms = torch.cat([histogram.reshape(-1) for histogram in histograms]).to(device)
+            torch.distributed.all_reduce(flat_histograms, op=torch.distributed.ReduceOp.SUM)
+            reduced_histograms = flat_histograms.split([histogram.numel() for histogram in histograms])
+            for state_name, histogram, reduced_histogram in zip(self._histogram_state_names, histograms, reduced_histograms):
+                setattr(self, state_name, reduced_histogram.view_as(histogram).to(histogram.device))
+
+        elif self.is_distributed:
             local_state_dict = self.predictions
             gathered_state_dicts = [None] * self.world_size
             torch.distributed.all_gather_object(gathered_state_dicts, local_state_dict)
@@ -342,8 +505,20 @@ class PoseEstimationMetrics(Metric):
         precision = -np.ones((T, K))
         recall = -np.ones((T, K))
 
-        predictions = self.predictions  # All gathered by this time
-        if len(predictions) > 0:
+        predictions = self.predictions if self.score_histogram_bins is None else []  # All gathered by this time
+
+        if self.score_histogram_bins is not None and int(self.n_targets.sum()) > 0:
+            # With a single class, ap and recall are of shape (1, T)
+            cls_precision, _, cls_recall, _, _, _, _ = compute_detection_metrics_from_histograms(
+                *[getattr(self, state_name) for state_name in self._histogram_state_names],
+                recall_thresholds=self.recall_thresholds.cpu(),
+                score_threshold=0,
+                device="cpu",
+            )
+            precision[:, 0] = cls_precision[0].cpu().numpy()
+            recall[:, 0] = cls_recall[0].cpu().numpy()
+
+        elif len(predictions) > 0:
             preds_matched = torch.cat([x[0].cpu() for x in predictions], dim=0)
             preds_to_ignore = torch.cat([x[1].cpu() for x in predictions], dim=0)
             preds_scores = torch.cat([x[2].cpu() for x in predictions], dim=0)
@@ -379,3 +554,7 @@ class PoseEstimationMetrics(Metric):
                 metrics[f"AR_{t:.2f}"] = summarize(recall[mask])
 
         return metrics
+
+    @property
+    def _histogram_state_names(self) -> List[str]:
+        return ["matched_histogram", "false_positive_histogram", "preds_histogram", "n_targets"]
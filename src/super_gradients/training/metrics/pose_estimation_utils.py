@@ -5,26 +5,26 @@ import torch
 from torch import Tensor
 
 
-def compute_visible_bbox_xywh(joints: Tensor, visibility_mask: Tensor) -> np.ndarray:
+def compute_visible_bbox_xywh(joints: Tensor, visibility_mask: Tensor) -> Tensor:
     """
     Compute the bounding box (X,Y,W,H) of the visible joints for each instance.
 
-    :param joints:  [Num Instances, Num Joints, 2+] last channel must have dimension of
+    :param joints:  [..., Num Instances, Num Joints, 2+] last channel must have dimension of
                     at least 2 that is considered to contain (X,Y) coordinates of the keypoint
-    :param visibility_mask: [Num Instances, Num Joints]
-    :return: A numpy array [Num Instances, 4] where last dimension contains bbox in format XYWH
+    :param visibility_mask: [..., Num Instances, Num Joints]
+    :return: A tensor [..., Num Instances, 4] where last dimension contains bbox in format XYWH
     """
     visibility_mask = visibility_mask > 0
     initial_value = 1_000_000
 
-    x1 = torch.min(joints[:, :, 0], where=visibility_mask, initial=initial_value, dim=-1)
-    y1 = torch.min(joints[:, :, 1], where=visibility_mask, initial=initial_value, dim=-1)
+    x1 = joints[..., 0].masked_fill(~visibility_mask, initial_value).amin(dim=-1)
+    y1 = joints[..., 1].masked_fill(~visibility_mask, initial_value).amin(dim=-1)
 
     x1[x1 == initial_value] = 0
     y1[y1 == initial_value] = 0
 
-    x2 = torch.max(joints[:, :, 0], where=visibility_mask, initial=0, dim=-1)
-    y2 = torch.max(joints[:, :, 1], where=visibility_mask, initial=0, dim=-1)
+    x2 = joints[..., 0].masked_fill(~visibility_mask, 0).amax(dim=-1).clamp_min(0)
+    y2 = joints[..., 1].masked_fill(~visibility_mask, 0).amax(dim=-1).clamp_min(0)
 
     w = x2 - x1
     h = y2 - y1
@@ -96,6 +96,55 @@ def compute_oks(
     return ious
 
 
+def compute_oks_batched(
+    pred_joints: Tensor,
+    gt_joints: Tensor,
+    gt_keypoint_visibility: Tensor,
+    sigmas: Tensor,
+    gt_areas: Tensor,
+    gt_bboxes: Tensor,
+) -> Tensor:
+    """
+    Compute the OKS between every prediction and every ground truth instance of every image of a batch at once.
+    This is the vectorized equivalent of calling compute_oks on each image.
+
+    :param pred_joints:             [B, K, NumJoints, 2] or [B, K, NumJoints, 3]
+    :param gt_joints:               [B, M, NumJoints, 2] or [B, M, NumJoints, 3]
+    :param gt_keypoint_visibility:  [B, M, NumJoints]
+    :param sigmas:                  [NumJoints]
+    :param gt_areas:                [B, M] Area of each ground truth instance
+    :param gt_bboxes:               [B, M, 4] Bounding box (X,Y,W,H) of each ground truth instance
+    :return: OKS matrix [B, K, M]
+    """
+    vars = (sigmas * 2) ** 2
+    num_joints = gt_joints.shape[-2]
+
+    # Shapes are broadcast to [B, K, M, NumJoints]
+    xd, yd = pred_joints[:, :, None, :, 0], pred_joints[:, :, None, :, 1]
+    xg, yg = gt_joints[:, None, :, :, 0], gt_joints[:, None, :, :, 1]
+
+    is_visible = gt_keypoint_visibility[:, None] > 0
+    num_visible = is_visible.sum(dim=-1)
+    has_visible = num_visible[..., None] > 0
+
+    # Bounds for ignore regions (double the gt bbox), used when no keypoint of the target is visible
+    gt_bboxes = gt_bboxes[:, None, :, None, :]
+    x0 = gt_bboxes[..., 0] - gt_bboxes[..., 2]
+    x1 = gt_bboxes[..., 0] + gt_bboxes[..., 2] * 2
+    y0 = gt_bboxes[..., 1] - gt_bboxes[..., 3]
+    y1 = gt_bboxes[..., 1] + gt_bboxes[..., 3] * 2
+
+    dx = torch.where(has_visible, xd - xg, (x0 - xd).clamp_min(0) + (xd - x1).clamp_min(0))
+    dy = torch.where(has_visible, yd - yg, (y0 - yd).clamp_min(0) + (yd - y1).clamp_min(0))
+
+    e = (dx**2 + dy**2) / vars / (gt_areas[:, None, :, None] + torch.finfo(torch.float64).eps) / 2
+
+    # Only visible keypoints are averaged, unless no keypoint of the target is visible
+    is_used = torch.logical_or(is_visible, ~has_visible)
+    num_used = torch.where(num_visible > 0, num_visible, torch.full_like(num_visible, num_joints))
+    return torch.exp(-e).masked_fill(~is_used, 0).sum(dim=-1) / num_used
+
+
 @dataclasses.dataclass
 class ImageKeypointMatchingResult:
     preds_matched: Tensor
@@ -261,3 +310,103 @@ def compute_img_keypoint_matching(
         preds_scores=pred_scores[preds_idx_to_use],
         num_targets=num_targets.item(),
     )
+
+
+@dataclasses.dataclass
+class BatchKeypointMatchingResult:
+    """
+    Matching results of a batch, for the top-k predictions of every image sorted by decreasing score.
+
+    :param preds_matched:   Tensor of shape (B, k, n_iou_thresholds)
+    :param preds_to_ignore: Tensor of shape (B, k, n_iou_thresholds)
+    :param preds_scores:    Tensor of shape (B, k)
+    :param num_preds:       Tensor of shape (B), number of valid predictions of every image (the first num_preds[i] of image i)
+    :param num_targets:     Tensor of shape (B), number of groundtruth targets of every image (crowd targets excluded)
+    """
+
+    preds_matched: Tensor
+    preds_to_ignore: Tensor
+    preds_scores: Tensor
+    num_preds: Tensor
+    num_targets: Tensor
+
+
+def compute_batch_keypoint_matching(
+    preds: Tensor,
+    pred_scores: Tensor,
+    preds_mask: Tensor,
+    targets: Tensor,
+    targets_visibilities: Tensor,
+    targets_areas: Tensor,
+    targets_bboxes: Tensor,
+    targets_mask: Tensor,
+    crowd_targets_mask: Tensor,
+    iou_thresholds: Tensor,
+    sigmas: Tensor,
+    top_k: int,
+) -> BatchKeypointMatchingResult:
+    """
+    Match predictions and targets of a whole batch at once, with padded tensors. The result is the same as calling
+    compute_img_keypoint_matching on every image (with targets_ignored all False), but OKS are computed with a single
+    compute_oks_batched call and the greedy matching is vectorized over images and IoU thresholds.
+    The only python loop is over the rank of a prediction in its image (bounded by top_k).
+
+    Targets and crowd targets share the same padded tensors, and are told apart by targets_mask and crowd_targets_mask.
+
+    :param preds:               Tensor of shape (B, K, NumJoints, 3) - Padded predicted skeletons
+    :param pred_scores:         Tensor of shape (B, K) - Confidence scores for each pose
+    :param preds_mask:          Tensor of shape (B, K) - True for the valid (non-padding) predictions
+    :param targets:             Tensor of shape (B, M, NumJoints, 2) - Padded groundtruth skeletons (targets and crowd targets)
+    :param targets_visibilities: Tensor of shape (B, M, NumJoints) - Visibility status for each keypoint
+    :param targets_areas:       Tensor of shape (B, M) - Areas of target objects
+    :param targets_bboxes:      Tensor of shape (B, M, 4) - Bounding boxes (XYWH) of targets
+    :param targets_mask:        Tensor of shape (B, M) - True for the targets to match
+    :param crowd_targets_mask:  Tensor of shape (B, M) - True for the crowd targets, which make matching predictions ignored
+    :param iou_thresholds:      IoU Threshold to compute the mAP
+    :param sigmas:              Tensor of shape (NumJoints) with sigmas for each joint
+    :param top_k:               Number of predictions to keep per image, ordered by confidence score
+    :return: BatchKeypointMatchingResult
+    """
+    batch_size, max_preds = pred_scores.shape
+    num_iou_thresholds = len(iou_thresholds)
+    device = pred_scores.device
+    k = min(top_k, max_preds)
+
+    # Keep the top_k predictions of every image, padding predictions are sorted last
+    top_scores, top_index = pred_scores.masked_fill(~preds_mask, -float("inf")).topk(k, dim=1, sorted=True, largest=True)
+    top_mask = preds_mask.gather(1, top_index)
+    top_preds = preds.gather(1, top_index[..., None, None].expand(-1, -1, *preds.shape[2:]))
+
+    preds_matched = torch.zeros((batch_size, k, num_iou_thresholds), dtype=torch.bool, device=device)
+    preds_to_ignore = torch.zeros((batch_size, k, num_iou_thresholds), dtype=torch.bool, device=device)
+
+    if targets.shape[1] > 0 and k > 0:
+        # shape = (B, k, M)
+        iou = compute_oks_batched(top_preds, targets, targets_visibilities, sigmas, gt_areas=targets_areas, gt_bboxes=targets_bboxes)
+
+        # Same as the per-image matching, only pairs with IoU above the smallest threshold are considered
+        is_pair_above_min = torch.logical_and(iou > iou_thresholds[0], targets_mask[:, None, :])
+        # shape = (B, k, T, M)
+        is_pair_above_threshold = torch.logical_and(iou[:, :, None, :] > iou_thresholds.view(1, 1, -1, 1), is_pair_above_min[:, :, None, :])
+        targets_matched = torch.zeros((batch_size, num_iou_thresholds, targets.shape[1]), dtype=torch.bool, device=device)
+
+        # Predictions are matched by decreasing confidence, each with its free target of highest IoU (lowest index on ties)
+        for pred_i in range(k):
+            are_candidates_good = torch.logical_and(is_pair_above_threshold[:, pred_i], ~targets_matched)
+            best_target = iou[:, pred_i, None, :].masked_fill(~are_candidates_good, -1).argmax(dim=-1)
+            is_matched = torch.logical_and(are_candidates_good.any(dim=-1), top_mask[:, pred_i, None])
+
+            preds_matched[:, pred_i] = is_matched
+            targets_matched.scatter_(2, best_target[..., None], torch.logical_or(targets_matched.gather(2, best_target[..., None]), is_matched[..., None]))
+
+        # Crowd targets can be matched with many predictions, we just check if a prediction has IoA large enough with any of them
+        best_ioa = iou.masked_fill(~crowd_targets_mask[:, None, :], -1).max(dim=-1).values
+        preds_to_ignore = best_ioa[..., None] > iou_thresholds.view(1, 1, -1)
+
+    return BatchKeypointMatchingResult(
+        preds_matched=preds_matched,
+        preds_to_ignore=preds_to_ignore,
+        preds_scores=top_scores,
+        num_preds=top_mask.sum(dim=1),
+        num_targets=targets_mask.sum(dim=1),
+    )
@@ -4,7 +4,7 @@ import torch.nn.functional as F
 
 from super_gradients.training.utils.utils import HpmStruct
 from super_gradients.training.utils import get_param
-from super_gradients.training.utils.segmentation_utils import forward_with_sliding_window_wrapper
+from super_gradients.training.utils.segmentation_utils import SlidingWindowInference
 from super_gradients.training.models.segmentation_models.segmentation_module import SegmentationModule
 from super_gradients.training.utils.regularization_utils import DropPath
 from super_gradients.modules.conv_bn_relu_block import ConvBNReLU
@@ -12,7 +12,7 @@ from super_gradients.common.object_names import Models
 from super_gradients.common.registry.registry import register_model
 
 
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 """
 paper:  SegFormer: Simple and Efficient Design for Semantic Segmentation with Transformers
@@ -318,6 +318,9 @@ class SegFormer(SegmentationModule):
         in_channels: int = 3,
         sliding_window_crop_size: Tuple[int, int] = (1024, 1024),
         sliding_window_stride: Tuple[int, int] = (768, 768),
+        sliding_window_crop_batch_size: Optional[int] = None,
+        sliding_window_blending: str = "uniform",
+        sliding_window_logits_downsample: int = 1,
     ):
         """
         :param num_classes: number of classes
@@ -331,6 +334,9 @@ class SegFormer(SegmentationModule):
         :param in_channels:  number of input channels
         :param sliding_window_crop_size:  (height, width) the crop size to take from the image for forward with sliding window
         :param sliding_window_stride:  (height, width) the stride size between crops for forward with sliding window
+        :param sliding_window_crop_batch_size:  number of crops per forward pass with sliding window (defaults to the batch size)
+        :param sliding_window_blending:  weighting of the overlapping crops logits, one of "uniform", "linear", "gaussian"
+        :param sliding_window_logits_downsample:  downsampling factor of the canvas the crops logits are accumulated on
 
         """
 
@@ -360,6 +366,13 @@ class SegFormer(SegmentationModule):
         self.use_sliding_window_validation = False
         self.sliding_window_crop_size = tuple(sliding_window_crop_size)
         self.sliding_window_stride = tuple(sliding_window_stride)
+        self.sliding_window_inference = SlidingWindowInference(
+            crop_size=self.sliding_window_crop_size,
+            stride=self.sliding_window_stride,
+            crop_batch_size=sliding_window_crop_batch_size,
+            blending=sliding_window_blending,
+            logits_downsample=sliding_window_logits_downsample,
+        )
 
     def init_params(self):
 
@@ -376,8 +389,22 @@ class SegFormer(SegmentationModule):
                 nn.init.ones_(m.weight)
                 nn.init.zeros_(m.bias)
 
-    def enable_sliding_window_validation(self):
+    def enable_sliding_window_validation(self, crop_batch_size: Optional[int] = None, blending: Optional[str] = None, logits_downsample: Optional[int] = None):
+        """
+        Enable sliding window inference, optionally overriding its parameters.
+
+        :param crop_batch_size:     number of crops per forward pass
+        :param blending:            weighting of the overlapping crops logits, one of "uniform", "linear", "gaussian"
+        :param logits_downsample:   downsampling factor of the canvas the crops logits are accumulated on
+        """
         self.use_sliding_window_validation = True
+        self.sliding_window_inference = SlidingWindowInference(
+            crop_size=self.sliding_window_crop_size,
+            stride=self.sliding_window_stride,
+            crop_batch_size=crop_batch_size or self.sliding_window_inference.crop_batch_size,
+            blending=blending or self.sliding_window_inference.blending,
+            logits_downsample=logits_downsample or self.sliding_window_inference.logits_downsample,
+        )
 
     def disable_sliding_window_validation(self):
         self.use_sliding_window_validation = False
@@ -400,13 +427,7 @@ class SegFormer(SegmentationModule):
 
     def forward(self, x: torch.Tensor) -> torch.Tensor:
         if self.use_sliding_window_validation:
-            return forward_with_sliding_window_wrapper(
-                forward=self._forward,
-                img=x,
-                sliding_window_stride=self.sliding_window_stride,
-                sliding_window_crop_size=self.sliding_window_crop_size,
-                num_classes=self.num_classes,
-            )
+            return self.sliding_window_inference(forward=self._forward, img=x)
         else:
             return self._forward(x)
 
@@ -466,6 +487,9 @@ class SegFormerCustom(SegFormer):
             in_channels=arch_params.in_channels,
             sliding_window_crop_size=arch_params.sliding_window_crop_size,
             sliding_window_stride=arch_params.sliding_window_stride,
+            sliding_window_crop_batch_size=get_param(arch_params, "sliding_window_crop_batch_size"),
+            sliding_window_blending=get_param(arch_params, "sliding_window_blending", "uniform"),
+            sliding_window_logits_downsample=get_param(arch_params, "sliding_window_logits_downsample", 1),
         )
 
 
@@ -478,6 +502,9 @@ DEFAULT_SEGFORMER_PARAMS = {
     "eff_self_att_heads": [1, 2, 5, 8],
     "sliding_window_crop_size": (1024, 1024),
     "sliding_window_stride": (768, 768),
+    "sliding_window_crop_batch_size": None,
+    "sliding_window_blending": "uniform",
+    "sliding_window_logits_downsample": 1,
 }
 
 DEFAULT_SEGFORMER_B0_PARAMS = {**DEFAULT_SEGFORMER_PARAMS, "encoder_embed_dims": [32, 64, 160, 256], "encoder_layers": [2, 2, 2, 2], "decoder_embed_dim": 256}
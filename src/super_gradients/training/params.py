@@ -25,6 +25,12 @@ DEFAULT_TRAINING_PARAMS = {
     "mixed_precision": False,
     "tensorboard_port": None,
     "save_ckpt_epoch_list": [],  # indices where the ckpt will save automatically
+    "async_checkpointing": False,  # Write the checkpoints in a background thread
+    "train_progress_update_freq": None,  # Steps between two (non-blocking) reads of the running loss and metrics
+    "device_prefetch": False,  # Pin and copy the batches to the device ahead of the batch being processed
+    "device_prefetch_params": {"num_prefetch": 2, "normalize_uint8_inputs": False, "mean": None, "std": None},
+    "step_profiler": False,  # Record the duration of every phase of the training step
+    "step_profiler_params": {"report_every": 100, "buffer_size": 1000},
     "average_best_models": True,
     "dataset_statistics": False,  # add a dataset statistical analysis and sample images to tensorboard
     "save_tensorboard_to_s3": False,
@@ -1,6 +1,7 @@
 import copy
 from abc import ABC, abstractmethod
-from typing import List, Optional, Tuple, Union, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, List, Optional, Tuple, Union, Iterable
 from contextlib import contextmanager
 from tqdm import tqdm
 
@@ -24,8 +25,8 @@ from super_gradients.training.utils.predict import (
     ImagesClassificationPrediction,
     ClassificationPrediction,
 )
-from super_gradients.training.utils.utils import generate_batch, infer_model_device, resolve_torch_device
-from super_gradients.training.utils.media.video import load_video, includes_video_extension
+from super_gradients.training.utils.utils import generate_batch, infer_model_device, map_in_background_thread, resolve_torch_device
+from super_gradients.training.utils.media.video import load_video, includes_video_extension, generate_video_frames, get_video_fps, save_video
 from super_gradients.training.utils.media.image import ImageSource, check_image_typing
 from super_gradients.training.utils.media.stream import WebcamStreaming
 from super_gradients.training.utils.detection_utils import DetectionPostPredictionCallback
@@ -90,7 +91,7 @@ class Pipeline(ABC):
         self.model.prep_model_for_conversion(input_size=input_example.shape[-2:])
         self.fuse_model = False
 
-    def __call__(self, inputs: Union[str, ImageSource, List[ImageSource]], batch_size: Optional[int] = 32) -> ImagesPredictions:
+    def __call__(self, inputs: Union[str, ImageSource, List[ImageSource]], batch_size: Optional[int] = 32, pipelined: bool = False) -> ImagesPredictions:
         """Predict an image or a list of images.
 
         Supported types include:
@@ -102,41 +103,88 @@ class Pipeline(ABC):
 
         :param inputs:      inputs to the model, which can be any of the above-mentioned types.
         :param batch_size:  Maximum number of images to process at the same time.
+        :param pipelined:   If True, overlap the preprocessing, the model forward and the postprocessing of consecutive batches.
         :return:            Results of the prediction.
         """
 
         if includes_video_extension(inputs):
-            return self.predict_video(inputs, batch_size)
+            return self.predict_video(inputs, batch_size, pipelined=pipelined)
         elif check_image_typing(inputs):
-            return self.predict_images(inputs, batch_size)
+            return self.predict_images(inputs, batch_size, pipelined=pipelined)
         else:
             raise ValueError(f"Input {inputs} not supported for prediction.")
 
-    def predict_images(self, images: Union[ImageSource, List[ImageSource]], batch_size: Optional[int] = 32) -> ImagesPredictions:
+    def predict_images(self, images: Union[ImageSource, List[ImageSource]], batch_size: Optional[int] = 32, pipelined: bool = False) -> ImagesPredictions:
         """Predict an image or a list of images.
 
         :param images:      Images to predict.
         :param batch_size:  The size of each batch.
+        :param pipelined:   If True, overlap the preprocessing, the model forward and the postprocessing of consecutive batches.
         :return:            Results of the prediction.
         """
-        from super_gradients.training.utils.media.image import load_images
+        from super_gradients.training.utils.media.image import load_images, generate_image_loader
+
+        if pipelined:
+            # The images are loaded lazily by the preprocessing stage, so that decoding them overlaps with the model forward
+            result_generator = self._generate_prediction_result(images=generate_image_loader(images), batch_size=batch_size, pipelined=True)
+            return self._combine_image_prediction_to_images(result_generator)
 
         images = load_images(images)
 
         result_generator = self._generate_prediction_result(images=images, batch_size=batch_size)
         return self._combine_image_prediction_to_images(result_generator, n_images=len(images))
 
-    def predict_video(self, video_path: str, batch_size: Optional[int] = 32) -> VideoPredictions:
+    def predict_video(self, video_path: str, batch_size: Optional[int] = 32, pipelined: bool = False) -> VideoPredictions:
         """Predict on a video file, by processing the frames in batches.
 
         :param video_path:  Path to the video file.
         :param batch_size:  The size of each batch.
+        :param pipelined:   If True, overlap the preprocessing, the model forward and the postprocessing of consecutive batches.
         :return:            Results of the prediction.
         """
         video_frames, fps = load_video(file_path=video_path)
-        result_generator = self._generate_prediction_result(images=video_frames, batch_size=batch_size)
+        result_generator = self._generate_prediction_result(images=video_frames, batch_size=batch_size, pipelined=pipelined)
         return self._combine_image_prediction_to_video(result_generator, fps=fps, n_images=len(video_frames))
 
+    def stream_video(self, video_path: str, batch_size: int = 32, pipelined: bool = False, read_ahead: Optional[int] = None) -> Iterator[ImagePrediction]:
+        """Predict on a video file, yielding the prediction of each frame as soon as its batch is processed.
+
+        Unlike predict_video, the frames are decoded lazily and neither the frames nor the predictions are accumulated, so the memory
+        used does not depend on the length of the video.
+
+        :param video_path:  Path to the video file.
+        :param batch_size:  The size of each batch.
+        :param pipelined:   If True, overlap the preprocessing, the model forward and the postprocessing of consecutive batches.
+        :param read_ahead:  Maximum number of decoded frames waiting to be processed. Defaults to batch_size.
+        :return:            Iterator of the prediction of each frame, in order.
+        """
+        video_frames = generate_video_frames(file_path=video_path, read_ahead=read_ahead or batch_size)
+        try:
+            yield from self._generate_prediction_result(images=video_frames, batch_size=batch_size, pipelined=pipelined)
+        finally:
+            video_frames.close()
+
+    def predict_video_to_file(
+        self, video_path: str, output_path: str, batch_size: int = 32, pipelined: bool = False, read_ahead: Optional[int] = None, **draw_kwargs
+    ) -> None:
+        """Predict on a video file and save the frames with the predictions drawn on them, writing each frame as soon as it is predicted.
+
+        The memory used does not depend on the length of the video, except when saving as .gif which requires all the frames at once.
+
+        :param video_path:  Path to the video file.
+        :param output_path: Path to the output video file.
+        :param batch_size:  The size of each batch.
+        :param pipelined:   If True, overlap the preprocessing, the model forward and the postprocessing of consecutive batches.
+        :param read_ahead:  Maximum number of decoded frames waiting to be processed. Defaults to batch_size.
+        :param draw_kwargs: Arguments passed to the draw method of each frame prediction (e.g. show_confidence).
+        """
+        frame_predictions = self.stream_video(video_path=video_path, batch_size=batch_size, pipelined=pipelined, read_ahead=read_ahead)
+        frames = (frame_prediction.draw(**draw_kwargs) for frame_prediction in frame_predictions)
+        try:
+            save_video(output_path=output_path, frames=frames, fps=get_video_fps(video_path))
+        finally:
+            frame_predictions.close()
+
     def predict_webcam(self) -> None:
         """Predict using webcam"""
 
@@ -148,7 +196,7 @@ class Pipeline(ABC):
         video_streaming = WebcamStreaming(frame_processing_fn=_draw_predictions, fps_update_frequency=1)
         video_streaming.run()
 
-    def _generate_prediction_result(self, images: Iterable[np.ndarray], batch_size: Optional[int] = None) -> Iterable[ImagePrediction]:
+    def _generate_prediction_result(self, images: Iterable[np.ndarray], batch_size: Optional[int] = None, pipelined: bool = False) -> Iterable[ImagePrediction]:
         """Run the pipeline on the images as single batch or through multiple batches.
 
         NOTE: A core motivation to have this function as a generator is that it can be used in a lazy way (if images is generator itself),
@@ -156,9 +204,13 @@ class Pipeline(ABC):
 
         :param images:      Iterable of numpy arrays representing images.
         :param batch_size:  The size of each batch.
+        :param pipelined:   If True, overlap the preprocessing, the model forward and the postprocessing of consecutive batches
+                            (see _generate_prediction_result_pipelined).
         :return:            Iterable of Results object, each containing the results of the prediction and the image.
         """
-        if batch_size is None:
+        if pipelined:
+            yield from self._generate_prediction_result_pipelined(images, batch_size=batch_size)
+        elif batch_size is None:
             yield from self._generate_prediction_result_single_batch(images)
         else:
             for batch_images in generate_batch(images, batch_size):
@@ -174,32 +226,104 @@ class Pipeline(ABC):
         :param images:  Iterable of numpy arrays representing images.
         :return:        Iterable of Results object, each containing the results of the prediction and the image.
         """
-        # Make sure the model is on the correct device, as it might have been moved after init
+        self._move_model_to_device()
+
+        images = list(images)  # We need to load all the images into memory, and to reuse it afterwards.
+        preprocessed_images, processing_metadatas = self._preprocess_batch(images)
+        model_output, torch_inputs = self._predict_batch(preprocessed_images)
+        yield from self._postprocess_batch(images, model_output, torch_inputs, processing_metadatas)
+
+    def _generate_prediction_result_pipelined(
+        self, images: Iterable[np.ndarray], batch_size: Optional[int] = None, num_preprocessing_workers: Optional[int] = None, max_queue_size: int = 2
+    ) -> Iterable[ImagePrediction]:
+        """Run the pipeline on the images with the steps of consecutive batches running concurrently:
+            - Batch N+1 is preprocessed by a pool of threads (one image per thread),
+            - Batch N is forwarded through the model in a background thread,
+            - Batch N-1 is decoded and postprocessed in the calling thread.
+        Each stage runs ahead of the next one by at most max_queue_size batches, so the memory stays bounded, and the throughput is
+        close to that of the slowest stage. The results are the same, and in the same order, as with _generate_prediction_result_single_batch.
+
+        :param images:                      Iterable of numpy arrays representing images.
+        :param batch_size:                  The size of each batch. If None, all the images are processed as a single batch.
+        :param num_preprocessing_workers:   Number of threads preprocessing the images. Defaults to ThreadPoolExecutor's default.
+        :param max_queue_size:              Maximum number of batches waiting between two stages.
+        :return:                            Iterable of Results object, each containing the results of the prediction and the image.
+        """
+        self._move_model_to_device()
+        batches = generate_batch(images, batch_size) if batch_size is not None else [list(images)]
+
+        with ThreadPoolExecutor(max_workers=num_preprocessing_workers) as executor:
+
+            def preprocess(batch_images: Tuple[np.ndarray, ...]):
+                batch_images = list(batch_images)
+                return (batch_images,) + self._preprocess_batch(batch_images, executor=executor)
+
+            def predict(preprocessed_batch):
+                batch_images, preprocessed_images, processing_metadatas = preprocessed_batch
+                return (batch_images, processing_metadatas) + self._predict_batch(preprocessed_images)
+
+            preprocessed_batches = map_in_background_thread(preprocess, batches, max_queue_size=max_queue_size)
+            predicted_batches = map_in_background_thread(predict, preprocessed_batches, max_queue_size=max_queue_size)
+            try:
+                for batch_images, processing_metadatas, model_output, torch_inputs in predicted_batches:
+                    yield from self._postprocess_batch(batch_images, model_output, torch_inputs, processing_metadatas)
+            finally:
+                # Stop the stages (from the last one) before the preprocessing threads
+                predicted_batches.close()
+                preprocessed_batches.close()
+
+    def _move_model_to_device(self) -> None:
+        """Make sure the model is on the correct device, as it might have been moved after init"""
         model_device: torch.device = infer_model_device(model=self.model)
         if self.device != model_device:
             self.model = self.model.to(self.device)
 
-        images = list(images)  # We need to load all the images into memory, and to reuse it afterwards.
+    def _preprocess_batch(self, images: List[np.ndarray], executor: Optional[ThreadPoolExecutor] = None) -> Tuple[List[np.ndarray], List[Any]]:
+        """Preprocess - Encode the images in the shape/format expected by the model.
 
-        # Preprocess
-        preprocessed_images, processing_metadatas = [], []
-        for image in images:
-            preprocessed_image, processing_metadata = self.image_processor.preprocess_image(image=image.copy())
-            preprocessed_images.append(preprocessed_image)
-            processing_metadatas.append(processing_metadata)
+        :param images:      Images to preprocess.
+        :param executor:    Optional pool of threads to preprocess the images with.
+        :return:            Preprocessed images and their processing metadata.
+        """
 
-        # Predict
+        def preprocess_image(image: np.ndarray):
+            return self.image_processor.preprocess_image(image=image.copy())
+
+        results = list(executor.map(preprocess_image, images) if executor is not None else map(preprocess_image, images))
+        preprocessed_images = [preprocessed_image for preprocessed_image, _ in results]
+        processing_metadatas = [processing_metadata for _, processing_metadata in results]
+        return preprocessed_images, processing_metadatas
+
+    def _predict_batch(self, preprocessed_images: List[np.ndarray]) -> Tuple[Union[List, Tuple, torch.Tensor], torch.Tensor]:
+        """Predict - Run the model on the preprocessed images.
+
+        :param preprocessed_images: Preprocessed images.
+        :return:                    Direct output of the model, and the model input.
+        """
         with eval_mode(self.model), torch.no_grad(), torch.cuda.amp.autocast():
             torch_inputs = torch.from_numpy(np.array(preprocessed_images)).to(self.device)
             torch_inputs = torch_inputs.to(self.dtype)
             if self.fuse_model:
                 self._fuse_model(torch_inputs)
             model_output = self.model(torch_inputs)
+        return model_output, torch_inputs
+
+    def _postprocess_batch(
+        self, images: List[np.ndarray], model_output: Union[List, Tuple, torch.Tensor], torch_inputs: torch.Tensor, processing_metadatas: List[Any]
+    ) -> Iterable[ImagePrediction]:
+        """Postprocess - Decode the output of the model so that the predictions are in the shape/format of original image.
+
+        :param images:                  Original images.
+        :param model_output:            Direct output of the model.
+        :param torch_inputs:            Model input.
+        :param processing_metadatas:    Processing metadata of the images.
+        :return:                        Iterable of Results object, each containing the results of the prediction and the image.
+        """
+        with torch.no_grad(), torch.cuda.amp.autocast():
             predictions = self._decode_model_output(model_output, model_input=torch_inputs)
 
-        # Postprocess
         postprocessed_predictions = []
-        for image, prediction, processing_metadata in zip(images, predictions, processing_metadatas):
+        for prediction, processing_metadata in zip(predictions, processing_metadatas):
             prediction = self.image_processor.postprocess_predictions(predictions=prediction, metadata=processing_metadata)
             postprocessed_predictions.append(prediction)
 
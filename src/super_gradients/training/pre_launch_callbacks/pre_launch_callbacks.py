@@ -1,6 +1,6 @@
 import copy
 from copy import deepcopy
-from typing import Union
+from typing import Optional, Sequence, Union
 
 from omegaconf import DictConfig
 import torch
@@ -9,12 +9,14 @@ from super_gradients.common.environment.cfg_utils import load_recipe
 from super_gradients.common.registry.registry import register_pre_launch_callback
 from super_gradients import is_distributed
 from super_gradients.common.abstractions.abstract_logger import get_logger
-from super_gradients.training import models
+from super_gradients.common.environment.device_utils import device_config
+from super_gradients.training import models, dataloaders
 from torch.distributed import barrier
 import cv2
 import numpy as np
 
 from super_gradients.training.utils import get_param
+from super_gradients.training.utils.batch_size_autotuner import BatchSizeAutoTuner
 
 logger = get_logger(__name__)
 
@@ -77,9 +79,35 @@ class AutoTrainBatchSizeSelectionCallback(PreLaunchCallback):
      FOUND_BATCH_SIZE/cfg.dataset_params.train_datalaoder_params.batch_size (default=True)
     :param mode: str, one of ["fastest","largest"], whether to select the largest batch size that fits memory or the one
      that the resulted in overall fastest execution.
+
+    :param in_process: bool, when True the batch sizes are probed in-process by BatchSizeAutoTuner instead of running
+     Trainer.train_from_config for every candidate: the model and a synthetic batch are built once, the search doubles the
+     batch size until it does not fit and then binary searches down to a resolution of size_step, and "fastest" is based
+     on the measured throughput (images/sec) of forward+backward passes (default=False).
+
+    :param memory_headroom: float, used when in_process=True. Fraction of the memory kept free for what the probes do not
+     account for (optimizer state, metrics, callbacks...) (default=0.1).
+
+    :param memory_budget: int, optional, used when in_process=True. Memory available for training, in bytes. Defaults to
+     the memory of the CUDA device, and is required to run the search on CPU (default=None).
+
+    :param input_shape: list, optional, used when in_process=True. Shape of a single input image (e.g. [3, 640, 640]).
+     When None, it is taken from the first sample of the train dataloader (default=None).
     """
 
-    def __init__(self, min_batch_size: int, size_step: int, num_forward_passes: int = 3, max_batch_size=None, scale_lr: bool = True, mode: str = "fastest"):
+    def __init__(
+        self,
+        min_batch_size: int,
+        size_step: int,
+        num_forward_passes: int = 3,
+        max_batch_size=None,
+        scale_lr: bool = True,
+        mode: str = "fastest",
+        in_process: bool = False,
+        memory_headroom: float = 0.1,
+        memory_budget: Optional[int] = None,
+        input_shape: Optional[Sequence[int]] = None,
+    ):
         if mode not in ["fastest", "largest"]:
             raise TypeError(f"Expected mode to be one of: ['fastest','largest'], got {mode}")
         self.scale_lr = scale_lr
@@ -88,6 +116,10 @@ class AutoTrainBatchSizeSelectionCallback(PreLaunchCallback):
         self.max_batch_size = max_batch_size
         self.num_forward_passes = num_forward_passes
         self.mode = mode
+        self.in_process = in_process
+        self.memory_headroom = memory_headroom
+        self.memory_budget = memory_budget
+        self.input_shape = input_shape
 
     def __call__(self, cfg: DictConfig) -> DictConfig:
 
@@ -105,6 +137,9 @@ class AutoTrainBatchSizeSelectionCallback(PreLaunchCallback):
             checkpoint_path=cfg.checkpoint_params.checkpoint_path,
             load_backbone=cfg.checkpoint_params.load_backbone,
         )
+        if self.in_process:
+            return self._select_batch_size_in_process(cfg, model)
+
         tmp_cfg = deepcopy(cfg)
         tmp_cfg.training_hyperparams.batch_accumulate = 1
         tmp_cfg.training_hyperparams.max_train_batches = self.num_forward_passes
@@ -160,6 +195,34 @@ class AutoTrainBatchSizeSelectionCallback(PreLaunchCallback):
 
         return self._inject_selected_batch_size_to_config(cfg, model, msg, selected_batch_size)
 
+    def _select_batch_size_in_process(self, cfg: DictConfig, model: torch.nn.Module) -> DictConfig:
+        tuner = BatchSizeAutoTuner(
+            model=model,
+            input_shape=self.input_shape or self._get_input_shape(cfg),
+            device=device_config.device,
+            min_batch_size=self.min_batch_size,
+            max_batch_size=self.max_batch_size,
+            size_step=self.size_step,
+            memory_budget=self.memory_budget,
+            memory_headroom=self.memory_headroom,
+            num_probes=self.num_forward_passes,
+        )
+        selected_batch_size = tuner.select_batch_size(mode=self.mode)
+        msg = f"Probed batch sizes {sorted(tuner.results)}, setting batch size to {selected_batch_size} ({self.mode})."
+        return self._inject_selected_batch_size_to_config(cfg, model, msg, selected_batch_size)
+
+    @staticmethod
+    def _get_input_shape(cfg: DictConfig) -> Sequence[int]:
+        dataloader_params = deepcopy(cfg.dataset_params.train_dataloader_params)
+        dataloader_params.batch_size = 1
+        train_dataloader = dataloaders.get(
+            name=get_param(cfg, "train_dataloader"),
+            dataset_params=cfg.dataset_params.train_dataset_params,
+            dataloader_params=dataloader_params,
+        )
+        inputs = next(iter(train_dataloader))[0]
+        return inputs.shape[1:]
+
     def _inject_selected_batch_size_to_config(self, cfg, model, msg, selected_batch_size):
         logger.info(msg)
         self._adapt_lr_if_needed(cfg, found_batch_size=selected_batch_size)
@@ -1,9 +1,10 @@
 import copy
 import inspect
 import os
+import sys
 import typing
 from copy import deepcopy
-from typing import Union, Tuple, Mapping, Dict, Any, List, Optional
+from typing import Union, Tuple, Mapping, Dict, Any, List, Optional, Iterable
 
 import hydra
 import numpy as np
@@ -79,6 +80,10 @@ from super_gradients.training.utils.optimizer_utils import build_optimizer
 from super_gradients.training.utils.sg_trainer_utils import MonitoredValue, log_main_training_params
 from super_gradients.training.utils.utils import fuzzy_idx_in_list, unwrap_model
 from super_gradients.training.utils.weight_averaging_utils import ModelWeightAveraging
+from super_gradients.training.utils.async_checkpoint_writer import AsyncCheckpointWriter
+from super_gradients.training.utils.step_profiler import StepProfiler
+from super_gradients.training.utils.deferred_logging_values import DeferredLoggingValues
+from super_gradients.training.utils.device_prefetcher import DevicePrefetcher
 from super_gradients.training.metrics import Accuracy, Top5
 from super_gradients.training.utils import random_seed
 from super_gradients.training.utils.checkpoint_utils import (
@@ -94,6 +99,7 @@ from super_gradients.training.utils.callbacks import (
     PhaseContext,
     MetricsUpdateCallback,
     LRCallbackBase,
+    ImageCacheStatsCallback,
 )
 from super_gradients.common.registry.registry import LR_WARMUP_CLS_DICT
 from super_gradients.common.environment.device_utils import device_config
@@ -183,6 +189,8 @@ class Trainer:
 
         self.model_weight_averaging = None
         self.average_model_checkpoint_filename = "average_model.pth"
+        self.checkpoint_writer: Optional[AsyncCheckpointWriter] = None
+        self.step_profiler = StepProfiler(enabled=False)
         self.start_epoch = 0
         self.best_metric = np.inf
         self.load_ema_as_net = False
@@ -458,7 +466,8 @@ class Trainer:
         self.net.train()
 
         # THE DISABLE FLAG CONTROLS WHETHER THE PROGRESS BAR IS SILENT OR PRINTS THE LOGS
-        with tqdm(self.train_loader, bar_format="{l_bar}{bar:10}{r_bar}", dynamic_ncols=True, disable=silent_mode) as progress_bar_train_loader:
+        train_loader = self._maybe_prefetch_to_device(self.train_loader)
+        with tqdm(train_loader, bar_format="{l_bar}{bar:10}{r_bar}", dynamic_ncols=True, disable=silent_mode) as progress_bar_train_loader:
             progress_bar_train_loader.set_description(f"Train epoch {context.epoch}")
 
             # RESET/INIT THE METRIC LOGGERS
@@ -469,8 +478,16 @@ class Trainer:
 
             context.update_context(loss_avg_meter=loss_avg_meter, metrics_compute_fn=self.train_metrics)
 
+            # WITH train_progress_update_freq THE LOGGING VALUES ARE READ EVERY N STEPS WITHOUT WAITING FOR THE DEVICE
+            update_freq = self.training_params.train_progress_update_freq
+            logging_values_reader = DeferredLoggingValues(device_config.device, update_freq=update_freq or 1, blocking=update_freq is None)
+
+            profiler = self.step_profiler
+            profiler.start("data_wait")
             for batch_idx, batch_items in enumerate(progress_bar_train_loader):
-                batch_items = core_utils.tensor_container_to_device(batch_items, device_config.device, non_blocking=True)
+                profiler.stop("data_wait")
+                with profiler.phase("h2d"):
+                    batch_items = core_utils.tensor_container_to_device(batch_items, device_config.device, non_blocking=True)
                 inputs, targets, additional_batch_items = sg_trainer_utils.unpack_batch_items(batch_items)
 
                 if self.pre_prediction_callback is not None:
@@ -479,38 +496,48 @@ class Trainer:
                 context.update_context(
                     batch_idx=batch_idx, inputs=inputs, target=targets, additional_batch_items=additional_batch_items, **additional_batch_items
                 )
-                self.phase_callback_handler.on_train_batch_start(context)
+                with profiler.phase("callbacks"):
+                    self.phase_callback_handler.on_train_batch_start(context)
 
                 # AUTOCAST IS ENABLED ONLY IF self.training_params.mixed_precision - IF enabled=False AUTOCAST HAS NO EFFECT
                 with autocast(enabled=self.training_params.mixed_precision):
                     # FORWARD PASS TO GET NETWORK'S PREDICTIONS
-                    outputs = self.net(inputs)
+                    with profiler.phase("forward"):
+                        outputs = self.net(inputs)
 
                     # COMPUTE THE LOSS FOR BACK PROP + EXTRA METRICS COMPUTED DURING THE LOSS FORWARD PASS
-                    loss, loss_log_items = self._get_losses(outputs, targets)
+                    with profiler.phase("loss"):
+                        loss, loss_log_items = self._get_losses(outputs, targets)
 
                 context.update_context(preds=outputs, loss_log_items=loss_log_items, loss_logging_items_names=self.loss_logging_items_names)
-                self.phase_callback_handler.on_train_batch_loss_end(context)
+                with profiler.phase("callbacks"):
+                    self.phase_callback_handler.on_train_batch_loss_end(context)
 
                 if not self.ddp_silent_mode and batch_idx == 0:
                     self._epoch_start_logging_values = self._get_epoch_start_logging_values()
 
                 self._backward_step(loss, context.epoch, batch_idx, context)
 
-                # COMPUTE THE RUNNING USER METRICS AND LOSS RUNNING ITEMS. RESULT TUPLE IS THEIR CONCATENATION.
-                logging_values = loss_avg_meter.average + get_metrics_results_tuple(self.train_metrics)
-                gpu_memory_utilization = get_gpu_mem_utilization() / 1e9 if torch.cuda.is_available() else 0
-
-                # RENDER METRICS PROGRESS
-                pbar_message_dict = get_train_loop_description_dict(
-                    logging_values, self.train_metrics, self.loss_logging_items_names, gpu_mem=gpu_memory_utilization
-                )
+                with profiler.phase("metrics"):
+                    # COMPUTE THE RUNNING USER METRICS AND LOSS RUNNING ITEMS. RESULT TUPLE IS THEIR CONCATENATION.
+                    if logging_values_reader.should_update(batch_idx):
+                        logging_values_reader.schedule(loss_avg_meter.average_tensor, get_metrics_results_tuple(self.train_metrics))
 
-                progress_bar_train_loader.set_postfix(**pbar_message_dict)
-                self.phase_callback_handler.on_train_batch_end(context)
+                    # RENDER METRICS PROGRESS FROM THE LAST VALUES THAT REACHED THE HOST
+                    ready_logging_values = logging_values_reader.poll()
+                    if ready_logging_values is not None:
+                        self._render_train_progress(progress_bar_train_loader, ready_logging_values)
+                with profiler.phase("callbacks"):
+                    self.phase_callback_handler.on_train_batch_end(context)
 
+                profiler.end_step(global_step=context.epoch * len(self.train_loader) + batch_idx)
                 if self.max_train_batches is not None and self.max_train_batches - 1 <= batch_idx:
                     break
+                profiler.start("data_wait")
+
+            # THE EPOCH RESULTS ARE ALWAYS READ FROM THE FINAL STATE OF THE LOSS AND METRICS
+            logging_values = loss_avg_meter.average + get_metrics_results_tuple(self.train_metrics)
+            pbar_message_dict = self._render_train_progress(progress_bar_train_loader, logging_values)
 
             self.train_monitored_values = sg_trainer_utils.update_monitored_values_dict(
                 monitored_values_dict=self.train_monitored_values, new_values_dict=pbar_message_dict
@@ -518,6 +545,30 @@ class Trainer:
 
         return logging_values
 
+    def _maybe_prefetch_to_device(self, data_loader: DataLoader) -> Iterable:
+        """
+        Wrap a data loader with a DevicePrefetcher if training_params.device_prefetch is set.
+
+        :param data_loader: Data loader of the train/validation/test loop
+        :return:            Iterable of the batches, already on the device when prefetched
+        """
+        if not core_utils.get_param(self.training_params, "device_prefetch", False):
+            return data_loader
+        return DevicePrefetcher(data_loader, device=device_config.device, **core_utils.get_param(self.training_params, "device_prefetch_params", {}))
+
+    def _render_train_progress(self, progress_bar: tqdm, logging_values: tuple) -> dict:
+        """
+        Set the postfix of the train progress bar to the logging values.
+
+        :param progress_bar:    Train progress bar
+        :param logging_values:  Loss running items followed by the metrics values
+        :return:                Dict of {name: value} rendered in the progress bar
+        """
+        gpu_memory_utilization = get_gpu_mem_utilization() / 1e9 if torch.cuda.is_available() else 0
+        pbar_message_dict = get_train_loop_description_dict(logging_values, self.train_metrics, self.loss_logging_items_names, gpu_mem=gpu_memory_utilization)
+        progress_bar.set_postfix(**pbar_message_dict)
+        return pbar_message_dict
+
     def _get_losses(self, outputs: torch.Tensor, targets: torch.Tensor) -> Tuple[torch.Tensor, tuple]:
         # GET THE OUTPUT OF THE LOSS FUNCTION
         loss = self.criterion(outputs, targets)
@@ -603,9 +654,13 @@ class Trainer:
         :param context: current phase context
         :return:
         """
+        profiler = self.step_profiler
+
         # SCALER IS ENABLED ONLY IF self.training_params.mixed_precision=True
-        self.scaler.scale(loss).backward()
-        self.phase_callback_handler.on_train_batch_backward_end(context)
+        with profiler.phase("backward"):
+            self.scaler.scale(loss).backward()
+        with profiler.phase("callbacks"):
+            self.phase_callback_handler.on_train_batch_backward_end(context)
 
         # ACCUMULATE GRADIENT FOR X BATCHES BEFORE OPTIMIZING
         local_step = batch_idx + 1
@@ -613,23 +668,27 @@ class Trainer:
         total_steps = len(self.train_loader) * self.max_epochs
 
         if global_step % self.batch_accumulate == 0:
-            self.phase_callback_handler.on_train_batch_gradient_step_start(context)
+            with profiler.phase("callbacks"):
+                self.phase_callback_handler.on_train_batch_gradient_step_start(context)
 
-            # APPLY GRADIENT CLIPPING IF REQUIRED
-            if self.training_params.clip_grad_norm:
-                self.scaler.unscale_(self.optimizer)
-                torch.nn.utils.clip_grad_norm_(self.net.parameters(), self.training_params.clip_grad_norm)
+            with profiler.phase("optimizer"):
+                # APPLY GRADIENT CLIPPING IF REQUIRED
+                if self.training_params.clip_grad_norm:
+                    self.scaler.unscale_(self.optimizer)
+                    torch.nn.utils.clip_grad_norm_(self.net.parameters(), self.training_params.clip_grad_norm)
 
-            # SCALER IS ENABLED ONLY IF self.training_params.mixed_precision=True
-            self.scaler.step(self.optimizer)
-            self.scaler.update()
+                # SCALER IS ENABLED ONLY IF self.training_params.mixed_precision=True
+                self.scaler.step(self.optimizer)
+                self.scaler.update()
 
-            self.optimizer.zero_grad()
+                self.optimizer.zero_grad()
             if self.ema:
-                self.ema_model.update(self.net, step=global_step, total_steps=total_steps)
+                with profiler.phase("ema"):
+                    self.ema_model.update(self.net, step=global_step, total_steps=total_steps)
 
             # RUN PHASE CALLBACKS
-            self.phase_callback_handler.on_train_batch_gradient_step_end(context)
+            with profiler.phase("callbacks"):
+                self.phase_callback_handler.on_train_batch_gradient_step_end(context)
 
     def _save_checkpoint(
         self,
@@ -644,7 +703,7 @@ class Trainer:
         """
         # WHEN THE validation_results_tuple IS NONE WE SIMPLY SAVE THE state_dict AS LATEST AND Return
         if validation_results_dict is None:
-            self.sg_logger.add_checkpoint(tag="ckpt_latest_weights_only.pth", state_dict={"net": self.net.state_dict()}, global_step=epoch)
+            self._add_checkpoint(tags=["ckpt_latest_weights_only.pth"], state_dict={"net": self.net.state_dict()}, global_step=epoch)
             return
 
         # COMPUTE THE CURRENT metric
@@ -671,17 +730,24 @@ class Trainer:
             state["torch_scheduler_state_dict"] = get_scheduler_state(self._torch_lr_scheduler)
 
         # SAVES CURRENT MODEL AS ckpt_latest
-        self.sg_logger.add_checkpoint(tag="ckpt_latest.pth", state_dict=state, global_step=epoch)
+        checkpoint_tags = ["ckpt_latest.pth"]
 
         # SAVE MODEL AT SPECIFIC EPOCHS DETERMINED BY save_ckpt_epoch_list
         if epoch in self.training_params.save_ckpt_epoch_list:
-            self.sg_logger.add_checkpoint(tag=f"ckpt_epoch_{epoch}.pth", state_dict=state, global_step=epoch)
+            checkpoint_tags.append(f"ckpt_epoch_{epoch}.pth")
 
         # OVERRIDE THE BEST CHECKPOINT AND best_metric IF metric GOT BETTER THAN THE PREVIOUS BEST
-        if (metric > self.best_metric and self.greater_metric_to_watch_is_better) or (metric < self.best_metric and not self.greater_metric_to_watch_is_better):
+        is_best = (metric > self.best_metric and self.greater_metric_to_watch_is_better) or (
+            metric < self.best_metric and not self.greater_metric_to_watch_is_better
+        )
+        if is_best:
+            checkpoint_tags.append(self.ckpt_best_name)
+
+        self._add_checkpoint(tags=checkpoint_tags, state_dict=state, global_step=epoch)
+
+        if is_best:
             # STORE THE CURRENT metric AS BEST
             self.best_metric = metric
-            self.sg_logger.add_checkpoint(tag=self.ckpt_best_name, state_dict=state, global_step=epoch)
 
             # RUN PHASE CALLBACKS
             self.phase_callback_handler.on_validation_end_best_epoch(context)
@@ -694,7 +760,18 @@ class Trainer:
             net_for_averaging = unwrap_model(self.ema_model.ema if self.ema else self.net)
 
             state["net"] = self.model_weight_averaging.get_average_model(net_for_averaging, validation_results_dict=validation_results_dict)
-            self.sg_logger.add_checkpoint(tag=self.average_model_checkpoint_filename, state_dict=state, global_step=epoch)
+            self._add_checkpoint(tags=[self.average_model_checkpoint_filename], state_dict=state, global_step=epoch)
+
+    def _add_checkpoint(self, tags: List[str], state_dict: dict, global_step: int) -> None:
+        """
+        Save the same state dict under several checkpoint names, either synchronously with the sg_logger,
+        or in the background if training_params.async_checkpointing is set (the state is then serialized only once).
+        """
+        if self.checkpoint_writer is not None:
+            self.checkpoint_writer.save(tags=tags, state_dict=state_dict, global_step=global_step)
+        else:
+            for tag in tags:
+                self.sg_logger.add_checkpoint(tag=tag, state_dict=state_dict, global_step=global_step)
 
     def _prep_net_for_train(self) -> None:
         if self.arch_params is None:
@@ -1046,6 +1123,42 @@ class Trainer:
 
                     List of fixed epoch indices the user wishes to save checkpoints in.
 
+                - `async_checkpointing` : bool (default=False)
+
+                    If set, checkpoints are written by a background thread (see AsyncCheckpointWriter): training only waits for the
+                    state to be copied to CPU memory, each state is serialized once even when saved under several names
+                    (latest, best, epoch), and files are written atomically.
+
+                - `train_progress_update_freq` : int (default=None)
+
+                    Number of training steps between two updates of the running loss and metrics in the progress bar.
+                    If None, they are computed and read every step, which synchronizes the device with the host every step.
+                    If set, they are read every `train_progress_update_freq` steps by a non-blocking copy, and the progress bar
+                    is updated once the copy completed, so that the device is never waited for. The values returned at the end of
+                    the epoch are not affected.
+
+                - `device_prefetch` : bool (default=False)
+
+                    If set, the train, validation and test loaders are wrapped with a DevicePrefetcher: batches are pinned in a
+                    background thread and copied to the GPU on a side CUDA stream ahead of the batch being processed, so that the
+                    host to device copy overlaps with the computation. Has no effect on CPU.
+
+                - `device_prefetch_params` : dict (default={"num_prefetch": 2, "normalize_uint8_inputs": False, "mean": None, "std": None})
+
+                    Parameters of DevicePrefetcher. With `normalize_uint8_inputs`, uint8 inputs are converted to float, divided by 255
+                    and normalized by `mean` and `std` on the device, so the data loader workers can ship uint8 images.
+
+                - `step_profiler` : bool (default=False)
+
+                    If set, the duration of every phase of the training step (data wait, host to device copy, forward, loss,
+                    backward, optimizer, EMA, callbacks and metrics) is recorded (see StepProfiler), and its p50/p95/p99
+                    are written to the sg_logger every `step_profiler_params.report_every` steps.
+
+                - `step_profiler_params` : dict (default={"report_every": 100, "buffer_size": 1000})
+
+                    Parameters of StepProfiler: `report_every` (number of steps between two reports) and `buffer_size`
+                    (number of last steps over which the percentiles are computed).
+
                 - `average_best_models` : bool (default=False)
 
                     If set, a snapshot dictionary file and the average model will be saved / updated at every epoch
@@ -1174,6 +1287,10 @@ class Trainer:
         self._load_checkpoint_to_model()
         if not self.ddp_silent_mode:
             self._initialize_sg_logger_objects(additional_configs_to_log)
+            if self.training_params.async_checkpointing:
+                self.checkpoint_writer = AsyncCheckpointWriter(sg_logger=self.sg_logger)
+            if self.training_params.step_profiler:
+                self.step_profiler = StepProfiler(sg_logger=self.sg_logger, device=device_config.device, **self.training_params.step_profiler_params)
 
         # SET RANDOM SEED
         random_seed(is_ddp=device_config.multi_gpu == MultiGPUMode.DISTRIBUTED_DATA_PARALLEL, device=device_config.device, seed=self.training_params.seed)
@@ -1272,6 +1389,7 @@ class Trainer:
         self._add_metrics_update_callback(Phase.TRAIN_BATCH_END)
         self._add_metrics_update_callback(Phase.VALIDATION_BATCH_END)
         self._add_metrics_update_callback(Phase.TEST_BATCH_END)
+        self._add_image_cache_stats_callback()
 
         self.phase_callback_handler = CallbackHandler(callbacks=self.phase_callbacks)
 
@@ -1519,6 +1637,8 @@ class Trainer:
 
             # Evaluating the average model and removing snapshot averaging file if training is completed
             if self.training_params.average_best_models:
+                if self.checkpoint_writer is not None:
+                    self.checkpoint_writer.wait()
                 self._validate_final_average_model(context=context, checkpoint_dir_path=self.checkpoints_dir_path, cleanup_snapshots_pkl_file=True)
 
             # PHASE.AVERAGE_BEST_MODELS_VALIDATION_END
@@ -1538,12 +1658,29 @@ class Trainer:
                 if torch.distributed.is_initialized() and self.training_params.kill_ddp_pgroup_on_end:
                     torch.distributed.destroy_process_group()
 
+            # The queued checkpoints are written before the logger is closed, but a write error is only raised once the cleanup is done
+            checkpoint_writer_error = None
+            if self.checkpoint_writer is not None:
+                try:
+                    self.checkpoint_writer.close()
+                except Exception as e:
+                    checkpoint_writer_error = e
+                self.checkpoint_writer = None
+
+            self.step_profiler = StepProfiler(enabled=False)
+
             # PHASE.TRAIN_END
             self.phase_callback_handler.on_training_end(context)
 
             if not self.ddp_silent_mode:
                 self.sg_logger.close()
 
+            if checkpoint_writer_error is not None:
+                if sys.exc_info()[1] is None:
+                    raise checkpoint_writer_error
+                # Do not hide the exception that interrupted the training
+                logger.error(f"Failed to write the last checkpoints: {checkpoint_writer_error}")
+
     def _get_preprocessing_from_valid_loader(self) -> Optional[dict]:
         valid_loader = self.valid_loader
 
@@ -1810,6 +1947,16 @@ class Trainer:
         """
         self.phase_callbacks.append(MetricsUpdateCallback(phase))
 
+    def _add_image_cache_stats_callback(self):
+        """
+        Adds ImageCacheStatsCallback (unless already passed in phase_callbacks) when the train or validation dataset uses a sharded image cache,
+        so that the cache hits and misses are reported to the sg_logger every epoch.
+        """
+        if any(isinstance(callback, ImageCacheStatsCallback) for callback in self.phase_callbacks):
+            return
+        if ImageCacheStatsCallback.get_sharded_image_caches(self.train_loader) or ImageCacheStatsCallback.get_sharded_image_caches(self.valid_loader):
+            self.phase_callbacks.append(ImageCacheStatsCallback())
+
     def _initialize_sg_logger_objects(self, additional_configs_to_log: Dict = None):
         """Initialize object that collect, write to disk, monitor and store remotely all training outputs"""
         sg_logger = core_utils.get_param(self.training_params, "sg_logger")
@@ -2080,6 +2227,7 @@ class Trainer:
             loss_logging_items_names=self.loss_logging_items_names,
         )
 
+        data_loader = self._maybe_prefetch_to_device(data_loader)
         with tqdm(data_loader, bar_format="{l_bar}{bar:10}{r_bar}", dynamic_ncols=True, disable=silent_mode) as progress_bar_data_loader:
 
             if not silent_mode:
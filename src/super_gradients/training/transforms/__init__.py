@@ -6,6 +6,7 @@ from super_gradients.training.transforms.transforms import (
     DetectionStandardize,
     DetectionMosaic,
     DetectionRandomAffine,
+    DetectionMosaicAffine,
     DetectionHSV,
     DetectionRGB2BGR,
     DetectionPaddedRescale,
@@ -45,6 +46,7 @@ __all__ = [
     "DetectionStandardize",
     "DetectionMosaic",
     "DetectionRandomAffine",
+    "DetectionMosaicAffine",
     "DetectionHSV",
     "DetectionRGB2BGR",
     "DetectionPaddedRescale",
@@ -2,6 +2,7 @@ import collections
 import math
 import random
 import warnings
+from functools import lru_cache
 from numbers import Number
 from typing import Optional, Union, Tuple, List, Sequence, Dict
 
@@ -52,10 +53,7 @@ class SegResize(SegmentationTransform):
         self.w = w
 
     def __call__(self, sample):
-        image = sample["image"]
-        mask = sample["mask"]
-        sample["image"] = image.resize((self.w, self.h), IMAGE_RESAMPLE_MODE)
-        sample["mask"] = mask.resize((self.w, self.h), MASK_RESAMPLE_MODE)
+        sample["image"], sample["mask"] = _resize_image_and_mask(sample["image"], sample["mask"], (self.w, self.h))
         return sample
 
 
@@ -73,8 +71,12 @@ class SegRandomFlip(SegmentationTransform):
         image = sample["image"]
         mask = sample["mask"]
         if random.random() < self.prob:
-            image = image.transpose(Image.FLIP_LEFT_RIGHT)
-            mask = mask.transpose(Image.FLIP_LEFT_RIGHT)
+            if isinstance(image, np.ndarray):
+                image = cv2.flip(image, 1)
+                mask = cv2.flip(mask, 1)
+            else:
+                image = image.transpose(Image.FLIP_LEFT_RIGHT)
+                mask = mask.transpose(Image.FLIP_LEFT_RIGHT)
             sample["image"] = image
             sample["mask"] = mask
 
@@ -105,7 +107,7 @@ class SegRescale(SegmentationTransform):
     def __call__(self, sample: dict) -> dict:
         image = sample["image"]
         mask = sample["mask"]
-        w, h = image.size
+        w, h = _get_image_size(image)
         if self.scale_factor is not None:
             scale = self.scale_factor
         elif self.short_size is not None:
@@ -117,8 +119,7 @@ class SegRescale(SegmentationTransform):
 
         out_size = int(scale * w), int(scale * h)
 
-        image = image.resize(out_size, IMAGE_RESAMPLE_MODE)
-        mask = mask.resize(out_size, MASK_RESAMPLE_MODE)
+        image, mask = _resize_image_and_mask(image, mask, out_size)
 
         sample["image"] = image
         sample["mask"] = mask
@@ -155,13 +156,12 @@ class SegRandomRescale:
     def __call__(self, sample: dict) -> dict:
         image = sample["image"]
         mask = sample["mask"]
-        w, h = image.size
+        w, h = _get_image_size(image)
 
         scale = random.uniform(self.scales[0], self.scales[1])
         out_size = int(scale * w), int(scale * h)
 
-        image = image.resize(out_size, IMAGE_RESAMPLE_MODE)
-        mask = mask.resize(out_size, MASK_RESAMPLE_MODE)
+        image, mask = _resize_image_and_mask(image, mask, out_size)
 
         sample["image"] = image
         sample["mask"] = mask
@@ -205,8 +205,15 @@ class SegRandomRotate(SegmentationTransform):
         mask = sample["mask"]
 
         deg = random.uniform(self.min_deg, self.max_deg)
-        image = image.rotate(deg, resample=IMAGE_RESAMPLE_MODE, fillcolor=self.fill_image)
-        mask = mask.rotate(deg, resample=MASK_RESAMPLE_MODE, fillcolor=self.fill_mask)
+        if isinstance(image, np.ndarray):
+            # Same rotation as PIL's Image.rotate: counter clockwise, around the center of the image, without expanding it
+            w, h = _get_image_size(image)
+            rotation_matrix = cv2.getRotationMatrix2D(((w - 1) / 2, (h - 1) / 2), deg, 1.0)
+            image = cv2.warpAffine(image, rotation_matrix, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=self.fill_image)
+            mask = cv2.warpAffine(mask, rotation_matrix, (w, h), flags=cv2.INTER_NEAREST, borderMode=cv2.BORDER_CONSTANT, borderValue=self.fill_mask)
+        else:
+            image = image.rotate(deg, resample=IMAGE_RESAMPLE_MODE, fillcolor=self.fill_image)
+            mask = mask.rotate(deg, resample=MASK_RESAMPLE_MODE, fillcolor=self.fill_mask)
 
         sample["image"] = image
         sample["mask"] = mask
@@ -243,7 +250,7 @@ class SegCropImageAndMask(SegmentationTransform):
         image = sample["image"]
         mask = sample["mask"]
 
-        w, h = image.size
+        w, h = _get_image_size(image)
         if self.mode == "random":
             x1 = random.randint(0, w - self.crop_size[0])
             y1 = random.randint(0, h - self.crop_size[1])
@@ -251,8 +258,12 @@ class SegCropImageAndMask(SegmentationTransform):
             x1 = int(round((w - self.crop_size[0]) / 2.0))
             y1 = int(round((h - self.crop_size[1]) / 2.0))
 
-        image = image.crop((x1, y1, x1 + self.crop_size[0], y1 + self.crop_size[1]))
-        mask = mask.crop((x1, y1, x1 + self.crop_size[0], y1 + self.crop_size[1]))
+        if isinstance(image, np.ndarray):
+            image = _crop_array(image, x1, y1, self.crop_size[0], self.crop_size[1])
+            mask = _crop_array(mask, x1, y1, self.crop_size[0], self.crop_size[1])
+        else:
+            image = image.crop((x1, y1, x1 + self.crop_size[0], y1 + self.crop_size[1]))
+            mask = mask.crop((x1, y1, x1 + self.crop_size[0], y1 + self.crop_size[1]))
 
         sample["image"] = image
         sample["mask"] = mask
@@ -284,7 +295,12 @@ class SegRandomGaussianBlur(SegmentationTransform):
         mask = sample["mask"]
 
         if random.random() < self.prob:
-            image = image.filter(ImageFilter.GaussianBlur(radius=random.random()))
+            radius = random.random()
+            if not isinstance(image, np.ndarray):
+                image = image.filter(ImageFilter.GaussianBlur(radius=radius))
+            elif radius > 0:
+                # PIL's radius is the standard deviation of the gaussian kernel
+                image = cv2.GaussianBlur(image, ksize=(0, 0), sigmaX=radius)
 
         sample["image"] = image
         sample["mask"] = mask
@@ -315,7 +331,7 @@ class SegPadShortToCropSize(SegmentationTransform):
     def __call__(self, sample: dict) -> dict:
         image = sample["image"]
         mask = sample["mask"]
-        w, h = image.size
+        w, h = _get_image_size(image)
 
         # pad images from center symmetrically
         if w < self.crop_size[0] or h < self.crop_size[1]:
@@ -324,8 +340,7 @@ class SegPadShortToCropSize(SegmentationTransform):
             padw = (self.crop_size[0] - w) / 2 if w < self.crop_size[0] else 0
             pad_left, pad_right = math.ceil(padw), math.floor(padw)
 
-            image = ImageOps.expand(image, border=(pad_left, pad_top, pad_right, pad_bottom), fill=self.fill_image)
-            mask = ImageOps.expand(mask, border=(pad_left, pad_top, pad_right, pad_bottom), fill=self.fill_mask)
+            image, mask = _pad_image_and_mask(image, mask, (pad_left, pad_top, pad_right, pad_bottom), self.fill_image, self.fill_mask)
 
         sample["image"] = image
         sample["mask"] = mask
@@ -355,7 +370,7 @@ class SegPadToDivisible(SegmentationTransform):
     def __call__(self, sample: dict) -> dict:
         image = sample["image"]
         mask = sample["mask"]
-        w, h = image.size
+        w, h = _get_image_size(image)
 
         padded_w = int(math.ceil(w / self.divisible_value) * self.divisible_value)
         padded_h = int(math.ceil(h / self.divisible_value) * self.divisible_value)
@@ -364,8 +379,7 @@ class SegPadToDivisible(SegmentationTransform):
             padh = padded_h - h
             padw = padded_w - w
 
-            image = ImageOps.expand(image, border=(0, 0, padw, padh), fill=self.fill_image)
-            mask = ImageOps.expand(mask, border=(0, 0, padw, padh), fill=self.fill_mask)
+            image, mask = _pad_image_and_mask(image, mask, (0, 0, padw, padh), self.fill_image, self.fill_mask)
 
         sample["image"] = image
         sample["mask"] = mask
@@ -379,7 +393,12 @@ class SegPadToDivisible(SegmentationTransform):
 @register_transform(Transforms.SegColorJitter)
 class SegColorJitter(transforms.ColorJitter):
     def __call__(self, sample):
-        sample["image"] = super(SegColorJitter, self).__call__(sample["image"])
+        image = sample["image"]
+        if isinstance(image, np.ndarray):
+            # torchvision's color adjustments work on PIL images (or tensors), so the image is wrapped for this transform only
+            sample["image"] = np.asarray(super(SegColorJitter, self).__call__(Image.fromarray(image))).copy()
+        else:
+            sample["image"] = super(SegColorJitter, self).__call__(image)
         return sample
 
 
@@ -398,6 +417,65 @@ def _validate_fill_values_arguments(fill_mask: int, fill_image: Union[int, Tuple
     return fill_mask, fill_image
 
 
+def _get_image_size(image: Union[Image.Image, np.ndarray]) -> Tuple[int, int]:
+    """Get the (width, height) of a PIL image or of a numpy array of shape (H, W) or (H, W, C)."""
+    if isinstance(image, np.ndarray):
+        return image.shape[1], image.shape[0]
+    return image.size
+
+
+def _resize_image_and_mask(
+    image: Union[Image.Image, np.ndarray], mask: Union[Image.Image, np.ndarray], size: Tuple[int, int]
+) -> Tuple[Union[Image.Image, np.ndarray], Union[Image.Image, np.ndarray]]:
+    """Resize an image (bilinear) and its mask (nearest) to size=(width, height).
+    Numpy images are resized with cv2, with INTER_AREA when downscaling (which, like PIL, averages the source pixels) and INTER_LINEAR otherwise.
+    Numpy masks are indexed with the source rows and columns picked by PIL's nearest resampling, so that they are equal to the PIL masks.
+    """
+    if isinstance(image, np.ndarray):
+        w, h = _get_image_size(image)
+        interpolation = cv2.INTER_AREA if size[0] < w and size[1] < h else cv2.INTER_LINEAR
+        mask_w, mask_h = _get_image_size(mask)
+        rows, columns = _get_nearest_indices(mask_h, size[1]), _get_nearest_indices(mask_w, size[0])
+        return cv2.resize(image, size, interpolation=interpolation), mask[rows[:, None], columns[None, :]]
+    return image.resize(size, IMAGE_RESAMPLE_MODE), mask.resize(size, MASK_RESAMPLE_MODE)
+
+
+@lru_cache(maxsize=64)
+def _get_nearest_indices(input_size: int, output_size: int) -> np.ndarray:
+    """Get the source index of each output pixel along an axis, when resizing from input_size to output_size with PIL's nearest resampling.
+    The indices are computed by PIL itself, by resizing a ramp of input_size pixels (cv2's INTER_NEAREST(_EXACT) rounds them differently).
+    """
+    ramp = Image.fromarray(np.arange(input_size, dtype=np.int32)[None, :])
+    indices = np.asarray(ramp.resize((output_size, 1), MASK_RESAMPLE_MODE))[0].astype(np.intp)
+    indices.setflags(write=False)  # Shared by the calls with the same sizes
+    return indices
+
+
+def _pad_image_and_mask(
+    image: Union[Image.Image, np.ndarray], mask: Union[Image.Image, np.ndarray], border: Tuple[int, int, int, int], fill_image: Tuple, fill_mask: int
+) -> Tuple[Union[Image.Image, np.ndarray], Union[Image.Image, np.ndarray]]:
+    """Pad an image and its mask by border=(left, top, right, bottom) pixels, with constant fill values."""
+    if isinstance(image, np.ndarray):
+        left, top, right, bottom = border
+        image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=fill_image)
+        mask = cv2.copyMakeBorder(mask, top, bottom, left, right, cv2.BORDER_CONSTANT, value=fill_mask)
+        return image, mask
+    return ImageOps.expand(image, border=border, fill=fill_image), ImageOps.expand(mask, border=border, fill=fill_mask)
+
+
+def _crop_array(array: np.ndarray, x1: int, y1: int, width: int, height: int) -> np.ndarray:
+    """Crop a (H, W) or (H, W, C) array like PIL's Image.crop: the parts of the crop outside the array are filled with zeros."""
+    h, w = array.shape[:2]
+    if x1 >= 0 and y1 >= 0 and x1 + width <= w and y1 + height <= h:
+        return array[y1 : y1 + height, x1 : x1 + width]
+
+    crop = np.zeros((height, width) + array.shape[2:], dtype=array.dtype)
+    src_x1, src_y1, src_x2, src_y2 = max(x1, 0), max(y1, 0), min(x1 + width, w), min(y1 + height, h)
+    if src_x1 < src_x2 and src_y1 < src_y2:
+        crop[src_y1 - y1 : src_y2 - y1, src_x1 - x1 : src_x2 - x1] = array[src_y1:src_y2, src_x1:src_x2]
+    return crop
+
+
 class DetectionTransform:
     """
     Detection transform base class.
@@ -613,6 +691,221 @@ class DetectionRandomAffine(DetectionTransform):
         return sample
 
 
+@register_transform(Transforms.DetectionMosaicAffine)
+class DetectionMosaicAffine(DetectionTransform):
+    """
+    Fused DetectionMosaic + DetectionRandomAffine detection transform.
+
+    DetectionMosaic pastes 4 resized images into a (2 * input_h, 2 * input_w) canvas which DetectionRandomAffine then warps to target_size.
+    This transform produces the same samples without the intermediate canvas: the resize, the placement in the mosaic and the random
+    affine transform of every image are combined into a single affine matrix, and each image is warped directly into the output image.
+    The boxes of all the images are moved to the mosaic at once and then warped with a single matrix product.
+
+    The random parameters are drawn in the same order as in DetectionMosaic followed by DetectionRandomAffine,
+    so that with the same random state both produce the same sample (up to interpolation differences, since every pixel
+    is interpolated once instead of twice).
+
+    :param input_dim:              Input dimension of the mosaic (each mosaic cell is of this size).
+    :param prob:                   Probability of applying mosaic. When mosaic is not applied, only the random affine transform is applied.
+    :param enable_mosaic:          Whether to apply mosaic at all (regardless of prob).
+    :param degrees:                Degrees for random rotation, when float the random values are drawn uniformly from (-degrees, degrees)
+    :param translate:              Translate size (in pixels) for random translation, when float the random values are drawn uniformly from
+                                   (center-translate, center+translate)
+    :param scales:                 Values for random rescale, when float the random values are drawn uniformly from (1-scales, 1+scales)
+    :param shear:                  Degrees for random shear, when float the random values are drawn uniformly from (-shear, shear)
+    :param target_size:            Desired output shape.
+    :param filter_box_candidates:  Whether to filter out transformed bboxes by edge size, area ratio, and aspect ratio (default=False).
+    :param wh_thr:                 Edge size threshold when filter_box_candidates = True.
+                                   Bounding oxes with edges smaller than this values will be filtered out.
+    :param ar_thr:                 Aspect ratio threshold filter_box_candidates = True.
+                                   Bounding boxes with aspect ratio larger than this values will be filtered out.
+    :param area_thr:               Threshold for area ratio between original image and the transformed one, when filter_box_candidates = True.
+                                   Bounding boxes with such ratio smaller than this value will be filtered out.
+    :param border_value:           Value for filling borders after applying transforms.
+    """
+
+    def __init__(
+        self,
+        input_dim: Union[int, Tuple[int, int]],
+        prob: float = 1.0,
+        enable_mosaic: bool = True,
+        degrees: Union[tuple, float] = 10,
+        translate: Union[tuple, float] = 0.1,
+        scales: Union[tuple, float] = 0.1,
+        shear: Union[tuple, float] = 10,
+        target_size: Union[int, Tuple[int, int], None] = (640, 640),
+        filter_box_candidates: bool = False,
+        wh_thr: float = 2,
+        ar_thr: float = 20,
+        area_thr: float = 0.1,
+        border_value: int = 114,
+    ):
+        super(DetectionMosaicAffine, self).__init__(additional_samples_count=3)
+        self.input_dim = ensure_is_tuple_of_two(input_dim)
+        self.prob = prob
+        self.enable_mosaic = enable_mosaic
+        self.degrees = degrees
+        self.translate = translate
+        self.scale = scales
+        self.shear = shear
+        self.target_size = ensure_is_tuple_of_two(target_size)
+        self.enable = True
+        self.filter_box_candidates = filter_box_candidates
+        self.wh_thr = wh_thr
+        self.ar_thr = ar_thr
+        self.area_thr = area_thr
+        self.border_value = border_value
+
+    def close(self):
+        self.additional_samples_count = 0
+        self.enable_mosaic = False
+        self.enable = False
+
+    def __call__(self, sample: dict) -> dict:
+        if not (self.enable_mosaic and random.random() < self.prob):
+            if self.enable:
+                sample["image"], sample["target"] = random_affine(
+                    sample["image"],
+                    sample["target"],
+                    sample.get("target_seg"),
+                    target_size=self.target_size or tuple(reversed(sample["image"].shape[:2])),
+                    degrees=self.degrees,
+                    translate=self.translate,
+                    scales=self.scale,
+                    shear=self.shear,
+                    filter_box_candidates=self.filter_box_candidates,
+                    wh_thr=self.wh_thr,
+                    area_thr=self.area_thr,
+                    ar_thr=self.ar_thr,
+                    border_value=self.border_value,
+                )
+            return sample
+
+        input_h, input_w = self.input_dim[0], self.input_dim[1]
+        yc = int(random.uniform(0.5 * input_h, 1.5 * input_h))
+        xc = int(random.uniform(0.5 * input_w, 1.5 * input_w))
+
+        # Affine transform from the (virtual) mosaic canvas to the output image
+        if self.enable:
+            target_size = self.target_size or (2 * input_w, 2 * input_h)
+            mosaic_to_output = get_affine_matrix((2 * input_h, 2 * input_w), target_size, self.degrees, self.translate, self.scale, self.shear)
+        else:
+            target_size = (2 * input_w, 2 * input_h)
+            mosaic_to_output = np.eye(3)[:2]
+
+        all_samples = [sample] + sample["additional_samples"]
+        output_img = np.full((target_size[1], target_size[0], all_samples[0]["image"].shape[2]), self.border_value, dtype=np.uint8)
+
+        labels, labels_seg, labels_scale_and_pad, labels_seg_scale_and_pad = [], [], [], []
+        for i_mosaic, mosaic_sample in enumerate(all_samples):
+            img = mosaic_sample["image"]
+            h0, w0 = img.shape[:2]  # orig hw
+            scale = min(1.0 * input_h / h0, 1.0 * input_w / w0)
+            w, h = int(w0 * scale), int(h0 * scale)  # size of the resized image in the mosaic
+
+            # suffix l means large image, while s means small image in mosaic aug.
+            (l_x1, l_y1, l_x2, l_y2), (s_x1, s_y1, s_x2, s_y2) = get_mosaic_coordinate(i_mosaic, xc, yc, w, h, input_h, input_w)
+            padw, padh = l_x1 - s_x1, l_y1 - s_y1
+
+            self._warp_into_output(img, output_img, mosaic_to_output, (w, h), (padw, padh), (s_x1, s_y1, s_x2, s_y2))
+
+            labels.append(mosaic_sample["target"])
+            labels_scale_and_pad.append(np.tile([[scale, padw, padh]], (len(mosaic_sample["target"]), 1)))
+            if mosaic_sample.get("target_seg") is not None:
+                labels_seg.append(mosaic_sample["target_seg"])
+                labels_seg_scale_and_pad.append(np.tile([[scale, padw, padh]], (len(mosaic_sample["target_seg"]), 1)))
+
+        # Move the boxes of all the images to the mosaic at once, then warp them to the output
+        mosaic_labels = np.concatenate(labels, 0).copy()
+        scale, padw, padh = np.concatenate(labels_scale_and_pad, 0).T
+        mosaic_labels[:, 0:4] = mosaic_labels[:, 0:4] * scale[:, None] + np.stack([padw, padh, padw, padh], 1)
+        mosaic_labels[:, [0, 2]] = np.clip(mosaic_labels[:, [0, 2]], 0, 2 * input_w)
+        mosaic_labels[:, [1, 3]] = np.clip(mosaic_labels[:, [1, 3]], 0, 2 * input_h)
+
+        mosaic_labels_seg = None
+        if len(labels_seg):
+            mosaic_labels_seg = np.concatenate(labels_seg, 0).copy()
+            scale, padw, padh = np.concatenate(labels_seg_scale_and_pad, 0).T
+            mosaic_labels_seg[:, ::2] = np.clip(mosaic_labels_seg[:, ::2] * scale[:, None] + padw[:, None], 0, 2 * input_w)
+            mosaic_labels_seg[:, 1::2] = np.clip(mosaic_labels_seg[:, 1::2] * scale[:, None] + padh[:, None], 0, 2 * input_h)
+
+        if self.enable:
+            targets_seg = np.zeros((mosaic_labels.shape[0], 0)) if mosaic_labels_seg is None else mosaic_labels_seg
+            output_labels = _apply_affine_to_targets(
+                mosaic_labels,
+                targets_seg,
+                target_size,
+                mosaic_to_output,
+                self.filter_box_candidates,
+                wh_thr=self.wh_thr,
+                ar_thr=self.ar_thr,
+                area_thr=self.area_thr,
+            )
+        else:
+            output_labels = mosaic_labels
+
+        sample["image"] = output_img
+        sample["target"] = output_labels
+        sample["info"] = (2 * input_w, 2 * input_h)
+        if mosaic_labels_seg is not None and len(mosaic_labels_seg):
+            sample["target_seg"] = mosaic_labels_seg
+        return sample
+
+    @staticmethod
+    def _warp_into_output(
+        img: np.ndarray,
+        output_img: np.ndarray,
+        mosaic_to_output: np.ndarray,
+        resized_size: Tuple[int, int],
+        mosaic_offset: Tuple[int, int],
+        visible_region: Tuple[int, int, int, int],
+    ) -> None:
+        """
+        Warp the visible part of an image directly into the output image, as if it was resized, placed in the mosaic
+        and then warped together with the whole mosaic.
+
+        :param img:              Image to warp
+        :param output_img:       Output image, modified in place
+        :param mosaic_to_output: Affine transform (2x3) from the mosaic canvas to the output image
+        :param resized_size:     (w, h) size of the image after resizing it to the mosaic cell
+        :param mosaic_offset:    (padw, padh) position of the resized image in the mosaic canvas
+        :param visible_region:   (x1, y1, x2, y2) region of the resized image that is visible in the mosaic
+        """
+        h0, w0 = img.shape[:2]
+        (w, h), (padw, padh), (s_x1, s_y1, s_x2, s_y2) = resized_size, mosaic_offset, visible_region
+        fx, fy = w / w0, h / h0
+
+        # Visible part of the original image (the image is cropped only where it exceeds the mosaic canvas)
+        x1, y1 = int(round(s_x1 / fx)), int(round(s_y1 / fy))
+        x2, y2 = min(int(round(s_x2 / fx)), w0), min(int(round(s_y2 / fy)), h0)
+        if x2 <= x1 or y2 <= y1:
+            return
+
+        # The crop is padded by one pixel, so that the pixels between two images in the mosaic are interpolated from their edges
+        # (rather than left out by BORDER_TRANSPARENT, which skips the pixels that are interpolated from outside of the source)
+        crop = cv2.copyMakeBorder(img[y1:y2, x1:x2], 1, 1, 1, 1, cv2.BORDER_REPLICATE)
+
+        # Same pixel mapping as cv2.resize, followed by the placement of the resized image in the mosaic
+        crop_to_mosaic = np.array([[fx, 0, (x1 - 1 + 0.5) * fx - 0.5 + padw], [0, fy, (y1 - 1 + 0.5) * fy - 0.5 + padh], [0, 0, 1]])
+        crop_to_output = mosaic_to_output @ crop_to_mosaic
+
+        # Warp only into the rectangle of the output that bounds the warped crop
+        crop_corners = np.array(
+            [[-0.5, -0.5, 1], [crop.shape[1] - 0.5, -0.5, 1], [-0.5, crop.shape[0] - 0.5, 1], [crop.shape[1] - 0.5, crop.shape[0] - 0.5, 1]]
+        )
+        crop_corners = crop_corners @ crop_to_output.T
+        out_h, out_w = output_img.shape[:2]
+        roi_x1, roi_y1 = max(int(np.floor(crop_corners[:, 0].min())), 0), max(int(np.floor(crop_corners[:, 1].min())), 0)
+        roi_x2, roi_y2 = min(int(np.ceil(crop_corners[:, 0].max())) + 1, out_w), min(int(np.ceil(crop_corners[:, 1].max())) + 1, out_h)
+        if roi_x2 <= roi_x1 or roi_y2 <= roi_y1:
+            return
+
+        crop_to_output[:, 2] -= (roi_x1, roi_y1)
+        roi = np.ascontiguousarray(output_img[roi_y1:roi_y2, roi_x1:roi_x2])
+        cv2.warpAffine(crop, crop_to_output, dsize=(roi.shape[1], roi.shape[0]), dst=roi, flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_TRANSPARENT)
+        output_img[roi_y1:roi_y2, roi_x1:roi_x2] = roi
+
+
 @register_transform(Transforms.DetectionMixup)
 class DetectionMixup(DetectionTransform):
     """
@@ -654,13 +947,12 @@ class DetectionMixup(DetectionTransform):
 
             cp_sample = sample["additional_samples"][0]
             img, cp_labels = cp_sample["image"], cp_sample["target"]
-            cp_boxes = cp_labels[:, :4]
             if random.random() < self.prob:
                 _, width, _ = img.shape
                 img = _flip_horizontal_image(img)
-                cp_boxes = _flip_horizontal_boxes(cp_boxes, width)
-            # PLUG IN TARGET THE FLIPPED BOXES
-            cp_labels[:, :4] = cp_boxes
+                # PLUG IN TARGET THE FLIPPED BOXES
+                cp_labels = cp_labels.copy()
+                cp_labels[:, :4] = _flip_horizontal_boxes(cp_labels[:, :4], width)
 
             jit_factor = random.uniform(*self.mixup_scale)
 
@@ -834,9 +1126,10 @@ class DetectionHorizontalFlip(DetectionTransform):
         if random.random() < self.prob:
             image = _flip_horizontal_image(image)
             _, width, _ = image.shape
+            targets = targets.copy()
             targets[:, :4] = _flip_horizontal_boxes(targets[:, :4], width)
             if crowd_targets is not None:
-                crowd_targets = _flip_horizontal_boxes(crowd_targets, width)
+                crowd_targets = _flip_horizontal_boxes(crowd_targets.copy(), width)
         sample["image"] = image
         sample["target"] = targets
         sample["crowd_targets"] = crowd_targets
@@ -864,8 +1157,10 @@ class DetectionVerticalFlip(DetectionTransform):
         if random.random() < self.prob:
             image = _flip_vertical_image(image)
             height, _, _ = image.shape
+            targets = targets.copy()
             targets[:, :4] = _flip_vertical_boxes(targets[:, :4], height)
             if crowd_targets is not None:
+                crowd_targets = crowd_targets.copy()
                 crowd_targets[:, :4] = _flip_vertical_boxes(crowd_targets[:, :4], height)
         sample["image"] = image
         sample["target"] = targets
@@ -1287,13 +1582,37 @@ def random_affine(
     img = cv2.warpAffine(img, M, dsize=target_size, borderValue=(border_value, border_value, border_value))
 
     # Transform label coordinates
+    targets = _apply_affine_to_targets(targets, targets_seg, target_size, M, filter_box_candidates, wh_thr=wh_thr, ar_thr=ar_thr, area_thr=area_thr)
+    return img, targets
+
+
+def _apply_affine_to_targets(
+    targets: np.ndarray,
+    targets_seg: np.ndarray,
+    target_size: Tuple[int, int],
+    M: np.ndarray,
+    filter_box_candidates: bool,
+    wh_thr: float,
+    ar_thr: float,
+    area_thr: float,
+) -> np.ndarray:
+    """
+    Apply an affine transform to the targets, and optionally filter out the boxes that are too small or too distorted after the transform.
+
+    :param targets:                 Targets in XYXY_LABEL format
+    :param targets_seg:             Targets derived from segmentation masks
+    :param target_size:             Output image size
+    :param M:                       Affine transform matrix (2x3)
+    :param filter_box_candidates:   Whether to filter out transformed bboxes by edge size, area ratio, and aspect ratio.
+    :return:                        Transformed targets
+    """
     if len(targets) > 0:
-        targets_orig = targets.copy()
-        targets = apply_affine_to_bboxes(targets, targets_seg, target_size, M)
+        targets_orig = targets
+        targets = apply_affine_to_bboxes(targets.copy(), targets_seg, target_size, M)
         if filter_box_candidates:
             box_candidates_ids = _filter_box_candidates(targets_orig[:, :4], targets[:, :4], wh_thr=wh_thr, ar_thr=ar_thr, area_thr=area_thr)
             targets = targets[box_candidates_ids]
-    return img, targets
+    return targets
 
 
 def _filter_box_candidates(box1, box2, wh_thr=2, ar_thr=20, area_thr=0.1):
@@ -115,7 +115,7 @@ def _shift_bboxes(targets: np.array, shift_w: float, shift_h: float) -> np.array
     :param shift_h:  shift height.
     :return:         Bboxes transformed of shape (N, 4+), in format [x1, y1, x2, y2, ...]
     """
-    boxes, labels = targets[:, :4], targets[:, 4:]
+    boxes, labels = targets[:, :4].copy(), targets[:, 4:]
     boxes[:, [0, 2]] += shift_w
     boxes[:, [1, 3]] += shift_h
     return np.concatenate((boxes, labels), 1)
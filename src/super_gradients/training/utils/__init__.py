@@ -1,17 +1,45 @@
-from super_gradients.training.utils.utils import (
-    Timer,
-    HpmStruct,
-    convert_to_tensor,
-    get_param,
-    tensor_container_to_device,
-    random_seed,
-    make_divisible,
+from typing import TYPE_CHECKING
+
+from super_gradients.common.lazy_imports import lazy_module_attributes
+
+# The objects below are only imported on first access, so that importing a single module of super_gradients.training.utils
+# does not import the callbacks, the checkpoint utilities and the modules they depend on.
+__getattr__, __dir__ = lazy_module_attributes(
+    __name__,
+    {
+        "Timer": "super_gradients.training.utils.utils:Timer",
+        "HpmStruct": "super_gradients.training.utils.utils:HpmStruct",
+        "convert_to_tensor": "super_gradients.training.utils.utils:convert_to_tensor",
+        "get_param": "super_gradients.training.utils.utils:get_param",
+        "tensor_container_to_device": "super_gradients.training.utils.utils:tensor_container_to_device",
+        "random_seed": "super_gradients.training.utils.utils:random_seed",
+        "make_divisible": "super_gradients.training.utils.utils:make_divisible",
+        "adapt_state_dict_to_fit_model_layer_names": "super_gradients.training.utils.checkpoint_utils:adapt_state_dict_to_fit_model_layer_names",
+        "raise_informative_runtime_error": "super_gradients.training.utils.checkpoint_utils:raise_informative_runtime_error",
+        "torch_version_is_greater_or_equal": "super_gradients.training.utils.version_utils:torch_version_is_greater_or_equal",
+        "raise_if_unused_params": "super_gradients.training.utils.config_utils:raise_if_unused_params",
+        "warn_if_unused_params": "super_gradients.training.utils.config_utils:warn_if_unused_params",
+        "EarlyStop": "super_gradients.training.utils.early_stopping:EarlyStop",
+        "DEKRPoseEstimationDecodeCallback": "super_gradients.training.utils.pose_estimation:DEKRPoseEstimationDecodeCallback",
+        "DEKRVisualizationCallback": "super_gradients.training.utils.pose_estimation:DEKRVisualizationCallback",
+    },
 )
-from super_gradients.training.utils.checkpoint_utils import adapt_state_dict_to_fit_model_layer_names, raise_informative_runtime_error
-from super_gradients.training.utils.version_utils import torch_version_is_greater_or_equal
-from super_gradients.training.utils.config_utils import raise_if_unused_params, warn_if_unused_params
-from super_gradients.training.utils.early_stopping import EarlyStop
-from super_gradients.training.utils.pose_estimation import DEKRPoseEstimationDecodeCallback, DEKRVisualizationCallback
+
+if TYPE_CHECKING:
+    from super_gradients.training.utils.utils import (
+        Timer,
+        HpmStruct,
+        convert_to_tensor,
+        get_param,
+        tensor_container_to_device,
+        random_seed,
+        make_divisible,
+    )
+    from super_gradients.training.utils.checkpoint_utils import adapt_state_dict_to_fit_model_layer_names, raise_informative_runtime_error
+    from super_gradients.training.utils.version_utils import torch_version_is_greater_or_equal
+    from super_gradients.training.utils.config_utils import raise_if_unused_params, warn_if_unused_params
+    from super_gradients.training.utils.early_stopping import EarlyStop
+    from super_gradients.training.utils.pose_estimation import DEKRPoseEstimationDecodeCallback, DEKRVisualizationCallback
 
 __all__ = [
     "Timer",
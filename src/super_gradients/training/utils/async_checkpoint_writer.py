@@ -0,0 +1,167 @@
+import copy
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import torch
+
+from super_gradients.common.abstractions.abstract_logger import get_logger
+from super_gradients.common.sg_loggers.abstract_sg_logger import AbstractSGLogger
+
+logger = get_logger(__name__)
+
+
+class AsyncCheckpointWriter:
+    """
+    Write checkpoints on a background thread, so that training only waits for the state to be copied to CPU and not for it to be written.
+
+        - save() copies all the tensors of the state dict to CPU (to pinned memory for CUDA tensors). This is the only part done on the
+          calling thread, after which the training is free to modify the model and the optimizer.
+        - The background thread serializes every state dict only once. When the same state is saved under several names
+          (e.g. ckpt_latest.pth, ckpt_best.pth and ckpt_epoch_N.pth of the same epoch), the other names are hardlinks to the first file,
+          or copies of it if the file system does not support hardlinks.
+        - Files are written to a temporary file which is then renamed, so that a checkpoint is never partially written,
+          even if the training is killed in the middle of a write.
+        - At most max_queue_size states are waiting to be written. save() blocks when the queue is full,
+          which bounds the memory held by the CPU copies to (max_queue_size + 2) states.
+        - The CPU (pinned) buffers are allocated once and reused: the snapshots rotate over max_queue_size + 2 sets of buffers, which is the
+          maximum number of snapshots alive at the same time (queued, being written and being copied). A buffer is reused for the tensor found
+          at the same place in the state dict, with the same shape and dtype.
+
+    The time it took to write each checkpoint (from the call to save() until the file is in place) and the number of checkpoints
+    waiting in the queue are reported to the sg_logger as "Checkpointing/save_latency_sec" and "Checkpointing/queue_depth".
+
+    :param sg_logger:       Logger of the experiment. Checkpoints are written to sg_logger.local_dir(). If the logger has an
+                            add_checkpoint_file method (like BaseSGLogger), it is called for each written file so that it can be uploaded.
+                            Otherwise, sg_logger.add_checkpoint is called from the background thread for every name.
+    :param max_queue_size:  Maximum number of states waiting to be written.
+    :param pin_memory:      Whether to copy CUDA tensors to pinned memory, which makes the copy faster and asynchronous.
+    """
+
+    def __init__(self, sg_logger: AbstractSGLogger, max_queue_size: int = 1, pin_memory: bool = True):
+        self.sg_logger = sg_logger
+        self.pin_memory = pin_memory and torch.cuda.is_available()
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._buffer_sets: List[Dict[Tuple, torch.Tensor]] = [{} for _ in range(max_queue_size + 2)]
+        self._n_snapshots = 0
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="AsyncCheckpointWriter", daemon=True)
+        self._thread.start()
+
+    def save(self, tags: Sequence[str], state_dict: Dict[str, Any], global_step: Optional[int] = None) -> None:
+        """
+        Copy the state to CPU and queue it to be written under every name in tags.
+
+        :param tags:        Names of the checkpoint files (e.g. ["ckpt_latest.pth", "ckpt_best.pth"]). The state is serialized once.
+        :param state_dict:  Checkpoint state dict.
+        :param global_step: Epoch number.
+        """
+        self._raise_if_failed()
+        start_time = time.perf_counter()
+        buffers_index = self._n_snapshots % len(self._buffer_sets)
+        used_buffers = {}
+        snapshot = self._snapshot(state_dict, buffers=self._buffer_sets[buffers_index], used_buffers=used_buffers, path=())
+        # Buffers of tensors that are not in the state anymore (or changed shape) are released
+        self._buffer_sets[buffers_index] = used_buffers
+        self._n_snapshots += 1
+        if self.pin_memory:
+            torch.cuda.current_stream().synchronize()  # The copies to pinned memory are asynchronous
+
+        self.sg_logger.add_scalar("Checkpointing/queue_depth", self._queue.qsize(), global_step=global_step)
+        self._queue.put((list(tags), snapshot, global_step, start_time))
+
+    def wait(self) -> None:
+        """Block until all the queued checkpoints are written."""
+        self._queue.join()
+        self._raise_if_failed()
+
+    def close(self) -> None:
+        """Write all the queued checkpoints and stop the background thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_if_failed()
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("Failed to write a checkpoint") from error
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                tags, state_dict, global_step, start_time = item
+                self._write(tags, state_dict, global_step)
+                self.sg_logger.add_scalar("Checkpointing/save_latency_sec", time.perf_counter() - start_time, global_step=global_step)
+            except BaseException as e:
+                logger.error(f"Failed to write checkpoints {item[0]}: {e}")
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _write(self, tags: Sequence[str], state_dict: Dict[str, Any], global_step: Optional[int]) -> None:
+        if not hasattr(self.sg_logger, "add_checkpoint_file"):
+            for tag in tags:
+                self.sg_logger.add_checkpoint(tag=tag, state_dict=state_dict, global_step=global_step)
+            return
+
+        paths = [os.path.join(self.sg_logger.local_dir(), tag if tag.endswith(".pth") else tag + ".pth") for tag in tags]
+        tmp_path = f"{paths[0]}.{os.getpid()}.tmp"
+        torch.save(state_dict, tmp_path)
+        os.replace(tmp_path, paths[0])
+
+        for path in paths[1:]:
+            # The alias is replaced atomically too. Since the new file is a new inode, previous hardlinks to the old file are not affected.
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            try:
+                os.link(paths[0], tmp_path)
+            except OSError:
+                shutil.copyfile(paths[0], tmp_path)
+            os.replace(tmp_path, path)
+
+        for path in paths:
+            self.sg_logger.add_checkpoint_file(path=path, global_step=global_step)
+
+    def _snapshot(
+        self, obj: Any, buffers: Dict[Tuple, torch.Tensor], used_buffers: Dict[Tuple, torch.Tensor], path: Tuple, memo: Optional[Dict[int, Any]] = None
+    ) -> Any:
+        """Copy all the tensors of a (nested) state dict to CPU, keeping the containers' types (e.g. OrderedDict with _metadata).
+
+        :param obj:             State dict (or any value in it) to copy
+        :param buffers:         CPU buffers of a previous snapshot, by (path, shape, dtype). They are reused for the tensors of this snapshot.
+        :param used_buffers:    Filled with the buffers used by this snapshot, by (path, shape, dtype).
+        :param path:            Keys (or indexes) leading to obj in the state dict.
+        :return:                The copied state dict (or value)
+        """
+        memo = {} if memo is None else memo
+        if id(obj) in memo:
+            return memo[id(obj)]
+
+        if isinstance(obj, torch.Tensor):
+            tensor = obj.detach()
+            key = (path, tensor.shape, tensor.dtype)
+            copied = buffers.get(key)
+            if copied is None:
+                copied = torch.empty(tensor.shape, dtype=tensor.dtype, pin_memory=self.pin_memory and tensor.is_cuda)
+            used_buffers[key] = copied
+            copied.copy_(tensor, non_blocking=self.pin_memory and tensor.is_cuda)
+        elif isinstance(obj, dict):
+            copied = OrderedDict() if isinstance(obj, OrderedDict) else {}
+            for key, value in obj.items():
+                copied[key] = self._snapshot(value, buffers, used_buffers, (*path, key), memo)
+            if hasattr(obj, "_metadata"):
+                copied._metadata = copy.deepcopy(obj._metadata)
+        elif isinstance(obj, (list, tuple)) and type(obj) in (list, tuple):
+            copied = type(obj)(self._snapshot(value, buffers, used_buffers, (*path, i), memo) for i, value in enumerate(obj))
+        else:
+            copied = copy.deepcopy(obj)
+
+        memo[id(obj)] = copied
+        return copied
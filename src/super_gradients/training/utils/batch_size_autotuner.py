@@ -0,0 +1,228 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Union
+
+import torch
+from torch import nn
+
+from super_gradients.common.abstractions.abstract_logger import get_logger
+
+logger = get_logger(__name__)
+
+__all__ = ["BatchSizeProbeResult", "BatchSizeAutoTuner"]
+
+
+@dataclass
+class BatchSizeProbeResult:
+    """Result of running forward+backward passes with a given batch size.
+
+    :param batch_size:      Batch size of the probe
+    :param peak_memory:     Peak memory used by the probe (bytes). None if the probe ran out of memory.
+    :param throughput:      Measured training throughput (images/sec). None if the probe did not fit in memory.
+    :param fits:            True if the peak memory is within the memory budget (minus the headroom).
+    """
+
+    batch_size: int
+    peak_memory: Optional[int]
+    throughput: Optional[float]
+    fits: bool
+
+
+class BatchSizeAutoTuner:
+    """
+    Search for the largest (or fastest) training batch size of a model, by running forward+backward passes on synthetic batches in-process.
+    The model is built once and reused by all the probes, so a probe only costs a few training iterations.
+
+    The search doubles the batch size until a probe does not fit in memory (or max_batch_size is reached), and then binary searches
+    between the last batch size that fits and the first one that does not, down to a resolution of size_step.
+
+    A probe "fits" if its peak memory is below memory_budget * (1 - memory_headroom). On CUDA the peak memory is measured with
+    torch.cuda.max_memory_allocated and the budget defaults to the device memory. On CPU there is no memory limit to hit, so memory_budget
+    is required and the peak memory is estimated from the parameters, gradients, input and the activations saved for backward.
+    This simulated budget lets the search be run (and tested) without a GPU.
+
+    Note that the probes do not account for the optimizer state and the memory used by the dataloader, the metrics and the callbacks,
+    which is what memory_headroom is for.
+
+    :param model:           Model to probe. It is moved to `device` and put in training mode.
+    :param input_shape:     Shape of a single input image, without the batch dimension (e.g. (3, 640, 640)).
+    :param device:          Device to run the probes on.
+    :param min_batch_size:  First batch size to probe. It must fit in memory.
+    :param max_batch_size:  Optional upper limit of the batch sizes to probe.
+    :param size_step:       Resolution of the binary search, and granularity of the selected batch size.
+    :param memory_budget:   Memory available for training (bytes). Defaults to the total memory of the CUDA device. Required on CPU.
+    :param memory_headroom: Fraction of memory_budget kept free for the memory that the probes do not account for.
+    :param num_probes:      Number of timed forward+backward passes per batch size (after one warmup pass).
+    """
+
+    def __init__(
+        self,
+        model: nn.Module,
+        input_shape: Sequence[int],
+        device: Union[str, torch.device],
+        min_batch_size: int = 1,
+        max_batch_size: Optional[int] = None,
+        size_step: int = 1,
+        memory_budget: Optional[int] = None,
+        memory_headroom: float = 0.1,
+        num_probes: int = 3,
+    ):
+        if min_batch_size < 1 or size_step < 1:
+            raise ValueError(f"min_batch_size and size_step should be positive, got min_batch_size={min_batch_size}, size_step={size_step}")
+        if max_batch_size is not None and max_batch_size < min_batch_size:
+            raise ValueError(f"max_batch_size={max_batch_size} should be greater or equal to min_batch_size={min_batch_size}")
+        if not 0 <= memory_headroom < 1:
+            raise ValueError(f"memory_headroom should be in [0, 1), got {memory_headroom}")
+
+        self.device = torch.device(device)
+        self.use_cuda = self.device.type == "cuda"
+        if memory_budget is None:
+            if not self.use_cuda:
+                raise ValueError("memory_budget is required when the probes are not run on a CUDA device")
+            memory_budget = torch.cuda.get_device_properties(self.device).total_memory
+
+        self.model = model.to(self.device).train()
+        self.input_shape = tuple(input_shape)
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.size_step = size_step
+        self.memory_budget = memory_budget
+        self.memory_headroom = memory_headroom
+        self.num_probes = num_probes
+        self.results: Dict[int, BatchSizeProbeResult] = {}
+
+    @property
+    def memory_limit(self) -> int:
+        """Peak memory (bytes) that a probe should not exceed to fit."""
+        return int(self.memory_budget * (1 - self.memory_headroom))
+
+    def probe(self, batch_size: int) -> BatchSizeProbeResult:
+        """
+        Run forward+backward passes with a synthetic batch of batch_size images, and measure their peak memory and throughput.
+
+        :param batch_size:  Batch size to probe.
+        :return:            Result of the probe. It is also stored in self.results.
+        """
+        if batch_size in self.results:
+            return self.results[batch_size]
+
+        try:
+            inputs = torch.randn((batch_size,) + self.input_shape, device=self.device)
+            peak_memory = self._run_forward_backward(inputs)  # Warmup, which also gives the peak memory
+            fits = peak_memory <= self.memory_limit
+            throughput = self._measure_throughput(inputs) if fits else None
+        except RuntimeError as e:
+            if "out of memory" not in str(e):
+                raise
+            peak_memory, throughput, fits = None, None, False
+        finally:
+            inputs = None
+            self.model.zero_grad(set_to_none=True)
+            if self.use_cuda:
+                torch.cuda.empty_cache()
+
+        result = BatchSizeProbeResult(batch_size=batch_size, peak_memory=peak_memory, throughput=throughput, fits=fits)
+        if fits:
+            logger.info(f"Batch size = {batch_size}: peak memory {peak_memory / 2**20:.0f}MB, throughput {throughput:.1f} images/sec.")
+        else:
+            logger.info(f"Batch size = {batch_size} does not fit in {self.memory_limit / 2**20:.0f}MB.")
+        self.results[batch_size] = result
+        return result
+
+    def search(self) -> List[BatchSizeProbeResult]:
+        """
+        Run the exponential-then-binary search.
+
+        :return: Results of all the probes, sorted by batch size.
+        """
+        if not self.probe(self.min_batch_size).fits:
+            raise RuntimeError(f"min_batch_size={self.min_batch_size} does not fit in memory, try setting a smaller min_batch_size.")
+
+        largest_fit, smallest_miss = self.min_batch_size, None
+        while smallest_miss is None and (self.max_batch_size is None or largest_fit < self.max_batch_size):
+            batch_size = largest_fit * 2 if self.max_batch_size is None else min(largest_fit * 2, self.max_batch_size)
+            if self.probe(batch_size).fits:
+                largest_fit = batch_size
+            else:
+                smallest_miss = batch_size
+
+        if smallest_miss is not None:
+            while smallest_miss - largest_fit > self.size_step:
+                batch_size = (largest_fit + smallest_miss) // 2
+                if self.probe(batch_size).fits:
+                    largest_fit = batch_size
+                else:
+                    smallest_miss = batch_size
+
+        return [self.results[batch_size] for batch_size in sorted(self.results)]
+
+    def select_batch_size(self, mode: str = "largest") -> int:
+        """
+        Run the search (if not done yet) and select a batch size.
+
+        :param mode:    "largest" for the largest batch size that fits in memory,
+                        "fastest" for the one with the highest measured throughput among those that fit.
+        :return:        Selected batch size.
+        """
+        if mode not in ["fastest", "largest"]:
+            raise ValueError(f"Expected mode to be one of: ['fastest','largest'], got {mode}")
+        if not self.results:
+            self.search()
+        fitting = [result for result in self.results.values() if result.fits]
+        if mode == "largest":
+            return max(result.batch_size for result in fitting)
+        return max(fitting, key=lambda result: result.throughput).batch_size
+
+    def _measure_throughput(self, inputs: torch.Tensor) -> float:
+        """Run num_probes timed forward+backward passes and return the throughput (images/sec)."""
+        if self.use_cuda:
+            torch.cuda.synchronize(self.device)
+        start = time.perf_counter()
+        for _ in range(self.num_probes):
+            self._forward_backward(inputs)
+        if self.use_cuda:
+            torch.cuda.synchronize(self.device)
+        return len(inputs) * self.num_probes / max(time.perf_counter() - start, 1e-9)
+
+    def _run_forward_backward(self, inputs: torch.Tensor) -> int:
+        """Run one forward+backward pass and return its peak memory (bytes), measured on CUDA and estimated otherwise."""
+        if self.use_cuda:
+            torch.cuda.synchronize(self.device)
+            torch.cuda.reset_peak_memory_stats(self.device)
+            self._forward_backward(inputs)
+            torch.cuda.synchronize(self.device)
+            return torch.cuda.max_memory_allocated(self.device)
+
+        saved_tensors_bytes = {}  # Tensors saved several times (or views of the same memory) are counted once
+
+        def pack_hook(tensor: torch.Tensor) -> torch.Tensor:
+            data_ptr = tensor.data_ptr()
+            saved_tensors_bytes[data_ptr] = max(saved_tensors_bytes.get(data_ptr, 0), tensor.numel() * tensor.element_size())
+            return tensor
+
+        with torch.autograd.graph.saved_tensors_hooks(pack_hook, lambda tensor: tensor):
+            self._forward_backward(inputs)
+
+        parameters_bytes = sum(p.numel() * p.element_size() for p in self.model.parameters())
+        trainable_bytes = sum(p.numel() * p.element_size() for p in self.model.parameters() if p.requires_grad)
+        inputs_bytes = inputs.numel() * inputs.element_size()
+        activations_bytes = sum(saved_tensors_bytes.values())
+        return parameters_bytes + trainable_bytes + inputs_bytes + activations_bytes
+
+    def _forward_backward(self, inputs: torch.Tensor) -> None:
+        """Forward the inputs and backward the sum of all the floating point outputs, which is enough to build the same graph as a real loss."""
+        self.model.zero_grad(set_to_none=True)
+        outputs = [output for output in _flatten_tensors(self.model(inputs)) if output.is_floating_point() and output.requires_grad]
+        if outputs:
+            torch.stack([output.float().sum() for output in outputs]).sum().backward()
+
+
+def _flatten_tensors(outputs) -> List[torch.Tensor]:
+    """Return all the tensors of a (possibly nested) tuple/list/dict of model outputs."""
+    if isinstance(outputs, torch.Tensor):
+        return [outputs]
+    if isinstance(outputs, dict):
+        outputs = list(outputs.values())
+    if isinstance(outputs, (tuple, list)):
+        return [tensor for output in outputs for tensor in _flatten_tensors(output)]
+    return []
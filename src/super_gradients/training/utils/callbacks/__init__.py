@@ -21,6 +21,7 @@ from super_gradients.training.utils.callbacks.callbacks import (
     YoloXTrainingStageSwitchCallback,
     TestLRCallback,
     TimerCallback,
+    ImageCacheStatsCallback,
     EpochStepWarmupLRCallback,
     BatchStepLinearWarmupLRCallback,
     StepLRCallback,
@@ -68,6 +69,7 @@ __all__ = [
     "TestLRCallback",
     "PPYoloETrainingStageSwitchCallback",
     "TimerCallback",
+    "ImageCacheStatsCallback",
     "EpochStepWarmupLRCallback",
     "BatchStepLinearWarmupLRCallback",
     "StepLRCallback",
@@ -12,7 +12,7 @@ import numpy as np
 import onnx
 import onnxruntime
 import torch
-from torch.utils.data import DataLoader
+from torch.utils.data import ConcatDataset, DataLoader, Dataset, Subset
 from torchmetrics import MetricCollection, Metric
 from torchvision.utils import draw_segmentation_masks
 
@@ -27,6 +27,7 @@ from super_gradients.common.object_names import LRSchedulers, LRWarmups, Callbac
 from super_gradients.common.plugins.deci_client import DeciClient
 from super_gradients.common.registry.registry import register_lr_scheduler, register_lr_warmup, register_callback, LR_SCHEDULERS_CLS_DICT, TORCH_LR_SCHEDULERS
 from super_gradients.common.sg_loggers.time_units import GlobalBatchStepNumber, EpochNumber
+from super_gradients.training.datasets.sharded_image_cache import ShardedImageCache
 from super_gradients.training.utils import get_param
 from super_gradients.training.utils.callbacks.base_callbacks import PhaseCallback, PhaseContext, Phase, Callback
 from super_gradients.training.utils.detection_utils import DetectionVisualization, DetectionPostPredictionCallback, cxcywh2xyxy, xyxy2cxcywh
@@ -896,20 +897,90 @@ class TimerCallback(Callback):
             return total_steps_in_done + train_loader_length + context.batch_idx
 
 
+@register_callback(Callbacks.IMAGE_CACHE_STATS)
+class ImageCacheStatsCallback(Callback):
+    """
+    Logs the hit/miss counters of the sharded image caches (see ShardedImageCache) of the train and validation datasets to the sg_logger.
+    The counters are reset when a loader starts, so the logged values are per epoch. They include the reads of the dataloader workers.
+
+    The Trainer adds this callback automatically when the train or validation dataset uses cache_mode="sharded".
+    """
+
+    def on_train_loader_start(self, context: PhaseContext) -> None:
+        self._reset_stats(context.train_loader)
+
+    @multi_process_safe
+    def on_train_loader_end(self, context: PhaseContext) -> None:
+        self._log_stats(context, loader=context.train_loader, prefix="train")
+
+    def on_validation_loader_start(self, context: PhaseContext) -> None:
+        self._reset_stats(context.valid_loader)
+
+    @multi_process_safe
+    def on_validation_loader_end(self, context: PhaseContext) -> None:
+        self._log_stats(context, loader=context.valid_loader, prefix="valid")
+
+    @staticmethod
+    def get_sharded_image_caches(loader: Optional[DataLoader]) -> List[ShardedImageCache]:
+        """
+        :param loader:  Data loader (or None)
+        :return:        The sharded image caches used by the dataset of the loader (looking into ConcatDataset and Subset).
+        """
+
+        def _get_caches(dataset: Dataset) -> List[ShardedImageCache]:
+            if isinstance(dataset, ConcatDataset):
+                return [cache for sub_dataset in dataset.datasets for cache in _get_caches(sub_dataset)]
+            if isinstance(dataset, Subset):
+                return _get_caches(dataset.dataset)
+            cache = getattr(dataset, "sharded_image_cache", None)
+            return [cache] if cache is not None else []
+
+        return _get_caches(loader.dataset) if loader is not None else []
+
+    def _reset_stats(self, loader: Optional[DataLoader]) -> None:
+        for cache in self.get_sharded_image_caches(loader):
+            cache.reset_stats()
+
+    def _log_stats(self, context: PhaseContext, loader: Optional[DataLoader], prefix: str) -> None:
+        caches = self.get_sharded_image_caches(loader)
+        if not caches:
+            return
+        caches_stats = [cache.get_stats() for cache in caches]
+        hits = sum(stats["hits"] for stats in caches_stats)
+        misses = sum(stats["misses"] for stats in caches_stats)
+        n_images = sum(cache.n_images for cache in caches)
+        scalars = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "cached_ratio": sum(cache.n_cached_images for cache in caches) / n_images if n_images else 1.0,
+        }
+        for name, value in scalars.items():
+            context.sg_logger.add_scalar(tag=f"image_cache/{prefix}_{name}", scalar_value=value, global_step=EpochNumber(context.epoch))
+
+
 @register_callback(Callbacks.SLIDING_WINDOW_VALIDATION)
 class SlidingWindowValidationCallback(Callback):
     """
     Performing single-scale sliding window during inference at the last epoch on the validation set and on the average model.
+
+    :param transforms_for_sliding_window:   Transforms of the validation/test datasets during sliding window inference.
+    :param sliding_window_params:           Optional parameters of the sliding window inference passed to the model's
+                                            enable_sliding_window_validation (e.g. {"crop_batch_size": 8, "blending": "gaussian"}).
     """
 
-    def __init__(self, transforms_for_sliding_window) -> None:
+    def __init__(self, transforms_for_sliding_window, sliding_window_params: Optional[dict] = None) -> None:
         self.transforms_for_sliding_window = transforms_for_sliding_window
+        self.sliding_window_params = sliding_window_params or {}
         self.valid_loader_transforms = []
         self.test_loader_transforms = []
 
+    def _enable_sliding_window_validation(self, net: torch.nn.Module) -> None:
+        unwrap_model(net).enable_sliding_window_validation(**self.sliding_window_params)
+
     def on_validation_loader_start(self, context: PhaseContext) -> None:
         if context.training_params.max_epochs - 1 == context.epoch:
-            unwrap_model(context.net).enable_sliding_window_validation()
+            self._enable_sliding_window_validation(context.net)
             self.valid_loader_transforms = context.valid_loader.dataset.transforms.transforms
             context.valid_loader.dataset.transforms.transforms = self.transforms_for_sliding_window
             iter(context.valid_loader)
@@ -920,7 +991,7 @@ class SlidingWindowValidationCallback(Callback):
 
     def on_average_best_models_validation_start(self, context: PhaseContext) -> None:
         if context.training_params.max_epochs - 1 == context.epoch and context.training_params.average_best_models:
-            unwrap_model(context.net).enable_sliding_window_validation()
+            self._enable_sliding_window_validation(context.net)
             context.valid_loader.dataset.transforms.transforms = self.transforms_for_sliding_window
             iter(context.valid_loader)
 
@@ -931,7 +1002,7 @@ class SlidingWindowValidationCallback(Callback):
             iter(context.valid_loader)
 
     def on_test_loader_start(self, context: PhaseContext) -> None:
-        unwrap_model(context.net).enable_sliding_window_validation()
+        self._enable_sliding_window_validation(context.net)
         self.test_loader_transforms = context.test_loader.dataset.transforms.transforms
         context.test_loader.dataset.transforms.transforms = self.transforms_for_sliding_window
         iter(context.test_loader)
@@ -0,0 +1,79 @@
+from typing import Optional, Sequence, Tuple, Union
+
+import torch
+
+__all__ = ["DeferredLoggingValues"]
+
+
+class DeferredLoggingValues:
+    """
+    Reads the running loss and metrics values of the training loop to the host without stalling the device every step.
+
+    Every update_freq steps, schedule() gathers the values (still on the device) into a single tensor, starts a non-blocking copy of it
+    to pinned host memory and records a CUDA event after the copy. poll() returns the values once the event has completed, and None
+    until then (or if nothing new was scheduled), so the progress bar is rendered from the last values that reached the host while
+    the device keeps running. On CPU (or when blocking=True), the values are read as soon as they are scheduled.
+
+    >>> logging_values_reader = DeferredLoggingValues(device="cuda", update_freq=20)
+    >>> if logging_values_reader.should_update(batch_idx):
+    >>>     logging_values_reader.schedule(loss_avg_meter.average_tensor, get_metrics_results_tuple(metrics))
+    >>> logging_values = logging_values_reader.poll()
+    >>> if logging_values is not None:
+    >>>     progress_bar.set_postfix(...)
+
+    :param device:      Device the values are computed on.
+    :param update_freq: Number of steps between two reads of the values.
+    :param blocking:    If True, wait for the values to reach the host in schedule() (i.e. synchronize the device).
+    """
+
+    def __init__(self, device: Union[str, torch.device], update_freq: int = 1, blocking: bool = False):
+        if update_freq < 1:
+            raise ValueError(f"update_freq should be a positive integer, got {update_freq}")
+        self.device = torch.device(device)
+        self.update_freq = update_freq
+        self.use_cuda_events = self.device.type == "cuda" and torch.cuda.is_available()
+        self.blocking = blocking or not self.use_cuda_events
+
+        self._host_values: Optional[torch.Tensor] = None
+        self._event: Optional["torch.cuda.Event"] = None
+        self._ready_values: Optional[Tuple[float, ...]] = None
+
+    def should_update(self, batch_idx: int) -> bool:
+        """:return: True if the values should be scheduled for reading at this step."""
+        return (batch_idx + 1) % self.update_freq == 0
+
+    def schedule(self, loss_average: Optional[torch.Tensor], metrics_values: Sequence[Union[torch.Tensor, float]]) -> None:
+        """
+        Start reading the values to the host. A previously scheduled read that did not complete yet is dropped.
+
+        :param loss_average:    Running average of the loss components (see AverageMeter.average_tensor), or None before the first update.
+        :param metrics_values:  Metrics values, as returned by get_metrics_results_tuple.
+        """
+        values = [] if loss_average is None else [loss_average.detach().reshape(-1).float()]
+        values += [torch.as_tensor(value, dtype=torch.float32, device=self.device).detach().reshape(1) for value in metrics_values]
+        if not values:
+            self._ready_values = ()
+            return
+        values = torch.cat([value.to(self.device) for value in values])
+
+        if self.blocking:
+            self._ready_values = tuple(values.tolist())
+            self._event = None
+            return
+
+        if self._host_values is None or self._host_values.numel() != values.numel() or self._event is not None:
+            # Do not overwrite a buffer that a pending copy is still writing to
+            self._host_values = torch.empty(values.numel(), dtype=torch.float32, pin_memory=True)
+        self._host_values.copy_(values, non_blocking=True)
+        self._event = torch.cuda.Event()
+        self._event.record()
+
+    def poll(self) -> Optional[Tuple[float, ...]]:
+        """
+        :return: The last scheduled values if they reached the host since the last call, None otherwise. Never synchronizes the device.
+        """
+        if self._event is not None and self._event.query():
+            self._ready_values = tuple(self._host_values.tolist())
+            self._event = None
+        ready_values, self._ready_values = self._ready_values, None
+        return ready_values
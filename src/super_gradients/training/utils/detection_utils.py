@@ -3,7 +3,7 @@ import os
 import pathlib
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Callable, List, Union, Tuple, Optional
+from typing import Callable, List, Union, Tuple, Optional, Sequence
 
 import cv2
 
@@ -94,7 +94,7 @@ def convert_cxcywh_bbox_to_xyxy(input_bbox: torch.Tensor):
 
 def _iou(CIoU: bool, DIoU: bool, GIoU: bool, b1_x1, b1_x2, b1_y1, b1_y2, b2_x1, b2_x2, b2_y1, b2_y2, eps):
     """
-    Internal function for the use of calculate_bbox_iou_matrix and calculate_bbox_iou_elementwise functions
+    Internal function for the use of calculate_bbox_iou_matrix, calculate_batched_bbox_iou_matrix and calculate_bbox_iou_elementwise functions
     DO NOT CALL THIS FUNCTIONS DIRECTLY - use one of the functions mentioned above
     """
     # Intersection area
@@ -153,6 +153,29 @@ def calculate_bbox_iou_matrix(box1, box2, x1y1x2y2=True, GIoU: bool = False, DIo
     return _iou(CIoU, DIoU, GIoU, b1_x1, b1_x2, b1_y1, b1_y2, b2_x1, b2_x2, b2_y1, b2_y2, eps)
 
 
+def calculate_batched_bbox_iou_matrix(box1: torch.Tensor, box2: torch.Tensor, x1y1x2y2: bool = True, eps: float = 1e-9) -> torch.Tensor:
+    """
+    Batched version of calculate_bbox_iou_matrix (same arithmetic, so the values are identical)
+    :param box1: a 3D tensor of boxes (shape B x N x 4)
+    :param box2: a 3D tensor of boxes (shape B x M x 4)
+    :param x1y1x2y2: boxes format is x1y1x2y2 (True) or xywh where xy is the center (False)
+    :return: a 3D iou matrix (shape B x N x M)
+    """
+    if x1y1x2y2:
+        b1_x1, b1_y1, b1_x2, b1_y2 = box1[..., 0], box1[..., 1], box1[..., 2], box1[..., 3]
+        b2_x1, b2_y1, b2_x2, b2_y2 = box2[..., 0], box2[..., 1], box2[..., 2], box2[..., 3]
+    else:
+        b1_x1, b1_x2 = box1[..., 0] - box1[..., 2] / 2, box1[..., 0] + box1[..., 2] / 2
+        b1_y1, b1_y2 = box1[..., 1] - box1[..., 3] / 2, box1[..., 1] + box1[..., 3] / 2
+        b2_x1, b2_x2 = box2[..., 0] - box2[..., 2] / 2, box2[..., 0] + box2[..., 2] / 2
+        b2_y1, b2_y2 = box2[..., 1] - box2[..., 3] / 2, box2[..., 1] + box2[..., 3] / 2
+
+    b1_x1, b1_y1, b1_x2, b1_y2 = b1_x1.unsqueeze(2), b1_y1.unsqueeze(2), b1_x2.unsqueeze(2), b1_y2.unsqueeze(2)
+    b2_x1, b2_y1, b2_x2, b2_y2 = b2_x1.unsqueeze(1), b2_y1.unsqueeze(1), b2_x2.unsqueeze(1), b2_y2.unsqueeze(1)
+
+    return _iou(False, False, False, b1_x1, b1_x2, b1_y1, b1_y2, b2_x1, b2_x2, b2_y1, b2_y2, eps)
+
+
 def calc_bbox_iou_matrix(pred: torch.Tensor):
     """
     calculate iou for every pair of boxes in the boxes vector
@@ -964,6 +987,294 @@ def compute_img_detection_matching(
     return preds_matched, preds_to_ignore, preds_scores, preds_cls, targets_cls
 
 
+def compute_detection_matching_batched(
+    output: List[torch.Tensor],
+    targets: torch.Tensor,
+    height: int,
+    width: int,
+    iou_thresholds: torch.Tensor,
+    denormalize_targets: bool,
+    device: str,
+    crowd_targets: Optional[torch.Tensor] = None,
+    top_k: int = 100,
+    return_on_cpu: bool = True,
+) -> List[Tuple]:
+    """
+    Batched equivalent of compute_detection_matching, returning exactly the same matching information.
+    Predictions and targets of all the images are packed into padded tensors and the greedy matching is vectorized over
+    every (image, class) pair of the batch and over the IoU thresholds. The only python loop left is over the rank
+    of the predictions inside their class, which is bounded by top_k.
+
+    :param output:          list (of length batch_size) of Tensors of shape (num_predictions, 6)
+                            format:     (x1, y1, x2, y2, confidence, class_label) where x1,y1,x2,y2 are according to image size
+    :param targets:         targets for all images of shape (total_num_targets, 6)
+                            format:     (index, x, y, w, h, label) where x,y,w,h are in range [0,1]
+    :param height:          dimensions of the image
+    :param width:           dimensions of the image
+    :param iou_thresholds:  Threshold to compute the mAP
+    :param device:          Device
+    :param crowd_targets:   crowd targets for all images of shape (total_num_crowd_targets, 6)
+                            format:     (index, x, y, w, h, label) where x,y,w,h are in range [0,1]
+    :param top_k:           Number of predictions to keep per class, ordered by confidence score
+    :param denormalize_targets: If True, denormalize the targets and crowd_targets
+    :param return_on_cpu:   If True, the output will be returned on "CPU", otherwise it will be returned on "device"
+
+    :return:                list of the following tensors, for every image (same as compute_detection_matching):
+        :preds_matched:     Tensor of shape (num_img_predictions, n_iou_thresholds)
+                            True when prediction (i) is matched with a target with respect to the (j)th IoU threshold
+        :preds_to_ignore:   Tensor of shape (num_img_predictions, n_iou_thresholds)
+                            True when prediction (i) is matched with a crowd target with respect to the (j)th IoU threshold
+        :preds_scores:      Tensor of shape (num_img_predictions), confidence score for every prediction
+        :preds_cls:         Tensor of shape (num_img_predictions), predicted class for every prediction
+        :targets_cls:       Tensor of shape (num_img_targets), ground truth class for every target
+    """
+    batch_size = len(output)
+    if batch_size == 0:
+        return []
+
+    output = [torch.zeros(size=(0, 6), device=device) if img_preds is None else img_preds.to(device) for img_preds in output]
+    targets, iou_thresholds = targets.to(device), iou_thresholds.to(device)
+    crowd_targets = torch.zeros(size=(0, 6), device=device) if crowd_targets is None else crowd_targets.to(device)
+    num_iou_thresholds = len(iou_thresholds)
+
+    # PREDICTIONS: (batch_size, max_num_preds, 6), padded rows are marked as invalid
+    num_preds = [len(img_preds) for img_preds in output]
+    preds = torch.nn.utils.rnn.pad_sequence(output, batch_first=True)
+    max_num_preds = preds.shape[1]
+    preds_valid = torch.arange(max_num_preds, device=device).view(1, -1) < torch.tensor(num_preds, device=device).view(-1, 1)
+
+    preds_box, preds_scores, preds_cls = preds[..., 0:4].clone(), preds[..., 4], preds[..., -1]
+    preds_box[..., [0, 2]] = preds_box[..., [0, 2]].clamp(min=0, max=width)
+    preds_box[..., [1, 3]] = preds_box[..., [1, 3]].clamp(min=0, max=height)
+
+    # Order the predictions of every image by decreasing confidence, padded rows last
+    sort_key = torch.where(preds_valid, preds_scores, torch.full_like(preds_scores, -float("inf")))
+    _, preds_order = torch.sort(sort_key, dim=1, descending=True, stable=True)
+    sorted_scores = preds_scores.gather(1, preds_order)
+    sorted_cls = preds_cls.gather(1, preds_order)
+    sorted_valid = preds_valid.gather(1, preds_order)
+    sorted_box = preds_box.gather(1, preds_order.unsqueeze(-1).expand(-1, -1, 4))
+
+    # Same selection as get_top_k_idx_per_cls: only the top_k predictions with a positive score are used for every class.
+    # The rank of a prediction inside its class is its position in the (stable) class-sorted sequence minus the position of the first
+    # prediction of that class.
+    is_eligible = torch.logical_and(sorted_valid, sorted_scores > 0)
+    cls_key = torch.where(is_eligible, sorted_cls.float(), torch.full_like(sorted_cls, float("inf"), dtype=torch.float))
+    cls_key_sorted, cls_order = torch.sort(cls_key, dim=1, stable=True)
+    rank_in_cls_sorted = torch.arange(max_num_preds, device=device).view(1, -1) - torch.searchsorted(cls_key_sorted, cls_key_sorted)
+    rank_in_cls = torch.empty_like(rank_in_cls_sorted).scatter_(1, cls_order, rank_in_cls_sorted)
+    sorted_selected = torch.logical_and(is_eligible, rank_in_cls < top_k)
+
+    preds_matched_sorted = torch.zeros((batch_size, max_num_preds, num_iou_thresholds), dtype=torch.bool, device=device)
+    preds_to_ignore_sorted = ~sorted_selected.unsqueeze(-1).repeat(1, 1, num_iou_thresholds)
+
+    # TARGETS: (batch_size, max_num_targets, 5) in format (label, x1, y1, x2, y2)
+    padded_targets, targets_valid, num_targets = _pad_detection_targets_per_image(targets, batch_size, height, width, denormalize_targets)
+
+    if padded_targets.shape[1] > 0 and max_num_preds > 0:
+        # Predictions of different classes never compete for the same target, so the greedy matching is run independently
+        # for every (image, class) pair that has targets. Predictions and targets are regrouped into padded tensors
+        # of shape (n_pairs, max_preds_per_pair) and (n_pairs, max_targets_per_pair), and matched for all the pairs at once.
+        batch_index = torch.arange(batch_size, device=device).view(-1, 1)
+        n_cls = int(padded_targets[..., 0].max()) + 1
+        targets_key = batch_index * n_cls + padded_targets[..., 0].long()
+        preds_key = batch_index * n_cls + sorted_cls.long()
+
+        pairs_key = torch.unique(targets_key[targets_valid])
+        preds_pair = torch.searchsorted(pairs_key, preds_key).clamp(max=len(pairs_key) - 1)
+        is_pred_in_pair = sorted_selected & (sorted_cls >= 0) & (sorted_cls < n_cls) & (pairs_key[preds_pair] == preds_key)
+        targets_pair = torch.searchsorted(pairs_key, targets_key).clamp(max=len(pairs_key) - 1)
+
+        # Flattening is row-major, so predictions keep their decreasing confidence order inside a pair and targets keep their order
+        pair_preds_position, pair_preds_valid = _group_by_pair(preds_pair[is_pred_in_pair], is_pred_in_pair.view(-1).nonzero().view(-1), len(pairs_key))
+        pair_targets_position, pair_targets_valid = _group_by_pair(targets_pair[targets_valid], targets_valid.view(-1).nonzero().view(-1), len(pairs_key))
+
+        # Pairs are sorted by decreasing number of predictions, so that at a given rank only the first pairs need to be processed
+        pair_num_preds, pairs_order = pair_preds_valid.sum(dim=1).sort(descending=True)
+        pair_preds_position, pair_preds_valid = pair_preds_position[pairs_order], pair_preds_valid[pairs_order]
+        pair_targets_position, pair_targets_valid = pair_targets_position[pairs_order], pair_targets_valid[pairs_order]
+
+        pair_preds_box = sorted_box.view(-1, 4)[pair_preds_position]
+        pair_targets_box = padded_targets[..., 1:5].reshape(-1, 4)[pair_targets_position]
+
+        # shape = (n_pairs, max_preds_per_pair, max_targets_per_pair)
+        iou = _batched_box_iou(pair_preds_box, pair_targets_box)
+        iou = torch.where(pair_preds_valid.unsqueeze(2) & pair_targets_valid.unsqueeze(1), iou, torch.zeros_like(iou))
+
+        # Number of pairs that have a prediction at every rank, only for ranks where at least one prediction has an IoU higher than min threshold
+        num_pairs_per_rank = (pair_num_preds.view(1, -1) > torch.arange(iou.shape[1], device=device).view(-1, 1)).sum(dim=1)
+        num_pairs_per_rank[~(iou > iou_thresholds[0]).any(dim=2).any(dim=0)] = 0
+        num_pairs_per_rank = num_pairs_per_rank.tolist()
+
+        # An extra column (index max_targets_per_pair) collects the updates of the predictions that are not matched
+        max_targets_per_pair = iou.shape[2]
+        targets_matched = torch.zeros((len(pairs_key), num_iou_thresholds, max_targets_per_pair + 1), dtype=torch.bool, device=device)
+        pair_preds_matched = torch.zeros((len(pairs_key), iou.shape[1], num_iou_thresholds), dtype=torch.bool, device=device)
+        iou_thresholds_view = iou_thresholds.view(1, -1, 1)
+        for rank, n_pairs in enumerate(num_pairs_per_rank):
+            if n_pairs == 0:
+                continue
+            # shape = (n_pairs, 1, max_targets_per_pair)
+            rank_iou = iou[:n_pairs, rank].unsqueeze(1)
+            rank_targets_matched = targets_matched[:n_pairs]
+
+            # shape = (n_pairs, n_iou_thresholds, max_targets_per_pair), True when (pred, target) can be matched for the (j)th threshold
+            are_candidates_good = torch.logical_and(rank_iou > iou_thresholds_view, ~rank_targets_matched[..., :max_targets_per_pair])
+
+            # Every prediction is matched with its free target of highest IoU; ties go to the first target, as in compute_img_detection_matching
+            _, best_target = torch.where(are_candidates_good, rank_iou, torch.full_like(rank_iou, -1.0)).max(dim=2)
+            is_matched = are_candidates_good.any(dim=2)
+            best_target = torch.where(is_matched, best_target, torch.full_like(best_target, max_targets_per_pair))
+
+            pair_preds_matched[:n_pairs, rank] = is_matched
+            rank_targets_matched.scatter_(2, best_target.unsqueeze(2), True)
+
+        preds_matched_sorted.view(-1, num_iou_thresholds)[pair_preds_position[pair_preds_valid]] = pair_preds_matched[pair_preds_valid]
+
+    # CROWD TARGETS: every prediction is ignored if its IoA with any crowd target of the same class is high enough
+    padded_crowd_targets, crowd_targets_valid, _ = _pad_detection_targets_per_image(crowd_targets, batch_size, height, width, denormalize_targets)
+
+    if padded_crowd_targets.shape[1] > 0:
+        ioa = _batched_crowd_ioa(sorted_box, padded_crowd_targets[..., 1:5])
+        is_same_cls = sorted_cls.unsqueeze(2) == padded_crowd_targets[..., 0].unsqueeze(1)
+        is_pair_valid = is_same_cls & sorted_selected.unsqueeze(2) & crowd_targets_valid.unsqueeze(1)
+        ioa = torch.where(is_pair_valid, ioa, torch.zeros_like(ioa))
+
+        best_ioa, _ = ioa.max(dim=2)
+        is_matching_with_crowd = best_ioa.unsqueeze(-1) > iou_thresholds.view(1, 1, -1)
+        preds_to_ignore_sorted = torch.logical_or(preds_to_ignore_sorted, is_matching_with_crowd)
+
+    # Back to the original order of the predictions
+    scatter_index = preds_order.unsqueeze(-1).expand(-1, -1, num_iou_thresholds)
+    preds_matched = torch.zeros_like(preds_matched_sorted).scatter_(1, scatter_index, preds_matched_sorted)
+    preds_to_ignore = torch.zeros_like(preds_to_ignore_sorted).scatter_(1, scatter_index, preds_to_ignore_sorted)
+    targets_cls = padded_targets[..., 0]
+
+    if return_on_cpu:
+        preds_matched, preds_to_ignore, targets_cls = preds_matched.to("cpu"), preds_to_ignore.to("cpu"), targets_cls.to("cpu")
+        output = [img_preds.to("cpu") for img_preds in output]
+
+    batch_metrics = []
+    for img_i, img_preds in enumerate(output):
+        img_num_preds, img_num_targets = num_preds[img_i], num_targets[img_i]
+        batch_metrics.append(
+            (
+                preds_matched[img_i, :img_num_preds].clone(),
+                preds_to_ignore[img_i, :img_num_preds].clone(),
+                img_preds[:, 4],
+                img_preds[:, -1],
+                targets_cls[img_i, :img_num_targets].clone(),
+            )
+        )
+    return batch_metrics
+
+
+def _pad_detection_targets_per_image(
+    targets: torch.Tensor, batch_size: int, height: int, width: int, denormalize_targets: bool
+) -> Tuple[torch.Tensor, torch.Tensor, List[int]]:
+    """
+    Pack flat targets (index, label, cx, cy, w, h) into a padded tensor of shape (batch_size, max_num_targets, 5) of (label, x1, y1, x2, y2).
+    The order of the targets inside every image is preserved.
+
+    :param targets:             Tensor of shape (num_targets, 6) in format (index, label, cx, cy, w, h)
+    :param batch_size:          Number of images in the batch
+    :param height:              Height of the image (used when denormalize_targets is True)
+    :param width:               Width of the image (used when denormalize_targets is True)
+    :param denormalize_targets: If True, denormalize the targets
+    :return:
+        :padded_targets:        Tensor of shape (batch_size, max_num_targets, 5)
+        :targets_valid:         Tensor of shape (batch_size, max_num_targets), False for padded rows
+        :num_targets:           Number of targets of every image
+    """
+    boxes = cxcywh2xyxy(targets[:, 2:6].clone())
+    if denormalize_targets:
+        boxes[:, [0, 2]] *= width
+        boxes[:, [1, 3]] *= height
+
+    (padded_targets,), targets_valid = pack_flat_tensors_per_image(
+        image_index=targets[:, 0], flat_tensors=[torch.cat([targets[:, 1:2], boxes], dim=1)], batch_size=batch_size
+    )
+    return padded_targets, targets_valid, targets_valid.sum(dim=1).tolist()
+
+
+def pack_flat_tensors_per_image(image_index: torch.Tensor, flat_tensors: Sequence[torch.Tensor], batch_size: int) -> Tuple[List[torch.Tensor], torch.Tensor]:
+    """
+    Pack flat tensors of a batch (e.g. the targets of all the images, concatenated) into zero-padded tensors with one row per image.
+    This is done with one sort and one scatter per tensor, and a single device to host synchronization (to get the number of slots),
+    regardless of the batch size. The order of the elements inside every image is preserved.
+
+    :param image_index:     Tensor of shape (N,) with the index of the image of every element. Can be a float tensor.
+    :param flat_tensors:    Tensors of shape (N, ...) to pack.
+    :param batch_size:      Number of images in the batch
+    :return:
+        :packed_tensors:    Tensors of shape (batch_size, max_elements_per_image, ...), one for every flat tensor, padded with zeros.
+        :is_valid:          Tensor of shape (batch_size, max_elements_per_image), False for padded slots
+    """
+    device = image_index.device
+    image_index_sorted, order = torch.sort(image_index.long(), stable=True)
+    images = torch.arange(batch_size, device=device)
+    first_element_of_image = torch.searchsorted(image_index_sorted, images)
+    num_elements = torch.searchsorted(image_index_sorted, images, right=True) - first_element_of_image
+    max_num_elements = int(num_elements.max()) if batch_size > 0 else 0
+
+    slot = torch.arange(len(image_index_sorted), device=device) - first_element_of_image[image_index_sorted]
+    packed_tensors = []
+    for flat_tensor in flat_tensors:
+        packed_tensor = flat_tensor.new_zeros((batch_size, max_num_elements, *flat_tensor.shape[1:]))
+        packed_tensor[image_index_sorted, slot] = flat_tensor[order]
+        packed_tensors.append(packed_tensor)
+
+    is_valid = torch.arange(max_num_elements, device=device).view(1, -1) < num_elements.view(-1, 1)
+    return packed_tensors, is_valid
+
+
+def _group_by_pair(pair_index: torch.Tensor, position: torch.Tensor, n_pairs: int) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Group flat elements into a padded tensor of shape (n_pairs, max_elements_per_pair), preserving their relative order.
+
+    :param pair_index:  Tensor of shape (n_elements), index of the pair of every element
+    :param position:    Tensor of shape (n_elements), value to store for every element (typically its index in a flat tensor)
+    :param n_pairs:     Number of pairs
+    :return:
+        :grouped:       Tensor of shape (n_pairs, max_elements_per_pair) with the values of position, padded with 0
+        :is_valid:      Tensor of shape (n_pairs, max_elements_per_pair), False for padded slots
+    """
+    pair_index_sorted, order = torch.sort(pair_index, stable=True)
+    slot = torch.arange(len(pair_index), device=pair_index.device) - torch.searchsorted(pair_index_sorted, pair_index_sorted)
+    max_slot = int(slot.max()) + 1 if len(slot) else 0
+
+    grouped = torch.zeros((n_pairs, max_slot), dtype=torch.long, device=pair_index.device)
+    is_valid = torch.zeros((n_pairs, max_slot), dtype=torch.bool, device=pair_index.device)
+    grouped[pair_index_sorted, slot] = position[order]
+    is_valid[pair_index_sorted, slot] = True
+    return grouped, is_valid
+
+
+def _batched_box_iou(box1: torch.Tensor, box2: torch.Tensor) -> torch.Tensor:
+    """
+    Batched version of box_iou (same arithmetic, so the values are identical).
+    :param box1: Tensor of shape [B, N, 4] in (x1, y1, x2, y2) format
+    :param box2: Tensor of shape [B, M, 4] in (x1, y1, x2, y2) format
+    :return:     iou, Tensor of shape [B, N, M]
+    """
+    area1 = (box1[..., 2] - box1[..., 0]) * (box1[..., 3] - box1[..., 1])
+    area2 = (box2[..., 2] - box2[..., 0]) * (box2[..., 3] - box2[..., 1])
+    inter = (torch.min(box1[:, :, None, 2:], box2[:, None, :, 2:]) - torch.max(box1[:, :, None, :2], box2[:, None, :, :2])).clamp(0).prod(3)
+    return inter / (area1[:, :, None] + area2[:, None, :] - inter)
+
+
+def _batched_crowd_ioa(det_box: torch.Tensor, crowd_box: torch.Tensor) -> torch.Tensor:
+    """
+    Batched version of crowd_ioa (same arithmetic, so the values are identical).
+    :param det_box:     Tensor of shape [B, N, 4] in (x1, y1, x2, y2) format
+    :param crowd_box:   Tensor of shape [B, M, 4] in (x1, y1, x2, y2) format
+    :return:            crowd_ioa, Tensor of shape [B, N, M]
+    """
+    det_area = (det_box[..., 2] - det_box[..., 0]) * (det_box[..., 3] - det_box[..., 1])
+    inter = (torch.min(det_box[:, :, None, 2:], crowd_box[:, None, :, 2:]) - torch.max(det_box[:, :, None, :2], crowd_box[:, None, :, :2])).clamp(0).prod(3)
+    return inter / det_area[:, :, None]
+
+
 def get_top_k_idx_per_cls(preds_scores: torch.Tensor, preds_cls: torch.Tensor, top_k: int):
     """Get the indexes of all the top k predictions for every class
 
@@ -977,7 +1288,7 @@ def get_top_k_idx_per_cls(preds_scores: torch.Tensor, preds_cls: torch.Tensor, t
     mask = preds_cls.view(-1, 1) == torch.arange(n_unique_cls + 1, device=preds_scores.device).view(1, -1)
     preds_scores_per_cls = preds_scores.view(-1, 1) * mask
 
-    sorted_scores_per_cls, sorting_idx = preds_scores_per_cls.sort(0, descending=True)
+    sorted_scores_per_cls, sorting_idx = preds_scores_per_cls.sort(dim=0, descending=True, stable=True)
     idx_with_satisfying_scores = sorted_scores_per_cls[:top_k, :].nonzero(as_tuple=False)
     top_k_idx = sorting_idx[idx_with_satisfying_scores.split(1, dim=1)]
     return top_k_idx.view(-1)
@@ -1066,6 +1377,154 @@ def compute_detection_metrics(
     return ap, precision, recall, f1, unique_classes, best_score_threshold, best_score_threshold_per_cls
 
 
+def compute_detection_matching_histograms(
+    matching_info: List[Tuple],
+    num_cls: int,
+    n_score_bins: int,
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Reduce the matching info of a batch (output of compute_detection_matching) to fixed-size histograms binned by confidence score.
+    Summing these histograms over batches (and over processes) is equivalent to concatenating the matching info.
+
+    :param matching_info:   list of (preds_matched, preds_to_ignore, preds_scores, preds_cls, targets_cls) for every image
+    :param num_cls:         Number of classes. Predictions and targets of classes outside [0, num_cls) are discarded.
+    :param n_score_bins:    Number of bins used to discretize the confidence scores in [0, 1]
+    :return:
+        :matched_histogram:         Tensor of shape (num_cls, n_iou_thresholds, n_score_bins), number of predictions
+                                    matched with a target with respect to the (j)th IoU threshold
+        :false_positive_histogram:  Tensor of shape (num_cls, n_iou_thresholds, n_score_bins), number of predictions
+                                    neither matched with a target nor ignored with respect to the (j)th IoU threshold
+        :preds_histogram:           Tensor of shape (num_cls, n_score_bins), total number of predictions (including ignored)
+        :n_targets:                 Tensor of shape (num_cls), number of targets of every class
+    """
+    preds_matched, preds_to_ignore, preds_scores, preds_cls, targets_cls = [torch.cat(x, 0) for x in zip(*matching_info)]
+    device, n_iou_thresholds = preds_matched.device, preds_matched.shape[1]
+    preds_to_ignore, preds_scores, preds_cls, targets_cls = preds_to_ignore.to(device), preds_scores.to(device), preds_cls.to(device), targets_cls.to(device)
+
+    is_cls_valid = torch.logical_and(preds_cls >= 0, preds_cls < num_cls)
+    valid_preds_cls = preds_cls[is_cls_valid].long()
+    score_bin = (preds_scores[is_cls_valid] * n_score_bins).long().clamp(0, n_score_bins - 1)
+
+    # Index of every prediction in a flattened (num_cls, n_score_bins) histogram,
+    # and of every (prediction, iou threshold) in a flattened (num_cls, n_iou_thresholds, n_score_bins) histogram
+    preds_bin_index = valid_preds_cls * n_score_bins + score_bin
+    iou_offset = torch.arange(n_iou_thresholds, device=device).view(1, -1) * n_score_bins
+    preds_iou_bin_index = (valid_preds_cls * n_iou_thresholds * n_score_bins + score_bin).view(-1, 1) + iou_offset
+
+    tps = preds_matched[is_cls_valid]
+    fps = torch.logical_and(~preds_matched[is_cls_valid], ~preds_to_ignore[is_cls_valid])
+    histogram_size = num_cls * n_iou_thresholds * n_score_bins
+    matched_histogram = torch.bincount(preds_iou_bin_index[tps], minlength=histogram_size).view(num_cls, n_iou_thresholds, n_score_bins)
+    false_positive_histogram = torch.bincount(preds_iou_bin_index[fps], minlength=histogram_size).view(num_cls, n_iou_thresholds, n_score_bins)
+    preds_histogram = torch.bincount(preds_bin_index, minlength=num_cls * n_score_bins).view(num_cls, n_score_bins)
+
+    targets_cls = targets_cls[torch.logical_and(targets_cls >= 0, targets_cls < num_cls)].long()
+    n_targets = torch.bincount(targets_cls, minlength=num_cls)
+    return matched_histogram, false_positive_histogram, preds_histogram, n_targets
+
+
+def compute_detection_metrics_from_histograms(
+    matched_histogram: torch.Tensor,
+    false_positive_histogram: torch.Tensor,
+    preds_histogram: torch.Tensor,
+    n_targets: torch.Tensor,
+    device: str,
+    recall_thresholds: Optional[torch.Tensor] = None,
+    score_threshold: Optional[float] = 0.1,
+    calc_best_score_thresholds: bool = False,
+) -> Tuple:
+    """
+    Compute the list of precision, recall, MaP and f1 for every IoU threshold and for every class, from score histograms
+    (see compute_detection_matching_histograms). This follows compute_detection_metrics, but the rolling precision and recall
+    are sampled at the score bins boundaries instead of at every prediction, so the result is an approximation that gets
+    closer to compute_detection_metrics as the number of score bins increases.
+
+    :param matched_histogram:           Tensor of shape (num_cls, n_iou_thresholds, n_score_bins)
+    :param false_positive_histogram:    Tensor of shape (num_cls, n_iou_thresholds, n_score_bins)
+    :param preds_histogram:             Tensor of shape (num_cls, n_score_bins)
+    :param n_targets:                   Tensor of shape (num_cls)
+    :param device:                      Device
+    :param recall_thresholds:           Recall thresholds used to compute MaP.
+    :param score_threshold:             Minimum confidence score to consider a prediction for the computation of
+                                            precision, recall and f1 (not MaP)
+    :param calc_best_score_thresholds:  If True, the best confidence score threshold is computed for each class
+    :return: Same as compute_detection_metrics
+        :ap, precision, recall, f1: Tensors of shape (n_class, nb_iou_thrs)
+        :unique_classes:            Vector with all unique target classes
+        :best_score_threshold:      torch.float with the best overall score threshold if calc_best_score_thresholds
+                                    is True else None
+        :best_score_threshold_per_cls:     dict that stores the best score threshold for each class , if
+                                            calc_best_score_thresholds is True else None
+    """
+    n_targets = n_targets.to(device)
+    unique_classes = torch.nonzero(n_targets > 0, as_tuple=False).view(-1)
+    n_score_bins = preds_histogram.shape[-1]
+
+    # Rolling sums from the highest to the lowest score bin, shape = (n_class, nb_iou_thrs, n_score_bins)
+    rolling_tps = matched_histogram.to(device)[unique_classes].flip(-1).cumsum(-1).float()
+    rolling_fps = false_positive_histogram.to(device)[unique_classes].flip(-1).cumsum(-1).float()
+    rolling_n_preds = preds_histogram.to(device)[unique_classes].flip(-1).cumsum(-1)
+    n_class, nb_iou_thrs = rolling_tps.shape[:2]
+
+    rolling_recalls = rolling_tps / n_targets[unique_classes].view(-1, 1, 1)
+    rolling_precisions = rolling_tps / (rolling_tps + rolling_fps + torch.finfo(torch.float64).eps)
+
+    # Reversed cummax to only have decreasing values
+    rolling_precisions = rolling_precisions.flip(-1).cummax(-1).values.flip(-1)
+
+    # When no prediction is above a score threshold, precision and recall are 0, so we pad with zeros
+    rolling_recalls_padded = torch.cat((torch.zeros(n_class, nb_iou_thrs, 1, device=device), rolling_recalls), dim=-1)
+    rolling_precisions_padded = torch.cat((torch.zeros(n_class, nb_iou_thrs, 1, device=device), rolling_precisions), dim=-1)
+    rolling_n_preds_padded = torch.cat((torch.zeros(n_class, 1, dtype=rolling_n_preds.dtype, device=device), rolling_n_preds), dim=-1)
+
+    def _n_bins_above(score_thresholds: List[float]) -> torch.Tensor:
+        # A bin is above a threshold when its lower bound is. Rounding avoids float errors such as 0.1 * 1000 = 100.00000000000001
+        return torch.tensor([n_score_bins - min(max(math.ceil(round(thr * n_score_bins, 6)), 0), n_score_bins) for thr in score_thresholds], device=device)
+
+    # ==================
+    # RECALL & PRECISION
+    n_bins_above_threshold = _n_bins_above([score_threshold]).expand(n_class)
+    is_any_pred_above = rolling_n_preds_padded.gather(1, n_bins_above_threshold.view(-1, 1)).view(-1) > 0
+    index = n_bins_above_threshold.view(-1, 1, 1).expand(-1, nb_iou_thrs, 1)
+    recall = rolling_recalls_padded.gather(2, index).squeeze(2) * is_any_pred_above.view(-1, 1)
+    precision = rolling_precisions_padded.gather(2, index).squeeze(2) * is_any_pred_above.view(-1, 1)
+
+    # ==================
+    # BEST CONFIDENCE SCORE THRESHOLD PER CLASS
+    best_score_threshold, best_score_threshold_per_cls = None, None
+    if calc_best_score_thresholds:
+        nb_score_thrs = 101
+        all_score_thresholds = torch.linspace(0, 1, nb_score_thrs, device=device)
+        index = _n_bins_above(all_score_thresholds.tolist()).view(1, 1, -1).expand(n_class, nb_iou_thrs, -1)
+
+        # shape (n_class, nb_iou_thrs, n_score_thresholds)
+        recalls_per_threshold = rolling_recalls_padded.gather(2, index)
+        precisions_per_threshold = rolling_precisions_padded.gather(2, index)
+        f1_per_threshold = 2 * recalls_per_threshold * precisions_per_threshold / (recalls_per_threshold + precisions_per_threshold + 1e-16)
+
+        # shape (n_class, n_score_thresholds), averaged over iou thresholds
+        f1_per_class_per_threshold = torch.mean(f1_per_threshold, dim=1)
+        best_score_threshold_per_cls = {
+            f"Best_score_threshold_cls_{int(cls)}": all_score_thresholds[torch.argmax(f1_per_class_per_threshold[cls_i])]
+            for cls_i, cls in enumerate(unique_classes)
+        }
+        best_score_threshold = all_score_thresholds[torch.argmax(torch.mean(f1_per_class_per_threshold, dim=0))]
+
+    # ==================
+    # AVERAGE PRECISION
+    recall_thresholds = torch.linspace(0, 1, 101, device=device) if recall_thresholds is None else recall_thresholds.to(device)
+
+    # We want the index i so that: rolling_recalls[i-1] < recall_thresholds[k] <= rolling_recalls[i]
+    recall_threshold_idx = torch.searchsorted(rolling_recalls.contiguous(), recall_thresholds.view(1, 1, -1).expand(n_class, nb_iou_thrs, -1).contiguous())
+
+    # When recall_thresholds[k] > max(rolling_recalls), rolling_precisions[i] is not defined, and we want precision = 0
+    rolling_precisions = torch.cat((rolling_precisions, torch.zeros(n_class, nb_iou_thrs, 1, device=device)), dim=-1)
+    ap = torch.gather(input=rolling_precisions, index=recall_threshold_idx, dim=-1).mean(-1)
+
+    f1 = 2 * precision * recall / (precision + recall + 1e-16)
+    return ap, precision, recall, f1, unique_classes, best_score_threshold, best_score_threshold_per_cls
+
+
 def compute_detection_metrics_per_cls(
     preds_matched: torch.Tensor,
     preds_to_ignore: torch.Tensor,
@@ -0,0 +1,183 @@
+import threading
+from collections import deque
+from queue import Empty, Full, Queue
+from typing import Iterable, Iterator, Optional, Sequence, Union
+
+import torch
+
+from super_gradients.training.utils.utils import tensor_container_to_device
+
+__all__ = ["DevicePrefetcher"]
+
+
+class _EndOfData:
+    """Marker put in the queue by the pinning thread once the data loader is exhausted."""
+
+
+class _PinningError:
+    """Wraps an exception raised in the pinning thread, to re-raise it in the training thread."""
+
+    def __init__(self, exception: BaseException):
+        self.exception = exception
+
+
+class DevicePrefetcher:
+    """
+    Wraps a data loader and yields its batches already on the device, so that the host to device copy overlaps with the computation.
+
+    On CUDA:
+        - A background thread iterates the data loader and pins the batches in page-locked memory (unless already pinned, e.g. with
+          DataLoader(pin_memory=True)).
+        - The copies of the next num_prefetch batches are issued on a side CUDA stream, while the current batch is processed.
+        - Before a batch is yielded, the current stream waits for the event recorded after its copy, and its tensors are marked as used
+          by the current stream (Tensor.record_stream), so that their memory is not reused by the side stream while still in use.
+    On CPU (or other devices), batches are moved to the device as they come, without any thread or stream.
+
+    If normalize_uint8_inputs is set, uint8 inputs (the first item of a batch) are converted to float, divided by 255 and optionally
+    normalized by mean and std on the device. This lets the data loader workers ship 4x smaller uint8 images.
+
+    >>> for inputs, targets in DevicePrefetcher(train_loader, device="cuda", normalize_uint8_inputs=True):
+    >>>     outputs = model(inputs)
+
+    :param data_loader:             Data loader (or any iterable of batches) to prefetch from.
+    :param device:                  Device to move the batches to.
+    :param num_prefetch:            Number of batches whose copy is issued ahead of the batch being processed.
+    :param normalize_uint8_inputs:  If True, uint8 inputs are converted to float and divided by 255 on the device.
+    :param mean:                    Optional per-channel mean, subtracted from the normalized inputs (channels first).
+    :param std:                     Optional per-channel std, by which the normalized inputs are divided (channels first).
+    """
+
+    def __init__(
+        self,
+        data_loader: Iterable,
+        device: Union[str, torch.device],
+        num_prefetch: int = 2,
+        normalize_uint8_inputs: bool = False,
+        mean: Optional[Sequence[float]] = None,
+        std: Optional[Sequence[float]] = None,
+    ):
+        if num_prefetch < 1:
+            raise ValueError(f"num_prefetch should be a positive integer, got {num_prefetch}")
+        self.data_loader = data_loader
+        self.device = torch.device(device)
+        self.num_prefetch = num_prefetch
+        self.normalize_uint8_inputs = normalize_uint8_inputs
+        self.use_cuda_stream = self.device.type == "cuda" and torch.cuda.is_available()
+
+        self.mean = None if mean is None else torch.tensor(mean, dtype=torch.float32, device=self.device).reshape(1, -1, 1, 1)
+        self.std = None if std is None else torch.tensor(std, dtype=torch.float32, device=self.device).reshape(1, -1, 1, 1)
+        self.stream = torch.cuda.Stream(device=self.device) if self.use_cuda_stream else None
+
+    def __len__(self) -> int:
+        return len(self.data_loader)
+
+    def __iter__(self) -> Iterator:
+        if not self.use_cuda_stream:
+            for batch in self.data_loader:
+                yield self._normalize_inputs(tensor_container_to_device(batch, self.device, non_blocking=True))
+            return
+
+        pinned_batches = Queue(maxsize=self.num_prefetch)
+        stop_event = threading.Event()
+        pinning_thread = threading.Thread(target=self._pin_batches, args=(iter(self.data_loader), pinned_batches, stop_event), daemon=True)
+        pinning_thread.start()
+
+        in_flight = deque()
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(in_flight) < self.num_prefetch:
+                    item = pinned_batches.get()
+                    if isinstance(item, _EndOfData):
+                        exhausted = True
+                    elif isinstance(item, _PinningError):
+                        raise item.exception
+                    else:
+                        in_flight.append(self._copy_to_device(item))
+                if not in_flight:
+                    return
+
+                batch, copy_done = in_flight.popleft()
+                current_stream = torch.cuda.current_stream(self.device)
+                current_stream.wait_event(copy_done)
+                _record_stream(batch, current_stream)
+                yield batch
+        finally:
+            stop_event.set()
+            # Unblock the pinning thread if it is waiting for room in the queue
+            while pinning_thread.is_alive():
+                try:
+                    pinned_batches.get(timeout=0.1)
+                except Empty:
+                    pass
+            pinning_thread.join()
+
+    def _copy_to_device(self, batch):
+        """Issue the copy (and normalization) of a pinned batch on the side stream, and return it with an event recorded after it."""
+        with torch.cuda.stream(self.stream):
+            batch = self._normalize_inputs(tensor_container_to_device(batch, self.device, non_blocking=True))
+            copy_done = torch.cuda.Event()
+            copy_done.record(self.stream)
+        return batch, copy_done
+
+    def _normalize_inputs(self, batch):
+        """Convert the uint8 inputs of a batch (already on the device) to normalized float inputs, if normalize_uint8_inputs is set."""
+        if not self.normalize_uint8_inputs or not isinstance(batch, (tuple, list)) or len(batch) == 0:
+            return batch
+        inputs = batch[0]
+        if not isinstance(inputs, torch.Tensor) or inputs.dtype != torch.uint8:
+            return batch
+
+        inputs = inputs.float().div_(255.0)
+        if self.mean is not None:
+            inputs.sub_(self.mean)
+        if self.std is not None:
+            inputs.div_(self.std)
+        return [inputs, *batch[1:]] if isinstance(batch, list) else (inputs, *batch[1:])
+
+    def _pin_batches(self, iterator: Iterator, pinned_batches: Queue, stop_event: threading.Event) -> None:
+        """Pinning thread: iterate the data loader, pin the batches and put them in the queue, until exhausted or stopped."""
+
+        def put(item) -> bool:
+            while not stop_event.is_set():
+                try:
+                    pinned_batches.put(item, timeout=0.1)
+                    return True
+                except Full:
+                    pass
+            return False
+
+        try:
+            for batch in iterator:
+                if not put(_pin_memory(batch)):
+                    return
+            put(_EndOfData())
+        except Exception as e:
+            put(_PinningError(e))
+
+
+def _pin_memory(obj):
+    """Recursively pin the CPU tensors of a (possibly nested) tuple/list/dict, keeping its structure."""
+    if isinstance(obj, torch.Tensor):
+        return obj.pin_memory() if obj.device.type == "cpu" and not obj.is_pinned() else obj
+    elif isinstance(obj, tuple):
+        return tuple(_pin_memory(x) for x in obj)
+    elif isinstance(obj, list):
+        return [_pin_memory(x) for x in obj]
+    elif isinstance(obj, dict):
+        return {k: _pin_memory(v) for k, v in obj.items()}
+    else:
+        return obj
+
+
+def _record_stream(obj, stream: "torch.cuda.Stream") -> None:
+    """Recursively mark the CUDA tensors of a (possibly nested) tuple/list/dict as used by stream."""
+    if isinstance(obj, torch.Tensor):
+        if obj.is_cuda:
+            obj.record_stream(stream)
+    elif isinstance(obj, (tuple, list)):
+        for x in obj:
+            _record_stream(x, stream)
+    elif isinstance(obj, dict):
+        for x in obj.values():
+            _record_stream(x, stream)
@@ -1,6 +1,7 @@
 import warnings
+import weakref
 from copy import deepcopy
-from typing import Union
+from typing import List, Tuple, Union
 
 import torch
 from super_gradients.training.utils.utils import unwrap_model
@@ -32,9 +33,12 @@ class ModelEMA:
     A smoothed version of the weights is necessary for some training schemes to perform well.
     This class is sensitive where it is initialized in the sequence of model init,
     GPU assignment and distributed training wrappers.
+
+    The floating point tensors of both models are collected once (on the first update) and updated in place with
+    multi-tensor (torch._foreach_*) kernels, without creating intermediate tensors.
     """
 
-    def __init__(self, model: nn.Module, decay: float, decay_function: IDecayFunction):
+    def __init__(self, model: nn.Module, decay: float, decay_function: IDecayFunction, update_every_n_steps: int = 1):
         """
         Init the EMA
         :param model: Union[SgModule, nn.Module], the training model to construct the EMA model by
@@ -44,13 +48,24 @@ class ModelEMA:
                       until the EMA_t+1 = EMA_t * decay + TRAINING_MODEL * (1- decay)
         :param beta: the exponent coefficient. The higher the beta, the sooner in the training the decay will saturate to
                      its final value. beta=15 is ~40% of the training process.
+        :param update_every_n_steps: Update the EMA model only every N calls to update(). The decay is raised to the power of N
+                                     to compensate for the skipped steps, i.e. EMA_t+N = EMA_t * decay^N + TRAINING_MODEL * (1 - decay^N)
         """
+        if update_every_n_steps < 1:
+            raise ValueError(f"update_every_n_steps must be a positive integer, got {update_every_n_steps}")
+
         # Create EMA
         model = unwrap_model(model)
         self.ema = deepcopy(model)
         self.ema.eval()
         self.decay = decay
         self.decay_function = decay_function
+        self.update_every_n_steps = update_every_n_steps
+        self.updates = 0
+
+        # Tensors to average, grouped by (device, dtype), and a weak reference to the model they were collected from
+        self._tensor_groups: List[Tuple[List[torch.Tensor], List[torch.Tensor]]] = []
+        self._tensor_groups_model_ref = None
 
         """"
         we hold a list of model attributes (not wights and biases) which we would like to include in each
@@ -69,7 +84,7 @@ class ModelEMA:
             p.requires_grad_(False)
 
     @classmethod
-    def from_params(cls, model: nn.Module, decay_type: str = None, decay: float = None, **kwargs):
+    def from_params(cls, model: nn.Module, decay_type: str = None, decay: float = None, update_every_n_steps: int = 1, **kwargs):
         if decay is None:
             logger.warning(
                 "Parameter `decay` is not specified for EMA params. Please specify `decay` parameter explicitly in your config:\n"
@@ -121,7 +136,7 @@ class ModelEMA:
             raise UnknownTypeException(decay_type, list(EMA_DECAY_FUNCTIONS.keys()))
 
         decay_function = decay_cls(**kwargs)
-        return cls(model, decay, decay_function)
+        return cls(model, decay, decay_function, update_every_n_steps=update_every_n_steps)
 
     def update(self, model, step: int, total_steps: int):
         """
@@ -131,14 +146,38 @@ class ModelEMA:
         :param step: Current training step
         :param total_steps: Total training steps
         """
+        self.updates += 1
+        if self.updates % self.update_every_n_steps != 0:
+            return
+
         # Update EMA parameters
         model = unwrap_model(model)
         with torch.no_grad():
-            decay = self.decay_function(self.decay, step, total_steps)
+            decay = self.decay_function(self.decay, step, total_steps) ** self.update_every_n_steps
 
+            for ema_tensors, model_tensors in self._get_tensor_groups(model):
+                torch._foreach_mul_(ema_tensors, decay)
+                torch._foreach_add_(ema_tensors, model_tensors, alpha=1.0 - decay)
+
+    def _get_tensor_groups(self, model: nn.Module) -> List[Tuple[List[torch.Tensor], List[torch.Tensor]]]:
+        """
+        Get the pairs of (EMA tensors, model tensors) to average, grouped by device and dtype as required by the torch._foreach_* kernels.
+        The groups are computed once per model, since state_dict() tensors share their storage with the parameters and buffers.
+        Tensors shared between the EMA model and the model (e.g. the teacher of a KDModule) are skipped.
+
+        :param model: Current (unwrapped) training model
+        :return: List of (ema_tensors, model_tensors)
+        """
+        if self._tensor_groups_model_ref is None or self._tensor_groups_model_ref() is not model:
+            groups = {}
             for ema_v, model_v in zip(self.ema.state_dict().values(), model.state_dict().values()):
-                if ema_v.dtype.is_floating_point:
-                    ema_v.copy_(ema_v * decay + (1.0 - decay) * model_v.detach())
+                if ema_v.dtype.is_floating_point and ema_v.data_ptr() != model_v.data_ptr():
+                    ema_tensors, model_tensors = groups.setdefault((ema_v.device, ema_v.dtype), ([], []))
+                    ema_tensors.append(ema_v)
+                    model_tensors.append(model_v.detach())
+            self._tensor_groups = list(groups.values())
+            self._tensor_groups_model_ref = weakref.ref(model)
+        return self._tensor_groups
 
     def update_attr(self, model):
         """
@@ -162,7 +201,7 @@ class KDModelEMA(ModelEMA):
     GPU assignment and distributed training wrappers.
     """
 
-    def __init__(self, kd_model: KDModule, decay: float, decay_function: IDecayFunction):
+    def __init__(self, kd_model: KDModule, decay: float, decay_function: IDecayFunction, update_every_n_steps: int = 1):
         """
         Init the EMA
         :param kd_model: KDModule, the training Knowledge distillation model to construct the EMA model by
@@ -172,9 +211,10 @@ class KDModelEMA(ModelEMA):
                       until the EMA_t+1 = EMA_t * decay + TRAINING_MODEL * (1- decay)
         :param beta: the exponent coefficient. The higher the beta, the sooner in the training the decay will saturate to
                      its final value. beta=15 is ~40% of the training process.
+        :param update_every_n_steps: Update the EMA model only every N calls to update(), with decay^N as the decay.
         """
         # Only work on the student (we don't want to update and to have a duplicate of the teacher)
-        super().__init__(model=unwrap_model(kd_model).student, decay=decay, decay_function=decay_function)
+        super().__init__(model=unwrap_model(kd_model).student, decay=decay, decay_function=decay_function, update_every_n_steps=update_every_n_steps)
 
         # Overwrite current ema attribute with combination of the student model EMA (current self.ema)
         # with already the instantiated teacher, to have the final KD EMA
@@ -1,4 +1,4 @@
-from typing import List, Optional, Tuple
+from typing import Iterable, Iterator, List, Optional, Tuple
 import cv2
 import PIL
 
@@ -6,10 +6,11 @@ import numpy as np
 
 
 from super_gradients.common.abstractions.abstract_logger import get_logger
+from super_gradients.training.utils.utils import map_in_background_thread
 
 logger = get_logger(__name__)
 
-__all__ = ["load_video", "save_video", "includes_video_extension", "show_video_from_disk", "show_video_from_frames"]
+__all__ = ["load_video", "generate_video_frames", "get_video_fps", "save_video", "includes_video_extension", "show_video_from_disk", "show_video_from_frames"]
 
 VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".wmv", ".flv", ".gif")
 
@@ -43,6 +44,38 @@ def _open_video(file_path: str) -> cv2.VideoCapture:
     return cap
 
 
+def generate_video_frames(file_path: str, max_frames: Optional[int] = None, read_ahead: int = 32) -> Iterator[np.ndarray]:
+    """Open a video file and lazily yield its frames, without loading the whole video into memory.
+
+    The frames are decoded in a background thread, which runs ahead of the consumer by at most read_ahead frames.
+    The video file is released once all the frames were read, or when the generator is closed.
+
+    :param file_path:   Path to the video file.
+    :param max_frames:  Optional, maximum number of frames to extract.
+    :param read_ahead:  Maximum number of decoded frames waiting to be consumed.
+    :return:            Iterator of the frames of the video, each in (H, W, C), RGB.
+    """
+    cap = _open_video(file_path)
+    frames = map_in_background_thread(_identity, _generate_frames(cap, max_frames), max_queue_size=read_ahead)
+    try:
+        yield from frames
+    finally:
+        frames.close()
+        cap.release()
+
+
+def get_video_fps(file_path: str) -> float:
+    """Get the Frames per Second (FPS) of a video file, without reading its frames.
+
+    :param file_path:   Path to the video file.
+    :return:            Frames per Second (FPS).
+    """
+    cap = _open_video(file_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    return fps
+
+
 def _extract_frames(cap: cv2.VideoCapture, max_frames: Optional[int] = None) -> List[np.ndarray]:
     """Extract frames from an opened video capture object.
 
@@ -50,22 +83,35 @@ def _extract_frames(cap: cv2.VideoCapture, max_frames: Optional[int] = None) ->
     :param max_frames:  Optional maximum number of frames to extract.
     :return:            Frames representing the video, each in (H, W, C), RGB.
     """
-    frames = []
+    return list(_generate_frames(cap, max_frames))
+
+
+def _generate_frames(cap: cv2.VideoCapture, max_frames: Optional[int] = None) -> Iterator[np.ndarray]:
+    """Read the frames of an opened video capture object one by one.
 
-    while max_frames != len(frames):
+    :param cap:         Opened video capture object.
+    :param max_frames:  Optional maximum number of frames to extract.
+    :return:            Iterator of the frames of the video, each in (H, W, C), RGB.
+    """
+    num_frames = 0
+    while max_frames != num_frames:
         frame_read_success, frame = cap.read()
         if not frame_read_success:
             break
-        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        yield cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        num_frames += 1
 
-    return frames
 
+def _identity(frame: np.ndarray) -> np.ndarray:
+    return frame
 
-def save_video(output_path: str, frames: List[np.ndarray], fps: int) -> None:
+
+def save_video(output_path: str, frames: Iterable[np.ndarray], fps: int) -> None:
     """Save a video locally. Depending on the extension, the video will be saved as a .mp4 file or as a .gif file.
 
     :param output_path: Where the video will be saved
     :param frames:      Frames representing the video, each in (H, W, C), RGB. Note that all the frames are expected to have the same shape.
+                        When saving as .mp4, frames can be a generator, in which case they are written one by one as they are generated.
     :param fps:         Frames per second
     """
     if not includes_video_extension(output_path):
@@ -78,7 +124,7 @@ def save_video(output_path: str, frames: List[np.ndarray], fps: int) -> None:
         save_mp4(output_path, frames, fps)
 
 
-def save_gif(output_path: str, frames: List[np.ndarray], fps: int) -> None:
+def save_gif(output_path: str, frames: Iterable[np.ndarray], fps: int) -> None:
     """Save a video locally in .gif format.
 
     :param output_path: Where the video will be saved
@@ -91,26 +137,52 @@ def save_gif(output_path: str, frames: List[np.ndarray], fps: int) -> None:
     frames_pil[0].save(output_path, save_all=True, append_images=frames_pil[1:], duration=int(1000 / fps), loop=0)
 
 
-def save_mp4(output_path: str, frames: List[np.ndarray], fps: int) -> None:
+def save_mp4(output_path: str, frames: Iterable[np.ndarray], fps: int) -> None:
     """Save a video locally in .mp4 format.
 
     :param output_path: Where the video will be saved
     :param frames:      Frames representing the video, each in (H, W, C), RGB. Note that all the frames are expected to have the same shape.
+                        If frames is a generator, the frames are written one by one as they are generated, without keeping them in memory.
     :param fps:         Frames per second
     """
-    video_height, video_width = _validate_frames(frames)
-
-    video_writer = cv2.VideoWriter(
-        output_path,
-        cv2.VideoWriter_fourcc(*"mp4v"),
-        fps,
-        (video_width, video_height),
-    )
-
-    for frame in frames:
-        video_writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
-
-    video_writer.release()
+    if isinstance(frames, list):
+        _validate_frames(frames)
+
+    video_writer, video_shape = None, None
+    try:
+        for frame in frames:
+            if video_writer is None:
+                video_shape = _validate_first_frame(frame)
+                video_height, video_width = video_shape[:2]
+                video_writer = cv2.VideoWriter(
+                    output_path,
+                    cv2.VideoWriter_fourcc(*"mp4v"),
+                    fps,
+                    (video_width, video_height),
+                )
+            elif frame.shape != video_shape:
+                raise RuntimeError(
+                    f"Your video is made of frames that have shape going from {video_shape} to {frame.shape}.\n"
+                    f"Please make sure that all the frames have the same shape."
+                )
+            video_writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+    finally:
+        if video_writer is not None:
+            video_writer.release()
+
+    if video_writer is None:
+        raise ValueError(f"No frames to save in {output_path}")
+
+
+def _validate_first_frame(frame: np.ndarray) -> Tuple[int, ...]:
+    """Validate that the first frame of a video includes the channel dimension (i.e. (H, W, C)). The next frames are expected to have the same shape.
+
+    :param frame:   First frame of the video, in (H, W, C), RGB.
+    :return:        Shape of the frame.
+    """
+    if frame.ndim != 3 or frame.shape[-1] != 3:
+        raise RuntimeError("Your frames must include 3 channels.")
+    return frame.shape
 
 
 def _validate_frames(frames: List[np.ndarray]) -> Tuple[float, float]:
@@ -4,7 +4,7 @@ import torch
 from torch import Tensor
 from typing import Tuple, List
 
-from super_gradients.module_interfaces import AbstractPoseEstimationPostPredictionCallback, PoseEstimationPredictions
+from super_gradients.module_interfaces.pose_estimation_post_prediction_callback import AbstractPoseEstimationPostPredictionCallback, PoseEstimationPredictions
 
 
 def get_locations(output_h: int, output_w: int, device):
@@ -1,7 +1,7 @@
 import os
 import cv2
 import numpy as np
-from typing import Union, Callable
+from typing import Union, Callable, List, Optional, Tuple
 import torch
 import torch.nn.functional as F
 from torchvision.utils import draw_segmentation_masks
@@ -210,13 +210,163 @@ def target_to_binary_edge(target: torch.Tensor, num_classes: int, kernel_size: i
     return one_hot_to_binary_edge(one_hot, kernel_size=kernel_size, flatten_channels=flatten_channels)
 
 
+class SlidingWindowInference:
+    """
+    Inference by sliding-window with overlap, batched over the crops.
+
+    The crops of all the images of the batch are gathered into mini-batches of crop_batch_size crops, so that a batch is processed
+    in ceil(num_crops / crop_batch_size) forward passes instead of one forward pass per crop position.
+    The overlapping crop logits are blended with a weight map:
+        - "uniform":    plain average of the overlapping logits.
+        - "linear":     weights decreasing linearly from the center of the crop to its borders.
+        - "gaussian":   gaussian weights centered on the crop, with a std of gaussian_sigma_scale * crop size.
+    The weight maps are computed once per crop geometry (size and device) and cached.
+
+    With logits_downsample > 1, the logits are accumulated on a canvas downsampled by this factor and only the blended logits are
+    upsampled to the image size, which divides the memory of the canvas by logits_downsample ** 2.
+
+    If h_crop > h_img or w_crop > w_img, the small patch will be used to decode without padding.
+
+    :param crop_size:               (height, width) the crop size to take from the image.
+    :param stride:                  (height, width) the stride size between crops.
+    :param crop_batch_size:         Number of crops per forward pass. If None, the batch size of the images is used
+                                    (i.e. the same memory per forward pass as processing the batch one crop position at a time).
+    :param blending:                Weighting of the overlapping logits, one of "uniform", "linear", "gaussian".
+    :param gaussian_sigma_scale:    Std of the gaussian weights, relative to the crop size.
+    :param logits_downsample:       Downsampling factor of the canvas the logits are accumulated on.
+    """
+
+    BLENDING_MODES = ("uniform", "linear", "gaussian")
+
+    def __init__(
+        self,
+        crop_size: Tuple[int, int],
+        stride: Tuple[int, int],
+        crop_batch_size: Optional[int] = None,
+        blending: str = "gaussian",
+        gaussian_sigma_scale: float = 0.125,
+        logits_downsample: int = 1,
+    ):
+        if stride[0] > crop_size[0] or stride[1] > crop_size[1]:
+            raise ValueError("sliding_window_stride cannot be larger than sliding_window_crop_size.")
+        if blending not in self.BLENDING_MODES:
+            raise ValueError(f"blending should be one of {self.BLENDING_MODES}, got {blending}")
+        if crop_batch_size is not None and crop_batch_size < 1:
+            raise ValueError(f"crop_batch_size should be a positive integer, got {crop_batch_size}")
+        if logits_downsample < 1:
+            raise ValueError(f"logits_downsample should be a positive integer, got {logits_downsample}")
+
+        self.crop_size = tuple(crop_size)
+        self.stride = tuple(stride)
+        self.crop_batch_size = crop_batch_size
+        self.blending = blending
+        self.gaussian_sigma_scale = gaussian_sigma_scale
+        self.logits_downsample = logits_downsample
+        self._weight_maps = {}
+
+    def __call__(self, forward: Callable[[torch.Tensor], torch.Tensor], img: torch.Tensor) -> torch.Tensor:
+        """
+        :param forward: a model's forward function.
+        :param img:     a batch of images [B, C, H, W].
+        :return:        blended logits [B, num_classes, H, W].
+        """
+        batch_size, _, h_img, w_img = img.size()
+        windows = self.get_windows(h_img, w_img)
+        crop_batch_size = self.crop_batch_size or batch_size
+
+        s = self.logits_downsample
+        h_canvas, w_canvas = -(-h_img // s), -(-w_img // s)
+        # (y1, y2, x1, x2) of the windows on the canvas
+        canvas_windows = [(y1 // s, -(-y2 // s), x1 // s, -(-x2 // s)) for y1, y2, x1, x2 in windows]
+
+        weights_sum = torch.zeros((1, 1, h_canvas, w_canvas), device=img.device)
+        for y1, y2, x1, x2 in canvas_windows:
+            weights_sum[:, :, y1:y2, x1:x2] += self.get_weight_map(y2 - y1, x2 - x1, device=img.device)
+
+        # Crops are ordered by window, then by image
+        crop_indices = [(window_idx, image_idx) for window_idx in range(len(windows)) for image_idx in range(batch_size)]
+        canvas = None
+        for chunk_start in range(0, len(crop_indices), crop_batch_size):
+            chunk = crop_indices[chunk_start : chunk_start + crop_batch_size]
+            crops = []
+            for window_idx, image_idx in chunk:
+                y1, y2, x1, x2 = windows[window_idx]
+                crops.append(img[image_idx, :, y1:y2, x1:x2])
+
+            crop_logits = forward(torch.stack(crops))
+            if not isinstance(crop_logits, torch.Tensor):
+                crop_logits = crop_logits[0]
+
+            if canvas is None:
+                canvas = torch.zeros((batch_size, crop_logits.size(1), h_canvas, w_canvas), device=img.device)
+
+            for (window_idx, image_idx), logits in zip(chunk, crop_logits):
+                y1, y2, x1, x2 = canvas_windows[window_idx]
+                if logits.shape[-2:] != (y2 - y1, x2 - x1):
+                    logits = F.interpolate(logits.unsqueeze(0).float(), size=(y2 - y1, x2 - x1), mode="bilinear", align_corners=False)[0]
+                canvas[image_idx, :, y1:y2, x1:x2] += logits * self.get_weight_map(y2 - y1, x2 - x1, device=img.device)
+
+        preds = canvas / weights_sum
+        if s > 1:
+            preds = F.interpolate(preds, size=(h_img, w_img), mode="bilinear", align_corners=False)
+        return preds
+
+    def get_windows(self, h_img: int, w_img: int) -> List[Tuple[int, int, int, int]]:
+        """
+        :return: (y1, y2, x1, x2) of the crops of an image of size (h_img, w_img). The last crops of each row/column are aligned
+                 with the image border, so that all the crops have the same size.
+        """
+        h_stride, w_stride = self.stride
+        h_crop, w_crop = self.crop_size
+        h_grids = max(h_img - h_crop + h_stride - 1, 0) // h_stride + 1
+        w_grids = max(w_img - w_crop + w_stride - 1, 0) // w_stride + 1
+
+        windows = []
+        for h_idx in range(h_grids):
+            for w_idx in range(w_grids):
+                y2 = min(h_idx * h_stride + h_crop, h_img)
+                x2 = min(w_idx * w_stride + w_crop, w_img)
+                windows.append((max(y2 - h_crop, 0), y2, max(x2 - w_crop, 0), x2))
+        return windows
+
+    def get_weight_map(self, height: int, width: int, device: Union[str, torch.device]) -> torch.Tensor:
+        """
+        :return: [1, height, width] blending weights of a crop (cached per geometry).
+        """
+        key = (self.blending, self.gaussian_sigma_scale, height, width, str(device))
+        if key not in self._weight_maps:
+            if self.blending == "uniform":
+                weight_map = torch.ones((1, height, width), device=device)
+            else:
+                weight_map = (self._weights_1d(height, device)[:, None] * self._weights_1d(width, device)[None, :]).unsqueeze(0)
+                # Keep the borders strictly positive, where they are covered by a single crop
+                weight_map = weight_map / weight_map.max()
+                weight_map = weight_map.clamp_min(1e-3)
+            self._weight_maps[key] = weight_map
+        return self._weight_maps[key]
+
+    def _weights_1d(self, size: int, device: Union[str, torch.device]) -> torch.Tensor:
+        """1D weights of the pixels of a crop along one axis, maximal at the center."""
+        positions = torch.arange(size, dtype=torch.float32, device=device) + 0.5
+        if self.blending == "linear":
+            return 1 - (2 * positions / size - 1).abs()
+        sigma = self.gaussian_sigma_scale * size
+        return torch.exp(-((positions - size / 2) ** 2) / (2 * sigma**2))
+
+
 def forward_with_sliding_window_wrapper(
-    forward: Callable[[torch.Tensor], torch.Tensor], img: torch.Tensor, sliding_window_stride: tuple, sliding_window_crop_size: tuple, num_classes: int
+    forward: Callable[[torch.Tensor], torch.Tensor],
+    img: torch.Tensor,
+    sliding_window_stride: tuple,
+    sliding_window_crop_size: tuple,
+    num_classes: int,
+    crop_batch_size: Optional[int] = None,
+    blending: str = "uniform",
 ) -> torch.Tensor:
     """
     Inference by sliding-window with overlap. It involves systematically moving a window with a fixed crop-size over
     the input image. As the window moves across the image, features or patterns within the window are extracted by
-    running a forward pass of the crop image through the net.
+    running a forward pass of the crop image through the net. See SlidingWindowInference.
 
     If h_crop > h_img or w_crop > w_img, the small patch will be used to decode without padding.
 
@@ -224,44 +374,13 @@ def forward_with_sliding_window_wrapper(
     :param img: a batch of images to benchmark the model on using sliding window.
     :param sliding_window_stride: (height, width) the stride size between crops for forward with sliding window
     :param sliding_window_crop_size: (height, width) the crop size to take from the image for forward with sliding window
-    :param num_classes: the number of classes.
+    :param num_classes: the number of classes. Not used anymore, the number of classes is taken from the logits.
+    :param crop_batch_size: number of crops per forward pass, defaults to the batch size of img.
+    :param blending: weighting of the overlapping logits, one of "uniform", "linear", "gaussian".
 
     return: predictions tensor
     """
-
-    h_stride, w_stride = sliding_window_stride
-    h_crop, w_crop = sliding_window_crop_size
-
-    if h_stride > h_crop or w_stride > w_crop:
-        raise ValueError("sliding_window_stride cannot be larger than sliding_window_crop_size.")
-
-    batch_size, _, h_img, w_img = img.size()
-
-    h_grids = max(h_img - h_crop + h_stride - 1, 0) // h_stride + 1
-    w_grids = max(w_img - w_crop + w_stride - 1, 0) // w_stride + 1
-
-    preds = torch.zeros((batch_size, num_classes, h_img, w_img), device=img.device)
-    count_mat = torch.zeros((batch_size, 1, h_img, w_img), device=img.device)
-
-    for h_idx in range(h_grids):
-        for w_idx in range(w_grids):
-            y1 = h_idx * h_stride
-            x1 = w_idx * w_stride
-            y2 = min(y1 + h_crop, h_img)
-            x2 = min(x1 + w_crop, w_img)
-            y1 = max(y2 - h_crop, 0)
-            x1 = max(x2 - w_crop, 0)
-            crop_img = img[:, :, y1:y2, x1:x2]
-
-            crop_logits = forward(crop_img)
-
-            if isinstance(crop_logits, torch.Tensor):
-                crop_logits = (crop_logits,)
-
-            crop_logits = crop_logits[0]
-
-            preds[:, :, y1:y2, x1:x2] += crop_logits
-
-            count_mat[:, :, y1:y2, x1:x2] += 1
-    preds = preds / count_mat
-    return preds
+    sliding_window_inference = SlidingWindowInference(
+        crop_size=sliding_window_crop_size, stride=sliding_window_stride, crop_batch_size=crop_batch_size, blending=blending
+    )
+    return sliding_window_inference(forward, img)
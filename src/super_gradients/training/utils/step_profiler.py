@@ -0,0 +1,212 @@
+import time
+from typing import Dict, Optional, Union
+
+import numpy as np
+import torch
+
+from super_gradients.common.abstractions.abstract_logger import get_logger
+from super_gradients.common.sg_loggers.abstract_sg_logger import AbstractSGLogger
+
+logger = get_logger(__name__)
+
+__all__ = ["StepProfiler"]
+
+
+class _NullPhase:
+    """Context manager used when the profiler is disabled, so that profiling a phase costs a single method call."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+class _Phase:
+    """Context manager timing a phase of the training step (preallocated once per phase)."""
+
+    def __init__(self, profiler: "StepProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler.start(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.profiler.stop(self.name)
+        return False
+
+
+class StepProfiler:
+    """
+    Low-overhead profiler of the phases of the training step, to tell whether a run is input-bound or compute-bound.
+
+    The duration of every phase is stored in a fixed-size ring buffer (one per phase), holding the last buffer_size steps.
+    Every report_every steps, the p50/p95/p99 of every phase (in milliseconds) are written to the sg_logger under "step_profiler/".
+
+    Device phases (host to device copy, forward, loss, backward, optimizer, EMA) are timed with CUDA events when training on a GPU,
+    so they measure the actual kernels rather than their launch. The events are only resolved when reporting, so profiling does
+    not synchronize the device more than once every report_every steps. Host phases (data wait, callbacks, metrics), and all the
+    phases when training on CPU, are timed with time.perf_counter_ns.
+
+    A phase that runs several times in a step (e.g. callbacks) is summed for host phases. A phase that does not run in a step
+    (e.g. optimizer with batch_accumulate > 1) is not counted in the percentiles.
+
+    The buffers are only written by the training thread, so no locking is needed. When disabled, every method returns immediately.
+
+    >>> profiler = StepProfiler(sg_logger=sg_logger, device="cuda", report_every=100)
+    >>> with profiler.phase("forward"):
+    >>>     outputs = model(inputs)
+    >>> profiler.end_step(global_step)
+
+    :param sg_logger:       Logger to write the percentiles to. If None, percentiles are only available through summary().
+    :param device:          Device of the training. CUDA events are used for the device phases if it is a CUDA device.
+    :param report_every:    Number of steps between two reports (and CUDA events resolutions).
+    :param buffer_size:     Number of steps kept in the ring buffers, over which the percentiles are computed.
+    :param enabled:         If False, the profiler does nothing.
+    """
+
+    PHASES = ("data_wait", "h2d", "forward", "loss", "backward", "optimizer", "ema", "callbacks", "metrics")
+    DEVICE_PHASES = ("h2d", "forward", "loss", "backward", "optimizer", "ema")
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(
+        self,
+        sg_logger: Optional[AbstractSGLogger] = None,
+        device: Union[str, torch.device] = "cpu",
+        report_every: int = 100,
+        buffer_size: int = 1000,
+        enabled: bool = True,
+    ):
+        if buffer_size < report_every:
+            raise ValueError(f"buffer_size ({buffer_size}) should be greater or equal to report_every ({report_every})")
+
+        self.enabled = enabled
+        self.sg_logger = sg_logger
+        self.report_every = report_every
+        self.buffer_size = buffer_size
+        self.num_steps = 0
+
+        self._null_phase = _NullPhase()
+        self._phases = {name: _Phase(self, name) for name in self.PHASES}
+        if not enabled:
+            return
+
+        self.use_cuda_events = torch.device(device).type == "cuda" and torch.cuda.is_available()
+        self._event_phases = frozenset(self.DEVICE_PHASES if self.use_cuda_events else ())
+
+        # Durations in ms, NaN when the phase did not run in the step
+        self._durations = {name: np.full(buffer_size, np.nan) for name in self.PHASES}
+
+        # Host timing of the current step
+        self._host_start_ns = dict.fromkeys(self.PHASES, 0)
+        self._host_elapsed_ns = dict.fromkeys(self.PHASES, 0)
+        self._host_ran = dict.fromkeys(self.PHASES, False)
+
+        # CUDA events of the steps since the last report, resolved when reporting
+        if self.use_cuda_events:
+            self._events = {
+                name: [(torch.cuda.Event(enable_timing=True), torch.cuda.Event(enable_timing=True)) for _ in range(report_every)] for name in self._event_phases
+            }
+            self._events_recorded = {name: np.zeros(report_every, dtype=bool) for name in self._event_phases}
+        self._num_resolved_steps = 0
+
+    def phase(self, name: str):
+        """
+        Context manager timing a phase of the current step.
+
+        :param name: Name of the phase, one of StepProfiler.PHASES
+        """
+        return self._phases[name] if self.enabled else self._null_phase
+
+    def start(self, name: str) -> None:
+        """Start timing a phase of the current step."""
+        if not self.enabled:
+            return
+        if name in self._event_phases:
+            self._events[name][self.num_steps - self._num_resolved_steps][0].record()
+        else:
+            self._host_start_ns[name] = time.perf_counter_ns()
+
+    def stop(self, name: str) -> None:
+        """Stop timing a phase of the current step."""
+        if not self.enabled:
+            return
+        if name in self._event_phases:
+            pending_index = self.num_steps - self._num_resolved_steps
+            self._events[name][pending_index][1].record()
+            self._events_recorded[name][pending_index] = True
+        else:
+            self._host_elapsed_ns[name] += time.perf_counter_ns() - self._host_start_ns[name]
+            self._host_ran[name] = True
+
+    def end_step(self, global_step: int) -> None:
+        """
+        Commit the timings of the current step to the ring buffers, and report the percentiles every report_every steps.
+
+        :param global_step: Global step number, used when writing to the sg_logger.
+        """
+        if not self.enabled:
+            return
+        slot = self.num_steps % self.buffer_size
+        for name in self.PHASES:
+            if name in self._event_phases:
+                continue
+            self._durations[name][slot] = self._host_elapsed_ns[name] / 1e6 if self._host_ran[name] else np.nan
+            self._host_elapsed_ns[name] = 0
+            self._host_ran[name] = False
+
+        self.num_steps += 1
+        if self.num_steps - self._num_resolved_steps == self.report_every:
+            self.report(global_step)
+
+    def report(self, global_step: int) -> Dict[str, float]:
+        """
+        Write the p50/p95/p99 of every phase over the ring buffers to the sg_logger.
+
+        :param global_step: Global step number, used when writing to the sg_logger.
+        :return:            Dict of {"step_profiler/<phase>_p<percentile>_ms": value}
+        """
+        if not self.enabled:
+            return {}
+        self._resolve_events()
+        scalars = {
+            f"step_profiler/{name}_p{percentile}_ms": float(value)
+            for name, percentiles in self.summary().items()
+            for percentile, value in zip(self.PERCENTILES, percentiles)
+        }
+        if self.sg_logger is not None and scalars:
+            self.sg_logger.add_scalars(tag_scalar_dict=scalars, global_step=global_step)
+        return scalars
+
+    def summary(self) -> Dict[str, np.ndarray]:
+        """
+        :return: Dict of {phase: [p50, p95, p99]} (in ms) over the ring buffers, for the phases that ran at least once.
+        """
+        if not self.enabled:
+            return {}
+        num_filled = min(self._num_resolved_steps, self.buffer_size)
+        summary = {}
+        for name in self.PHASES:
+            durations = self._durations[name][:num_filled]
+            durations = durations[~np.isnan(durations)]
+            if len(durations):
+                summary[name] = np.percentile(durations, self.PERCENTILES)
+        return summary
+
+    def _resolve_events(self) -> None:
+        """Read the durations of the CUDA events of the steps since the last resolution (a single device synchronization)."""
+        num_pending = self.num_steps - self._num_resolved_steps
+        if self.use_cuda_events and num_pending:
+            torch.cuda.synchronize()
+            for name in self._event_phases:
+                for pending_index in range(num_pending):
+                    slot = (self._num_resolved_steps + pending_index) % self.buffer_size
+                    if self._events_recorded[name][pending_index]:
+                        start_event, end_event = self._events[name][pending_index]
+                        self._durations[name][slot] = start_event.elapsed_time(end_event)
+                    else:
+                        self._durations[name][slot] = np.nan
+                self._events_recorded[name][:] = False
+        self._num_resolved_steps = self.num_steps
@@ -4,6 +4,7 @@ import os
 import random
 import re
 import tarfile
+import threading
 import time
 import typing
 import warnings
@@ -11,7 +12,8 @@ from functools import lru_cache, wraps
 from importlib import import_module
 from itertools import islice
 from pathlib import Path
-from typing import Mapping, Optional, Tuple, Union, List, Dict, Any, Iterable
+from queue import Empty, Full, Queue
+from typing import Mapping, Optional, Tuple, Union, List, Dict, Any, Iterable, Callable, Iterator
 from zipfile import ZipFile
 
 import numpy as np
@@ -218,6 +220,13 @@ class AverageMeter:
         # return (self._sum / self._count).__float__() if self._sum.dim() < 1 or len(self._sum) == 1 \
         #     else tuple((self._sum / self._count).cpu().numpy())
 
+    @property
+    def average_tensor(self) -> Optional[torch.Tensor]:
+        """Running average as a tensor on the device of the updates (read without synchronizing the device), None before the first update."""
+        if self._sum is None:
+            return None
+        return self._sum / self._count
+
 
 def tensor_container_to_device(obj: Union[torch.Tensor, tuple, list, dict], device: str, non_blocking=True, detach: bool = False):
     """
@@ -619,6 +628,70 @@ def generate_batch(iterable: Iterable, batch_size: int) -> Iterable:
             return
 
 
+class _EndOfStage:
+    """Marker put in the queue of map_in_background_thread once its inputs are exhausted."""
+
+
+class _StageError:
+    """Wraps an exception raised in the thread of map_in_background_thread, to re-raise it in the consumer thread."""
+
+    def __init__(self, exception: BaseException):
+        self.exception = exception
+
+
+def map_in_background_thread(fn: Callable[[Any], Any], items: Iterable[Any], max_queue_size: int) -> Iterator[Any]:
+    """Apply fn to the items in a background thread, which runs ahead of the consumer by at most max_queue_size results.
+
+    The results are yielded in order. Exceptions raised by fn (or by the iteration of items) are re-raised in the consumer thread.
+    The thread is stopped when the generator is closed, e.g. if the consumer stops iterating early.
+
+    :param fn:              Function to apply to each item.
+    :param items:           Items to process. They are iterated in the background thread.
+    :param max_queue_size:  Maximum number of results waiting to be consumed.
+    :return:                Iterator of fn(item) for item in items.
+    """
+    results = Queue(maxsize=max_queue_size)
+    stop_event = threading.Event()
+
+    def put(result) -> bool:
+        while not stop_event.is_set():
+            try:
+                results.put(result, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def run() -> None:
+        try:
+            for item in items:
+                if not put(fn(item)):
+                    return
+            put(_EndOfStage())
+        except BaseException as e:
+            put(_StageError(e))
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        while True:
+            result = results.get()
+            if isinstance(result, _EndOfStage):
+                return
+            if isinstance(result, _StageError):
+                raise result.exception
+            yield result
+    finally:
+        stop_event.set()
+        # Unblock the thread if it is waiting for room in the queue
+        while thread.is_alive():
+            try:
+                results.get(timeout=0.1)
+            except Empty:
+                pass
+        thread.join()
+
+
 def ensure_is_tuple_of_two(inputs: Union[Any, Iterable[Any], None]) -> Union[Tuple[Any, Any], None]:
     """
     Checks input and converts it to a tuple of length two. If input is None returns None.
@@ -1,16 +1,23 @@
 import os
+import shutil
+from typing import Dict, List, Optional
+
 import torch
 import numpy as np
+from super_gradients.common.abstractions.abstract_logger import get_logger
 from super_gradients.training.utils.checkpoint_utils import read_ckpt_state_dict
-from super_gradients.training.utils.utils import move_state_dict_to_device, unwrap_model
+from super_gradients.training.utils.utils import unwrap_model
+
+logger = get_logger(__name__)
 
 
 class ModelWeightAveraging:
     """
     Utils class for managing the averaging of the best several snapshots into a single model.
-    A snapshot dictionary file and the average model will be saved / updated at every epoch and evaluated only when
-    training is completed. The snapshot file will only be deleted upon completing the training.
-    The snapshot dict will be managed on cpu.
+    The snapshots are kept in memory (on cpu) together with their running sum, so replacing a snapshot and computing the average model
+    only costs O(model size), regardless of the number of averaged models.
+    Every snapshot is also saved to its own file in the snapshots directory. Only the replaced snapshot is written at every epoch,
+    and training can be resumed from these files. The snapshots directory will only be deleted upon completing the training.
     """
 
     def __init__(
@@ -25,87 +32,140 @@ class ModelWeightAveraging:
         Init the ModelWeightAveraging
         :param ckpt_dir: the directory where the checkpoints are saved
         :param metric_to_watch: monitoring loss or acc, will be identical to that which determines best_model
-        :param load_checkpoint: whether to load pre-existing snapshot dict.
+        :param load_checkpoint: whether to load pre-existing snapshots.
         :param number_of_models_to_average: number of models to average
         """
 
-        self.averaging_snapshots_file = os.path.join(ckpt_dir, "averaging_snapshots.pkl")
+        self.averaging_snapshots_dir = os.path.join(ckpt_dir, "averaging_snapshots")
         self.number_of_models_to_average = number_of_models_to_average
         self.metric_to_watch = metric_to_watch
         self.greater_is_better = greater_is_better
 
-        # if continuing training, copy previous snapshot dict if exist
-        if load_checkpoint and ckpt_dir is not None and os.path.isfile(self.averaging_snapshots_file):
-            averaging_snapshots_dict = read_ckpt_state_dict(self.averaging_snapshots_file)
-
+        self.snapshots: List[Optional[Dict[str, torch.Tensor]]] = [None] * self.number_of_models_to_average
+        # if metric to watch is acc, hold a zero array, if loss hold inf array
+        if self.greater_is_better:
+            self.snapshots_metric = -1 * np.inf * np.ones(self.number_of_models_to_average)
         else:
-            averaging_snapshots_dict = {"snapshot" + str(i): None for i in range(self.number_of_models_to_average)}
-            # if metric to watch is acc, hold a zero array, if loss hold inf array
-            if self.greater_is_better:
-                averaging_snapshots_dict["snapshots_metric"] = -1 * np.inf * np.ones(self.number_of_models_to_average)
-            else:
-                averaging_snapshots_dict["snapshots_metric"] = np.inf * np.ones(self.number_of_models_to_average)
+            self.snapshots_metric = np.inf * np.ones(self.number_of_models_to_average)
+
+        # Sum of all the snapshots, accumulated in float64 so that replacing snapshots does not accumulate rounding errors
+        self._snapshots_sum: Optional[Dict[str, torch.Tensor]] = None
 
-            torch.save(averaging_snapshots_dict, self.averaging_snapshots_file)
+        # if continuing training, load the previous snapshots if exist. Otherwise, remove the snapshots of a previous run
+        if not load_checkpoint:
+            self.cleanup()
+        os.makedirs(self.averaging_snapshots_dir, exist_ok=True)
+        if load_checkpoint:
+            self._load_snapshots(ckpt_dir)
 
-    def update_snapshots_dict(self, model, validation_results_dict):
+    def update_snapshots_dict(self, model, validation_results_dict) -> bool:
         """
-        Update the snapshot dict and returns the updated average model for saving
+        Replace the worst snapshot with the latest model if it is better, and save it to its snapshot file.
         :param model: the latest model
         :param validation_results_dict: performance of the latest model
+        :return: whether the model was added to the snapshots
         """
-        averaging_snapshots_dict = self._get_averaging_snapshots_dict()
-
         # IF CURRENT MODEL IS BETTER, TAKING HIS PLACE IN ACC LIST AND OVERWRITE THE NEW AVERAGE
-        require_update, update_ind = self._is_better(averaging_snapshots_dict, validation_results_dict)
+        require_update, update_ind = self._is_better(validation_results_dict)
         if require_update:
-            # moving state dict to cpu
-            new_sd = unwrap_model(model).state_dict()
-            new_sd = move_state_dict_to_device(new_sd, "cpu")
+            # copying state dict to cpu (the copy must not share memory with the model, which keeps training)
+            new_sd = {k: v.detach().to("cpu", copy=True) for k, v in unwrap_model(model).state_dict().items()}
+            metric = validation_results_dict[self.metric_to_watch]
+            metric = metric.item() if isinstance(metric, torch.Tensor) else float(metric)
 
-            averaging_snapshots_dict["snapshot" + str(update_ind)] = new_sd
-            averaging_snapshots_dict["snapshots_metric"][update_ind] = validation_results_dict[self.metric_to_watch]
+            self._replace_snapshot(update_ind, new_sd, metric)
+            self._save_snapshot(update_ind)
 
-        return averaging_snapshots_dict
+        return require_update
 
     def get_average_model(self, model, validation_results_dict=None):
         """
         Returns the averaged model
         :param model: will be used to determine arch
         :param validation_results_dict: if provided, will update the average model before returning
-        :param target_device: if provided, return sd on target device
 
         """
         # If validation tuple is provided, update the average model
         if validation_results_dict is not None:
-            averaging_snapshots_dict = self.update_snapshots_dict(model, validation_results_dict)
-        else:
-            averaging_snapshots_dict = self._get_averaging_snapshots_dict()
+            self.update_snapshots_dict(model, validation_results_dict)
 
-        torch.save(averaging_snapshots_dict, self.averaging_snapshots_file)
-        average_model_sd = averaging_snapshots_dict["snapshot0"]
-        for n_model in range(1, self.number_of_models_to_average):
-            if averaging_snapshots_dict["snapshot" + str(n_model)] is not None:
-                net_sd = averaging_snapshots_dict["snapshot" + str(n_model)]
-                # USING MOVING AVERAGE
-                for key in average_model_sd:
-                    average_model_sd[key] = torch.true_divide(average_model_sd[key] * n_model + net_sd[key], (n_model + 1))
+        if self._snapshots_sum is None:
+            return {k: v.detach().to("cpu", copy=True) for k, v in unwrap_model(model).state_dict().items()}
 
-        return average_model_sd
+        num_snapshots = sum(snapshot is not None for snapshot in self.snapshots)
+        reference_sd = next(snapshot for snapshot in self.snapshots if snapshot is not None)
+        return {key: torch.true_divide(self._snapshots_sum[key], num_snapshots).to(reference_sd[key].dtype) for key in self._snapshots_sum}
 
     def cleanup(self):
         """
-        Delete snapshot file when reaching the last epoch
+        Delete the snapshot files when reaching the last epoch
+        """
+        shutil.rmtree(self.averaging_snapshots_dir, ignore_errors=True)
+
+    def _replace_snapshot(self, index: int, state_dict: Dict[str, torch.Tensor], metric: float) -> None:
+        """
+        Replace the snapshot at the given index and update the running sum, without going over the other snapshots.
+        :param index: index of the snapshot to replace
+        :param state_dict: new snapshot (cpu state dict)
+        :param metric: performance of the new snapshot
         """
-        os.remove(self.averaging_snapshots_file)
+        if self._snapshots_sum is None:
+            self._snapshots_sum = {key: torch.zeros(value.shape, dtype=torch.float64) for key, value in state_dict.items()}
 
-    def _is_better(self, averaging_snapshots_dict, validation_results_dict):
+        previous_sd = self.snapshots[index]
+        for key, value in state_dict.items():
+            self._snapshots_sum[key].add_(value)
+            if previous_sd is not None:
+                self._snapshots_sum[key].sub_(previous_sd[key])
+
+        self.snapshots[index] = state_dict
+        self.snapshots_metric[index] = metric
+
+    def _snapshot_path(self, index: int) -> str:
+        return os.path.join(self.averaging_snapshots_dir, f"snapshot{index}.pth")
+
+    def _save_snapshot(self, index: int) -> None:
+        """
+        Save a single snapshot and its metric to its own file. The file is written under a temporary name and then renamed,
+        so that an interrupted training never leaves a partially written snapshot.
+        :param index: index of the snapshot to save
+        """
+        path = self._snapshot_path(index)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        torch.save({"net": self.snapshots[index], "metric": float(self.snapshots_metric[index])}, tmp_path)
+        os.replace(tmp_path, path)
+
+    def _load_snapshots(self, ckpt_dir: str) -> None:
+        """
+        Load the snapshots saved by a previous run, either from the per-snapshot files, or from the single
+        averaging_snapshots.pkl file written by previous versions of SuperGradients.
+        :param ckpt_dir: the directory where the checkpoints are saved
+        """
+        legacy_snapshots_file = os.path.join(ckpt_dir, "averaging_snapshots.pkl")
+        if os.path.isfile(legacy_snapshots_file):
+            averaging_snapshots_dict = read_ckpt_state_dict(legacy_snapshots_file)
+            for index in range(self.number_of_models_to_average):
+                snapshot = averaging_snapshots_dict.get("snapshot" + str(index))
+                if snapshot is not None:
+                    self._replace_snapshot(index, snapshot, float(averaging_snapshots_dict["snapshots_metric"][index]))
+                    self._save_snapshot(index)
+            os.remove(legacy_snapshots_file)
+            return
+
+        for index in range(self.number_of_models_to_average):
+            if os.path.isfile(self._snapshot_path(index)):
+                snapshot = read_ckpt_state_dict(self._snapshot_path(index))
+                self._replace_snapshot(index, snapshot["net"], snapshot["metric"])
+
+        if self._snapshots_sum is not None:
+            logger.info(f"Loaded {sum(snapshot is not None for snapshot in self.snapshots)} weight averaging snapshots from {self.averaging_snapshots_dir}")
+
+    def _is_better(self, validation_results_dict):
         """
         Determines if the new model is better according to the specified metrics
-        :param averaging_snapshots_dict: snapshot dict
         :param validation_results_dict: latest model performance
         """
-        snapshot_metric_array = averaging_snapshots_dict["snapshots_metric"]
+        snapshot_metric_array = self.snapshots_metric
         val = validation_results_dict[self.metric_to_watch]
 
         if self.greater_is_better:
@@ -117,6 +177,3 @@ class ModelWeightAveraging:
             return True, update_ind
 
         return False, None
-
-    def _get_averaging_snapshots_dict(self):
-        return torch.load(self.averaging_snapshots_file)
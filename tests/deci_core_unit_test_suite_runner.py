@@ -66,6 +66,28 @@ from tests.unit_tests.detection_sub_sampling_test import TestDetectionDatasetSub
 from tests.unit_tests.detection_sub_classing_test import TestDetectionDatasetSubclassing
 from tests.unit_tests.detection_output_adapter_test import TestDetectionOutputAdapter
 from tests.unit_tests.detection_caching import TestDetectionDatasetCaching
+from tests.unit_tests.sharded_image_cache_test import TestShardedImageCache
+from tests.unit_tests.annotation_index_test import TestAnnotationIndex
+from tests.unit_tests.detection_dataset_read_only_sample_test import TestDetectionDatasetReadOnlySample
+from tests.unit_tests.pack_flat_targets_test import TestPackFlatTargets
+from tests.unit_tests.yolox_batched_assignment_test import TestYoloXBatchedAssignment
+from tests.unit_tests.async_checkpoint_writer_test import TestAsyncCheckpointWriter
+from tests.unit_tests.model_ema_test import TestModelEMA
+from tests.unit_tests.weight_averaging_test import TestModelWeightAveraging
+from tests.unit_tests.detection_mosaic_affine_test import TestDetectionMosaicAffine
+from tests.unit_tests.dekr_targets_generator_test import TestDEKRTargetsGenerator
+from tests.unit_tests.pose_annotation_index_test import TestPoseAnnotationIndex
+from tests.unit_tests.lazy_import_test import TestLazyImport
+from tests.unit_tests.batch_size_autotuner_test import TestBatchSizeAutoTuner
+from tests.unit_tests.pose_estimation_metrics_histogram_test import TestPoseEstimationMetricsHistogram
+from tests.unit_tests.batched_pose_matching_test import TestBatchedPoseMatching
+from tests.unit_tests.step_profiler_test import TestStepProfiler
+from tests.unit_tests.deferred_logging_values_test import TestDeferredLoggingValues
+from tests.unit_tests.device_prefetcher_test import TestDevicePrefetcher
+from tests.unit_tests.pipelined_prediction_test import TestPipelinedPrediction
+from tests.unit_tests.streaming_video_prediction_test import TestStreamingVideoPrediction
+from tests.unit_tests.bulk_annotation_loading_test import TestBulkAnnotationLoading
+from tests.unit_tests.segmentation_image_backend_test import TestSegmentationImageBackend
 from tests.unit_tests.multi_scaling_test import MultiScaleTest
 from tests.unit_tests.ppyoloe_unit_test import TestPPYOLOE
 from tests.unit_tests.bbox_formats_test import BBoxFormatsTest
@@ -75,6 +97,8 @@ from tests.unit_tests.training_utils_test import TestTrainingUtils
 from tests.unit_tests.dekr_loss_test import DEKRLossTest
 from tests.unit_tests.pose_estimation_metrics_test import TestPoseEstimationMetrics
 from tests.unit_tests.forward_with_sliding_window_test import SlidingWindowTest
+from tests.unit_tests.batched_detection_matching_test import TestBatchedDetectionMatching
+from tests.unit_tests.detection_metrics_histogram_test import TestDetectionMetricsHistogram
 
 
 class CoreUnitTestSuiteRunner:
@@ -124,6 +148,28 @@ class CoreUnitTestSuiteRunner:
         self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestDetectionDatasetSubclassing))
         self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(QuantizationUtilityTest))
         self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestDetectionDatasetCaching))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestShardedImageCache))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestAnnotationIndex))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestDetectionDatasetReadOnlySample))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestPackFlatTargets))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestYoloXBatchedAssignment))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestAsyncCheckpointWriter))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestModelEMA))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestModelWeightAveraging))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestDetectionMosaicAffine))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestDEKRTargetsGenerator))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestPoseAnnotationIndex))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestLazyImport))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestBatchSizeAutoTuner))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestPoseEstimationMetricsHistogram))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestBatchedPoseMatching))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestStepProfiler))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestDeferredLoggingValues))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestDevicePrefetcher))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestPipelinedPrediction))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestStreamingVideoPrediction))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestBulkAnnotationLoading))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestSegmentationImageBackend))
         self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(MultiScaleTest))
         self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TrainingParamsTest))
         self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(CallTrainTwiceTest))
@@ -162,6 +208,8 @@ class CoreUnitTestSuiteRunner:
         self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestPoseEstimationModelExport))
         self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(YoloNASPoseTests))
         self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(PoseEstimationSampleTest))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestBatchedDetectionMatching))
+        self.unit_tests_suite.addTest(self.test_loader.loadTestsFromModule(TestDetectionMetricsHistogram))
 
     def _add_modules_to_end_to_end_tests_suite(self):
         """
@@ -0,0 +1,122 @@
+import os
+import pickle
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+from super_gradients.training.datasets import COCODetectionDataset, YoloDarknetFormatDetectionDataset
+from super_gradients.training.datasets.annotation_index import AnnotationIndex, UnsupportedAnnotationError
+from super_gradients.training.datasets.detection_datasets.detection_dataset import DetectionDataset
+
+
+class TestAnnotationIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.index_dir = Path(self.temp_dir.name) / "index"
+        self.mini_coco_data_dir = str(Path(__file__).parent.parent / "data" / "tinycoco")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _create_yolo_dataset(self, n_images: int) -> str:
+        data_dir = Path(self.temp_dir.name) / "yolo"
+        (data_dir / "images").mkdir(parents=True)
+        (data_dir / "labels").mkdir(parents=True)
+        random_state = np.random.RandomState(0)
+        for i in range(n_images):
+            cv2.imwrite(str(data_dir / "images" / f"{i}.jpg"), np.zeros((40 + i, 60, 3), dtype=np.uint8))
+            with open(data_dir / "labels" / f"{i}.txt", "w") as f:
+                for _ in range(i % 4):  # Some images have no label
+                    f.write(f"{random_state.randint(0, 3)} {' '.join(str(x) for x in random_state.uniform(0.2, 0.4, 4))}\n")
+        return str(data_dir)
+
+    def _assert_same_samples(self, expected_dataset: DetectionDataset, actual_dataset: DetectionDataset):
+        self.assertEqual(len(expected_dataset), len(actual_dataset))
+        for index in range(len(expected_dataset)):
+            expected_sample, actual_sample = expected_dataset.get_sample(index), actual_dataset.get_sample(index)
+            self.assertEqual(expected_sample.keys(), actual_sample.keys())
+            for key, expected_value in expected_sample.items():
+                if isinstance(expected_value, np.ndarray):
+                    self.assertEqual(expected_value.dtype, actual_sample[key].dtype)
+                    self.assertTrue(np.array_equal(expected_value, actual_sample[key], equal_nan=expected_value.dtype.kind == "f"))
+                else:
+                    self.assertEqual(expected_value, actual_sample[key])
+
+    def test_coco_dataset_with_annotation_index(self):
+        dataset_params = {"data_dir": self.mini_coco_data_dir, "subdir": "images/train2017", "json_file": "instances_train2017.json", "input_dim": [512, 512]}
+        dataset = COCODetectionDataset(**dataset_params)
+        indexed_dataset = COCODetectionDataset(annotation_index_dir=str(self.index_dir), **dataset_params)
+        self.assertIsInstance(indexed_dataset._cached_annotations, AnnotationIndex)
+        self._assert_same_samples(dataset, indexed_dataset)
+
+        # Once indexed, the dataset is set up without parsing the json file
+        with patch.object(COCODetectionDataset, "_load_sample_annotation") as load_sample_annotation, patch.object(
+            COCODetectionDataset, "_init_coco"
+        ) as init_coco:
+            reloaded_dataset = COCODetectionDataset(annotation_index_dir=str(self.index_dir), **dataset_params)
+            load_sample_annotation.assert_not_called()
+            init_coco.assert_not_called()
+        self.assertIsNone(reloaded_dataset._coco)
+        self.assertEqual(dataset.classes, reloaded_dataset.classes)
+        self.assertEqual(dataset.class_ids, reloaded_dataset.class_ids)
+        self.assertEqual(dataset.sample_id_to_coco_id, reloaded_dataset.sample_id_to_coco_id)
+        self._assert_same_samples(dataset, reloaded_dataset)
+        self.assertIsNone(reloaded_dataset._coco)
+
+        # The json file is parsed lazily when the annotations have to be loaded
+        resized_params = {**dataset_params, "input_dim": [320, 320]}
+        with patch.object(COCODetectionDataset, "_init_coco", autospec=True, side_effect=COCODetectionDataset._init_coco) as init_coco:
+            resized_dataset = COCODetectionDataset(annotation_index_dir=str(self.index_dir), annotation_loading_workers=4, **resized_params)
+            self.assertEqual(init_coco.call_count, 1)
+        self._assert_same_samples(COCODetectionDataset(**resized_params), resized_dataset)
+        self.assertEqual(1, len(list(self.index_dir.glob("coco_data_source_*"))))
+
+        # The parameters affecting the annotations are part of the index key
+        subset_params = {**dataset_params, "class_inclusion_list": ["airplane", "person"]}
+        subset_dataset = COCODetectionDataset(annotation_index_dir=str(self.index_dir), **subset_params)
+        self.assertEqual(3, len(list(self.index_dir.glob("annotation_index_*"))))
+        self._assert_same_samples(COCODetectionDataset(**subset_params), subset_dataset)
+
+    def test_yolo_dataset_index_is_rebuilt_when_labels_change(self):
+        data_dir = self._create_yolo_dataset(n_images=12)
+        dataset_params = {"data_dir": data_dir, "images_dir": "images", "labels_dir": "labels", "classes": ["a", "b", "c"], "input_dim": (64, 64)}
+        indexed_dataset = YoloDarknetFormatDetectionDataset(annotation_index_dir=str(self.index_dir), **dataset_params)
+        self._assert_same_samples(YoloDarknetFormatDetectionDataset(**dataset_params), indexed_dataset)
+
+        time.sleep(0.01)
+        with open(os.path.join(data_dir, "labels", "0.txt"), "w") as f:
+            f.write("1 0.5 0.5 0.2 0.2\n")
+        updated_dataset = YoloDarknetFormatDetectionDataset(annotation_index_dir=str(self.index_dir), **dataset_params)
+        self.assertEqual(2, len(list(self.index_dir.glob("annotation_index_*"))))
+        self._assert_same_samples(YoloDarknetFormatDetectionDataset(**dataset_params), updated_dataset)
+
+    def test_index_is_pickled_without_copying_the_data(self):
+        annotations = [{"target": np.random.rand(i, 5), "img_path": f"image_{i}.jpg", "resized_img_shape": (i, 2 * i), "n": i} for i in range(10)]
+        index = AnnotationIndex.build(annotations=annotations, path=str(self.index_dir))
+        self.assertLess(len(pickle.dumps(index)), 1000)
+
+        unpickled_index = pickle.loads(pickle.dumps(index))
+        for sample_id, annotation in enumerate(annotations):
+            self.assertTrue(np.array_equal(annotation["target"], unpickled_index[sample_id]["target"]))
+            self.assertFalse(unpickled_index[sample_id]["target"].flags.writeable)
+            self.assertEqual(annotation["img_path"], unpickled_index[sample_id]["img_path"])
+            self.assertEqual(annotation["resized_img_shape"], unpickled_index[sample_id]["resized_img_shape"])
+            self.assertEqual(annotation["n"], unpickled_index[sample_id]["n"])
+        self.assertTrue(np.array_equal(index.get_lengths("target"), np.arange(10)))
+
+    def test_unsupported_annotations(self):
+        with self.assertRaises(UnsupportedAnnotationError):
+            AnnotationIndex.build(annotations=[{"target": np.zeros((1, 5)), "info": {"a": 1}}], path=str(self.index_dir))
+        with self.assertRaises(UnsupportedAnnotationError):
+            AnnotationIndex.build(annotations=[{"target": np.zeros((1, 5))}, {"target": np.zeros((1, 4))}], path=str(self.index_dir))
+        self.assertFalse(self.index_dir.exists())
+        self.assertIsNone(AnnotationIndex.load(str(self.index_dir)))
+
+
+if __name__ == "__main__":
+    unittest.main()
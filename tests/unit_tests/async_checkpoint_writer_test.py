@@ -0,0 +1,263 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from collections import OrderedDict
+from unittest.mock import patch
+
+import torch
+
+from super_gradients.training import Trainer, models
+from super_gradients.training.dataloaders.dataloaders import classification_test_dataloader
+from super_gradients.training.metrics import Accuracy, Top5
+from super_gradients.training.utils.async_checkpoint_writer import AsyncCheckpointWriter
+from super_gradients.training.utils.callbacks import Callback, PhaseContext
+from super_gradients.training.utils.checkpoint_utils import read_ckpt_state_dict
+from super_gradients.common.object_names import Models
+
+
+class DummyLogger:
+    """Minimal logger recording the scalars and the checkpoint files it is notified about."""
+
+    def __init__(self, local_dir: str):
+        self._local_dir = local_dir
+        self.scalars = []
+        self.checkpoint_files = []
+
+    def local_dir(self) -> str:
+        return self._local_dir
+
+    def add_scalar(self, tag: str, scalar_value: float, global_step: int = None):
+        self.scalars.append((tag, scalar_value, global_step))
+
+    def add_checkpoint_file(self, path: str, global_step: int = None):
+        self.checkpoint_files.append(path)
+
+
+class DummyLoggerWithoutCheckpointFiles:
+    """Logger that can only save checkpoints through add_checkpoint."""
+
+    def __init__(self, local_dir: str):
+        self._local_dir = local_dir
+        self.checkpoints = []
+
+    def local_dir(self) -> str:
+        return self._local_dir
+
+    def add_scalar(self, tag: str, scalar_value: float, global_step: int = None):
+        pass
+
+    def add_checkpoint(self, tag: str, state_dict: dict, global_step: int = None):
+        self.checkpoints.append((tag, state_dict))
+
+
+class TrainingEndCallback(Callback):
+    """Records whether on_training_end was called, and optionally fails at the end of a given training epoch."""
+
+    def __init__(self, fail_on_epoch: int = None):
+        self.fail_on_epoch = fail_on_epoch
+        self.training_ended = False
+
+    def on_train_loader_end(self, context: PhaseContext) -> None:
+        if context.epoch == self.fail_on_epoch:
+            raise ValueError("Training failed")
+
+    def on_training_end(self, context: PhaseContext) -> None:
+        self.training_ended = True
+
+
+class TestAsyncCheckpointWriter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.local_dir = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        # The trainer's tensorboard files may still be flushed while the directory is removed
+        shutil.rmtree(self.local_dir, ignore_errors=True)
+
+    def test_state_is_written_once_with_aliases(self):
+        sg_logger = DummyLogger(self.local_dir)
+        writer = AsyncCheckpointWriter(sg_logger)
+        net_state = OrderedDict(weight=torch.arange(6.0).view(2, 3))
+        net_state._metadata = {"": {"version": 1}}
+        state = {"net": net_state, "epoch": 3, "optimizer_state_dict": {"param_groups": [{"lr": 0.1}]}}
+
+        writer.save(tags=["ckpt_latest.pth", "ckpt_best.pth"], state_dict=state, global_step=3)
+        net_state["weight"].zero_()  # Training goes on and modifies the tensors in place
+        writer.close()
+
+        latest_path, best_path = os.path.join(self.local_dir, "ckpt_latest.pth"), os.path.join(self.local_dir, "ckpt_best.pth")
+        self.assertEqual(os.stat(latest_path).st_ino, os.stat(best_path).st_ino)
+        self.assertEqual(sorted(os.listdir(self.local_dir)), ["ckpt_best.pth", "ckpt_latest.pth"])  # No temporary file left
+        loaded_state = torch.load(best_path)
+        self.assertTrue(torch.equal(loaded_state["net"]["weight"], torch.arange(6.0).view(2, 3)))
+        self.assertEqual(loaded_state["net"]._metadata, {"": {"version": 1}})
+        self.assertEqual(loaded_state["optimizer_state_dict"], {"param_groups": [{"lr": 0.1}]})
+        self.assertEqual(sg_logger.checkpoint_files, [latest_path, best_path])
+        self.assertEqual({tag for tag, _, _ in sg_logger.scalars}, {"Checkpointing/save_latency_sec", "Checkpointing/queue_depth"})
+
+    def test_overwriting_latest_does_not_modify_previous_best(self):
+        writer = AsyncCheckpointWriter(DummyLogger(self.local_dir))
+        writer.save(tags=["ckpt_latest.pth", "ckpt_best.pth"], state_dict={"epoch": 1}, global_step=1)
+        writer.save(tags=["ckpt_latest.pth"], state_dict={"epoch": 2}, global_step=2)
+        writer.close()
+        self.assertEqual(torch.load(os.path.join(self.local_dir, "ckpt_latest.pth"))["epoch"], 2)
+        self.assertEqual(torch.load(os.path.join(self.local_dir, "ckpt_best.pth"))["epoch"], 1)
+
+    def test_queue_is_bounded(self):
+        writer = AsyncCheckpointWriter(DummyLogger(self.local_dir), max_queue_size=1)
+        can_write = threading.Event()
+        original_save = torch.save
+
+        def _blocking_save(*args, **kwargs):
+            can_write.wait()
+            original_save(*args, **kwargs)
+
+        with patch("super_gradients.training.utils.async_checkpoint_writer.torch.save", side_effect=_blocking_save):
+            writer.save(tags=["ckpt_1.pth"], state_dict={"epoch": 1}, global_step=1)  # Taken by the background thread
+            time.sleep(0.1)
+            writer.save(tags=["ckpt_2.pth"], state_dict={"epoch": 2}, global_step=2)  # Waits in the queue
+
+            third_save = threading.Thread(target=writer.save, kwargs={"tags": ["ckpt_3.pth"], "state_dict": {"epoch": 3}, "global_step": 3})
+            third_save.start()
+            third_save.join(timeout=0.2)
+            self.assertTrue(third_save.is_alive())  # Blocked until there is room in the queue
+
+            can_write.set()
+            third_save.join()
+            writer.close()
+        self.assertEqual(sorted(os.listdir(self.local_dir)), ["ckpt_1.pth", "ckpt_2.pth", "ckpt_3.pth"])
+
+    def test_buffers_are_reused(self):
+        writer = AsyncCheckpointWriter(DummyLogger(self.local_dir), max_queue_size=1)
+        state = {"net": OrderedDict(weight=torch.zeros(4, 3), bias=torch.zeros(4)), "ema": [torch.zeros(2)]}
+        with patch("super_gradients.training.utils.async_checkpoint_writer.torch.empty", wraps=torch.empty) as empty:
+            for epoch in range(6):
+                for tensor in (state["net"]["weight"], state["net"]["bias"], state["ema"][0]):
+                    tensor.fill_(epoch)
+                writer.save(tags=[f"ckpt_epoch_{epoch}.pth"], state_dict=state, global_step=epoch)
+            writer.close()
+        # One buffer per tensor, for each of the max_queue_size + 2 snapshots that can be alive at the same time
+        self.assertEqual(empty.call_count, 3 * 3)
+        for epoch in range(6):
+            loaded_state = torch.load(os.path.join(self.local_dir, f"ckpt_epoch_{epoch}.pth"))
+            self.assertTrue(torch.equal(loaded_state["net"]["weight"], torch.full((4, 3), float(epoch))))
+            self.assertTrue(torch.equal(loaded_state["ema"][0], torch.full((2,), float(epoch))))
+
+        # Buffers are not reused for tensors with another shape
+        writer = AsyncCheckpointWriter(DummyLogger(self.local_dir), max_queue_size=1)
+        for size in range(1, 5):
+            writer.save(tags=["ckpt_latest.pth"], state_dict={"weight": torch.ones(size)}, global_step=size)
+        writer.close()
+        self.assertTrue(torch.equal(torch.load(os.path.join(self.local_dir, "ckpt_latest.pth"))["weight"], torch.ones(4)))
+
+    def test_write_errors_are_raised_in_training_thread(self):
+        writer = AsyncCheckpointWriter(DummyLogger(os.path.join(self.local_dir, "does_not_exist")))
+        writer.save(tags=["ckpt_latest.pth"], state_dict={"epoch": 1}, global_step=1)
+        with self.assertRaises(RuntimeError):
+            writer.wait()
+        writer.close()
+
+    def test_logger_without_checkpoint_files(self):
+        sg_logger = DummyLoggerWithoutCheckpointFiles(self.local_dir)
+        writer = AsyncCheckpointWriter(sg_logger)
+        writer.save(tags=["ckpt_latest.pth", "ckpt_best.pth"], state_dict={"net": {"weight": torch.ones(2)}}, global_step=1)
+        writer.close()
+        self.assertEqual([tag for tag, _ in sg_logger.checkpoints], ["ckpt_latest.pth", "ckpt_best.pth"])
+
+    def test_trainer_with_async_checkpointing(self):
+        train_params = {
+            "max_epochs": 3,
+            "lr_updates": [],
+            "lr_mode": "StepLRScheduler",
+            "lr_decay_factor": 0.1,
+            "lr_warmup_epochs": 0,
+            "initial_lr": 0.1,
+            "loss": "CrossEntropyLoss",
+            "optimizer": "SGD",
+            "save_ckpt_epoch_list": [2],
+            "async_checkpointing": True,
+            "train_metrics_list": [Accuracy(), Top5()],
+            "valid_metrics_list": [Accuracy(), Top5()],
+            "metric_to_watch": "Accuracy",
+            "greater_metric_to_watch_is_better": True,
+            # The system monitor thread keeps writing to the run directory after train() returns
+            "sg_logger_params": {"monitor_system": False},
+        }
+        trainer = Trainer("async_checkpointing_test", ckpt_root_dir=self.local_dir)
+        model = models.get(Models.RESNET18_CIFAR, arch_params={"num_classes": 10})
+        trainer.train(model=model, training_params=train_params, train_loader=classification_test_dataloader(), valid_loader=classification_test_dataloader())
+
+        self.assertIsNone(trainer.checkpoint_writer)
+        checkpoint_files = os.listdir(trainer.checkpoints_dir_path)
+        for name in ("ckpt_latest.pth", "ckpt_best.pth", "ckpt_epoch_2.pth", "average_model.pth"):
+            self.assertIn(name, checkpoint_files)
+        self.assertFalse(any(name.endswith(".tmp") for name in checkpoint_files))
+
+        latest_state = read_ckpt_state_dict(os.path.join(trainer.checkpoints_dir_path, "ckpt_latest.pth"))
+        self.assertEqual(latest_state["epoch"], 3)
+        model.load_state_dict(latest_state["net"])
+
+    def _train_with_failing_writes(self, callback: TrainingEndCallback) -> Trainer:
+        train_params = {
+            "max_epochs": 2,
+            "lr_updates": [],
+            "lr_mode": "StepLRScheduler",
+            "lr_decay_factor": 0.1,
+            "lr_warmup_epochs": 0,
+            "initial_lr": 0.1,
+            "loss": "CrossEntropyLoss",
+            "optimizer": "SGD",
+            "async_checkpointing": True,
+            "average_best_models": False,
+            "phase_callbacks": [callback],
+            "train_metrics_list": [Accuracy()],
+            "valid_metrics_list": [Accuracy()],
+            "metric_to_watch": "Accuracy",
+            "greater_metric_to_watch_is_better": True,
+            # The system monitor thread keeps writing to the run directory after train() returns
+            "sg_logger_params": {"monitor_system": False},
+        }
+        trainer = Trainer("async_checkpointing_failure_test", ckpt_root_dir=self.local_dir)
+        model = models.get(Models.RESNET18_CIFAR, arch_params={"num_classes": 10})
+        with patch.object(AsyncCheckpointWriter, "_write", side_effect=OSError("No space left on device")):
+            trainer.train(
+                model=model, training_params=train_params, train_loader=classification_test_dataloader(), valid_loader=classification_test_dataloader()
+            )
+        return trainer
+
+    def test_trainer_raises_write_errors_after_cleanup(self):
+        callback = TrainingEndCallback()
+        with self.assertRaises(RuntimeError):
+            self._train_with_failing_writes(callback)
+        self.assertTrue(callback.training_ended)
+
+    def test_trainer_does_not_hide_training_errors_with_write_errors(self):
+        callback = TrainingEndCallback(fail_on_epoch=1)
+        with self.assertRaisesRegex(ValueError, "Training failed"):
+            self._train_with_failing_writes(callback)
+        self.assertTrue(callback.training_ended)
+
+    def test_blocking_time_benchmark(self):
+        state = {"net": OrderedDict((f"layer_{i}.weight", torch.randn(1024, 1024)) for i in range(32))}  # 128MB
+        sync_path = os.path.join(self.local_dir, "sync.pth")
+        start = time.perf_counter()
+        for tag in ("latest", "best", "epoch"):
+            torch.save(state, sync_path)
+        sync_time = time.perf_counter() - start
+
+        writer = AsyncCheckpointWriter(DummyLogger(self.local_dir))
+        start = time.perf_counter()
+        writer.save(tags=["ckpt_latest.pth", "ckpt_best.pth", "ckpt_epoch.pth"], state_dict=state, global_step=0)
+        blocking_time = time.perf_counter() - start
+        writer.close()
+        total_time = time.perf_counter() - start
+        print(
+            f"Saving a 128MB state as latest+best+epoch: synchronous {sync_time * 1000:.0f}ms, "
+            f"async blocking {blocking_time * 1000:.0f}ms (written in the background in {total_time * 1000:.0f}ms)"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+import torch
+from torch import nn
+
+from super_gradients.training.utils.batch_size_autotuner import BatchSizeAutoTuner
+
+
+class TestBatchSizeAutoTuner(unittest.TestCase):
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        self.model = nn.Sequential(nn.Conv2d(3, 8, 3, padding=1), nn.BatchNorm2d(8), nn.ReLU(), nn.Conv2d(8, 4, 3, padding=1))
+        self.input_shape = (3, 32, 32)
+
+    def _tuner(self, memory_budget: int, **kwargs) -> BatchSizeAutoTuner:
+        return BatchSizeAutoTuner(model=self.model, input_shape=self.input_shape, device="cpu", memory_budget=memory_budget, num_probes=1, **kwargs)
+
+    def _budget_for(self, batch_size: int, memory_headroom: float = 0.1) -> int:
+        """Budget such that batch_size is the largest batch size that fits."""
+        probe_tuner = self._tuner(memory_budget=2**40)
+        peak, next_peak = probe_tuner.probe(batch_size).peak_memory, probe_tuner.probe(batch_size + 1).peak_memory
+        return int((peak + next_peak) / 2 / (1 - memory_headroom))
+
+    def test_peak_memory_grows_with_batch_size(self):
+        tuner = self._tuner(memory_budget=2**40)
+        peaks = [tuner.probe(batch_size).peak_memory for batch_size in (1, 2, 4, 8)]
+        self.assertEqual(peaks, sorted(peaks))
+        self.assertLess(peaks[0], peaks[-1])
+        self.assertTrue(all(result.throughput > 0 for result in tuner.results.values()))
+
+    def test_search_finds_largest_batch_size(self):
+        for expected in (1, 5, 37, 64):
+            tuner = self._tuner(memory_budget=self._budget_for(expected))
+            self.assertEqual(tuner.select_batch_size(mode="largest"), expected)
+            # Exponential then binary search: logarithmic number of probes
+            self.assertLessEqual(len(tuner.results), 2 * (expected.bit_length() + 1))
+            self.assertIn(tuner.select_batch_size(mode="fastest"), [result.batch_size for result in tuner.results.values() if result.fits])
+
+    def test_size_step(self):
+        tuner = self._tuner(memory_budget=self._budget_for(37), min_batch_size=4, size_step=8)
+        largest = tuner.select_batch_size(mode="largest")
+        self.assertLessEqual(largest, 37)
+        self.assertGreater(largest, 37 - 8)
+
+    def test_max_batch_size(self):
+        tuner = self._tuner(memory_budget=self._budget_for(64), max_batch_size=20)
+        self.assertEqual(tuner.select_batch_size(mode="largest"), 20)
+        self.assertEqual(max(tuner.results), 20)
+
+    def test_memory_headroom(self):
+        budget = self._budget_for(16, memory_headroom=0.0)
+        self.assertEqual(self._tuner(memory_budget=budget, memory_headroom=0.0).select_batch_size(mode="largest"), 16)
+        self.assertLess(self._tuner(memory_budget=budget, memory_headroom=0.5).select_batch_size(mode="largest"), 16)
+
+    def test_min_batch_size_does_not_fit(self):
+        with self.assertRaises(RuntimeError):
+            self._tuner(memory_budget=self._budget_for(3), min_batch_size=8).search()
+
+    def test_memory_budget_required_on_cpu(self):
+        with self.assertRaises(ValueError):
+            BatchSizeAutoTuner(model=self.model, input_shape=self.input_shape, device="cpu")
+
+
+if __name__ == "__main__":
+    unittest.main()
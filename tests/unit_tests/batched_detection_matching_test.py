@@ -0,0 +1,149 @@
+import time
+import unittest
+from typing import List, Optional, Tuple
+
+import torch
+
+from super_gradients.training.metrics import DetectionMetrics
+from super_gradients.training.utils.detection_utils import (
+    DetectionPostPredictionCallback,
+    IouThreshold,
+    compute_detection_matching,
+    compute_detection_matching_batched,
+)
+
+
+class IdentityPostPredictionCallback(DetectionPostPredictionCallback):
+    def forward(self, x, device: str = None):
+        return x
+
+
+def generate_detection_batch(
+    batch_size: int, max_targets: int, max_preds: int, num_classes: int, seed: int, height: int = 320, width: int = 480
+) -> Tuple[List[Optional[torch.Tensor]], torch.Tensor, torch.Tensor]:
+    """
+    Generate random predictions (x1, y1, x2, y2, confidence, class) that overlap with random targets (index, class, cx, cy, w, h).
+    Some images have no prediction (None), some predictions have a zero score, and some have a wrong class.
+    """
+    generator = torch.Generator().manual_seed(seed)
+    output, targets, crowd_targets = [], [], []
+    for img_i in range(batch_size):
+        n_targets = int(torch.randint(0, max_targets + 1, (1,), generator=generator))
+        targets_cxcy = torch.rand(n_targets, 2, generator=generator)
+        targets_wh = torch.rand(n_targets, 2, generator=generator) * 0.3 + 0.02
+        targets_cls = torch.randint(0, num_classes, (n_targets, 1), generator=generator).float()
+        targets.append(torch.cat([torch.full((n_targets, 1), float(img_i)), targets_cls, targets_cxcy, targets_wh], 1))
+
+        n_crowd = int(torch.randint(0, 3, (1,), generator=generator))
+        crowd_cls = torch.randint(0, num_classes, (n_crowd, 1), generator=generator).float()
+        crowd_boxes = torch.cat([torch.rand(n_crowd, 2, generator=generator), torch.rand(n_crowd, 2, generator=generator) * 0.5], 1)
+        crowd_targets.append(torch.cat([torch.full((n_crowd, 1), float(img_i)), crowd_cls, crowd_boxes], 1))
+
+        if img_i % 7 == 3:
+            output.append(None)
+            continue
+
+        n_preds = int(torch.randint(0, max_preds + 1, (1,), generator=generator))
+        if n_targets > 0:
+            source = torch.randint(0, n_targets, (n_preds,), generator=generator)
+            boxes, preds_cls = torch.cat([targets_cxcy, targets_wh], 1)[source], targets_cls[source, 0]
+        else:
+            boxes, preds_cls = torch.rand(n_preds, 4, generator=generator), torch.randint(0, num_classes, (n_preds,), generator=generator).float()
+        boxes = boxes + torch.randn(n_preds, 4, generator=generator) * 0.03
+        is_wrong_cls = torch.rand(n_preds, generator=generator) < 0.2
+        preds_cls = torch.where(is_wrong_cls, torch.randint(0, num_classes, (n_preds,), generator=generator).float(), preds_cls)
+
+        boxes_xyxy = torch.stack(
+            [boxes[:, 0] - boxes[:, 2] / 2, boxes[:, 1] - boxes[:, 3] / 2, boxes[:, 0] + boxes[:, 2] / 2, boxes[:, 1] + boxes[:, 3] / 2], 1
+        )
+        boxes_xyxy[:, [0, 2]] *= width
+        boxes_xyxy[:, [1, 3]] *= height
+
+        scores = torch.rand(n_preds, generator=generator)
+        scores[torch.rand(n_preds, generator=generator) < 0.05] = 0.0
+        scores, order = scores.sort(descending=True)
+        output.append(torch.cat([boxes_xyxy[order], scores[:, None], preds_cls[order, None]], 1))
+    return output, torch.cat(targets), torch.cat(crowd_targets)
+
+
+class TestBatchedDetectionMatching(unittest.TestCase):
+    def setUp(self) -> None:
+        self.height, self.width = 320, 480
+
+    def _match(self, matching_fn, output, targets, crowd_targets, iou_thresholds, top_k):
+        return matching_fn(
+            [None if img_preds is None else img_preds.clone() for img_preds in output],
+            targets.clone(),
+            self.height,
+            self.width,
+            iou_thresholds,
+            denormalize_targets=True,
+            device="cpu",
+            crowd_targets=crowd_targets.clone(),
+            top_k=top_k,
+        )
+
+    def test_batched_matching_is_identical_to_per_image_matching(self):
+        iou_thresholds_list = [IouThreshold.MAP_05_TO_095.to_tensor(), torch.tensor([0.5]), torch.tensor([0.75])]
+        for seed in range(20):
+            output, targets, crowd_targets = generate_detection_batch(8, 15, 60, 4, seed=seed, height=self.height, width=self.width)
+            for iou_thresholds in iou_thresholds_list:
+                for top_k in (100, 5):
+                    expected = self._match(compute_detection_matching, output, targets, crowd_targets, iou_thresholds, top_k)
+                    actual = self._match(compute_detection_matching_batched, output, targets, crowd_targets, iou_thresholds, top_k)
+                    self.assertEqual(len(expected), len(actual))
+                    for expected_img, actual_img in zip(expected, actual):
+                        for expected_tensor, actual_tensor in zip(expected_img, actual_img):
+                            self.assertEqual(expected_tensor.dtype, actual_tensor.dtype)
+                            self.assertTrue(torch.equal(expected_tensor, actual_tensor))
+
+    def test_batched_matching_without_targets_or_predictions(self):
+        iou_thresholds = IouThreshold.MAP_05_TO_095.to_tensor()
+        output, _, _ = generate_detection_batch(4, 5, 10, 3, seed=0, height=self.height, width=self.width)
+        no_targets = torch.zeros((0, 6))
+        for preds in (output, [None] * 4):
+            expected = self._match(compute_detection_matching, preds, no_targets, no_targets, iou_thresholds, 100)
+            actual = self._match(compute_detection_matching_batched, preds, no_targets, no_targets, iou_thresholds, 100)
+            for expected_img, actual_img in zip(expected, actual):
+                for expected_tensor, actual_tensor in zip(expected_img, actual_img):
+                    self.assertTrue(torch.equal(expected_tensor, actual_tensor))
+
+    def test_detection_metrics_batched_matching(self):
+        metrics = [
+            DetectionMetrics(num_cls=4, post_prediction_callback=IdentityPostPredictionCallback(), batched_matching=batched_matching)
+            for batched_matching in (False, True)
+        ]
+        inputs = torch.zeros((8, 3, self.height, self.width))
+        for seed in range(5):
+            output, targets, crowd_targets = generate_detection_batch(8, 15, 60, 4, seed=seed, height=self.height, width=self.width)
+            for metric in metrics:
+                metric.update(
+                    [None if img_preds is None else img_preds.clone() for img_preds in output],
+                    targets,
+                    device="cpu",
+                    inputs=inputs,
+                    crowd_targets=crowd_targets,
+                )
+        expected, actual = metrics[0].compute(), metrics[1].compute()
+        self.assertEqual(expected.keys(), actual.keys())
+        for key in expected.keys():
+            self.assertEqual(float(expected[key]), float(actual[key]))
+
+    def test_batched_matching_benchmark(self):
+        iou_thresholds = IouThreshold.MAP_05_TO_095.to_tensor()
+        for num_boxes in (1_000, 10_000, 100_000):
+            output, targets, crowd_targets = generate_detection_batch(num_boxes // 100, 30, 200, 80, seed=0, height=self.height, width=self.width)
+
+            start = time.perf_counter()
+            self._match(compute_detection_matching, output, targets, crowd_targets, iou_thresholds, 100)
+            per_image_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            self._match(compute_detection_matching_batched, output, targets, crowd_targets, iou_thresholds, 100)
+            batched_time = time.perf_counter() - start
+
+            print(f"{num_boxes} boxes: per-image matching {per_image_time:.3f}s, batched matching {batched_time:.3f}s")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import time
+import unittest
+
+import numpy as np
+import torch
+
+from super_gradients.training.metrics.pose_estimation_metrics import PoseEstimationMetrics
+from super_gradients.training.metrics.pose_estimation_utils import compute_oks, compute_oks_batched
+from tests.unit_tests.pose_estimation_metrics_histogram_test import _identity_decode, generate_pose_batch
+
+
+class TestBatchedPoseMatching(unittest.TestCase):
+    def setUp(self) -> None:
+        self.num_joints = 17
+        self.batches = [generate_pose_batch(16, self.num_joints, seed=seed) for seed in range(10)]
+
+    def _metric(self, batched_matching: bool, **kwargs) -> PoseEstimationMetrics:
+        return PoseEstimationMetrics(
+            post_prediction_callback=_identity_decode,
+            num_joints=self.num_joints,
+            iou_thresholds_to_report=[0.5, 0.75],
+            batched_matching=batched_matching,
+            **kwargs,
+        )
+
+    def _update(self, metric: PoseEstimationMetrics, batches) -> None:
+        for preds, gt_joints, gt_iscrowd in batches:
+            metric.update(preds=preds, target=None, gt_joints=gt_joints, gt_iscrowd=gt_iscrowd)
+
+    def test_batched_oks_equals_per_image_oks(self):
+        sigmas = torch.full((self.num_joints,), 0.1)
+        (predicted_poses, _), gt_joints, _ = self.batches[0]
+        gt_joints = [torch.from_numpy(joints) for joints in gt_joints]
+        max_preds, max_gt = max(len(p) for p in predicted_poses), max(len(g) for g in gt_joints)
+        preds = torch.nn.utils.rnn.pad_sequence(predicted_poses, batch_first=True)
+        targets = torch.nn.utils.rnn.pad_sequence(gt_joints, batch_first=True)
+        bboxes = torch.rand(len(gt_joints), max_gt, 4) * 100
+        areas = bboxes[..., 2] * bboxes[..., 3]
+
+        batched_oks = compute_oks_batched(preds, targets[..., :2], targets[..., 2], sigmas, gt_areas=areas, gt_bboxes=bboxes)
+        self.assertEqual(batched_oks.shape, (len(gt_joints), max_preds, max_gt))
+        for i, (image_preds, image_targets) in enumerate(zip(predicted_poses, gt_joints)):
+            n_preds, n_targets = len(image_preds), len(image_targets)
+            expected = compute_oks(
+                image_preds, image_targets[..., :2], image_targets[..., 2], sigmas, gt_areas=areas[i, :n_targets], gt_bboxes=bboxes[i, :n_targets]
+            )
+            self.assertTrue(torch.allclose(batched_oks[i, :n_preds, :n_targets], expected, atol=1e-6))
+
+    def test_batched_matching_equals_per_image_matching(self):
+        for max_objects_per_image in (3, 20):
+            per_image_metric = self._metric(batched_matching=False, max_objects_per_image=max_objects_per_image)
+            batched_metric = self._metric(batched_matching=True, max_objects_per_image=max_objects_per_image)
+            self._update(per_image_metric, self.batches)
+            self._update(batched_metric, self.batches)
+
+            self.assertEqual(len(per_image_metric.predictions), len(batched_metric.predictions))
+            for expected, actual in zip(per_image_metric.predictions, batched_metric.predictions):
+                self.assertTrue(torch.equal(expected[0], actual[0]))
+                self.assertTrue(torch.equal(expected[1], actual[1]))
+                self.assertTrue(torch.equal(expected[2], actual[2]))
+                self.assertEqual(expected[3], actual[3])
+            self.assertEqual(per_image_metric.compute(), batched_metric.compute())
+
+    def test_batched_matching_with_histograms(self):
+        per_image_metric = self._metric(batched_matching=False, score_histogram_bins=1000)
+        batched_metric = self._metric(batched_matching=True, score_histogram_bins=1000)
+        self._update(per_image_metric, self.batches)
+        self._update(batched_metric, self.batches)
+        for state_name in per_image_metric._histogram_state_names:
+            self.assertTrue(torch.equal(getattr(per_image_metric, state_name), getattr(batched_metric, state_name)))
+
+    def test_batched_matching_benchmark(self):
+        devices = ["cpu", "cuda"] if torch.cuda.is_available() else ["cpu"]
+        batches = [generate_pose_batch(64, self.num_joints, seed=seed) for seed in range(5)]
+        num_images = sum(len(gt_joints) for _, gt_joints, _ in batches)
+        for device in devices:
+            batches_on_device = [
+                (([p.to(device) for p in poses], [s.to(device) for s in scores]), gt_joints, gt_iscrowd) for (poses, scores), gt_joints, gt_iscrowd in batches
+            ]
+            throughputs = {}
+            for batched_matching in (False, True):
+                metric = self._metric(batched_matching=batched_matching).to(device)
+                start = time.perf_counter()
+                self._update(metric, batches_on_device)
+                throughputs[batched_matching] = num_images / (time.perf_counter() - start)
+            print(f"{device}: per-image matching {throughputs[False]:.0f} images/sec, batched matching {throughputs[True]:.0f} images/sec")
+            self.assertTrue(np.isfinite(throughputs[True]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+from super_gradients.training.datasets import COCODetectionDataset, YoloDarknetFormatDetectionDataset
+from super_gradients.training.datasets.detection_datasets.detection_dataset import DetectionDataset
+
+
+class TestBulkAnnotationLoading(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.mini_coco_data_dir = str(Path(__file__).parent.parent / "data" / "tinycoco")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _create_yolo_dataset(self, n_images: int, with_invalid_labels: bool = True) -> str:
+        data_dir = Path(self.temp_dir.name) / f"yolo_{n_images}"
+        (data_dir / "images").mkdir(parents=True)
+        (data_dir / "labels").mkdir(parents=True)
+        random_state = np.random.RandomState(0)
+        invalid_lines = ["3 0.5 0.5 0.2 0.2\n", "1 0.5 0.5 0.2\n", "a 0.5 0.5 0.2 0.2\n", "1.0 0.5 0.5 0.2 0.2\n", "   \n"]
+        for i in range(n_images):
+            cv2.imwrite(str(data_dir / "images" / f"{i}.jpg"), np.zeros((40 + i % 50, 60, 3), dtype=np.uint8))
+            with open(data_dir / "labels" / f"{i}.txt", "w") as f:
+                for _ in range(i % 4):  # Some images have no label
+                    f.write(f"{random_state.randint(0, 3)} {' '.join(str(x) for x in random_state.uniform(0.2, 0.4, 4))}\n")
+                if with_invalid_labels and i % 7 == 0:
+                    f.write(invalid_lines[(i // 7) % len(invalid_lines)])
+        return str(data_dir)
+
+    def _assert_same_annotations(self, expected_annotations, actual_annotations):
+        self.assertEqual(len(expected_annotations), len(actual_annotations))
+        for expected_annotation, actual_annotation in zip(expected_annotations, actual_annotations):
+            self.assertEqual(expected_annotation.keys(), actual_annotation.keys())
+            for key, expected_value in expected_annotation.items():
+                if isinstance(expected_value, np.ndarray):
+                    self.assertEqual(expected_value.dtype, actual_annotation[key].dtype)
+                    self.assertEqual(expected_value.shape, actual_annotation[key].shape)
+                    self.assertTrue(np.array_equal(expected_value, actual_annotation[key], equal_nan=expected_value.dtype.kind == "f"))
+                else:
+                    self.assertEqual(expected_value, actual_annotation[key])
+
+    def _assert_same_samples(self, expected_dataset: DetectionDataset, actual_dataset: DetectionDataset):
+        self.assertEqual(len(expected_dataset), len(actual_dataset))
+        self._assert_same_annotations(
+            [expected_dataset.get_sample(index) for index in range(len(expected_dataset))],
+            [actual_dataset.get_sample(index) for index in range(len(actual_dataset))],
+        )
+
+    def test_yolo_bulk_annotations_equal_sequential_annotations(self):
+        data_dir = self._create_yolo_dataset(n_images=60)
+        dataset = YoloDarknetFormatDetectionDataset(data_dir=data_dir, images_dir="images", labels_dir="labels", classes=["a", "b", "c"], input_dim=(64, 64))
+        sample_ids = range(len(dataset.images_file_names))
+        self._assert_same_annotations(
+            [dataset._load_annotation(sample_id) for sample_id in sample_ids],
+            dataset._load_annotations_in_bulk(sample_ids),
+        )
+
+    def test_yolo_dataset_with_annotation_loading_workers(self):
+        data_dir = self._create_yolo_dataset(n_images=60)
+        dataset_params = {"data_dir": data_dir, "images_dir": "images", "labels_dir": "labels", "classes": ["a", "b", "c"], "input_dim": (64, 64)}
+        dataset = YoloDarknetFormatDetectionDataset(**dataset_params)
+        for annotation_loading_workers in (1, 4):
+            with patch.object(DetectionDataset, "annotation_loading_chunk_size", 7):
+                parallel_dataset = YoloDarknetFormatDetectionDataset(annotation_loading_workers=annotation_loading_workers, **dataset_params)
+            self._assert_same_samples(dataset, parallel_dataset)
+
+    def test_yolo_invalid_labels_are_raised(self):
+        data_dir = self._create_yolo_dataset(n_images=10)
+        with self.assertRaises(RuntimeError):
+            YoloDarknetFormatDetectionDataset(
+                data_dir=data_dir, images_dir="images", labels_dir="labels", classes=["a", "b", "c"], ignore_invalid_labels=False, annotation_loading_workers=2
+            )
+
+    def test_coco_bulk_annotations_equal_sequential_annotations(self):
+        for input_dim in (None, [512, 512]):
+            dataset = COCODetectionDataset(
+                data_dir=self.mini_coco_data_dir, subdir="images/train2017", json_file="instances_train2017.json", input_dim=input_dim, tight_box_rotation=True
+            )
+            sample_ids = range(len(dataset.sample_id_to_coco_id))
+            self._assert_same_annotations(
+                [dataset._load_annotation(sample_id) for sample_id in sample_ids],
+                dataset._load_annotations_in_bulk(sample_ids),
+            )
+
+    def test_coco_dataset_with_annotation_loading_workers(self):
+        dataset_params = {"data_dir": self.mini_coco_data_dir, "subdir": "images/train2017", "json_file": "instances_train2017.json", "input_dim": [512, 512]}
+        dataset = COCODetectionDataset(**dataset_params)
+        parallel_dataset = COCODetectionDataset(annotation_loading_workers=4, **dataset_params)
+        self._assert_same_samples(dataset, parallel_dataset)
+
+        subset_params = {**dataset_params, "class_inclusion_list": ["airplane", "person"]}
+        self._assert_same_samples(COCODetectionDataset(**subset_params), COCODetectionDataset(annotation_loading_workers=4, **subset_params))
+
+    def test_bulk_annotation_loading_benchmark(self):
+        """Time to load the annotations of a yolo format dataset one sample at a time vs. in chunks with a pool of threads."""
+        data_dir = self._create_yolo_dataset(n_images=2000, with_invalid_labels=False)
+        dataset = YoloDarknetFormatDetectionDataset(
+            data_dir=data_dir, images_dir="images", labels_dir="labels", classes=["a", "b", "c"], cache_annotations=False, ignore_empty_annotations=False
+        )
+        n_samples = len(dataset.images_file_names)
+
+        start = time.perf_counter()
+        sequential_annotations = [dataset._load_sample_annotation(sample_id) for sample_id in range(n_samples)]
+        sequential_time = time.perf_counter() - start
+
+        dataset.annotation_loading_workers = 8
+        start = time.perf_counter()
+        bulk_annotations = list(dataset._generate_all_sample_annotations(n_samples=n_samples))
+        bulk_time = time.perf_counter() - start
+
+        print(f"Loading {n_samples} yolo annotations: sequential {sequential_time:.2f}s, bulk with 8 workers {bulk_time:.2f}s")
+        self._assert_same_annotations(sequential_annotations, bulk_annotations)
+
+
+if __name__ == "__main__":
+    unittest.main()
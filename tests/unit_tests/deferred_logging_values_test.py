@@ -0,0 +1,82 @@
+import time
+import unittest
+
+import torch
+from torch import nn
+
+from super_gradients.training.utils.deferred_logging_values import DeferredLoggingValues
+from super_gradients.training.utils.utils import AverageMeter
+
+
+class TestDeferredLoggingValues(unittest.TestCase):
+    def setUp(self) -> None:
+        self.devices = ["cpu", "cuda"] if torch.cuda.is_available() else ["cpu"]
+
+    def _wait_for_values(self, reader: DeferredLoggingValues):
+        if reader.use_cuda_events:
+            torch.cuda.synchronize()
+        return reader.poll()
+
+    def test_values_read_every_n_steps(self):
+        for device in self.devices:
+            reader = DeferredLoggingValues(device, update_freq=5)
+            loss_avg_meter = AverageMeter()
+            read_steps = []
+            for batch_idx in range(20):
+                loss_avg_meter.update(torch.tensor([float(batch_idx), 2.0 * batch_idx], device=device), batch_size=1)
+                if reader.should_update(batch_idx):
+                    reader.schedule(loss_avg_meter.average_tensor, (torch.tensor(0.5, device=device), 0.25))
+                    values = self._wait_for_values(reader)
+                    read_steps.append(batch_idx)
+                    expected_loss = sum(range(batch_idx + 1)) / (batch_idx + 1)
+                    self.assertEqual(len(values), 4)
+                    self.assertAlmostEqual(values[0], expected_loss, places=5)
+                    self.assertAlmostEqual(values[1], 2 * expected_loss, places=5)
+                    self.assertEqual(values[2:], (0.5, 0.25))
+                else:
+                    self.assertIsNone(reader.poll())
+            self.assertEqual(read_steps, [4, 9, 14, 19])
+
+    def test_values_are_returned_once(self):
+        reader = DeferredLoggingValues("cpu", update_freq=1)
+        reader.schedule(None, (1.0,))
+        self.assertEqual(reader.poll(), (1.0,))
+        self.assertIsNone(reader.poll())
+
+    def test_invalid_update_freq(self):
+        with self.assertRaises(ValueError):
+            DeferredLoggingValues("cpu", update_freq=0)
+
+    def test_deferred_reads_benchmark(self):
+        """Step time of a small model when the logging values are read every step vs. every 50 steps."""
+        for device in self.devices:
+            torch.manual_seed(0)
+            model = nn.Sequential(nn.Linear(32, 64), nn.ReLU(), nn.Linear(64, 10)).to(device)
+            optimizer = torch.optim.SGD(model.parameters(), lr=0.01)
+            inputs, targets = torch.randn(16, 32, device=device), torch.randint(0, 10, (16,), device=device)
+
+            step_times = {}
+            for update_freq, blocking in ((1, True), (50, False)):
+                reader = DeferredLoggingValues(device, update_freq=update_freq, blocking=blocking)
+                loss_avg_meter = AverageMeter()
+                num_steps = 200
+                start = time.perf_counter()
+                for batch_idx in range(num_steps):
+                    outputs = model(inputs)
+                    loss = nn.functional.cross_entropy(outputs, targets)
+                    loss.backward()
+                    optimizer.step()
+                    optimizer.zero_grad()
+                    loss_avg_meter.update(loss.detach().unsqueeze(0), batch_size=len(inputs))
+                    if reader.should_update(batch_idx):
+                        reader.schedule(loss_avg_meter.average_tensor, ((outputs.argmax(1) == targets).float().mean(),))
+                    reader.poll()
+                if reader.use_cuda_events:
+                    torch.cuda.synchronize()
+                step_times[update_freq] = (time.perf_counter() - start) / num_steps * 1000
+            print(f"{device}: {step_times[1]:.3f} ms/step reading every step, {step_times[50]:.3f} ms/step reading every 50 steps")
+            self.assertTrue(all(step_time > 0 for step_time in step_times.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
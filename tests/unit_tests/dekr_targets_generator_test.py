@@ -0,0 +1,151 @@
+import time
+import unittest
+
+import cv2
+import numpy as np
+import torch
+
+from super_gradients.training.datasets.pose_estimation_datasets import DEKRTargetsGenerator
+
+
+class _PerPixelDEKRTargetsGenerator(DEKRTargetsGenerator):
+    """Reference implementation, filling the heatmaps and the offsets one pixel at a time."""
+
+    def __call__(self, image, joints, mask):
+        num_instances, num_joints, _ = joints.shape
+        num_joints_with_center = num_joints + 1
+
+        joints, area = self.sort_joints_by_area(joints)
+        joints = self.augment_with_center_joint(joints)
+
+        rows, cols = mask.shape
+        output_rows, output_cols = rows // self.output_stride, cols // self.output_stride
+
+        heatmaps = np.zeros(shape=(num_joints_with_center, output_rows, output_cols), dtype=np.float32)
+        ignored_hms = 2 * np.ones(shape=(num_joints_with_center, output_rows, output_cols), dtype=np.float32)
+        offset_map = np.zeros((num_joints * 2, output_rows, output_cols), dtype=np.float32)
+        offset_weight = np.zeros((num_joints * 2, output_rows, output_cols), dtype=np.float32)
+
+        sx = output_cols / cols
+        sy = output_rows / rows
+        joints = joints.copy()
+        joints[:, :, 0] *= sx
+        joints[:, :, 1] *= sy
+
+        for person_id, p in enumerate(joints):
+            for idx, pt in enumerate(p):
+                sigma = self.sigma if idx < num_joints else self.center_sigma
+                if pt[2] > 0:
+                    x, y = pt[0], pt[1]
+                    if x < 0 or y < 0 or x >= output_cols or y >= output_rows:
+                        continue
+
+                    ul = int(np.floor(x - 3 * sigma - 1)), int(np.floor(y - 3 * sigma - 1))
+                    br = int(np.ceil(x + 3 * sigma + 1)), int(np.ceil(y + 3 * sigma + 1))
+                    aa, bb = max(0, ul[1]), min(br[1], output_rows)
+                    cc, dd = max(0, ul[0]), min(br[0], output_cols)
+
+                    joint_rg = np.zeros((bb - aa, dd - cc), dtype=np.float32)
+                    for sy in range(aa, bb):
+                        for sx in range(cc, dd):
+                            joint_rg[sy - aa, sx - cc] = self.get_heat_val(sigma, sx, sy, int(x), int(y))
+                    joint_rg[joint_rg.shape[0] // 2, joint_rg.shape[1] // 2] = 1
+
+                    heatmaps[idx, aa:bb, cc:dd] = np.maximum(heatmaps[idx, aa:bb, cc:dd], joint_rg)
+                    ignored_hms[idx, aa:bb, cc:dd] = 1.0
+
+        for person_id, p in enumerate(joints):
+            offset_weight_factor = 1.0 / np.clip(np.sqrt(area[person_id]), a_min=1, a_max=None)
+            ct_x, ct_y, ct_v = int(p[-1, 0]), int(p[-1, 1]), int(p[-1, 2])
+            if ct_v < 1 or ct_x < 0 or ct_y < 0 or ct_x >= output_cols or ct_y >= output_rows:
+                continue
+
+            for idx, pt in enumerate(p[:-1]):
+                if pt[2] > 0:
+                    x, y = pt[0], pt[1]
+                    if x < 0 or y < 0 or x >= output_cols or y >= output_rows:
+                        continue
+
+                    start_x = max(int(ct_x - self.offset_radius), 0)
+                    start_y = max(int(ct_y - self.offset_radius), 0)
+                    end_x = min(int(ct_x + self.offset_radius), output_cols)
+                    end_y = min(int(ct_y + self.offset_radius), output_rows)
+                    for pos_x in range(start_x, end_x):
+                        for pos_y in range(start_y, end_y):
+                            offset_map[idx * 2, pos_y, pos_x] = pos_x - x
+                            offset_map[idx * 2 + 1, pos_y, pos_x] = pos_y - y
+                            offset_weight[idx * 2, pos_y, pos_x] = offset_weight_factor
+                            offset_weight[idx * 2 + 1, pos_y, pos_x] = offset_weight_factor
+
+        ignored_hms[ignored_hms == 2] = self.bg_weight
+
+        mask = cv2.resize(mask, dsize=(output_cols, output_rows), interpolation=cv2.INTER_LINEAR)
+        mask = (mask > 0).astype(np.float32)
+        mask = mask * ignored_hms
+
+        return heatmaps, mask, offset_map, offset_weight
+
+
+def _random_crowd(num_people: int, image_size: int, seed: int) -> np.ndarray:
+    """Random poses of 17 joints, some of them invisible or outside of the image."""
+    rng = np.random.RandomState(seed)
+    centers = rng.uniform(0, image_size, (num_people, 1, 2))
+    sizes = rng.uniform(5, image_size / 3, (num_people, 1, 1))
+    joints = np.concatenate([centers + rng.uniform(-1, 1, (num_people, 17, 2)) * sizes, rng.uniform(0, 1, (num_people, 17, 1)) > 0.2], -1)
+    joints[:, 0, 2] = 1  # At least one visible joint per person
+    return joints.astype(np.float32)
+
+
+class TestDEKRTargetsGenerator(unittest.TestCase):
+    def setUp(self) -> None:
+        self.params = dict(output_stride=4, sigma=2, center_sigma=4, bg_weight=0.1, offset_radius=4)
+
+    def test_targets_are_identical_to_per_pixel_implementation(self):
+        target_generator = DEKRTargetsGenerator(**self.params)
+        reference_generator = _PerPixelDEKRTargetsGenerator(**self.params)
+        for image_size, num_people in ((256, 1), (256, 5), (512, 20), (640, 50)):
+            for seed in range(3):
+                joints = _random_crowd(num_people, image_size, seed)
+                mask = (np.random.RandomState(seed).rand(image_size, image_size) > 0.1).astype(np.float32)
+                image = torch.zeros((3, image_size, image_size))
+
+                expected = reference_generator(image, joints, mask)
+                actual = target_generator(image, joints, mask)
+                for name, expected_target, actual_target in zip(("heatmap", "mask", "offset", "offset_weight"), expected, actual):
+                    self.assertEqual(expected_target.dtype, actual_target.dtype, name)
+                    self.assertTrue(np.array_equal(expected_target, actual_target), name)
+
+    def test_non_integer_sigma(self):
+        params = dict(self.params, sigma=1.7, center_sigma=3.3, offset_radius=3.5)
+        joints = _random_crowd(10, 256, seed=0)
+        mask = np.ones((256, 256), dtype=np.float32)
+        expected = _PerPixelDEKRTargetsGenerator(**params)(torch.zeros((3, 256, 256)), joints, mask)
+        actual = DEKRTargetsGenerator(**params)(torch.zeros((3, 256, 256)), joints, mask)
+        for expected_target, actual_target in zip(expected, actual):
+            self.assertTrue(np.array_equal(expected_target, actual_target))
+
+    def test_cached_kernels_are_not_modified(self):
+        target_generator = DEKRTargetsGenerator(**self.params)
+        joints = _random_crowd(20, 256, seed=0)
+        target_generator(torch.zeros((3, 256, 256)), joints, np.ones((256, 256), dtype=np.float32))
+        for (sigma, dx_range, dy_range), kernel in target_generator._gaussian_kernels.items():
+            dx, dy = np.meshgrid(np.arange(*dx_range), np.arange(*dy_range))
+            self.assertTrue(np.array_equal(kernel, np.exp(-(dx**2 + dy**2) / (2 * sigma**2)).astype(np.float32)))
+
+    def test_benchmark(self):
+        target_generator = DEKRTargetsGenerator(**self.params)
+        reference_generator = _PerPixelDEKRTargetsGenerator(**self.params)
+        image, mask = torch.zeros((3, 640, 640)), np.ones((640, 640), dtype=np.float32)
+        for num_people in (1, 10, 50):
+            joints = _random_crowd(num_people, 640, seed=0)
+            timings = {}
+            for name, generator in (("per-pixel", reference_generator), ("vectorized", target_generator)):
+                start = time.perf_counter()
+                for _ in range(3):
+                    generator(image, joints, mask)
+                timings[name] = (time.perf_counter() - start) / 3 * 1000
+            print(f"DEKR targets for {num_people} people at 640x640: " + ", ".join(f"{name} {timing:.1f}ms/sample" for name, timing in timings.items()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import random
+import time
+import unittest
+from copy import deepcopy
+
+import numpy as np
+
+from super_gradients.training.datasets import DetectionDataset
+from super_gradients.training.transforms.transforms import (
+    DetectionHorizontalFlip,
+    DetectionMixup,
+    DetectionMosaic,
+    DetectionPaddedRescale,
+    DetectionRandomAffine,
+    DetectionTargetsFormatTransform,
+    DetectionVerticalFlip,
+)
+from super_gradients.training.utils.detection_utils import DetectionTargetsFormat
+
+
+class InMemoryDetectionDataset(DetectionDataset):
+    """Detection dataset with random in-memory images and many targets per image, so that the annotation handling is not hidden by image decoding."""
+
+    def __init__(self, n_samples: int, n_targets: int, *args, **kwargs):
+        self.n_samples = n_samples
+        self.n_targets = n_targets
+        self.images = [np.random.RandomState(i).randint(0, 255, (160, 200, 3), dtype=np.uint8) for i in range(8)]
+        kwargs["all_classes_list"] = ["class_0", "class_1", "class_2"]
+        kwargs["original_target_format"] = DetectionTargetsFormat.XYXY_LABEL
+        super().__init__(data_dir="/", input_dim=(160, 200), *args, **kwargs)
+
+    def _setup_data_source(self):
+        return self.n_samples
+
+    def _load_annotation(self, sample_id: int) -> dict:
+        random_state = np.random.RandomState(sample_id)
+        xy = random_state.uniform(0, 120, (self.n_targets, 2))
+        wh = random_state.uniform(10, 40, (self.n_targets, 2))
+        target = np.concatenate([xy, xy + wh, random_state.randint(0, 3, (self.n_targets, 1))], axis=1)
+        return {"img_path": str(sample_id % len(self.images)), "target": target, "resized_img_shape": (160, 200), "info": {"id": sample_id}}
+
+    def _load_image(self, image_path: str) -> np.ndarray:
+        return self.images[int(image_path)]
+
+
+class DeepCopyInMemoryDetectionDataset(InMemoryDetectionDataset):
+    """Previous behavior of get_sample, where the annotations were deep-copied on every access."""
+
+    def get_sample(self, index: int, ignore_empty_annotations: bool = False) -> dict:
+        sample_annotations = self._get_sample_annotations(index=index, ignore_empty_annotations=ignore_empty_annotations)
+        image = self._load_resized_img(image_path=sample_annotations["img_path"])
+        return {"image": image, **deepcopy(sample_annotations)}
+
+
+def _recipe_transforms():
+    return [
+        DetectionMosaic(input_dim=(160, 200), prob=1.0),
+        DetectionRandomAffine(degrees=10.0, translate=0.1, scales=[0.5, 1.5], shear=2.0, target_size=(160, 200), filter_box_candidates=True),
+        DetectionMixup(input_dim=(160, 200), mixup_scale=[0.5, 1.5], prob=1.0, flip_prob=0.5),
+        DetectionHorizontalFlip(prob=0.5),
+        DetectionVerticalFlip(prob=0.5),
+        DetectionPaddedRescale(input_dim=(160, 200)),
+        DetectionTargetsFormatTransform(input_dim=(160, 200), output_format="LABEL_CXCYWH"),
+    ]
+
+
+class TestDetectionDatasetReadOnlySample(unittest.TestCase):
+    def test_get_sample_returns_writeable_copies_by_default(self):
+        dataset = InMemoryDetectionDataset(n_samples=10, n_targets=5)
+        sample = dataset.get_sample(0)
+        self.assertTrue(sample["target"].flags.writeable)
+        self.assertFalse(np.shares_memory(sample["target"], dataset._get_sample_annotations(0, ignore_empty_annotations=False)["target"]))
+        original_target = sample["target"].copy()
+        sample["target"][0, 0] = -1
+        sample["info"]["id"] = -1
+        self.assertTrue(np.array_equal(dataset.get_sample(0)["target"], original_target))
+        self.assertEqual(dataset.get_sample(0)["info"]["id"], 0)
+
+    def test_get_sample_returns_read_only_views(self):
+        dataset = InMemoryDetectionDataset(n_samples=10, n_targets=5, read_only_samples=True)
+        sample = dataset.get_sample(0)
+        self.assertFalse(sample["target"].flags.writeable)
+        self.assertTrue(np.shares_memory(sample["target"], dataset._get_sample_annotations(0, ignore_empty_annotations=False)["target"]))
+        with self.assertRaises(ValueError):
+            sample["target"][0, 0] = 0
+
+        sample["info"]["id"] = -1  # Mutable non-array values are still copied
+        self.assertEqual(dataset.get_sample(0)["info"]["id"], 0)
+
+    def test_transforms_output_is_unchanged_and_annotations_are_not_modified(self):
+        dataset = InMemoryDetectionDataset(n_samples=20, n_targets=10, transforms=_recipe_transforms(), read_only_samples=True)
+        deepcopy_dataset = DeepCopyInMemoryDetectionDataset(n_samples=20, n_targets=10, transforms=_recipe_transforms())
+        original_targets = [dataset.get_sample(i)["target"].copy() for i in range(len(dataset))]
+
+        for index in range(len(dataset)):
+            random.seed(index)
+            np.random.seed(index)
+            image, target = dataset[index]
+            random.seed(index)
+            np.random.seed(index)
+            expected_image, expected_target = deepcopy_dataset[index]
+            self.assertTrue(np.array_equal(image, expected_image))
+            self.assertTrue(np.array_equal(target, expected_target))
+            self.assertTrue(target.flags.writeable)
+
+        for index, original_target in enumerate(original_targets):
+            self.assertTrue(np.array_equal(dataset.get_sample(index)["target"], original_target))
+
+    def test_untransformed_output_is_writeable(self):
+        dataset = InMemoryDetectionDataset(n_samples=4, n_targets=3, read_only_samples=True)
+        _, target = dataset[0]
+        self.assertTrue(target.flags.writeable)
+
+    def test_samples_per_second_benchmark(self):
+        n_samples = 200
+        for n_targets in (10, 100):
+            results, get_sample_results = {}, {}
+            for name, dataset_cls, read_only_samples in (
+                ("deepcopy", DeepCopyInMemoryDetectionDataset, False),
+                ("copies", InMemoryDetectionDataset, False),
+                ("read-only views", InMemoryDetectionDataset, True),
+            ):
+                dataset = dataset_cls(n_samples=n_samples, n_targets=n_targets, transforms=_recipe_transforms(), read_only_samples=read_only_samples)
+                random.seed(0)
+                np.random.seed(0)
+                start = time.perf_counter()
+                for index in range(n_samples):
+                    _ = dataset[index]
+                results[name] = n_samples / (time.perf_counter() - start)
+
+                start = time.perf_counter()
+                for index in range(n_samples):
+                    _ = dataset.get_sample(index)
+                get_sample_results[name] = n_samples / (time.perf_counter() - start)
+            print(
+                f"Mosaic + RandomAffine + Mixup, {n_targets} targets per image: "
+                + ", ".join(f"{name} {samples_per_sec:.1f} samples/sec per worker" for name, samples_per_sec in results.items())
+                + " | get_sample only: "
+                + ", ".join(f"{name} {samples_per_sec:.1f} calls/sec" for name, samples_per_sec in get_sample_results.items())
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
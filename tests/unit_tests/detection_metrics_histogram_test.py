@@ -0,0 +1,83 @@
+import unittest
+
+import torch
+
+from super_gradients.training.metrics import DetectionMetrics, DetectionMetrics_050
+from super_gradients.training.utils.detection_utils import IouThreshold, compute_detection_matching, compute_detection_matching_histograms
+from tests.unit_tests.batched_detection_matching_test import IdentityPostPredictionCallback, generate_detection_batch
+
+
+class TestDetectionMetricsHistogram(unittest.TestCase):
+    def setUp(self) -> None:
+        self.height, self.width = 320, 480
+        self.batches = [generate_detection_batch(8, 15, 60, 4, seed=seed, height=self.height, width=self.width) for seed in range(10)]
+
+    def _run_metrics(self, metrics):
+        inputs = torch.zeros((8, 3, self.height, self.width))
+        for output, targets, crowd_targets in self.batches:
+            for metric in metrics:
+                metric.update(
+                    [None if img_preds is None else img_preds.clone() for img_preds in output],
+                    targets,
+                    device="cpu",
+                    inputs=inputs,
+                    crowd_targets=crowd_targets,
+                )
+        return [metric.compute() for metric in metrics]
+
+    def test_histograms_count_every_prediction_and_target(self):
+        output, targets, crowd_targets = self.batches[0]
+        matching_info = compute_detection_matching(
+            output,
+            targets,
+            self.height,
+            self.width,
+            IouThreshold.MAP_05_TO_095.to_tensor(),
+            denormalize_targets=True,
+            device="cpu",
+            crowd_targets=crowd_targets,
+        )
+        matched_histogram, false_positive_histogram, preds_histogram, n_targets = compute_detection_matching_histograms(
+            matching_info, num_cls=4, n_score_bins=10
+        )
+        preds_matched, preds_to_ignore, _, _, targets_cls = [torch.cat(x, 0) for x in zip(*matching_info)]
+
+        self.assertEqual(matched_histogram.shape, (4, 10, 10))
+        self.assertEqual(int(preds_histogram.sum()), len(preds_matched))
+        self.assertEqual(int(n_targets.sum()), len(targets_cls))
+        self.assertTrue(torch.equal(matched_histogram.sum(dim=(0, 2)), preds_matched.sum(0)))
+        self.assertTrue(torch.equal(false_positive_histogram.sum(dim=(0, 2)), (~preds_matched & ~preds_to_ignore).sum(0)))
+
+    def test_histogram_metrics_converge_to_exact_metrics(self):
+        for metric_cls in (DetectionMetrics, DetectionMetrics_050):
+            for calc_best_score_thresholds in (False, True):
+                callback = IdentityPostPredictionCallback()
+                exact_metric = metric_cls(num_cls=4, post_prediction_callback=callback, calc_best_score_thresholds=calc_best_score_thresholds)
+                coarse_metric = metric_cls(
+                    num_cls=4, post_prediction_callback=callback, calc_best_score_thresholds=calc_best_score_thresholds, score_histogram_bins=100
+                )
+                fine_metric = metric_cls(
+                    num_cls=4, post_prediction_callback=callback, calc_best_score_thresholds=calc_best_score_thresholds, score_histogram_bins=100_000
+                )
+                exact, coarse, fine = self._run_metrics([exact_metric, coarse_metric, fine_metric])
+
+                self.assertEqual(exact.keys(), fine.keys())
+                for key in exact.keys():
+                    self.assertAlmostEqual(float(exact[key]), float(fine[key]), delta=1e-3)
+                    if not key.startswith("Best_score_threshold"):
+                        self.assertAlmostEqual(float(exact[key]), float(coarse[key]), delta=2e-2)
+
+    def test_histogram_state_has_fixed_size(self):
+        metric = DetectionMetrics(num_cls=4, post_prediction_callback=IdentityPostPredictionCallback(), score_histogram_bins=1000)
+        state_shapes = [getattr(metric, name).shape for name in metric._histogram_state_names]
+        self._run_metrics([metric])
+        self.assertEqual(state_shapes, [getattr(metric, name).shape for name in metric._histogram_state_names])
+        self.assertFalse(hasattr(metric, "matching_info@0.50:0.95"))
+
+        metric.reset()
+        self.assertEqual(int(metric.preds_histogram.sum()), 0)
+        self.assertEqual(metric.compute()["mAP@0.50:0.95"], -1)
+
+
+if __name__ == "__main__":
+    unittest.main()
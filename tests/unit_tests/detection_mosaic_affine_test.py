@@ -0,0 +1,114 @@
+import random
+import time
+import unittest
+
+import cv2
+import numpy as np
+
+from super_gradients.common.factories.transforms_factory import TransformsFactory
+from super_gradients.training.transforms.transforms import DetectionMosaic, DetectionRandomAffine, DetectionMosaicAffine
+
+
+def _random_sample(seed: int, with_seg: bool = False) -> dict:
+    rng = np.random.RandomState(seed)
+    h, w = rng.randint(200, 700), rng.randint(200, 700)
+    image = cv2.GaussianBlur((rng.rand(h, w, 3) * 255).astype(np.uint8), (15, 15), 5)  # Smooth images, so that interpolation differences stay small
+    num_boxes = rng.randint(0, 10)
+    xy = rng.rand(num_boxes, 2) * (w, h)
+    wh = rng.rand(num_boxes, 2) * (w, h) / 3 + 5
+    target = np.concatenate([xy, np.minimum(xy + wh, (w, h)), rng.randint(0, 80, (num_boxes, 1))], 1).astype(np.float32)
+    sample = {"image": image, "target": target}
+    if with_seg:
+        sample["target_seg"] = target[:, [0, 1, 2, 1, 2, 3, 0, 3]]
+    return sample
+
+
+def _random_mosaic_sample(seed: int, with_seg: bool = False) -> dict:
+    sample = _random_sample(seed, with_seg)
+    sample["additional_samples"] = [_random_sample(seed * 10 + i + 1, with_seg) for i in range(3)]
+    return sample
+
+
+# Mosaic and affine parameters of the YoloX COCO recipe (coco_detection_dataset_params)
+AFFINE_PARAMS = dict(
+    degrees=10.0, translate=0.1, scales=[0.1, 2], shear=2.0, target_size=(640, 640), filter_box_candidates=True, wh_thr=2, ar_thr=20, area_thr=0.1
+)
+
+
+class TestDetectionMosaicAffine(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mosaic = DetectionMosaic(input_dim=(640, 640), prob=1.0)
+        self.affine = DetectionRandomAffine(**AFFINE_PARAMS)
+        self.mosaic_affine = DetectionMosaicAffine(input_dim=(640, 640), prob=1.0, **AFFINE_PARAMS)
+
+    def _run_both(self, seed: int, with_seg: bool = False):
+        random.seed(seed)
+        expected = self.affine(self.mosaic(_random_mosaic_sample(seed, with_seg)))
+        random.seed(seed)
+        actual = self.mosaic_affine(_random_mosaic_sample(seed, with_seg))
+        return expected, actual
+
+    def test_same_output_as_mosaic_then_affine(self):
+        for seed in range(20):
+            expected, actual = self._run_both(seed)
+            self.assertEqual(expected["image"].shape, actual["image"].shape)
+            self.assertEqual(expected["image"].dtype, actual["image"].dtype)
+            # Pixels are interpolated once instead of twice, so the images are only close to each other
+            image_diff = np.abs(expected["image"].astype(np.float32) - actual["image"].astype(np.float32))
+            self.assertLess(image_diff.mean(), 1.0)
+            self.assertLess((image_diff > 32).mean(), 0.005)
+            np.testing.assert_allclose(expected["target"], actual["target"], atol=1e-3)
+            self.assertEqual(expected["info"], actual["info"])
+
+    def test_same_output_with_target_seg(self):
+        for seed in range(5):
+            expected, actual = self._run_both(seed, with_seg=True)
+            np.testing.assert_allclose(expected["target"], actual["target"], atol=1e-3)
+            np.testing.assert_allclose(expected["target_seg"], actual["target_seg"], atol=1e-3)
+
+    def test_without_mosaic_is_random_affine(self):
+        self.mosaic_affine.enable_mosaic = False
+        random.seed(0)
+        expected = self.affine(_random_sample(0))
+        random.seed(0)
+        actual = self.mosaic_affine(_random_sample(0))
+        np.testing.assert_array_equal(expected["image"], actual["image"])
+        np.testing.assert_array_equal(expected["target"], actual["target"])
+
+    def test_close(self):
+        self.mosaic_affine.close()
+        self.assertEqual(self.mosaic_affine.additional_samples_count, 0)
+        sample = _random_sample(0)
+        image, target = sample["image"].copy(), sample["target"].copy()
+        sample = self.mosaic_affine(sample)
+        np.testing.assert_array_equal(sample["image"], image)
+        np.testing.assert_array_equal(sample["target"], target)
+
+    def test_instantiate_from_config(self):
+        transforms = TransformsFactory().get([{"DetectionMosaicAffine": {"input_dim": [640, 640], **AFFINE_PARAMS}}])
+        self.assertIsInstance(transforms[0], DetectionMosaicAffine)
+        self.assertEqual(transforms[0].additional_samples_count, 3)
+
+    def test_samples_per_second_benchmark(self):
+        # Single-threaded OpenCV, as in a dataloader worker
+        num_threads = cv2.getNumThreads()
+        cv2.setNumThreads(0)
+        try:
+            samples = [_random_mosaic_sample(seed) for seed in range(10)]
+            timings = {}
+            for name, transform in (
+                ("DetectionMosaic + DetectionRandomAffine", lambda s: self.affine(self.mosaic(s))),
+                ("DetectionMosaicAffine", self.mosaic_affine),
+            ):
+                random.seed(0)
+                start = time.perf_counter()
+                for i in range(100):
+                    transform(dict(samples[i % len(samples)]))
+                timings[name] = 100 / (time.perf_counter() - start)
+            print("Mosaic + affine at 640x640, samples/sec per worker: " + ", ".join(f"{name} {rate:.0f}" for name, rate in timings.items()))
+        finally:
+            cv2.setNumThreads(num_threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import threading
+import unittest
+
+import torch
+from torch.utils.data import DataLoader, TensorDataset
+
+from super_gradients.training.utils.device_prefetcher import DevicePrefetcher
+
+
+class _FailingLoader:
+    def __len__(self):
+        return 3
+
+    def __iter__(self):
+        yield torch.zeros(2), torch.zeros(2)
+        raise RuntimeError("Failed to load batch")
+
+
+class TestDevicePrefetcher(unittest.TestCase):
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        self.images = torch.randint(0, 256, (20, 3, 8, 8), dtype=torch.uint8)
+        self.targets = torch.arange(20)
+        self.loader = DataLoader(TensorDataset(self.images, self.targets), batch_size=4)
+        self.devices = ["cpu", "cuda"] if torch.cuda.is_available() else ["cpu"]
+
+    def test_yields_all_batches_on_device(self):
+        for device in self.devices:
+            for num_prefetch in (1, 2, 8):
+                prefetcher = DevicePrefetcher(self.loader, device=device, num_prefetch=num_prefetch)
+                self.assertEqual(len(prefetcher), len(self.loader))
+                batches = list(prefetcher)
+                self.assertEqual(len(batches), len(self.loader))
+                for (images, targets), (expected_images, expected_targets) in zip(batches, self.loader):
+                    self.assertEqual(images.device.type, device)
+                    self.assertTrue(torch.equal(images.cpu(), expected_images))
+                    self.assertTrue(torch.equal(targets.cpu(), expected_targets))
+
+    def test_normalize_uint8_inputs(self):
+        mean, std = [0.485, 0.456, 0.406], [0.229, 0.224, 0.225]
+        for device in self.devices:
+            prefetcher = DevicePrefetcher(self.loader, device=device, normalize_uint8_inputs=True, mean=mean, std=std)
+            for (images, targets), (expected_images, expected_targets) in zip(prefetcher, self.loader):
+                expected_images = (expected_images.float() / 255 - torch.tensor(mean).reshape(1, 3, 1, 1)) / torch.tensor(std).reshape(1, 3, 1, 1)
+                self.assertEqual(images.dtype, torch.float32)
+                self.assertTrue(torch.allclose(images.cpu(), expected_images, atol=1e-5))
+                self.assertTrue(torch.equal(targets.cpu(), expected_targets))
+
+    def test_early_stop_and_reiteration(self):
+        for device in self.devices:
+            prefetcher = DevicePrefetcher(self.loader, device=device)
+            num_threads = threading.active_count()
+            for batch_idx, _ in enumerate(prefetcher):
+                if batch_idx == 1:
+                    break
+            self.assertEqual(threading.active_count(), num_threads)
+            self.assertEqual(len(list(prefetcher)), len(self.loader))
+
+    def test_loader_exception_is_raised(self):
+        for device in self.devices:
+            with self.assertRaises(RuntimeError):
+                list(DevicePrefetcher(_FailingLoader(), device=device))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,9 @@
+import time
 import torch
 import unittest
 import torch.nn
 
-from super_gradients.training.utils.segmentation_utils import forward_with_sliding_window_wrapper
+from super_gradients.training.utils.segmentation_utils import forward_with_sliding_window_wrapper, SlidingWindowInference
 
 
 class SlidingWindowTest(unittest.TestCase):
@@ -116,6 +117,74 @@ class SlidingWindowTest(unittest.TestCase):
 
         self._assert_tensors_equal(input_tensor, reconstructed_input)
 
+    def _reference_sliding_window(self, forward, img, stride_size, crop_size):
+        """Sliding window with one forward pass per crop position and uniform averaging of the overlaps."""
+        windows = SlidingWindowInference(crop_size=crop_size, stride=stride_size).get_windows(img.size(2), img.size(3))
+        preds, count_mat = None, torch.zeros((img.size(0), 1) + img.shape[2:])
+        for y1, y2, x1, x2 in windows:
+            crop_logits = forward(img[:, :, y1:y2, x1:x2])
+            if preds is None:
+                preds = torch.zeros((img.size(0), crop_logits.size(1)) + img.shape[2:])
+            preds[:, :, y1:y2, x1:x2] += crop_logits
+            count_mat[:, :, y1:y2, x1:x2] += 1
+        return preds / count_mat
+
+    def test_crop_batch_size_does_not_change_predictions(self):
+        torch.manual_seed(0)
+        model = torch.nn.Conv2d(3, 5, kernel_size=3, padding=1).eval()
+        input_tensor = torch.randn((3, 3, 50, 70))
+        with torch.no_grad():
+            expected = self._reference_sliding_window(model, input_tensor, (12, 16), (20, 24))
+            for crop_batch_size in (None, 1, 5, 64, 1000):
+                sliding_window_inference = SlidingWindowInference(crop_size=(20, 24), stride=(12, 16), crop_batch_size=crop_batch_size, blending="uniform")
+                self._assert_tensors_equal(expected, sliding_window_inference(model, input_tensor))
+
+    def test_weighted_blending_reconstructs_input(self):
+        input_tensor = torch.randn((2, 1, 37, 53))
+        for blending in SlidingWindowInference.BLENDING_MODES:
+            sliding_window_inference = SlidingWindowInference(crop_size=(16, 16), stride=(10, 6), crop_batch_size=7, blending=blending)
+            self.assertTrue(torch.allclose(sliding_window_inference(DummyModel(), input_tensor), input_tensor, atol=1e-5))
+
+    def test_weight_maps(self):
+        for blending in ("linear", "gaussian"):
+            sliding_window_inference = SlidingWindowInference(crop_size=(16, 16), stride=(8, 8), blending=blending)
+            weight_map = sliding_window_inference.get_weight_map(16, 20, device="cpu")
+            self.assertEqual(weight_map.shape, (1, 16, 20))
+            self.assertGreater(float(weight_map.min()), 0)
+            self.assertAlmostEqual(float(weight_map.max()), 1.0, places=5)
+            self.assertGreater(float(weight_map[0, 8, 10]), float(weight_map[0, 0, 0]))
+            # Cached per crop geometry
+            self.assertIs(weight_map, sliding_window_inference.get_weight_map(16, 20, device="cpu"))
+
+    def test_downsampled_logits_canvas(self):
+        input_tensor = torch.ones((1, 2, 64, 96))
+        sliding_window_inference = SlidingWindowInference(crop_size=(32, 32), stride=(16, 16), blending="gaussian", logits_downsample=4)
+        preds = sliding_window_inference(lambda crops: torch.nn.functional.avg_pool2d(crops, 4), input_tensor)
+        self.assertEqual(preds.shape, input_tensor.shape)
+        self._assert_tensors_equal(preds, input_tensor)
+
+    def test_sliding_window_benchmark(self):
+        """Images/sec of sliding window inference vs. the number of crops per forward pass."""
+        devices = ["cpu", "cuda"] if torch.cuda.is_available() else ["cpu"]
+        for device in devices:
+            model = torch.nn.Sequential(torch.nn.Conv2d(3, 16, 3, padding=1), torch.nn.ReLU(), torch.nn.Conv2d(16, 19, 1)).to(device).eval()
+            images = torch.randn((2, 3, 256, 512), device=device)
+            throughputs = {}
+            with torch.no_grad():
+                for crop_batch_size in (1, 2, 8, 32):
+                    sliding_window_inference = SlidingWindowInference(crop_size=(128, 128), stride=(96, 96), crop_batch_size=crop_batch_size)
+                    sliding_window_inference(model, images)
+                    if device == "cuda":
+                        torch.cuda.synchronize()
+                    start = time.perf_counter()
+                    for _ in range(3):
+                        sliding_window_inference(model, images)
+                    if device == "cuda":
+                        torch.cuda.synchronize()
+                    throughputs[crop_batch_size] = 3 * len(images) / (time.perf_counter() - start)
+            print(f"{device}: " + ", ".join(f"crop_batch_size={size}: {throughput:.1f} images/sec" for size, throughput in throughputs.items()))
+            self.assertTrue(all(throughput > 0 for throughput in throughputs.values()))
+
 
 class DummyModel(torch.nn.Module):
     def forward(self, x):
@@ -0,0 +1,188 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+
+
+def _run_python(code: str, **env) -> str:
+    """Run python code in a new interpreter, so that nothing is imported beforehand, and return its last output line."""
+    result = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(code)], env={**os.environ, **env}, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False
+    )
+    if result.returncode != 0:
+        raise AssertionError(result.stderr)
+    return result.stdout.strip().splitlines()[-1]
+
+
+class TestLazyImport(unittest.TestCase):
+    def test_import_does_not_import_training_modules(self):
+        imported = _run_python(
+            """
+            import sys, json
+            import super_gradients
+            print(json.dumps(sorted(name for name in sys.modules if name.startswith("super_gradients.training") or name == "super_gradients.sanity_check")))
+            """
+        )
+        self.assertEqual(json.loads(imported), [])
+
+    def test_lazy_attributes(self):
+        output = _run_python(
+            """
+            import super_gradients
+            from super_gradients import Trainer, KDTrainer, QATTrainer, ARCHITECTURES, losses, utils, datasets_utils, DataAugmentation, setup_device
+            from super_gradients.training import Trainer as TrainingTrainer, MultiGPUMode, modify_params_for_qat
+            from super_gradients.training.utils import HpmStruct, EarlyStop
+            from super_gradients.training.sg_trainer import Trainer as SGTrainer
+            assert Trainer is TrainingTrainer is SGTrainer
+            assert super_gradients.training.models.get is not None  # Submodules are imported on attribute access
+            assert "Trainer" in dir(super_gradients)
+            print(type(ARCHITECTURES["yolo_nas_s"]).__name__)
+            """
+        )
+        self.assertEqual(output, "type")
+
+        with self.assertRaises(AssertionError):
+            _run_python("import super_gradients; super_gradients.not_an_attribute")
+
+    def test_registries_resolve_objects_on_first_use(self):
+        registries = ["ARCHITECTURES", "LOSSES", "METRICS", "CALLBACKS", "TRANSFORMS", "ALL_DATASETS", "ALL_DATALOADERS", "PROCESSINGS", "SG_LOGGERS"]
+        # Eagerly import all the packages registering objects, as `import super_gradients` used to do
+        all_imported = _run_python(
+            f"""
+            import json
+            import super_gradients.training.sg_trainer, super_gradients.training.kd_trainer, super_gradients.training.qat_trainer
+            import super_gradients.training.models, super_gradients.training.losses, super_gradients.training.metrics
+            import super_gradients.training.datasets, super_gradients.training.dataloaders, super_gradients.training.utils.callbacks
+            import super_gradients.training.transforms, super_gradients.training.processing, super_gradients.common.sg_loggers
+            from super_gradients.common.registry import registry
+            print(json.dumps({{name: sorted(dict.keys(getattr(registry, name))) for name in {registries}}}))
+            """
+        )
+        # Listing a registry imports the modules registering its objects
+        lazily_imported = _run_python(
+            f"""
+            import json
+            from super_gradients.common.registry import registry
+            print(json.dumps({{name: sorted(getattr(registry, name).keys()) for name in {registries}}}))
+            """
+        )
+        self.assertEqual(json.loads(all_imported), json.loads(lazily_imported))
+
+        # Looking up a name only imports the modules registering the objects of this registry
+        output = _run_python(
+            """
+            import sys
+            from super_gradients.common.registry.registry import ARCHITECTURES, LOSSES
+            architecture = ARCHITECTURES["yolo_nas_s"]
+            loss = LOSSES.get("cross_entropy")
+            print(architecture.__name__, loss.__name__, "super_gradients.training.sg_trainer" in sys.modules)
+            """
+        )
+        self.assertEqual(output, "YoloNAS_S CrossEntropyLoss False")
+
+    def test_registry_imports_registering_modules(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            Path(temp_dir, "lazy_registry_definition.py").write_text(
+                textwrap.dedent(
+                    """
+                    from super_gradients.common.registry.registry import Registry, create_register_decorator
+                    OBJECTS = Registry(modules=["lazy_registry_objects"])
+                    register_object = create_register_decorator(registry=OBJECTS)
+                    """
+                )
+            )
+            Path(temp_dir, "lazy_registry_objects.py").write_text(
+                textwrap.dedent(
+                    """
+                    from lazy_registry_definition import register_object
+                    @register_object("first", deprecated_name="old_first")
+                    class First:
+                        pass
+                    """
+                )
+            )
+            sys.path.insert(0, temp_dir)
+            try:
+                from lazy_registry_definition import OBJECTS
+
+                self.assertNotIn("lazy_registry_objects", sys.modules)
+                self.assertIn("first", OBJECTS)
+                self.assertIn("lazy_registry_objects", sys.modules)
+                self.assertEqual(sorted(OBJECTS.keys()), ["_deprecated_objects", "first", "old_first"])
+                self.assertIs(OBJECTS["old_first"], OBJECTS["first"])
+            finally:
+                sys.path.remove(temp_dir)
+                sys.modules.pop("lazy_registry_definition", None)
+                sys.modules.pop("lazy_registry_objects", None)
+
+    def test_env_sanity_check_is_opt_in(self):
+        check = "import sys, super_gradients; print('super_gradients.sanity_check' in sys.modules)"
+        self.assertEqual(_run_python(check, ENV_SANITY_CHECK="FALSE"), "False")
+        self.assertEqual(_run_python(check, ENV_SANITY_CHECK="TRUE"), "True")
+
+    def test_lazy_attribute_import_errors(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            Path(temp_dir, "lazy_package").mkdir()
+            Path(temp_dir, "lazy_package", "__init__.py").write_text(
+                textwrap.dedent(
+                    """
+                    from super_gradients.common.lazy_imports import lazy_module_attributes
+                    __getattr__, __dir__ = lazy_module_attributes(__name__, {"Broken": "lazy_package.broken:Broken"})
+                    """
+                )
+            )
+            Path(temp_dir, "lazy_package", "broken.py").write_text("import os\nos.not_an_attribute\nclass Broken:\n    pass\n")
+            sys.path.insert(0, temp_dir)
+            try:
+                # The AttributeError raised while importing the module is not reported as a missing attribute of the package
+                with self.assertRaises(ImportError) as context:
+                    from lazy_package import Broken  # noqa: F401
+                self.assertIsInstance(context.exception.__cause__, AttributeError)
+                self.assertIn("not_an_attribute", str(context.exception))
+            finally:
+                sys.path.remove(temp_dir)
+                sys.modules.pop("lazy_package", None)
+                sys.modules.pop("lazy_package.broken", None)
+
+    def test_startup_benchmark(self):
+        """Time and peak RSS of `import super_gradients`, and then of `models.get("yolo_nas_s")`, in a new interpreter."""
+        output = _run_python(
+            """
+            import json, resource, sys, time
+            steps = {}
+
+            start = time.perf_counter()
+            import super_gradients
+            steps["import"] = [time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, len(sys.modules)]
+
+            start = time.perf_counter()
+            from super_gradients.training import models
+            model = models.get("yolo_nas_s", num_classes=80)
+            steps["models_get"] = [time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, len(sys.modules)]
+
+            trainer_modules = ["super_gradients.training.sg_trainer", "super_gradients.training.kd_trainer", "super_gradients.training.qat_trainer"]
+            steps["imported_trainer_modules"] = [name for name in trainer_modules if name in sys.modules]
+            print(json.dumps(steps))
+            """
+        )
+        steps = json.loads(output)
+        import_duration, import_max_rss, import_n_modules = steps["import"]
+        models_get_duration, models_get_max_rss, models_get_n_modules = steps["models_get"]
+        # ru_maxrss is in kilobytes on Linux
+        print(
+            f"Startup: import super_gradients {import_duration:.2f}s, peak RSS {import_max_rss / 1024:.0f}MB; "
+            f'models.get("yolo_nas_s") {models_get_duration:.2f}s, peak RSS {models_get_max_rss / 1024:.0f}MB'
+        )
+        self.assertLess(import_duration, 10.0)
+        self.assertLessEqual(import_max_rss, models_get_max_rss)
+        self.assertLess(import_n_modules, models_get_n_modules)
+        # Instantiating a model does not import the trainers (and the modules they depend on)
+        self.assertEqual(steps["imported_trainer_modules"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import time
+import unittest
+from copy import deepcopy
+
+import torch
+from torch import nn
+
+from super_gradients.common.object_names import Models
+from super_gradients.training import models
+from super_gradients.training.models.kd_modules.kd_module import KDModule
+from super_gradients.training.utils.ema import ModelEMA, KDModelEMA
+from super_gradients.training.utils.ema_decay_schedules import ConstantDecay, ExpDecay
+
+
+def _reference_update(ema_model: nn.Module, model: nn.Module, decay: float):
+    """The original EMA update: walk both state dicts and create the updated tensors out of place."""
+    with torch.no_grad():
+        for ema_v, model_v in zip(ema_model.state_dict().values(), model.state_dict().values()):
+            if ema_v.dtype.is_floating_point:
+                ema_v.copy_(ema_v * decay + (1.0 - decay) * model_v.detach())
+
+
+def _perturb_(model: nn.Module, generator: torch.Generator):
+    """Simulate an optimizer step, changing all the floating point parameters and buffers in place."""
+    with torch.no_grad():
+        for tensor in model.state_dict().values():
+            if tensor.dtype.is_floating_point:
+                tensor.add_(torch.randn(tensor.shape, generator=generator) * 0.01)
+
+
+def _assert_state_dicts_close(test_case: unittest.TestCase, expected: nn.Module, actual: nn.Module):
+    for (key, expected_v), actual_v in zip(expected.state_dict().items(), actual.state_dict().values()):
+        test_case.assertTrue(torch.allclose(expected_v, actual_v, rtol=1e-5, atol=1e-6), key)
+
+
+class TestModelEMA(unittest.TestCase):
+    def test_update_matches_reference_update(self):
+        model = models.get(Models.RESNET18_CIFAR, arch_params={"num_classes": 10})
+        ema = ModelEMA(model, decay=0.99, decay_function=ExpDecay(beta=15))
+        reference_ema = deepcopy(ema.ema)
+        generator = torch.Generator().manual_seed(0)
+
+        for step in range(10):
+            _perturb_(model, generator)
+            ema.update(model, step=step, total_steps=10)
+            _reference_update(reference_ema, model, ExpDecay(beta=15)(0.99, step, 10))
+        _assert_state_dicts_close(self, reference_ema, ema.ema)
+
+    def test_update_every_n_steps_uses_corrected_decay(self):
+        model = models.get(Models.RESNET18_CIFAR, arch_params={"num_classes": 10})
+        ema = ModelEMA.from_params(model, decay_type="constant", decay=0.9, update_every_n_steps=3)
+        reference_ema = deepcopy(ema.ema)
+        generator = torch.Generator().manual_seed(0)
+
+        for step in range(7):
+            _perturb_(model, generator)
+            ema.update(model, step=step, total_steps=7)
+            if step in (2, 5):
+                _reference_update(reference_ema, model, 0.9**3)
+            _assert_state_dicts_close(self, reference_ema, ema.ema)
+        self.assertEqual(ema.updates, 7)
+
+    def test_invalid_update_every_n_steps(self):
+        with self.assertRaises(ValueError):
+            ModelEMA(nn.Linear(2, 2), decay=0.9, decay_function=ConstantDecay(), update_every_n_steps=0)
+
+    def test_tensors_are_collected_again_for_another_model(self):
+        model = nn.Linear(4, 4)
+        ema = ModelEMA(model, decay=0.5, decay_function=ConstantDecay())
+        ema.update(model, step=0, total_steps=2)
+
+        other_model = nn.Linear(4, 4)
+        ema.update(other_model, step=1, total_steps=2)
+        expected_weight = 0.5 * model.weight + 0.5 * other_model.weight
+        self.assertTrue(torch.allclose(ema.ema.weight, expected_weight))
+
+    def test_kd_ema_updates_student_only(self):
+        student = models.get(Models.RESNET18_CIFAR, arch_params={"num_classes": 10})
+        teacher = models.get(Models.RESNET18_CIFAR, arch_params={"num_classes": 10})
+        kd_model = KDModule(arch_params={}, student=student, teacher=teacher)
+        teacher_state = deepcopy(teacher.state_dict())
+        ema = KDModelEMA(kd_model, decay=0.9, decay_function=ConstantDecay())
+        reference_student_ema = deepcopy(ema.ema.student)
+        generator = torch.Generator().manual_seed(0)
+
+        for step in range(3):
+            _perturb_(student, generator)
+            ema.update(kd_model, step=step, total_steps=3)
+            _reference_update(reference_student_ema, student, 0.9)
+
+        self.assertIs(ema.ema.teacher, teacher)
+        for key, value in teacher.state_dict().items():
+            self.assertTrue(torch.equal(teacher_state[key], value), key)
+        _assert_state_dicts_close(self, reference_student_ema, ema.ema.student)
+
+    def test_update_benchmark(self):
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        # A ResNet18 has enough tensors for the per-tensor overhead to show, and keeps the unit suite fast
+        model = models.get(Models.RESNET18, arch_params={"num_classes": 1000}).to(device)
+        for name, update_every_n_steps in (("fused", 1), ("fused, every 4 steps", 4)):
+            ema = ModelEMA(model, decay=0.9999, decay_function=ConstantDecay(), update_every_n_steps=update_every_n_steps)
+            reference_ema = deepcopy(ema.ema)
+            timings = {}
+            for update_name, update_fn in (
+                ("reference", lambda step: _reference_update(reference_ema, model, 0.9999)),
+                (name, lambda step: ema.update(model, step=step, total_steps=100)),
+            ):
+                update_fn(0)  # warmup
+                if device == "cuda":
+                    torch.cuda.synchronize()
+                start = time.perf_counter()
+                for step in range(20):
+                    update_fn(step)
+                if device == "cuda":
+                    torch.cuda.synchronize()
+                timings[update_name] = (time.perf_counter() - start) / 20 * 1000
+            print(f"EMA update of ResNet18 on {device}: " + ", ".join(f"{update_name} {timing:.2f}ms/step" for update_name, timing in timings.items()))
+            self.assertLess(timings[name], timings["reference"])
+
+
+if __name__ == "__main__":
+    unittest.main()
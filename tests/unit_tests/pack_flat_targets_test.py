@@ -0,0 +1,95 @@
+import time
+import unittest
+from typing import Dict
+
+import torch
+import torch.nn.functional as F
+
+from super_gradients.training.datasets.data_formats.bbox_formats.cxcywh import cxcywh_to_xyxy
+from super_gradients.training.datasets.pose_estimation_datasets.yolo_nas_pose_collate_fn import undo_flat_collate_tensors_with_batch_index
+from super_gradients.training.losses import PPYoloELoss, YoloNASPoseLoss
+from super_gradients.training.utils.detection_utils import pack_flat_tensors_per_image
+
+
+def _per_image_loop_packing(image_index: torch.Tensor, flat_tensors, batch_size: int):
+    """Reference implementation: one mask, one host sync and one pad per image."""
+    per_image = [[flat_tensor[image_index == i] for i in range(batch_size)] for flat_tensor in flat_tensors]
+    max_elements = max(int((image_index == i).sum().item()) for i in range(batch_size))
+    return [
+        torch.stack([F.pad(t, (0, 0) * (t.ndim - 1) + (0, max_elements - len(t)), mode="constant", value=0) for t in tensors], dim=0) for tensors in per_image
+    ]
+
+
+def _reference_yolox_targets_to_ppyolo(targets: torch.Tensor, batch_size: int) -> Dict[str, torch.Tensor]:
+    gt_bbox = cxcywh_to_xyxy(targets[:, 2:6], image_shape=None)
+    gt_class, gt_bbox, pad_gt_mask = _per_image_loop_packing(targets[:, 0], [targets[:, 1:2].long(), gt_bbox, gt_bbox.sum(1, keepdims=True) > 0], batch_size)
+    return {"gt_class": gt_class, "gt_bbox": gt_bbox, "pad_gt_mask": pad_gt_mask}
+
+
+def _generate_flat_targets(batch_size: int, max_targets: int, seed: int) -> torch.Tensor:
+    generator = torch.Generator().manual_seed(seed)
+    num_targets = torch.randint(0, max_targets + 1, (batch_size,), generator=generator)
+    image_index = torch.repeat_interleave(torch.arange(batch_size), num_targets).float()
+    n = len(image_index)
+    targets = torch.cat([image_index[:, None], torch.randint(0, 80, (n, 1), generator=generator).float(), torch.rand(n, 4, generator=generator)], 1)
+    targets[torch.rand(n, generator=generator) < 0.1, 2:] = 0  # Some empty boxes
+    return targets[torch.randperm(n, generator=generator)]  # Images are not necessarily contiguous
+
+
+class TestPackFlatTargets(unittest.TestCase):
+    def test_packing_matches_per_image_loop(self):
+        for seed in range(10):
+            targets = _generate_flat_targets(batch_size=8, max_targets=12, seed=seed)
+            (packed_targets,), is_valid = pack_flat_tensors_per_image(targets[:, 0], [targets[:, 1:]], batch_size=8)
+            (expected_targets,) = _per_image_loop_packing(targets[:, 0], [targets[:, 1:]], batch_size=8)
+            self.assertTrue(torch.equal(packed_targets, expected_targets))
+            self.assertTrue(torch.equal(is_valid.sum(1), torch.bincount(targets[:, 0].long(), minlength=8)))
+
+    def test_packing_without_targets(self):
+        (packed,), is_valid = pack_flat_tensors_per_image(torch.zeros((0,)), [torch.zeros((0, 5))], batch_size=4)
+        self.assertEqual(packed.shape, (4, 0, 5))
+        self.assertEqual(is_valid.shape, (4, 0))
+
+    def test_ppyoloe_targets_match_per_image_loop(self):
+        loss = PPYoloELoss(num_classes=80)
+        for seed in range(5):
+            targets = _generate_flat_targets(batch_size=6, max_targets=20, seed=seed)
+            actual = loss._yolox_targets_to_ppyolo(targets, batch_size=6)
+            expected = _reference_yolox_targets_to_ppyolo(targets, batch_size=6)
+            for key in expected.keys():
+                self.assertEqual(expected[key].dtype, actual[key].dtype)
+                self.assertTrue(torch.equal(expected[key], actual[key]))
+
+    def test_yolo_nas_pose_targets_match_per_image_loop(self):
+        loss = YoloNASPoseLoss(oks_sigmas=[0.05] * 17)
+        for seed in range(5):
+            boxes = _generate_flat_targets(batch_size=6, max_targets=20, seed=seed)[:, [0, 2, 3, 4, 5]]
+            joints = torch.cat([boxes[:, None, 0:1].expand(-1, 17, 1), torch.rand(len(boxes), 17, 3)], dim=2)
+            crowd = torch.stack([boxes[:, 0], (torch.rand(len(boxes)) < 0.2).float()], dim=1)
+            actual = loss._unpack_flat_targets((boxes, joints, crowd), batch_size=6)
+
+            gt_bbox, pad_gt_mask = _per_image_loop_packing(boxes[:, 0], [boxes[:, 1:5], boxes[:, 1:5].sum(1, keepdims=True) > 0], 6)
+            expected = {
+                "gt_class": torch.zeros(gt_bbox.shape[:2] + (1,), dtype=torch.long),
+                "gt_bbox": gt_bbox,
+                "pad_gt_mask": pad_gt_mask,
+                "gt_poses": torch.stack([F.pad(t, (0, 0, 0, 0, 0, gt_bbox.size(1) - len(t))) for t in undo_flat_collate_tensors_with_batch_index(joints, 6)]),
+                "gt_crowd": torch.stack([F.pad(t, (0, 0, 0, gt_bbox.size(1) - len(t))) for t in undo_flat_collate_tensors_with_batch_index(crowd, 6)]),
+            }
+            for key in expected.keys():
+                self.assertEqual(expected[key].dtype, actual[key].dtype)
+                self.assertTrue(torch.equal(expected[key], actual[key]))
+
+    def test_packing_benchmark(self):
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        targets = _generate_flat_targets(batch_size=64, max_targets=100, seed=0).to(device)
+        flat_tensors = [targets[:, 1:2].long(), targets[:, 2:6], targets[:, 2:6].sum(1, keepdims=True) > 0]
+        for name, packing_fn in (("per-image loop", _per_image_loop_packing), ("vectorized", lambda *args: pack_flat_tensors_per_image(*args)[0])):
+            start = time.perf_counter()
+            for _ in range(20):
+                packing_fn(targets[:, 0], flat_tensors, 64)
+            print(f"Packing {len(targets)} targets of 64 images on {device}, {name}: {(time.perf_counter() - start) / 20 * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    unittest.main()
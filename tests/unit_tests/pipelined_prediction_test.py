@@ -0,0 +1,77 @@
+import os
+import tempfile
+import time
+import unittest
+
+import cv2
+import numpy as np
+import torch
+from torch import nn
+
+from super_gradients.training.pipelines.pipelines import ClassificationPipeline
+from super_gradients.training.processing.processing import ComposeProcessing, ImagePermute, Resize, StandardizeImage
+
+
+class TestPipelinedPrediction(unittest.TestCase):
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        rng = np.random.RandomState(0)
+        self.images = [rng.randint(0, 256, size=(rng.randint(200, 400), rng.randint(200, 400), 3), dtype=np.uint8) for _ in range(23)]
+        model = nn.Sequential(nn.Conv2d(3, 8, 3, stride=2), nn.ReLU(), nn.AdaptiveAvgPool2d(1), nn.Flatten(), nn.Linear(8, 5))
+        self.pipeline = ClassificationPipeline(
+            model=model,
+            class_names=[f"class_{i}" for i in range(5)],
+            image_processor=ComposeProcessing([Resize(size=128), StandardizeImage(), ImagePermute()]),
+            fuse_model=False,
+        )
+
+    def _assert_same_predictions(self, expected, actual):
+        expected, actual = list(expected), list(actual)
+        self.assertEqual(len(expected), len(actual))
+        for expected_prediction, actual_prediction in zip(expected, actual):
+            self.assertTrue(np.array_equal(expected_prediction.image, actual_prediction.image))
+            self.assertEqual(expected_prediction.prediction.label, actual_prediction.prediction.label)
+            self.assertAlmostEqual(expected_prediction.prediction.confidence, actual_prediction.prediction.confidence, places=5)
+
+    def test_pipelined_predictions_equal_sequential_predictions(self):
+        for batch_size in (None, 1, 4, 32):
+            sequential = self.pipeline._generate_prediction_result(self.images, batch_size=batch_size)
+            pipelined = self.pipeline._generate_prediction_result(self.images, batch_size=batch_size, pipelined=True)
+            self._assert_same_predictions(sequential, pipelined)
+
+    def test_pipelined_predict_images(self):
+        sequential = self.pipeline.predict_images(self.images, batch_size=5)
+        pipelined = self.pipeline.predict_images(self.images, batch_size=5, pipelined=True)
+        self._assert_same_predictions(sequential._images_prediction_lst, pipelined._images_prediction_lst)
+
+    def test_early_stop(self):
+        results = self.pipeline._generate_prediction_result(iter(self.images), batch_size=2, pipelined=True)
+        self.assertIsNotNone(next(results))
+        results.close()
+
+    def test_preprocessing_exception_is_raised(self):
+        def failing_preprocess_image(image: np.ndarray):
+            raise RuntimeError("Failed to preprocess image")
+
+        self.pipeline.image_processor.preprocess_image = failing_preprocess_image
+        with self.assertRaises(RuntimeError):
+            list(self.pipeline._generate_prediction_result(self.images, batch_size=4, pipelined=True))
+
+    def test_pipelined_prediction_benchmark(self):
+        """Throughput of predicting a folder of images, with and without pipelining."""
+        with tempfile.TemporaryDirectory() as images_dir:
+            rng = np.random.RandomState(0)
+            for i in range(64):
+                cv2.imwrite(os.path.join(images_dir, f"{i:03d}.jpg"), rng.randint(0, 256, size=(480, 640, 3), dtype=np.uint8))
+
+            throughputs = {}
+            for pipelined in (False, True):
+                start = time.perf_counter()
+                predictions = self.pipeline.predict_images(images_dir, batch_size=16, pipelined=pipelined)
+                throughputs[pipelined] = len(predictions._images_prediction_lst) / (time.perf_counter() - start)
+            print(f"Folder of 64 images: sequential {throughputs[False]:.1f} images/sec, pipelined {throughputs[True]:.1f} images/sec")
+            self.assertTrue(all(throughput > 0 for throughput in throughputs.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
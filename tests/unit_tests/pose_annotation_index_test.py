@@ -0,0 +1,186 @@
+import json
+import os
+import pickle
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+from super_gradients.training.datasets.pose_estimation_datasets import COCOPoseEstimationDataset
+from super_gradients.training.datasets.pose_estimation_datasets.coco_utils import decode_mask_runs, encode_mask_runs
+
+NUM_JOINTS = 17
+
+
+def _random_person(rng: np.random.RandomState, ann_id: int, image_id: int, width: int, height: int) -> dict:
+    x, y = rng.uniform(-5, width * 0.8), rng.uniform(-5, height * 0.8)
+    w, h = rng.uniform(10, width * 0.3), rng.uniform(10, height * 0.3)  # Some boxes extend outside of the image
+    keypoints = np.stack([rng.uniform(x, x + w, NUM_JOINTS), rng.uniform(y, y + h, NUM_JOINTS), rng.randint(0, 3, NUM_JOINTS)], axis=1)
+    if rng.rand() < 0.3:
+        keypoints[:] = 0
+    polygon = [x, y, x + w, y, x + w / 2, y + h]
+    annotation = {
+        "id": ann_id,
+        "image_id": image_id,
+        "category_id": 1,
+        "iscrowd": 0,
+        "bbox": [x, y, w, h],
+        "keypoints": keypoints.ravel().tolist(),
+        "num_keypoints": int((keypoints[:, 2] > 0).sum()),
+        "segmentation": [polygon],
+    }
+    if rng.rand() < 0.5:
+        annotation["area"] = w * h * 0.6
+    return annotation
+
+
+def _random_crowd(rng: np.random.RandomState, ann_id: int, image_id: int, width: int, height: int) -> dict:
+    mask = np.zeros((height, width), dtype=bool)
+    x, y = rng.randint(0, width // 2), rng.randint(0, height // 2)
+    mask[y : y + rng.randint(5, height // 2), x : x + rng.randint(5, width // 2)] = True
+    return {
+        "id": ann_id,
+        "image_id": image_id,
+        "category_id": 1,
+        "iscrowd": 1,
+        "bbox": [x, y, 10, 10],
+        "area": float(mask.sum()),
+        "keypoints": [0] * NUM_JOINTS * 3,
+        "num_keypoints": 0,
+        # Uncompressed COCO RLE is column-major, which is the row-major encoding of the transposed mask
+        "segmentation": {"counts": encode_mask_runs(mask.T).tolist(), "size": [height, width]},
+    }
+
+
+def _create_coco_pose_dataset(data_dir: Path, n_images: int, image_size=(120, 160)) -> None:
+    rng = np.random.RandomState(0)
+    (data_dir / "images").mkdir(parents=True)
+    images, annotations = [], []
+    for image_id in range(1, n_images + 1):
+        height, width = image_size[0] + image_id % 3, image_size[1]
+        cv2.imwrite(str(data_dir / "images" / f"{image_id}.png"), np.full((height, width, 3), image_id % 255, dtype=np.uint8))
+        images.append({"id": image_id, "file_name": f"{image_id}.png", "height": height, "width": width})
+        for _ in range(image_id % 5):  # Some images have no annotation
+            annotations.append(_random_person(rng, len(annotations) + 1, image_id, width, height))
+        if image_id % 4 == 0:
+            annotations.append(_random_crowd(rng, len(annotations) + 1, image_id, width, height))
+
+    categories = [{"id": 1, "name": "person", "keypoints": [f"joint_{i}" for i in range(NUM_JOINTS)], "skeleton": []}]
+    with open(data_dir / "annotations.json", "w") as f:
+        json.dump({"images": images, "annotations": annotations, "categories": categories}, f)
+
+
+class TestPoseAnnotationIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.temp_dir.name) / "coco_pose"
+        self.index_dir = str(Path(self.temp_dir.name) / "index")
+        _create_coco_pose_dataset(self.data_dir, n_images=24)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _dataset_params(self, **kwargs) -> dict:
+        dataset_params = dict(
+            data_dir=str(self.data_dir),
+            images_dir="images",
+            json_file="annotations.json",
+            include_empty_samples=False,
+            transforms=[],
+            edge_links=[],
+            edge_colors=None,
+            keypoint_colors=None,
+        )
+        dataset_params.update(kwargs)
+        return dataset_params
+
+    def _assert_same_samples(self, expected_dataset: COCOPoseEstimationDataset, actual_dataset: COCOPoseEstimationDataset):
+        self.assertEqual(expected_dataset.ids, actual_dataset.ids)
+        for index in range(len(expected_dataset)):
+            expected_sample, actual_sample = expected_dataset.load_sample(index), actual_dataset.load_sample(index)
+            for field in ("image", "mask", "joints", "areas", "bboxes_xywh", "is_crowd"):
+                expected_value, actual_value = getattr(expected_sample, field), getattr(actual_sample, field)
+                self.assertEqual(expected_value.dtype, actual_value.dtype, field)
+                self.assertTrue(np.array_equal(expected_value, actual_value), field)
+
+    def test_encode_decode_mask_runs(self):
+        rng = np.random.RandomState(0)
+        for mask in (rng.rand(7, 5) > 0.5, np.zeros((3, 4), dtype=bool), np.ones((3, 4), dtype=bool), np.zeros((0, 4), dtype=bool)):
+            runs = encode_mask_runs(mask)
+            self.assertEqual(runs.dtype, np.uint32)
+            self.assertEqual(runs.sum(), mask.size)
+            self.assertTrue(np.array_equal(decode_mask_runs(runs, mask.shape), mask))
+
+    def test_same_samples_with_annotation_index(self):
+        for params in (
+            dict(),
+            dict(include_empty_samples=True),
+            dict(crowd_annotations_action="mask_as_normal"),
+            dict(crowd_annotations_action="drop_annotation", remove_duplicate_annotations=True),
+            dict(crowd_annotations_action="drop_sample"),
+        ):
+            dataset_params = self._dataset_params(**params)
+            dataset = COCOPoseEstimationDataset(**dataset_params)
+            indexed_dataset = COCOPoseEstimationDataset(annotation_index_dir=self.index_dir, **dataset_params)
+            self.assertIsNotNone(indexed_dataset.annotation_index)
+            self.assertIsNone(indexed_dataset.coco)
+            self._assert_same_samples(dataset, indexed_dataset)
+        self.assertEqual(len(os.listdir(self.index_dir)), 5)
+
+    def test_reload_does_not_parse_annotation_file(self):
+        dataset = COCOPoseEstimationDataset(**self._dataset_params())
+        COCOPoseEstimationDataset(annotation_index_dir=self.index_dir, **self._dataset_params())
+        with patch("super_gradients.training.datasets.pose_estimation_datasets.coco_pose_estimation_dataset.COCO") as coco_mock:
+            reloaded_dataset = COCOPoseEstimationDataset(annotation_index_dir=self.index_dir, **self._dataset_params())
+            coco_mock.assert_not_called()
+        self.assertEqual(reloaded_dataset.joints, dataset.joints)
+        self._assert_same_samples(dataset, reloaded_dataset)
+
+        # Dataloader workers reopen the memory-mapped index instead of receiving a copy of the annotations
+        unpickled_dataset = pickle.loads(pickle.dumps(reloaded_dataset))
+        self._assert_same_samples(dataset, unpickled_dataset)
+
+    def test_samples_are_writable(self):
+        dataset = COCOPoseEstimationDataset(annotation_index_dir=self.index_dir, **self._dataset_params())
+        sample = dataset.load_sample(0)
+        sample.joints[:] = 0
+        sample.bboxes_xywh[:] = 0
+        self.assertFalse(np.array_equal(dataset.load_sample(0).bboxes_xywh, sample.bboxes_xywh))
+
+    def test_index_is_rebuilt_when_annotation_file_changes(self):
+        COCOPoseEstimationDataset(annotation_index_dir=self.index_dir, **self._dataset_params())
+        os.utime(self.data_dir / "annotations.json", ns=(0, 0))
+        COCOPoseEstimationDataset(annotation_index_dir=self.index_dir, **self._dataset_params())
+        self.assertEqual(len(os.listdir(self.index_dir)), 2)
+
+    def test_load_sample_benchmark(self):
+        data_dir = Path(self.temp_dir.name) / "coco_pose_640"
+        _create_coco_pose_dataset(data_dir, n_images=100, image_size=(480, 640))
+        dataset_params = self._dataset_params(data_dir=str(data_dir))
+
+        datasets = {
+            "COCO object": COCOPoseEstimationDataset(**dataset_params),
+            "annotation index": COCOPoseEstimationDataset(annotation_index_dir=self.index_dir, **dataset_params),
+        }
+        # Images are decoded once beforehand, to only measure the time spent on annotations and crowd masks
+        images = {str(path): cv2.imread(str(path)) for path in (data_dir / "images").iterdir()}
+        timings, pickled_sizes = {}, {}
+        with patch("super_gradients.training.datasets.pose_estimation_datasets.coco_pose_estimation_dataset.cv2.imread", lambda path, flags: images[path]):
+            for name, dataset in datasets.items():
+                start = time.perf_counter()
+                for index in range(len(dataset)):
+                    dataset.load_sample(index)
+                timings[name] = (time.perf_counter() - start) / len(dataset) * 1000
+                pickled_sizes[name] = len(pickle.dumps(dataset)) / 1024
+        print(
+            "COCOPoseEstimationDataset annotations of 100 images at 640x480: "
+            + ", ".join(f"{name} {timings[name]:.2f}ms/sample and {pickled_sizes[name]:.0f}KB sent to every worker" for name in datasets)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
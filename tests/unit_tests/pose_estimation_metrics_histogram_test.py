@@ -0,0 +1,84 @@
+import unittest
+from typing import List
+
+import numpy as np
+import torch
+
+from super_gradients.module_interfaces import PoseEstimationPredictions
+from super_gradients.training.metrics.pose_estimation_metrics import PoseEstimationMetrics
+
+
+def _identity_decode(preds) -> List[PoseEstimationPredictions]:
+    return [PoseEstimationPredictions(poses=poses, scores=scores, bboxes_xyxy=None) for poses, scores in zip(*preds)]
+
+
+def generate_pose_batch(batch_size: int, num_joints: int, seed: int):
+    """Random groundtruth poses and predictions made of noised (and randomly dropped) groundtruth poses plus random false positives."""
+    rng = np.random.RandomState(seed)
+    predicted_poses, predicted_scores, gt_joints, gt_iscrowd = [], [], [], []
+    for _ in range(batch_size):
+        num_instances = rng.randint(0, 8)
+        centers = rng.uniform(50, 450, size=(num_instances, 1, 2))
+        joints_xy = centers + rng.uniform(-40, 40, size=(num_instances, num_joints, 2))
+        visibility = (rng.rand(num_instances, num_joints) > 0.2).astype(np.float32)
+        joints = np.concatenate([joints_xy, visibility[..., None]], axis=-1).astype(np.float32)
+
+        kept = joints[rng.rand(num_instances) > 0.2]
+        noised = kept.copy()
+        noised[..., :2] += rng.normal(scale=rng.uniform(1, 15), size=noised[..., :2].shape)
+        num_false_positives = rng.randint(0, 4)
+        false_positives = np.concatenate(
+            [rng.uniform(0, 500, size=(num_false_positives, num_joints, 2)), np.ones((num_false_positives, num_joints, 1))], axis=-1
+        ).astype(np.float32)
+
+        poses = np.concatenate([noised, false_positives], axis=0)
+        predicted_poses.append(torch.from_numpy(poses))
+        predicted_scores.append(torch.from_numpy(rng.rand(len(poses)).astype(np.float32)))
+        gt_joints.append(joints)
+        gt_iscrowd.append(rng.rand(num_instances) > 0.9)
+    return (predicted_poses, predicted_scores), gt_joints, gt_iscrowd
+
+
+class TestPoseEstimationMetricsHistogram(unittest.TestCase):
+    def setUp(self) -> None:
+        self.num_joints = 17
+        self.batches = [generate_pose_batch(16, self.num_joints, seed=seed) for seed in range(10)]
+
+    def _run_metrics(self, metrics):
+        for preds, gt_joints, gt_iscrowd in self.batches:
+            for metric in metrics:
+                metric.update(preds=preds, target=None, gt_joints=gt_joints, gt_iscrowd=gt_iscrowd)
+        return [metric.compute() for metric in metrics]
+
+    def _metric(self, score_histogram_bins=None) -> PoseEstimationMetrics:
+        return PoseEstimationMetrics(
+            post_prediction_callback=_identity_decode,
+            num_joints=self.num_joints,
+            iou_thresholds_to_report=[0.5, 0.75],
+            score_histogram_bins=score_histogram_bins,
+        )
+
+    def test_histogram_metrics_converge_to_exact_metrics(self):
+        exact, coarse, fine = self._run_metrics([self._metric(), self._metric(score_histogram_bins=100), self._metric(score_histogram_bins=100_000)])
+
+        self.assertEqual(exact.keys(), fine.keys())
+        self.assertGreater(exact["AP"], 0)
+        for key in exact.keys():
+            self.assertAlmostEqual(float(exact[key]), float(fine[key]), delta=1e-3)
+            self.assertAlmostEqual(float(exact[key]), float(coarse[key]), delta=2e-2)
+
+    def test_histogram_state_has_fixed_size(self):
+        metric = self._metric(score_histogram_bins=1000)
+        state_shapes = [getattr(metric, name).shape for name in metric._histogram_state_names]
+        self._run_metrics([metric])
+        self.assertEqual(state_shapes, [getattr(metric, name).shape for name in metric._histogram_state_names])
+        self.assertFalse(hasattr(metric, "predictions"))
+        self.assertGreater(int(metric.n_targets.sum()), 0)
+
+        metric.reset()
+        self.assertEqual(int(metric.preds_histogram.sum()), 0)
+        self.assertEqual(metric.compute()["AP"], -1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -84,6 +84,30 @@ class TestPoseEstimationMetrics(unittest.TestCase):
         actual_metrics = sg_metrics.compute()
         pprint(actual_metrics)
 
+        batched_sg_metrics = PoseEstimationMetrics(
+            post_prediction_callback=convert_predictions_to_target_format,
+            num_joints=17,
+            max_objects_per_image=20,
+            iou_thresholds_to_report=(0.5, 0.75),
+            batched_matching=True,
+        ).to(device)
+
+        # The batched matching should reproduce the per-image matching, whatever the batch size
+        for start in range(0, len(predicted_poses), 64):
+            batch = slice(start, start + 64)
+            batched_sg_metrics.update(
+                preds=(predicted_poses[batch], predicted_scores[batch]),
+                target=None,
+                gt_joints=groundtruths_poses[batch],
+                gt_iscrowd=groundtruths_iscrowd[batch],
+                gt_areas=groundtruths_areas[batch],
+                gt_bboxes=groundtruths_bboxes[batch],
+            )
+
+        batched_metrics = batched_sg_metrics.compute()
+        for key in actual_metrics.keys():
+            self.assertAlmostEqual(actual_metrics[key], batched_metrics[key], delta=1e-6)
+
         coco_pred = self._coco_convert_predictions_to_dict(predicted_poses, predicted_scores, image_ids)
 
         with tempfile.TemporaryDirectory() as td:
@@ -0,0 +1,104 @@
+import os
+import random
+import tempfile
+import time
+import unittest
+
+import cv2
+import numpy as np
+import pkg_resources
+import torch
+import yaml
+
+from super_gradients.training.datasets.segmentation_datasets.cityscape_segmentation import CityscapesDataset
+
+
+class TestSegmentationImageBackend(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root_dir = self.tmp_dir.name
+        self._create_cityscapes_dataset(n_images=8, size=(1024, 512))
+
+        recipe_path = pkg_resources.resource_filename("super_gradients.recipes", "dataset_params/cityscapes_stdc_seg50_dataset_params.yaml")
+        with open(recipe_path) as f:
+            recipe = yaml.safe_load(f)
+        self.train_transforms = recipe["train_dataset_params"]["transforms"]
+        self.val_transforms = recipe["val_dataset_params"]["transforms"]
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _create_cityscapes_dataset(self, n_images: int, size) -> None:
+        """Create a tiny dataset in the cityscapes format: images, label ids masks, a list file and the labels metadata csv."""
+        w, h = size
+        os.makedirs(os.path.join(self.root_dir, "leftImg8bit", "train", "city"))
+        os.makedirs(os.path.join(self.root_dir, "gtFine", "train", "city"))
+        os.makedirs(os.path.join(self.root_dir, "lists"))
+
+        rng = np.random.RandomState(0)
+        yy, xx = np.mgrid[0:h, 0:w]
+        list_lines = []
+        for i in range(n_images):
+            image = np.stack([(xx + 10 * i) % 256, (yy + 20 * i) % 256, (xx + yy) % 256], axis=-1).astype(np.uint8)
+            label = rng.randint(0, 34, size=(h // 32, w // 32)).repeat(32, axis=0).repeat(32, axis=1).astype(np.uint8)
+            image_path = os.path.join("leftImg8bit", "train", "city", f"city_{i:06d}_leftImg8bit.png")
+            label_path = os.path.join("gtFine", "train", "city", f"city_{i:06d}_gtFine_labelIds.png")
+            cv2.imwrite(os.path.join(self.root_dir, image_path), image[:, :, ::-1])
+            cv2.imwrite(os.path.join(self.root_dir, label_path), label)
+            list_lines.append(f"{image_path} {label_path}\n")
+
+        with open(os.path.join(self.root_dir, "lists", "train.lst"), "w") as f:
+            f.writelines(list_lines)
+
+        # Label ids 0-33, the first 19 are mapped to train ids and the others are ignored
+        with open(os.path.join(self.root_dir, "lists", "labels.csv"), "w") as f:
+            f.write("id,name,trainid,level3id,category,categoryid,hasinstances,ignoreineval,color\n")
+            for label_id in range(34):
+                train_id = label_id if label_id < 19 else 255
+                f.write(f"{label_id},class_{label_id},{train_id},{label_id},category,0,False,{train_id == 255},#{label_id * 7:06x}\n")
+
+    def _create_dataset(self, image_backend: str, transforms) -> CityscapesDataset:
+        return CityscapesDataset(
+            root_dir=self.root_dir, list_file="lists/train.lst", labels_csv_path="lists/labels.csv", transforms=transforms, image_backend=image_backend
+        )
+
+    def _get_samples(self, dataset: CityscapesDataset, seed: int = 0):
+        random.seed(seed)
+        torch.manual_seed(seed)
+        return [dataset[i] for i in range(len(dataset))]
+
+    def test_cv2_backend_loads_the_same_samples(self):
+        pil_dataset, cv2_dataset = self._create_dataset("pil", transforms=None), self._create_dataset("cv2", transforms=None)
+        for (pil_image, pil_mask), (cv2_image, cv2_mask) in zip(self._get_samples(pil_dataset), self._get_samples(cv2_dataset)):
+            self.assertTrue(torch.equal(pil_image, cv2_image))
+            self.assertTrue(torch.equal(pil_mask, cv2_mask))
+
+    def test_cv2_backend_with_recipe_transforms(self):
+        for transforms in (self.val_transforms, self.train_transforms):
+            pil_dataset, cv2_dataset = self._create_dataset("pil", transforms=transforms), self._create_dataset("cv2", transforms=transforms)
+            for (pil_image, pil_mask), (cv2_image, cv2_mask) in zip(self._get_samples(pil_dataset), self._get_samples(cv2_dataset)):
+                self.assertEqual(pil_image.shape, cv2_image.shape)
+                self.assertEqual(pil_mask.shape, cv2_mask.shape)
+                self.assertTrue(torch.equal(pil_mask, cv2_mask))
+                # Images differ by the rounding of the interpolation, which is less than a gray level on average
+                self.assertLess((pil_image - cv2_image).abs().mean().item(), 0.1)
+
+    def test_invalid_image_backend(self):
+        with self.assertRaises(ValueError):
+            self._create_dataset("numpy", transforms=None)
+
+    def test_image_backend_benchmark(self):
+        """Samples/sec of loading and augmenting cityscapes samples with the stdc recipe transforms, with PIL vs. with OpenCV."""
+        throughputs = {}
+        for image_backend in ("pil", "cv2"):
+            dataset = self._create_dataset(image_backend, transforms=self.train_transforms)
+            start = time.perf_counter()
+            for _ in range(3):
+                self._get_samples(dataset)
+            throughputs[image_backend] = 3 * len(dataset) / (time.perf_counter() - start)
+        print(f"Cityscapes samples with stdc train transforms: pil {throughputs['pil']:.1f} samples/sec, cv2 {throughputs['cv2']:.1f} samples/sec")
+        self.assertTrue(all(throughput > 0 for throughput in throughputs.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,19 @@
+import random
 import unittest
 
+import numpy as np
 import torch
 from torchvision.transforms import Compose, ToTensor
-from super_gradients.training.transforms.transforms import SegRescale, SegRandomRescale, SegCropImageAndMask, SegPadShortToCropSize
+from super_gradients.training.transforms.transforms import (
+    SegRescale,
+    SegRandomRescale,
+    SegCropImageAndMask,
+    SegPadShortToCropSize,
+    SegPadToDivisible,
+    SegRandomFlip,
+    SegRandomRotate,
+    SegResize,
+)
 from PIL import Image
 from super_gradients.training.datasets.segmentation_datasets.segmentation_dataset import SegmentationDataSet
 
@@ -216,6 +227,77 @@ class SegmentationTransformsTest(unittest.TestCase):
         out = transform(sample)
         self.assertEqual(crop_size, out["image"].size)
 
+    def create_array_sample(self, size):
+        """Smooth RGB image and blocky mask (with some ignored pixels), as uint8 arrays of shape (H, W, 3) and (H, W)."""
+        w, h = size
+        rng = np.random.RandomState(0)
+        yy, xx = np.mgrid[0:h, 0:w]
+        image = np.stack([xx * 255 / w, yy * 255 / h, (xx + yy) * 127 / (w + h)], axis=-1).astype(np.uint8)
+        mask = rng.randint(0, 20, size=(h // 16 + 1, w // 16 + 1)).repeat(16, axis=0).repeat(16, axis=1)[:h, :w].astype(np.uint8)
+        mask[rng.rand(h, w) < 0.05] = 255
+        return {"image": image, "mask": mask}
+
+    def _apply_to_pil_and_array_samples(self, transform, size):
+        array_sample = self.create_array_sample(size)
+        pil_sample = {"image": Image.fromarray(array_sample["image"]), "mask": Image.fromarray(array_sample["mask"])}
+        random.seed(0)
+        pil_out = transform(pil_sample)
+        random.seed(0)
+        array_out = transform(array_sample)
+        self.assertIsInstance(array_out["image"], np.ndarray)
+        self.assertIsInstance(array_out["mask"], np.ndarray)
+        return pil_out, array_out
+
+    def test_array_transforms_match_pil_transforms(self):
+        size = (300, 200)
+        # Geometric transforms which do not interpolate give the exact same image and mask
+        exact_transforms = [
+            SegRandomFlip(prob=1.0),
+            SegCropImageAndMask(crop_size=(128, 96), mode="center"),
+            SegCropImageAndMask(crop_size=(128, 96), mode="random"),
+            SegCropImageAndMask(crop_size=(400, 256), mode="center"),
+            SegPadShortToCropSize(crop_size=(512, 256), fill_mask=19, fill_image=(1, 2, 3)),
+            SegPadToDivisible(divisible_value=64, fill_mask=19, fill_image=127),
+        ]
+        for transform in exact_transforms:
+            pil_out, array_out = self._apply_to_pil_and_array_samples(transform, size)
+            self.assertTrue(np.array_equal(np.asarray(pil_out["image"]), array_out["image"]), transform)
+            self.assertTrue(np.array_equal(np.asarray(pil_out["mask"]), array_out["mask"]), transform)
+
+        # Rescaled masks are the same, and images are within interpolation differences
+        resize_transforms = [SegResize(h=150, w=500), SegRescale(scale_factor=0.37), SegRescale(long_size=512), SegRandomRescale(scales=(0.125, 1.5))]
+        for transform in resize_transforms:
+            pil_out, array_out = self._apply_to_pil_and_array_samples(transform, size)
+            self.assertEqual(pil_out["image"].size, (array_out["image"].shape[1], array_out["image"].shape[0]))
+            self.assertTrue(np.array_equal(np.asarray(pil_out["mask"]), array_out["mask"]), transform)
+            self.assertLess(np.abs(np.asarray(pil_out["image"]).astype(np.float32) - array_out["image"]).mean(), 2.0, transform)
+
+        # Rotated masks only differ on a few pixels at the boundaries of the classes
+        pil_out, array_out = self._apply_to_pil_and_array_samples(SegRandomRotate(min_deg=-10, max_deg=10, fill_mask=19), size)
+        self.assertLess(np.mean(np.asarray(pil_out["mask"]) != array_out["mask"]), 0.01)
+        self.assertLess(np.abs(np.asarray(pil_out["image"]).astype(np.float32) - array_out["image"]).mean(), 2.0)
+
+    def test_array_mask_resize_matches_pil_nearest(self):
+        # Random masks, so that any pixel picked differently from PIL's nearest resampling is detected
+        rng = np.random.RandomState(0)
+        for size, out_size in [((8, 1), (6, 1)), ((300, 200), (500, 150)), ((2048, 1024), (1536, 768)), ((97, 61), (31, 203))]:
+            mask = rng.randint(0, 256, size=size[::-1]).astype(np.uint8)
+            sample = {"image": np.zeros(size[::-1] + (3,), dtype=np.uint8), "mask": mask}
+            out = SegResize(h=out_size[1], w=out_size[0])(sample)
+            self.assertTrue(np.array_equal(np.asarray(Image.fromarray(mask).resize(out_size, Image.NEAREST)), out["mask"]), (size, out_size))
+
+    def test_array_random_rescale_padding_random_crop(self):
+        transform = Compose(
+            [SegRandomRescale(scales=(0.1, 2.0)), SegPadShortToCropSize(crop_size=(256, 128)), SegCropImageAndMask(crop_size=(256, 128), mode="random")]
+        )
+        for seed in range(5):
+            random.seed(seed)
+            out = transform(self.create_array_sample((1024, 512)))
+            self.assertEqual((128, 256, 3), out["image"].shape)
+            self.assertEqual((128, 256), out["mask"].shape)
+            self.assertEqual(np.uint8, out["image"].dtype)
+            self.assertEqual(np.uint8, out["mask"].dtype)
+
 
 if __name__ == "__main__":
     unittest.main()
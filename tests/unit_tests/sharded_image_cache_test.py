@@ -0,0 +1,182 @@
+import pickle
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import numpy as np
+from torch.utils.data import ConcatDataset, DataLoader, Dataset
+
+from super_gradients.training.datasets.sharded_image_cache import ShardedImageCache
+from super_gradients.training.utils.callbacks import ImageCacheStatsCallback, PhaseContext
+from tests.unit_tests.detection_caching import DummyDetectionDataset
+
+
+def _random_image(index: int) -> np.ndarray:
+    random_state = np.random.RandomState(index)
+    height, width = 20 + index % 7, 30 + index % 5  # Images of different shapes
+    return random_state.randint(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+class _CachedImagesDataset(Dataset):
+    def __init__(self, sharded_image_cache: ShardedImageCache):
+        self.sharded_image_cache = sharded_image_cache
+
+    def __len__(self):
+        return self.sharded_image_cache.n_images
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        image = self.sharded_image_cache.get(index)
+        return image if image is not None else _random_image(index)
+
+
+class _ScalarsLogger:
+    def __init__(self):
+        self.scalars = {}
+
+    def add_scalar(self, tag: str, scalar_value: float, global_step=None):
+        self.scalars[tag] = scalar_value
+
+
+class TestShardedImageCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.temp_dir.name)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_images_are_stored_without_padding_in_several_shards(self):
+        for compression in (None, "png"):
+            cache = ShardedImageCache(
+                cache_dir=str(self.cache_dir / str(compression)), n_images=50, load_image_fn=_random_image, compression=compression, shard_size_mb=0.01
+            )
+            self.assertTrue(cache.is_complete)
+            self.assertGreater(len(list((self.cache_dir / str(compression)).glob("shard_*.index.npy"))), 1)
+            for index in range(50):
+                self.assertTrue(np.array_equal(cache.get(index), _random_image(index)))
+            self.assertEqual((cache.hits, cache.misses), (50, 0))
+
+    def test_jpeg_compression(self):
+        def _smooth_image(index: int) -> np.ndarray:
+            gradient = np.linspace(0, 255, 40 + index, dtype=np.float32)
+            return np.stack([np.tile(gradient, (32, 1))] * 3, axis=-1).astype(np.uint8)
+
+        cache = ShardedImageCache(cache_dir=str(self.cache_dir), n_images=10, load_image_fn=_smooth_image, compression="jpeg", jpeg_quality=95)
+        for index in range(10):
+            image = cache.get(index)
+            self.assertEqual(image.shape, _smooth_image(index).shape)
+            self.assertLess(np.abs(image.astype(np.float32) - _smooth_image(index)).mean(), 3)
+
+    def test_cache_is_reused(self):
+        ShardedImageCache(cache_dir=str(self.cache_dir), n_images=20, load_image_fn=_random_image)
+
+        def _fail(index: int) -> np.ndarray:
+            raise AssertionError("The cache should not be filled again")
+
+        cache = ShardedImageCache(cache_dir=str(self.cache_dir), n_images=20, load_image_fn=_fail)
+        self.assertTrue(np.array_equal(cache.get(3), _random_image(3)))
+
+    def test_background_fill_reports_misses_until_filled(self):
+        can_load = threading.Event()
+
+        def _blocking_load(index: int) -> np.ndarray:
+            can_load.wait()
+            return _random_image(index)
+
+        cache = ShardedImageCache(cache_dir=str(self.cache_dir), n_images=30, load_image_fn=_blocking_load, background_fill=True, refresh_interval_sec=0)
+        self.assertIsNone(cache.get(0))
+        self.assertEqual(cache.misses, 1)
+
+        can_load.set()
+        cache.wait_until_filled()
+        self.assertTrue(cache.is_complete)
+        self.assertTrue(np.array_equal(cache.get(0), _random_image(0)))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_fill_resumes_after_last_complete_shard(self):
+        ShardedImageCache(cache_dir=str(self.cache_dir), n_images=40, load_image_fn=_random_image, shard_size_mb=0.01)
+        index_paths = sorted(self.cache_dir.glob("shard_*.index.npy"))
+        last_shard_first_image = int(np.load(str(index_paths[-1]))["index"].min())
+        index_paths[-1].unlink()
+        (self.cache_dir / ShardedImageCache.METADATA_FILENAME).unlink()
+
+        loaded_indexes = []
+
+        def _tracking_load(index: int) -> np.ndarray:
+            loaded_indexes.append(index)
+            return _random_image(index)
+
+        cache = ShardedImageCache(cache_dir=str(self.cache_dir), n_images=40, load_image_fn=_tracking_load, shard_size_mb=0.01)
+        self.assertEqual(sorted(loaded_indexes), list(range(last_shard_first_image, 40)))
+        for index in range(40):
+            self.assertTrue(np.array_equal(cache.get(index), _random_image(index)))
+
+    def test_cache_can_be_pickled(self):
+        cache = ShardedImageCache(cache_dir=str(self.cache_dir), n_images=5, load_image_fn=_random_image)
+        cache.get(0)
+        unpickled_cache = pickle.loads(pickle.dumps(cache))
+        self.assertTrue(np.array_equal(unpickled_cache.get(4), _random_image(4)))
+
+    def test_stats_include_dataloader_workers(self):
+        cache = ShardedImageCache(cache_dir=str(self.cache_dir), n_images=20, load_image_fn=_random_image)
+        for multiprocessing_context in ("fork", "spawn"):
+            cache.reset_stats()
+            loader = DataLoader(
+                _CachedImagesDataset(cache), batch_size=None, num_workers=2, multiprocessing_context=multiprocessing_context, persistent_workers=True
+            )
+            for _ in range(2):
+                self.assertEqual(len(list(loader)), 20)
+            self.assertEqual(cache.get_stats(), {"hits": 40, "misses": 0, "hit_rate": 1.0, "cached_ratio": 1.0}, multiprocessing_context)
+
+        cache.get(0)
+        cache.reset_stats()
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+        cache.get(0)
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+    def test_image_cache_stats_callback(self):
+        can_load = threading.Event()
+
+        def _blocking_load(index: int) -> np.ndarray:
+            can_load.wait()
+            return _random_image(index)
+
+        filled_cache = ShardedImageCache(cache_dir=str(self.cache_dir / "filled"), n_images=10, load_image_fn=_random_image)
+        filling_cache = ShardedImageCache(cache_dir=str(self.cache_dir / "filling"), n_images=30, load_image_fn=_blocking_load, background_fill=True)
+        train_loader = DataLoader(ConcatDataset([_CachedImagesDataset(filled_cache), _CachedImagesDataset(filling_cache)]), batch_size=None)
+        self.assertEqual(len(ImageCacheStatsCallback.get_sharded_image_caches(train_loader)), 2)
+
+        sg_logger = _ScalarsLogger()
+        context = PhaseContext(epoch=0, train_loader=train_loader, sg_logger=sg_logger)
+        callback = ImageCacheStatsCallback()
+        filled_cache.get(0)  # Counted before the epoch starts, so not reported
+        for _ in range(2):
+            callback.on_train_loader_start(context)
+            list(train_loader)
+            callback.on_train_loader_end(context)
+            self.assertEqual(sg_logger.scalars["image_cache/train_hits"], 10)
+            self.assertEqual(sg_logger.scalars["image_cache/train_misses"], 30)
+            self.assertAlmostEqual(sg_logger.scalars["image_cache/train_hit_rate"], 0.25)
+            self.assertAlmostEqual(sg_logger.scalars["image_cache/train_cached_ratio"], 0.25)
+        can_load.set()
+        filling_cache.wait_until_filled()
+
+    def test_invalid_compression(self):
+        with self.assertRaises(ValueError):
+            ShardedImageCache(cache_dir=str(self.cache_dir), n_images=5, load_image_fn=_random_image, compression="webp")
+
+    def test_detection_dataset_sharded_cache(self):
+        padded_dataset = DummyDetectionDataset(input_dim=(64, 48), cache=True, cache_dir=str(self.cache_dir), data_dir="/home/")
+        sharded_dataset = DummyDetectionDataset(
+            input_dim=(64, 48), cache=True, cache_mode="sharded", cache_compression="png", cache_dir=str(self.cache_dir), data_dir="/home/"
+        )
+        self.assertIsNone(sharded_dataset.cached_imgs_padded)
+        self.assertEqual(1, len(list(self.cache_dir.glob("img_resized_cache_*_png"))))
+        for index in range(len(sharded_dataset)):
+            self.assertTrue(np.array_equal(padded_dataset.get_sample(index)["image"], sharded_dataset.get_sample(index)["image"]))
+        self.assertEqual(sharded_dataset.sharded_image_cache.hits, len(sharded_dataset))
+
+
+if __name__ == "__main__":
+    unittest.main()
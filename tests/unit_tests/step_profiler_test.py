@@ -0,0 +1,81 @@
+import time
+import unittest
+
+import numpy as np
+
+from super_gradients.training.utils.step_profiler import StepProfiler
+
+
+class _ScalarsLogger:
+    def __init__(self):
+        self.reports = []
+
+    def add_scalars(self, tag_scalar_dict: dict, global_step: int = None):
+        self.reports.append((global_step, tag_scalar_dict))
+
+
+class TestStepProfiler(unittest.TestCase):
+    def test_reports_every_n_steps(self):
+        sg_logger = _ScalarsLogger()
+        profiler = StepProfiler(sg_logger=sg_logger, report_every=10, buffer_size=20)
+        for step in range(35):
+            with profiler.phase("forward"):
+                pass
+            profiler.end_step(global_step=step)
+
+        self.assertEqual([global_step for global_step, _ in sg_logger.reports], [9, 19, 29])
+        self.assertEqual(set(sg_logger.reports[0][1].keys()), {"step_profiler/forward_p50_ms", "step_profiler/forward_p95_ms", "step_profiler/forward_p99_ms"})
+
+    def test_percentiles_over_ring_buffer(self):
+        profiler = StepProfiler(report_every=5, buffer_size=10)
+        for step in range(20):
+            # The first 10 steps are out of the ring buffer when the last report is made
+            profiler.start("data_wait")
+            profiler._host_start_ns["data_wait"] -= (step + 1) * 1_000_000
+            profiler.stop("data_wait")
+            profiler.end_step(global_step=step)
+
+        p50, p95, p99 = profiler.summary()["data_wait"]
+        durations = np.arange(11, 21)
+        self.assertAlmostEqual(p50, np.percentile(durations, 50), delta=0.5)
+        self.assertAlmostEqual(p99, np.percentile(durations, 99), delta=0.5)
+        self.assertLessEqual(p50, p95)
+        self.assertLessEqual(p95, p99)
+
+    def test_repeated_phase_is_summed_and_missing_phase_is_ignored(self):
+        profiler = StepProfiler(report_every=4, buffer_size=4)
+        for step in range(4):
+            for _ in range(3):
+                with profiler.phase("callbacks"):
+                    time.sleep(0.002)
+            if step % 2 == 0:
+                with profiler.phase("optimizer"):
+                    pass
+            profiler.end_step(global_step=step)
+
+        summary = profiler.summary()
+        self.assertGreaterEqual(summary["callbacks"][0], 6)
+        self.assertEqual(np.isnan(profiler._durations["optimizer"]).sum(), 2)
+        self.assertNotIn("ema", summary)
+
+    def test_disabled_profiler_does_nothing(self):
+        sg_logger = _ScalarsLogger()
+        profiler = StepProfiler(sg_logger=sg_logger, report_every=1, enabled=False)
+        for step in range(3):
+            profiler.start("data_wait")
+            profiler.stop("data_wait")
+            with profiler.phase("forward"):
+                pass
+            profiler.end_step(global_step=step)
+
+        self.assertEqual(sg_logger.reports, [])
+        self.assertEqual(profiler.summary(), {})
+        self.assertEqual(profiler.num_steps, 0)
+
+    def test_buffer_smaller_than_report_interval(self):
+        with self.assertRaises(ValueError):
+            StepProfiler(report_every=100, buffer_size=10)
+
+
+if __name__ == "__main__":
+    unittest.main()
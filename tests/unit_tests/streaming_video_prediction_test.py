@@ -0,0 +1,141 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import cv2
+import numpy as np
+import psutil
+import torch
+from torch import nn
+
+from super_gradients.training.pipelines.pipelines import ClassificationPipeline
+from super_gradients.training.processing.processing import ComposeProcessing, ImagePermute, Resize, StandardizeImage
+from super_gradients.training.utils.media.video import generate_video_frames, get_video_fps, load_video, save_mp4
+
+
+class _PeakRSSMonitor:
+    """Sample the resident memory of the process in a background thread, and keep the highest value."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.process = psutil.Process(os.getpid())
+        self.peak_rss = 0
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self.peak_rss = max(self.peak_rss, self.process.memory_info().rss)
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._stop_event.set()
+        self._thread.join()
+        self.peak_rss = max(self.peak_rss, self.process.memory_info().rss)
+
+
+class TestStreamingVideoPrediction(unittest.TestCase):
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.video_path = os.path.join(self.tmp_dir.name, "synthetic.mp4")
+        self.num_frames, self.height, self.width, self.fps = 300, 480, 640, 30
+        self._write_synthetic_video(self.video_path)
+
+        model = nn.Sequential(nn.Conv2d(3, 8, 3, stride=2), nn.ReLU(), nn.AdaptiveAvgPool2d(1), nn.Flatten(), nn.Linear(8, 5))
+        self.pipeline = ClassificationPipeline(
+            model=model,
+            class_names=[f"class_{i}" for i in range(5)],
+            image_processor=ComposeProcessing([Resize(size=128), StandardizeImage(), ImagePermute()]),
+            fuse_model=False,
+        )
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _write_synthetic_video(self, video_path: str) -> None:
+        video_writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"mp4v"), self.fps, (self.width, self.height))
+        rng = np.random.RandomState(0)
+        for i in range(self.num_frames):
+            frame = np.full((self.height, self.width, 3), fill_value=(i * 7) % 256, dtype=np.uint8)
+            x, y = rng.randint(0, self.width - 100), rng.randint(0, self.height - 100)
+            frame[y : y + 100, x : x + 100] = rng.randint(0, 256, size=3, dtype=np.uint8)
+            video_writer.write(frame)
+        video_writer.release()
+
+    def test_generate_video_frames_equal_load_video(self):
+        frames, fps = load_video(self.video_path)
+        self.assertEqual(len(frames), self.num_frames)
+        self.assertAlmostEqual(get_video_fps(self.video_path), fps)
+        streamed_frames = list(generate_video_frames(self.video_path, read_ahead=4))
+        self.assertEqual(len(streamed_frames), len(frames))
+        for frame, streamed_frame in zip(frames, streamed_frames):
+            self.assertTrue(np.array_equal(frame, streamed_frame))
+
+        self.assertEqual(len(list(generate_video_frames(self.video_path, max_frames=10))), 10)
+
+    def test_early_stop(self):
+        num_threads = threading.active_count()
+        frame_predictions = self.pipeline.stream_video(self.video_path, batch_size=8, pipelined=True)
+        self.assertIsNotNone(next(frame_predictions))
+        frame_predictions.close()
+        self.assertEqual(threading.active_count(), num_threads)
+
+    def test_stream_video_equal_predictions(self):
+        frames, _ = load_video(self.video_path)
+        expected = list(self.pipeline._generate_prediction_result(frames, batch_size=16))
+        for pipelined in (False, True):
+            streamed = list(self.pipeline.stream_video(self.video_path, batch_size=16, pipelined=pipelined))
+            self.assertEqual(len(streamed), len(expected))
+            for expected_prediction, streamed_prediction in zip(expected, streamed):
+                self.assertTrue(np.array_equal(expected_prediction.image, streamed_prediction.image))
+                self.assertEqual(expected_prediction.prediction.label, streamed_prediction.prediction.label)
+                self.assertAlmostEqual(expected_prediction.prediction.confidence, streamed_prediction.prediction.confidence, places=5)
+
+    def test_predict_video_to_file(self):
+        output_path = os.path.join(self.tmp_dir.name, "prediction.mp4")
+        self.pipeline.predict_video_to_file(self.video_path, output_path, batch_size=16, show_confidence=False)
+        frames, fps = load_video(output_path)
+        self.assertEqual(len(frames), self.num_frames)
+        self.assertEqual(frames[0].shape[:2], (self.height, self.width))
+        self.assertAlmostEqual(fps, self.fps)
+
+    def test_save_mp4_from_generator(self):
+        output_path = os.path.join(self.tmp_dir.name, "generated.mp4")
+        save_mp4(output_path, (np.zeros((64, 48, 3), dtype=np.uint8) for _ in range(5)), fps=10)
+        self.assertEqual(len(load_video(output_path)[0]), 5)
+
+        with self.assertRaises(RuntimeError):
+            save_mp4(output_path, (np.zeros((64, 48 + i, 3), dtype=np.uint8) for i in range(5)), fps=10)
+        with self.assertRaises(ValueError):
+            save_mp4(output_path, iter([]), fps=10)
+
+    def test_streaming_memory_and_throughput(self):
+        """Peak RSS and frames/sec of predicting the video and writing the annotated frames to a file, without materializing the frames."""
+        output_path = os.path.join(self.tmp_dir.name, "prediction.mp4")
+        # Warm up, so that lazily allocated buffers (e.g. torch's thread pools) are not counted as streaming memory
+        self.pipeline.predict_video_to_file(self.video_path, output_path, batch_size=16)
+
+        all_frames_size = self.num_frames * self.height * self.width * 3
+        for pipelined in (False, True):
+            baseline_rss = psutil.Process(os.getpid()).memory_info().rss
+            start = time.perf_counter()
+            with _PeakRSSMonitor() as rss_monitor:
+                self.pipeline.predict_video_to_file(self.video_path, output_path, batch_size=16, pipelined=pipelined)
+            frames_per_sec = self.num_frames / (time.perf_counter() - start)
+            peak_rss_increase = rss_monitor.peak_rss - baseline_rss
+            print(
+                f"Streaming {self.num_frames} frames of {self.width}x{self.height} (pipelined={pipelined}): {frames_per_sec:.1f} frames/sec, "
+                f"peak RSS increase {peak_rss_increase / 2**20:.1f} MB (all the frames take {all_frames_size / 2**20:.1f} MB)"
+            )
+            self.assertLess(peak_rss_increase, all_frames_size / 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import torch
+from torch import nn
+
+from super_gradients.training.utils.weight_averaging_utils import ModelWeightAveraging
+
+
+def _reference_average(state_dicts):
+    """Average of the snapshots, computed from scratch."""
+    return {key: torch.stack([sd[key].double() for sd in state_dicts]).mean(0) for key in state_dicts[0]}
+
+
+class _Net(nn.Module):
+    def __init__(self, width: int = 8):
+        super().__init__()
+        self.conv = nn.Conv2d(3, width, 3)
+        self.bn = nn.BatchNorm2d(width)
+        self.fc = nn.Linear(width, 2)
+
+
+def _random_net(seed: int, width: int = 8) -> _Net:
+    torch.manual_seed(seed)
+    net = _Net(width)
+    net.bn.running_mean.normal_()
+    net.bn.num_batches_tracked.fill_(seed)
+    return net
+
+
+class TestModelWeightAveraging(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.ckpt_dir = self.temp_dir.name
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_average_of_best_snapshots(self):
+        averaging = ModelWeightAveraging(self.ckpt_dir, greater_is_better=True, metric_to_watch="Accuracy", number_of_models_to_average=3)
+        metrics = [0.1, 0.5, 0.3, 0.2, 0.6, 0.05, 0.4]
+        kept = {}
+        for epoch, metric in enumerate(metrics):
+            net = _random_net(epoch)
+            kept[epoch] = {k: v.clone() for k, v in net.state_dict().items()}
+            average_sd = averaging.get_average_model(net, validation_results_dict={"Accuracy": metric})
+
+            best_epochs = sorted(range(epoch + 1), key=lambda e: metrics[e])[-3:]
+            expected = _reference_average([kept[e] for e in best_epochs])
+            for key, value in average_sd.items():
+                self.assertEqual(value.dtype, kept[0][key].dtype)
+                self.assertTrue(torch.allclose(value.double(), expected[key].to(value.dtype).double(), atol=1e-6), key)
+
+        self.assertEqual(sorted(averaging.snapshots_metric.tolist()), [0.4, 0.5, 0.6])
+
+    def test_snapshots_are_copies(self):
+        averaging = ModelWeightAveraging(self.ckpt_dir, greater_is_better=False, metric_to_watch="Loss")
+        net = _random_net(0)
+        expected_weight = net.fc.weight.detach().clone()
+        averaging.get_average_model(net, validation_results_dict={"Loss": 1.0})
+        with torch.no_grad():
+            net.fc.weight.zero_()  # Training goes on
+        self.assertTrue(torch.allclose(averaging.get_average_model(net)["fc.weight"], expected_weight))
+
+    def test_only_replaced_snapshot_is_saved(self):
+        averaging = ModelWeightAveraging(self.ckpt_dir, greater_is_better=True, metric_to_watch="Accuracy", number_of_models_to_average=3)
+        for epoch, metric in enumerate([0.1, 0.2, 0.3]):
+            averaging.get_average_model(_random_net(epoch), validation_results_dict={"Accuracy": metric})
+
+        with patch("super_gradients.training.utils.weight_averaging_utils.torch.save", wraps=torch.save) as save_mock:
+            averaging.get_average_model(_random_net(3), validation_results_dict={"Accuracy": 0.4})
+            self.assertEqual(save_mock.call_count, 1)
+            averaging.get_average_model(_random_net(4), validation_results_dict={"Accuracy": 0.0})  # Not better than any snapshot
+            self.assertEqual(save_mock.call_count, 1)
+        self.assertEqual(sorted(os.listdir(averaging.averaging_snapshots_dir)), ["snapshot0.pth", "snapshot1.pth", "snapshot2.pth"])
+
+    def test_resume_from_snapshot_files(self):
+        averaging = ModelWeightAveraging(self.ckpt_dir, greater_is_better=True, metric_to_watch="Accuracy", number_of_models_to_average=3)
+        for epoch, metric in enumerate([0.1, 0.5, 0.3, 0.4]):
+            average_sd = averaging.get_average_model(_random_net(epoch), validation_results_dict={"Accuracy": metric})
+
+        resumed = ModelWeightAveraging(self.ckpt_dir, greater_is_better=True, metric_to_watch="Accuracy", load_checkpoint=True, number_of_models_to_average=3)
+        np.testing.assert_array_equal(resumed.snapshots_metric, averaging.snapshots_metric)
+        resumed_sd = resumed.get_average_model(_random_net(0))
+        for key, value in average_sd.items():
+            self.assertTrue(torch.allclose(value, resumed_sd[key]), key)
+
+        # Starting a new training removes the snapshots of the previous one
+        ModelWeightAveraging(self.ckpt_dir, greater_is_better=True, metric_to_watch="Accuracy", number_of_models_to_average=3)
+        self.assertEqual(os.listdir(averaging.averaging_snapshots_dir), [])
+
+    def test_resume_from_legacy_snapshots_file(self):
+        nets = [_random_net(0), _random_net(1)]
+        legacy_snapshots = {"snapshot" + str(i): None for i in range(3)}
+        legacy_snapshots["snapshot0"], legacy_snapshots["snapshot1"] = nets[0].state_dict(), nets[1].state_dict()
+        legacy_snapshots["snapshots_metric"] = torch.tensor([0.2, 0.4, -np.inf], dtype=torch.float64)
+        torch.save(legacy_snapshots, os.path.join(self.ckpt_dir, "averaging_snapshots.pkl"))
+
+        averaging = ModelWeightAveraging(self.ckpt_dir, greater_is_better=True, metric_to_watch="Accuracy", load_checkpoint=True, number_of_models_to_average=3)
+        self.assertFalse(os.path.exists(os.path.join(self.ckpt_dir, "averaging_snapshots.pkl")))
+        self.assertEqual(sorted(os.listdir(averaging.averaging_snapshots_dir)), ["snapshot0.pth", "snapshot1.pth"])
+        expected = _reference_average([net.state_dict() for net in nets])
+        self.assertTrue(torch.allclose(averaging.get_average_model(nets[0])["fc.weight"].double(), expected["fc.weight"]))
+
+    def test_update_benchmark(self):
+        # 10 snapshots of a ~64MB model
+        net = _random_net(0, width=4096)
+        with torch.no_grad():
+            net.conv = nn.Conv2d(4096, 4096, 1)
+        averaging = ModelWeightAveraging(self.ckpt_dir, greater_is_better=True, metric_to_watch="Accuracy")
+        for epoch in range(10):
+            averaging.get_average_model(net, validation_results_dict={"Accuracy": epoch})
+
+        start = time.perf_counter()
+        averaging.get_average_model(net, validation_results_dict={"Accuracy": 100})
+        incremental_time = time.perf_counter() - start
+
+        # Previous implementation: load, save and average all the snapshots at every epoch
+        legacy_file = os.path.join(self.ckpt_dir, "legacy_snapshots.pkl")
+        legacy_snapshots = {f"snapshot{i}": snapshot for i, snapshot in enumerate(averaging.snapshots)}
+        torch.save(legacy_snapshots, legacy_file)
+        start = time.perf_counter()
+        legacy_snapshots = torch.load(legacy_file)
+        torch.save(legacy_snapshots, legacy_file)
+        average_sd = dict(legacy_snapshots["snapshot0"])
+        for n_model in range(1, 10):
+            for key in average_sd:
+                average_sd[key] = torch.true_divide(average_sd[key] * n_model + legacy_snapshots[f"snapshot{n_model}"][key], n_model + 1)
+        full_time = time.perf_counter() - start
+        print(f"Weight averaging update of 10 x 64MB snapshots: full reload {full_time * 1000:.0f}ms, incremental {incremental_time * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import time
+import unittest
+
+import torch
+
+from super_gradients.training.losses import YoloXDetectionLoss
+
+
+def _random_predictions(batch_size: int, image_size: int, num_classes: int, seed: int):
+    generator = torch.Generator().manual_seed(seed)
+    return [torch.randn((batch_size, 1, image_size // stride, image_size // stride, 4 + 1 + num_classes), generator=generator) for stride in (8, 16, 32)]
+
+
+def _random_targets(batch_size: int, image_size: int, num_classes: int, max_targets: int, seed: int) -> torch.Tensor:
+    generator = torch.Generator().manual_seed(seed)
+    num_targets = torch.randint(0, max_targets + 1, (batch_size,), generator=generator)
+    num_targets[0] = 0  # At least one image without targets
+    image_ids = torch.repeat_interleave(torch.arange(batch_size), num_targets).float()
+    n = len(image_ids)
+    wh = torch.rand((n, 2), generator=generator) * image_size * 0.5 + 4
+    cxcy = torch.rand((n, 2), generator=generator) * image_size
+    classes = torch.randint(0, num_classes, (n,), generator=generator).float()
+    targets = torch.cat([image_ids[:, None], classes[:, None], cxcy, wh], dim=1)
+    return targets[torch.randperm(n, generator=generator)]
+
+
+class TestYoloXBatchedAssignment(unittest.TestCase):
+    def setUp(self) -> None:
+        self.num_classes = 10
+        self.image_size = 256
+
+    def _per_image_assignments(self, loss: YoloXDetectionLoss, predictions, targets):
+        x_shifts, y_shifts, expanded_strides, transformed_outputs, _ = loss.prepare_predictions(predictions)
+        assignments = []
+        for image_idx in range(transformed_outputs.shape[0]):
+            labels_im = targets[targets[:, 0] == image_idx]
+            if len(labels_im) == 0:
+                assignments.append(None)
+                continue
+            gt_matched_classes, fg_mask, pred_ious_this_matching, matched_gt_inds, _ = loss.get_assignments(
+                image_idx,
+                len(labels_im),
+                transformed_outputs.shape[1],
+                labels_im[:, 2:6].clone(),
+                labels_im[:, 1],
+                transformed_outputs[image_idx, :, :4],
+                expanded_strides,
+                x_shifts,
+                y_shifts,
+                transformed_outputs[:, :, 5:],
+                transformed_outputs[:, :, 4:5],
+            )
+            assignments.append((fg_mask, matched_gt_inds, pred_ious_this_matching, gt_matched_classes))
+        return assignments
+
+    def test_batched_assignments_are_identical_to_per_image_assignments(self):
+        loss = YoloXDetectionLoss(strides=[8, 16, 32], num_classes=self.num_classes)
+        for seed in range(5):
+            predictions = _random_predictions(6, self.image_size, self.num_classes, seed)
+            targets = _random_targets(6, self.image_size, self.num_classes, max_targets=15, seed=seed)
+            expected = self._per_image_assignments(loss, predictions, targets)
+
+            x_shifts, y_shifts, expanded_strides, transformed_outputs, _ = loss.prepare_predictions(predictions)
+            fg_mask, matched_gt_inds, pred_ious, gt_bboxes, gt_classes = loss.get_batched_assignments(
+                targets,
+                transformed_outputs[:, :, :4],
+                transformed_outputs[:, :, 5:],
+                transformed_outputs[:, :, 4:5],
+                expanded_strides,
+                x_shifts,
+                y_shifts,
+            )
+            for image_idx, expected_assignment in enumerate(expected):
+                if expected_assignment is None:
+                    self.assertFalse(fg_mask[image_idx].any())
+                    continue
+                expected_fg_mask, expected_gt_inds, expected_ious, expected_classes = expected_assignment
+                self.assertTrue(torch.equal(expected_fg_mask, fg_mask[image_idx]))
+                self.assertTrue(torch.equal(expected_gt_inds, matched_gt_inds[image_idx][expected_fg_mask]))
+                self.assertTrue(torch.equal(expected_ious, pred_ious[image_idx][expected_fg_mask]))
+                self.assertTrue(torch.equal(expected_classes, gt_classes[image_idx][matched_gt_inds[image_idx][expected_fg_mask]]))
+
+    def test_batched_loss_is_identical_to_per_image_loss(self):
+        for use_l1 in (False, True):
+            per_image_loss = YoloXDetectionLoss(strides=[8, 16, 32], num_classes=self.num_classes, use_l1=use_l1)
+            batched_loss = YoloXDetectionLoss(strides=[8, 16, 32], num_classes=self.num_classes, use_l1=use_l1, batched_assignment=True)
+            for seed in range(3):
+                predictions = _random_predictions(4, self.image_size, self.num_classes, seed)
+                targets = _random_targets(4, self.image_size, self.num_classes, max_targets=20, seed=seed)
+                expected_loss, expected_components = per_image_loss(predictions, targets)
+                actual_loss, actual_components = batched_loss(predictions, targets)
+                self.assertTrue(torch.allclose(expected_loss, actual_loss))
+                self.assertTrue(torch.allclose(expected_components, actual_components))
+
+    def test_batched_loss_without_targets(self):
+        per_image_loss = YoloXDetectionLoss(strides=[8, 16, 32], num_classes=self.num_classes, use_l1=True)
+        batched_loss = YoloXDetectionLoss(strides=[8, 16, 32], num_classes=self.num_classes, use_l1=True, batched_assignment=True)
+        predictions = [p.requires_grad_(True) for p in _random_predictions(2, self.image_size, self.num_classes, seed=0)]
+        expected_loss, expected_components = per_image_loss(predictions, torch.zeros((0, 6)))
+        actual_loss, actual_components = batched_loss(predictions, torch.zeros((0, 6)))
+        actual_loss.backward()
+        self.assertTrue(torch.allclose(expected_loss, actual_loss))
+        self.assertTrue(torch.allclose(expected_components, actual_components))
+
+    def test_batched_assignment_benchmark(self):
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        per_image_loss = YoloXDetectionLoss(strides=[8, 16, 32], num_classes=80)
+        batched_loss = YoloXDetectionLoss(strides=[8, 16, 32], num_classes=80, batched_assignment=True)
+        for batch_size in (4, 16):
+            for max_targets in (5, 50):
+                predictions = [p.to(device) for p in _random_predictions(batch_size, 320, 80, seed=0)]
+                targets = _random_targets(batch_size, 320, 80, max_targets=max_targets, seed=0).to(device)
+                timings = {}
+                for name, loss in (("per-image", per_image_loss), ("batched", batched_loss)):
+                    loss(predictions, targets)  # warmup
+                    start = time.perf_counter()
+                    for _ in range(3):
+                        loss(predictions, targets)
+                    if device == "cuda":
+                        torch.cuda.synchronize()
+                    timings[name] = (time.perf_counter() - start) / 3 * 1000
+                print(
+                    f"YoloX loss on {device}, batch size {batch_size}, {len(targets)} GTs: "
+                    + ", ".join(f"{name} {timing:.1f}ms" for name, timing in timings.items())
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()